@@ -1,11 +1,15 @@
 from flask import Flask
 from flask_cors import CORS
 
-from app import config
+from app import config, metrics
 from app.datastores import db
 from app.errors import blueprint as error_handler
 from app.events import api as events_api
+from app.events.cache import alert_state_cache
+from app.events.commands import commands as events_commands
+from app.events.group_commit import activity_event_group_committer
 from lib import logging
+from lib.json import UJSONProvider
 
 ALLOWED_ORIGINS = {
     "development": ["http://localhost:*"],
@@ -16,19 +20,32 @@ ALLOWED_ORIGINS = {
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object("app.config")
+    app.json = UJSONProvider(app)
 
     CORS(app, origins=ALLOWED_ORIGINS.get(config.SERVICE_ENV))  # type: ignore[arg-type]
 
     # Routes
     app.register_blueprint(blueprint=events_api.routes)
 
+    # Commands
+    app.cli.add_command(events_commands)
+
     # Error handling
     app.register_blueprint(blueprint=error_handler)
 
     # Initialise logging
     logging.init_app(app=app)
 
+    # Initialise metrics, exposed at `/metrics`
+    metrics.init_app(app=app)
+
     # Initialise database
     db.init_app(app=app)
 
+    # Initialise the alert state cache
+    alert_state_cache.init_app(app=app)
+
+    # Initialise the group committer of single events
+    activity_event_group_committer.init_app(app=app)
+
     return app
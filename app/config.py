@@ -3,6 +3,21 @@ from decouple import config
 FLASK_DEBUG = config("FLASK_DEBUG", cast=bool, default=False)
 LOGFMT = config("LOGFMT", "text")
 LOG_LEVEL = config("LOG_LEVEL", "info")
+# The maximum size in bytes of a request or response body logged with each request, above
+# which the body is truncated
+LOG_BODY_MAX_SIZE = config("LOG_BODY_MAX_SIZE", default=1_024, cast=int)
+# The fraction of successful requests which are logged, while every failed request is
+LOG_SAMPLE_RATE = config("LOG_SAMPLE_RATE", default=1.0, cast=float)
+# Whether records are rendered and written by a background thread, which they are handed
+# to over a queue of at most `LOG_QUEUE_SIZE` records. Records below ERROR are dropped
+# while the queue is full.
+LOG_ASYNC = config("LOG_ASYNC", default=False, cast=bool)
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", default=10_000, cast=int)
+
+# The directory each process writes its metrics to, which `GET /metrics` sums across
+# every process such as each gunicorn worker. When empty, only the metrics of the process
+# handling the request are exposed.
+METRICS_DIR = config("METRICS_DIR", default="")
 
 SERVICE_ENV = config("SERVICE_ENV")
 SQLALCHEMY_DATABASE_URI = config("DATABASE_URI")
@@ -33,3 +48,47 @@ SQLALCHEMY_TRACK_MODIFICATIONS = config(
     default=False,
     cast=bool,
 )
+# The duration in seconds at or above which a statement is logged, along with the call
+# site which executed it
+SLOW_QUERY_THRESHOLD = config("SLOW_QUERY_THRESHOLD", default=0.1, cast=float)
+
+# The source of the state evaluated by the alert rules, one of `AlertStateBackendEnum`
+ALERT_STATE_BACKEND = config("ALERT_STATE_BACKEND", default="query")
+# Each cached user holds at most the most recent events and deposits evaluated and a
+# record for each second of the accumulative deposit time window, so the cache holds at
+# most this many times `ACCUMULATIVE_DEPOSIT_TIME_LIMIT + 1` deposit records
+ALERT_STATE_CACHE_MAX_USERS = config(
+    "ALERT_STATE_CACHE_MAX_USERS",
+    default=10_000,
+    cast=int,
+)
+ALERT_STATE_CACHE_TTL = config(
+    "ALERT_STATE_CACHE_TTL",
+    default=300,
+    cast=int,
+)
+
+# Whether events for the same user are evaluated one at a time across every thread and
+# process, so each is evaluated against the history including the events before it
+SERIALISE_USER_EVENTS = config("SERIALISE_USER_EVENTS", default=True, cast=bool)
+
+# The maximum number of events accepted by a single request to `POST /event/batch`
+EVENT_BATCH_MAX_SIZE = config("EVENT_BATCH_MAX_SIZE", default=1_000, cast=int)
+
+# The number of events evaluated and committed together by `POST /event/stream`
+EVENT_STREAM_BATCH_SIZE = config("EVENT_STREAM_BATCH_SIZE", default=500, cast=int)
+# The maximum size in bytes of a single line accepted by `POST /event/stream`
+EVENT_STREAM_MAX_LINE_SIZE = config(
+    "EVENT_STREAM_MAX_LINE_SIZE",
+    default=65_536,
+    cast=int,
+)
+
+# Whether events sent to `POST /event` by concurrent requests are committed together,
+# once `GROUP_COMMIT_MAX_SIZE` events are pending or `GROUP_COMMIT_INTERVAL` seconds after
+# the first, rather than each within its own transaction
+GROUP_COMMIT = config("GROUP_COMMIT", default=False, cast=bool)
+GROUP_COMMIT_MAX_SIZE = config("GROUP_COMMIT_MAX_SIZE", default=100, cast=int)
+GROUP_COMMIT_INTERVAL = config("GROUP_COMMIT_INTERVAL", default=0.005, cast=float)
+# The seconds a request waits for the group holding its event to be committed
+GROUP_COMMIT_TIMEOUT = config("GROUP_COMMIT_TIMEOUT", default=30.0, cast=float)
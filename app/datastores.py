@@ -1,26 +1,182 @@
-from typing import TypeVar
+import contextlib
+import inspect
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from flask import Flask
+import structlog
+from flask import Flask, Response, g, has_request_context
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy as _SQLAlchemy
 from flask_sqlalchemy.model import Model
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import (
     scoped_session,
 )
 
 from app import config
+from app.metrics import TimedQueuePool
+from lib import logging
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
 
 _BaseModelT = TypeVar("_BaseModelT", bound=Model)
 
+_PROJECT_ROOT: Path = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class StatementRecord:
+    """A statement executed against the database, and the frame which executed it."""
+
+    statement: str
+    duration: float
+    rowcount: int
+    call_site: str
+
+
+@dataclass
+class QueryStats:
+    """The number of statements executed by a request, and the time they took."""
+
+    count: int = 0
+    duration: float = 0.0
+
+
+def _find_call_site() -> str:
+    """
+    Finds the innermost frame within the project, outside of this module and of any
+    installed package, which executed the current statement.
+
+    Returns:
+        str: The file, line and function of the frame, such as
+            "app/events/queries.py:42 in get_recent_activity_events"
+    """
+    frame: FrameType | None = inspect.currentframe()
+    while frame is not None:
+        path: Path = Path(frame.f_code.co_filename)
+        if (
+            path.is_relative_to(_PROJECT_ROOT)
+            and path != Path(__file__)
+            and "site-packages" not in path.parts
+        ):
+            return (
+                f"{path.relative_to(_PROJECT_ROOT)}:{frame.f_lineno} "
+                f"in {frame.f_code.co_name}"
+            )
+
+        frame = frame.f_back
+
+    return "unknown"
+
+
+def _start_query_stats() -> None:
+    g.query_stats = QueryStats()
+
+
+def _bind_query_stats(response: Response) -> Response:
+    if (query_stats := g.get("query_stats")) is not None:
+        logging.context(
+            query_count=query_stats.count, db_time=round(query_stats.duration, 6)
+        )
+
+    return response
+
+
+def _start_statement(
+    conn: Connection,
+    _cursor: Any,
+    _statement: str,
+    _parameters: Any,
+    _context: ExecutionContext | None,
+    _executemany: bool,
+) -> None:
+    conn.info["statement_started_at"] = time.perf_counter()
+
 
 class SQLAlchemy(_SQLAlchemy):
     session: scoped_session
 
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.slow_query_threshold: float | None = None
+        self._statement_recorders: list[list[StatementRecord]] = []
+
     def init_app(self, app: Flask) -> None:
         super().init_app(app)
         Migrate(app, self)
 
+        self.slow_query_threshold = app.config["SLOW_QUERY_THRESHOLD"]
+        with app.app_context():
+            for engine in self.engines.values():
+                event.listen(engine, "before_cursor_execute", _start_statement)
+                event.listen(engine, "after_cursor_execute", self._finish_statement)
+
+        app.before_request(_start_query_stats)
+        # After request functions are called in the reverse order they are registered, so
+        # the stats are bound before the request is logged by the function registered by
+        # `lib.logging` beforehand
+        app.after_request(_bind_query_stats)
+
+    @contextlib.contextmanager
+    def record_statements(self) -> Iterator[list[StatementRecord]]:
+        """Records every statement executed within the block, by any thread."""
+        statements: list[StatementRecord] = []
+        self._statement_recorders.append(statements)
+
+        try:
+            yield statements
+        finally:
+            self._statement_recorders.remove(statements)
+
+    def _finish_statement(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        _parameters: Any,
+        _context: ExecutionContext | None,
+        _executemany: bool,
+    ) -> None:
+        duration: float = time.perf_counter() - conn.info.pop("statement_started_at")
+
+        if has_request_context() and (query_stats := g.get("query_stats")) is not None:
+            query_stats.count += 1
+            query_stats.duration += duration
+
+        is_slow: bool = (
+            self.slow_query_threshold is not None
+            and duration >= self.slow_query_threshold
+        )
+        # The call site is only found for the statements which are logged or recorded
+        if not is_slow and not self._statement_recorders:
+            return
+
+        record = StatementRecord(
+            statement=statement,
+            duration=duration,
+            rowcount=cursor.rowcount,
+            call_site=_find_call_site(),
+        )
+        if is_slow:
+            log.warning(
+                "slow statement",
+                statement=record.statement,
+                duration=round(record.duration, 6),
+                rowcount=record.rowcount,
+                call_site=record.call_site,
+            )
+
+        for statements in self._statement_recorders:
+            statements.append(record)
+
     def save(self, model: _BaseModelT) -> Model:
         try:
             self.session.add(model)
@@ -30,6 +186,13 @@ class SQLAlchemy(_SQLAlchemy):
             self.session.rollback()
             raise
 
+    def commit(self) -> None:
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
     def save_all(self, models: list[_BaseModelT]) -> list[_BaseModelT]:
         try:
             for model in models:
@@ -43,5 +206,5 @@ class SQLAlchemy(_SQLAlchemy):
 
 
 db: SQLAlchemy = SQLAlchemy(
-    engine_options=config.SQLALCHEMY_ENGINE_OPTIONS,
+    engine_options={**config.SQLALCHEMY_ENGINE_OPTIONS, "poolclass": TimedQueuePool},
 )
@@ -1,20 +1,44 @@
+import io
+import itertools
+import uuid
+from collections.abc import Iterator
 from dataclasses import asdict
 from http import HTTPStatus
-from typing import TYPE_CHECKING
+from typing import IO, TYPE_CHECKING, Any
 
 import structlog
-from flask import Blueprint, Response, jsonify, request
+import ujson
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
+from marshmallow.exceptions import ValidationError
 
-from app import db
-from app.events.controllers import check_alerts
-from app.events.models import ActivityEvent
+from app import config, db
+from app.events.controllers import (
+    queue_activity_event,
+    save_activity_event_and_check_alerts,
+    save_activity_events_and_check_alerts,
+)
+from app.events.group_commit import activity_event_group_committer
+from app.events.models import ActivityEvent, QueuedActivityEvent
+from app.events.queries import get_activity_event_alert, get_queued_activity_event
 from app.events.schemas import ActivityEventSchema, AlertResponseSchema
 from lib import logging
+from lib.schemas import compile_schema
 
 log: structlog.stdlib.BoundLogger = structlog.get_logger()
 
 if TYPE_CHECKING:
     from app.events.domains import ActivityEventDomain, AlertResponseDomain
+    from app.events.models import ActivityEventAlert
+    from lib.schemas import CompiledSchema
+
+NDJSON_MIMETYPE: str = "application/x-ndjson"
 
 routes: Blueprint = Blueprint(
     name="events",
@@ -31,12 +55,20 @@ def create_event() -> tuple[Response, HTTPStatus]:
 
     The event data is provided in the request body as JSON.
 
+    When the request includes a `Prefer: respond-async` header, the event is queued once
+    validated and evaluated by the `flask events process-queue` workers instead, and its
+    alerts can be retrieved from the URL within the `Location` header.
+
+    When `GROUP_COMMIT` is enabled, the event is committed together with the events of
+    concurrent requests, and the response is returned once they are committed.
+
     Args:
         None
 
     Returns:
         Response: A tuple containing:
             - JSON response with success message on successful creation (201)
+            - JSON response with the event ID once queued asynchronously (202)
             - JSON response with error message on failure (500)
 
     Raises:
@@ -48,7 +80,9 @@ def create_event() -> tuple[Response, HTTPStatus]:
 
     # Note: The source of the `t` which is mapped to event_received_at is not clear from the task description.
     # The assumption is that this is coming from a trusted source and is a Unix epoch timestamp.
-    activity_event_as_domain: ActivityEventDomain = ActivityEventSchema().load(payload)
+    activity_event_as_domain: ActivityEventDomain = compile_schema(
+        ActivityEventSchema
+    ).load(payload)
 
     if activity_event_as_domain.amount <= 0:
         return (
@@ -56,25 +90,321 @@ def create_event() -> tuple[Response, HTTPStatus]:
             HTTPStatus.BAD_REQUEST,
         )
 
+    if _is_respond_async_preferred():
+        event_id: uuid.UUID = queue_activity_event(
+            queued_activity_event=QueuedActivityEvent(
+                **asdict(activity_event_as_domain)
+            )
+        )
+
+        log.debug("event queued", event_id=event_id)
+
+        response: Response = jsonify({"id": str(event_id), "status": "queued"})
+        response.headers["Location"] = url_for(
+            "events.get_event_alerts", event_id=event_id
+        )
+        response.headers["Preference-Applied"] = "respond-async"
+
+        return response, HTTPStatus.ACCEPTED
+
     activity_event_as_model: ActivityEvent = ActivityEvent(
         **asdict(activity_event_as_domain)
     )
 
-    alert_response: AlertResponseDomain = check_alerts(
-        user_id=activity_event_as_model.user_id,
-        current_activity_event=activity_event_as_model,
-    )
-
-    log.debug("checking alerts", alert_errors=alert_response.alert_codes)
-
     # This API identifies alerts and persists events. In a real-world scenario, if there
     # were alerts, preventing the activity may be preferable to allowing it but for the
     # purposes of this task, we will allow the activity to proceed.
-    db.save(model=activity_event_as_model)
+    alert_response: AlertResponseDomain
+    if config.GROUP_COMMIT:
+        alert_response = activity_event_group_committer.save(
+            activity_event=activity_event_as_model
+        )
+    else:
+        alert_response = save_activity_event_and_check_alerts(
+            activity_event=activity_event_as_model,
+        )
+
+    log.debug("checking alerts", alert_errors=alert_response.alert_codes)
 
     log.debug("event created", event_id=activity_event_as_model.id)
 
     return (
-        jsonify(AlertResponseSchema().dump(alert_response)),
+        jsonify(compile_schema(AlertResponseSchema).dump(alert_response)),
+        HTTPStatus.CREATED,
+    )
+
+
+@routes.route("/<uuid:event_id>/alerts", methods=["GET"])
+def get_event_alerts(event_id: uuid.UUID) -> tuple[Response, HTTPStatus]:
+    """Retrieve the alerts of an activity event accepted asynchronously.
+
+    Args:
+        event_id: The ID returned when the event was queued
+
+    Returns:
+        Response: A tuple containing:
+            - JSON response with the alerts of the event once evaluated (200)
+            - JSON response with the event ID while the event is queued (202)
+            - JSON response with error message if the event is unknown (404)
+            - JSON response with the event ID if the event could not be evaluated (422)
+    """
+    activity_event_alert: ActivityEventAlert | None = get_activity_event_alert(
+        activity_event_id=event_id
+    )
+
+    if activity_event_alert is not None:
+        return (
+            jsonify(compile_schema(AlertResponseSchema).dump(activity_event_alert)),
+            HTTPStatus.OK,
+        )
+
+    queued_activity_event: QueuedActivityEvent | None = get_queued_activity_event(
+        activity_event_id=event_id
+    )
+
+    if (
+        queued_activity_event is not None
+        and queued_activity_event.failed_at is not None
+    ):
+        return (
+            jsonify({"id": str(event_id), "status": "failed"}),
+            HTTPStatus.UNPROCESSABLE_ENTITY,
+        )
+
+    if queued_activity_event is not None:
+        return (
+            jsonify({"id": str(event_id), "status": "queued"}),
+            HTTPStatus.ACCEPTED,
+        )
+
+    return jsonify({"error": "Event not found"}), HTTPStatus.NOT_FOUND
+
+
+@routes.route("/batch", methods=["POST"])
+def create_events() -> tuple[Response, HTTPStatus]:
+    """Create a batch of activity events.
+
+    This endpoint accepts POST requests to create many activity events in the system.
+
+    The events are provided in the request body as a JSON array, each in the same format
+    accepted by `POST /event`. The events are persisted within a single transaction, so
+    either every event is created or none are.
+
+    Args:
+        None
+
+    Returns:
+        Response: A tuple containing:
+            - JSON array of alert responses, in the order of the events, on successful creation (201)
+            - JSON response with error message if the batch is invalid (400)
+            - JSON response with error message on failure (500)
+
+    Raises:
+        422: If any event fails validation
+        500: If there is a database error while saving the events
+    """
+    payload: list = request.json or []
+
+    if len(payload) > config.EVENT_BATCH_MAX_SIZE:
+        return (
+            jsonify(
+                {
+                    "error": f"Batch must contain at most {config.EVENT_BATCH_MAX_SIZE} events"
+                }
+            ),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    activity_events_as_domain: list[ActivityEventDomain] = compile_schema(
+        ActivityEventSchema
+    ).load(payload, many=True)
+
+    for index, activity_event_as_domain in enumerate(activity_events_as_domain):
+        if activity_event_as_domain.amount <= 0:
+            return (
+                jsonify({"error": f"Amount of event {index} must be greater than 0"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+
+    alert_responses: list[AlertResponseDomain] = save_activity_events_and_check_alerts(
+        activity_events=[
+            ActivityEvent(**asdict(activity_event_as_domain))
+            for activity_event_as_domain in activity_events_as_domain
+        ],
+    )
+
+    log.debug("events created", count=len(alert_responses))
+
+    return (
+        jsonify(compile_schema(AlertResponseSchema).dump(alert_responses, many=True)),
         HTTPStatus.CREATED,
     )
+
+
+@routes.route("/stream", methods=["POST"])
+def create_events_stream() -> Response | tuple[Response, HTTPStatus]:
+    """Create a stream of activity events.
+
+    This endpoint accepts POST requests with an `application/x-ndjson` body, which may be
+    sent chunked, holding an event per line in the same format accepted by `POST /event`.
+
+    Lines are parsed and evaluated as they are read, in batches of
+    `EVENT_STREAM_BATCH_SIZE` each persisted within its own transaction, and a result for
+    each line is streamed back as NDJSON once its batch is committed. Memory use is
+    bounded by the batch size however large the body.
+
+    Args:
+        None
+
+    Returns:
+        Response: Either:
+            - NDJSON stream of a result per non-blank line, in order, each holding the
+              `line` number and either the alert response of the event or the `message`
+              and `code` of the error which rejected it (200)
+            - JSON response with error message if the body is not NDJSON (415)
+    """
+    if request.mimetype != NDJSON_MIMETYPE:
+        return (
+            jsonify({"error": f"Content-Type must be {NDJSON_MIMETYPE}"}),
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+        )
+
+    # The body is read line by line, which an unbuffered stream reads a byte at a time
+    stream: IO[bytes] = request.stream
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+
+    return Response(
+        stream_with_context(_stream_alert_responses(stream=stream)),
+        status=HTTPStatus.OK,
+        mimetype=NDJSON_MIMETYPE,
+    )
+
+
+def _is_respond_async_preferred() -> bool:
+    """Checks whether the `Prefer` header of the request includes `respond-async`."""
+    return any(
+        preference.split(";")[0].strip().lower() == "respond-async"
+        for preference in request.headers.get("Prefer", "").split(",")
+    )
+
+
+def _read_lines(stream: IO[bytes]) -> Iterator[tuple[int, bytes | None]]:
+    """Reads the non-blank lines of a stream along with their line numbers, where a line
+    exceeding `EVENT_STREAM_MAX_LINE_SIZE` is skipped and read as None.
+    """
+    max_line_size: int = config.EVENT_STREAM_MAX_LINE_SIZE
+
+    for line_number in itertools.count(start=1):
+        line: bytes = stream.readline(max_line_size + 1)
+
+        if not line:
+            return
+
+        if len(line) > max_line_size and not line.endswith(b"\n"):
+            while (rest := stream.readline(max_line_size)) and not rest.endswith(b"\n"):
+                pass
+
+            yield line_number, None
+        elif line.strip():
+            yield line_number, line
+
+
+def _load_lines(
+    lines: Iterator[tuple[int, bytes | None]],
+) -> Iterator[tuple[int, ActivityEvent | dict[str, Any]]]:
+    """Loads each line into an activity event, or the error which rejected it."""
+    schema: CompiledSchema[ActivityEventDomain] = compile_schema(ActivityEventSchema)
+
+    for line_number, line in lines:
+        if line is None:
+            yield (
+                line_number,
+                {
+                    "message": f"Line must be at most {config.EVENT_STREAM_MAX_LINE_SIZE} bytes",
+                    "code": HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                },
+            )
+            continue
+
+        try:
+            activity_event_as_domain: ActivityEventDomain = schema.load(
+                ujson.loads(line)
+            )
+        except ValidationError as e:
+            yield (
+                line_number,
+                {"message": e.messages, "code": HTTPStatus.UNPROCESSABLE_ENTITY},
+            )
+            continue
+        except ValueError:
+            yield (
+                line_number,
+                {"message": "Line must be valid JSON", "code": HTTPStatus.BAD_REQUEST},
+            )
+            continue
+
+        if activity_event_as_domain.amount <= 0:
+            yield (
+                line_number,
+                {
+                    "message": "Amount must be greater than 0",
+                    "code": HTTPStatus.BAD_REQUEST,
+                },
+            )
+            continue
+
+        yield line_number, ActivityEvent(**asdict(activity_event_as_domain))
+
+
+def _stream_alert_responses(stream: IO[bytes]) -> Iterator[bytes]:
+    """Evaluates the events of an NDJSON stream in batches, yielding a result per line."""
+    items: Iterator[tuple[int, ActivityEvent | dict[str, Any]]] = _load_lines(
+        _read_lines(stream=stream)
+    )
+    schema: CompiledSchema[AlertResponseDomain] = compile_schema(AlertResponseSchema)
+
+    while batch := list(itertools.islice(items, config.EVENT_STREAM_BATCH_SIZE)):
+        activity_events: list[ActivityEvent] = [
+            item for _, item in batch if isinstance(item, ActivityEvent)
+        ]
+
+        try:
+            alert_responses: Iterator[AlertResponseDomain] = iter(
+                save_activity_events_and_check_alerts(activity_events=activity_events)
+                if activity_events
+                else []
+            )
+        except Exception:
+            # The status has already been sent, so the failure is reported against each
+            # line of the batch and the stream ends, as later lines were not read
+            db.session.rollback()
+            log.exception("failed to create streamed events", count=len(batch))
+
+            for line_number, _ in batch:
+                yield _dump_line(
+                    {
+                        "line": line_number,
+                        "message": "Something went wrong",
+                        "code": HTTPStatus.INTERNAL_SERVER_ERROR,
+                    }
+                )
+            return
+
+        log.debug("events created", count=len(activity_events))
+
+        for line_number, item in batch:
+            yield _dump_line(
+                {
+                    "line": line_number,
+                    **(
+                        schema.dump(next(alert_responses))
+                        if isinstance(item, ActivityEvent)
+                        else item
+                    ),
+                }
+            )
+
+
+def _dump_line(data: dict[str, Any]) -> bytes:
+    return ujson.dumps(data).encode() + b"\n"
@@ -0,0 +1,325 @@
+import io
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.events.domains import AlertThresholdsDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.models import ActivityEvent
+from app.events.velocity import VELOCITY_ALERT_CODES, get_velocity_granularity
+
+if TYPE_CHECKING:
+    from lib.money import Cents
+
+# Each row of a binary COPY is a field count followed by the size and value of each field
+# in network byte order. Every column is fixed width and not null, so the rows can be
+# read directly into a structured array.
+_COPY_HEADER_SIZE: int = 19
+_COPY_TRAILER_SIZE: int = 2
+_COPY_ROW_DTYPE: np.dtype = np.dtype(
+    [
+        ("field_count", ">i2"),
+        ("id_size", ">i4"),
+        ("id", "V16"),
+        ("user_id_size", ">i4"),
+        ("user_id", ">i8"),
+        ("event_received_at_size", ">i4"),
+        ("event_received_at", ">i8"),
+        ("is_deposit_size", ">i4"),
+        ("is_deposit", "?"),
+        ("amount_size", ">i4"),
+        ("amount", ">i8"),
+    ]
+)
+
+
+@dataclass
+class ActivityEventArrays:
+    """
+    Activity events held as columns, sorted by `user_id` and then `event_received_at`.
+
+    Amounts are integers of cents, as they are within the online path.
+    """
+
+    id: npt.NDArray[np.void]
+    user_id: npt.NDArray[np.int64]
+    event_received_at: npt.NDArray[np.int64]
+    is_deposit: npt.NDArray[np.bool_]
+    amount: npt.NDArray[np.int64]
+
+    def __len__(self) -> int:
+        return len(self.user_id)
+
+
+@dataclass
+class AlertBacktestResult:
+    """The alerts raised for each event of an `ActivityEventArrays`, by alert code."""
+
+    alerts: dict[AlertCodeEnum, npt.NDArray[np.bool_]] = field(default_factory=dict)
+
+    @property
+    def counts(self) -> dict[AlertCodeEnum, int]:
+        return {code: int(alerts.sum()) for code, alerts in self.alerts.items()}
+
+    def get_alert_codes(self, index: int) -> list[int]:
+        """Retrieves the codes of the alerts raised for the event at `index`."""
+        return [code.value for code, alerts in self.alerts.items() if alerts[index]]
+
+
+def load_activity_event_arrays() -> ActivityEventArrays:
+    """
+    Loads every activity event into columnar arrays with a single binary COPY.
+
+    Events of a user with the same `event_received_at` are ordered by `created_at`.
+    """
+    statement = select(
+        ActivityEvent.id,
+        ActivityEvent.user_id,
+        ActivityEvent.event_received_at,
+        ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+        ActivityEvent.amount,
+    ).order_by(
+        ActivityEvent.user_id,
+        ActivityEvent.event_received_at,
+        ActivityEvent.created_at,
+        ActivityEvent.id,
+    )
+    query: str = str(
+        statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+    buffer = io.BytesIO()
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+
+    rows = np.frombuffer(
+        buffer.getbuffer()[_COPY_HEADER_SIZE:-_COPY_TRAILER_SIZE],
+        dtype=_COPY_ROW_DTYPE,
+    )
+
+    return ActivityEventArrays(
+        id=rows["id"].copy(),
+        user_id=rows["user_id"].astype(np.int64),
+        event_received_at=rows["event_received_at"].astype(np.int64),
+        is_deposit=rows["is_deposit"].copy(),
+        amount=rows["amount"].astype(np.int64),
+    )
+
+
+def get_activity_event_id(arrays: ActivityEventArrays, index: int) -> uuid.UUID:
+    return uuid.UUID(bytes=arrays.id[index].tobytes())
+
+
+def backtest_alerts(
+    arrays: ActivityEventArrays,
+    thresholds: AlertThresholdsDomain | None = None,
+) -> AlertBacktestResult:
+    """
+    Evaluates the alert rules for every event at once, as if each user's events had been
+    received in order of `event_received_at`.
+
+    Each rule is computed with vectorised operations over the columns, producing the same
+    alerts as `check_alerts` with the accumulative deposit time window ending at the
+    dispatch time of each event.
+
+    Args:
+        arrays: The activity events to evaluate
+        thresholds: The thresholds to evaluate the rules with, by default the current ones
+
+    Returns:
+        AlertBacktestResult: The alerts raised for each event
+    """
+    thresholds = thresholds or AlertThresholdsDomain()
+
+    if len(arrays) == 0:
+        return AlertBacktestResult(
+            alerts={code: np.zeros(0, dtype=np.bool_) for code in AlertCodeEnum}
+        )
+
+    user_starts: npt.NDArray[np.bool_] = _get_group_starts(arrays.user_id)
+    is_withdraw: npt.NDArray[np.bool_] = ~arrays.is_deposit
+
+    # The deposit rules ignore withdraws, so they are evaluated over the deposits alone
+    deposits: npt.NDArray[np.intp] = np.flatnonzero(arrays.is_deposit)
+    deposit_user_id: npt.NDArray[np.int64] = arrays.user_id[deposits]
+    deposit_user_starts: npt.NDArray[np.bool_] = _get_group_starts(deposit_user_id)
+    deposit_event_received_at: npt.NDArray[np.int64] = arrays.event_received_at[
+        deposits
+    ]
+    deposit_amount: npt.NDArray[np.int64] = arrays.amount[deposits]
+
+    alerts: dict[AlertCodeEnum, npt.NDArray[np.bool_]] = {
+        AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE: is_withdraw
+        & (arrays.amount > thresholds.single_withdraw_amount_limit),
+    }
+
+    # The current withdraw and every previous event within the limit must be withdraws
+    historic_withdraw_limit: int = thresholds.consecutive_withdraw_transaction_limit - 1
+    alerts[AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE] = (
+        is_withdraw
+        & (_get_run_lengths(is_withdraw, user_starts) > historic_withdraw_limit)
+        if historic_withdraw_limit > 0
+        else np.zeros(len(arrays), dtype=np.bool_)
+    )
+
+    # Each previous deposit within the limit must be less than the deposit after it
+    historic_deposit_limit: int = thresholds.consecutive_deposit_transaction_limit - 1
+    is_increasing: npt.NDArray[np.bool_] = np.zeros(len(deposits), dtype=np.bool_)
+    is_increasing[1:] = deposit_amount[1:] > deposit_amount[:-1]
+    is_increasing &= ~deposit_user_starts
+    alerts[AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE] = _scatter(
+        (
+            _get_run_lengths(is_increasing, deposit_user_starts)
+            >= historic_deposit_limit
+            if historic_deposit_limit > 0
+            else np.zeros(len(deposits), dtype=np.bool_)
+        ),
+        indices=deposits,
+        size=len(arrays),
+    )
+
+    # The current deposit and the previous deposits within the time window must not
+    # exceed the limit
+    alerts[AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE] = _scatter(
+        _get_amounts_within_windows(
+            group_starts=deposit_user_starts,
+            values=deposit_event_received_at,
+            amounts=deposit_amount,
+            windows=thresholds.accumulative_deposit_time_limit,
+        )
+        > thresholds.accumulative_deposit_amount_limit,
+        indices=deposits,
+        size=len(arrays),
+    )
+
+    # The current event and the previous events of its type within each velocity window
+    # must not exceed its limit, where windows are aligned to the buckets they are
+    # counted with
+    for transaction_type, codes in VELOCITY_ALERT_CODES.items():
+        is_deposit: bool = transaction_type == ActivityEventTypeEnum.DEPOSIT
+        events: npt.NDArray[np.intp] = (
+            deposits if is_deposit else np.flatnonzero(is_withdraw)
+        )
+        event_user_starts: npt.NDArray[np.bool_] = _get_group_starts(
+            arrays.user_id[events]
+        )
+        event_received_at: npt.NDArray[np.int64] = arrays.event_received_at[events]
+        velocity_limits: dict[int, Cents] = (
+            thresholds.deposit_velocity_limits
+            if is_deposit
+            else thresholds.withdraw_velocity_limits
+        )
+        velocity_windows: dict[int, int] = (
+            thresholds.deposit_velocity_windows
+            if is_deposit
+            else thresholds.withdraw_velocity_windows
+        )
+
+        for registered_window, code in codes.items():
+            window: int = velocity_windows[registered_window]
+            granularity: int = get_velocity_granularity(window=window)
+
+            alerts[code] = _scatter(
+                _get_amounts_within_windows(
+                    group_starts=event_user_starts,
+                    values=event_received_at,
+                    amounts=arrays.amount[events],
+                    windows=event_received_at
+                    - (event_received_at - window) // granularity * granularity,
+                )
+                > velocity_limits[registered_window],
+                indices=events,
+                size=len(arrays),
+            )
+
+    return AlertBacktestResult(alerts=alerts)
+
+
+def _get_group_starts(groups: npt.NDArray[np.int64]) -> npt.NDArray[np.bool_]:
+    """Flags the first element of each run of equal, sorted, group keys."""
+    starts: npt.NDArray[np.bool_] = np.ones(len(groups), dtype=np.bool_)
+    starts[1:] = groups[1:] != groups[:-1]
+    return starts
+
+
+def _get_run_lengths(
+    flags: npt.NDArray[np.bool_], group_starts: npt.NDArray[np.bool_]
+) -> npt.NDArray[np.int64]:
+    """
+    Computes the length of the run of set flags ending at each element, where runs do not
+    continue across the start of a group.
+    """
+    counts: npt.NDArray[np.int64] = np.cumsum(flags, dtype=np.int64)
+
+    # Each run is counted from the last unset flag, or from the start of its group. The
+    # count at each of those positions never decreases, so a running maximum carries the
+    # count at the start of the current run forward.
+    run_starts: npt.NDArray[np.int64] = np.where(
+        ~flags, counts, np.where(group_starts, counts - 1, 0)
+    )
+
+    return counts - np.maximum.accumulate(run_starts)
+
+
+def _get_amounts_within_windows(
+    group_starts: npt.NDArray[np.bool_],
+    values: npt.NDArray[np.int64],
+    amounts: npt.NDArray[np.int64],
+    windows: int | npt.NDArray[np.int64],
+) -> npt.NDArray[np.int64]:
+    """
+    Sums, for each element, the amounts of the elements of the same group from the first
+    whose value is at least its own value less its window, up to and including itself.
+    """
+    window_starts: npt.NDArray[np.intp] = _get_window_starts(
+        group_starts=group_starts, values=values, window=windows
+    )
+
+    # Cumulative sums wrap on overflow, but the difference between two of them is
+    # exact whenever the sum within the window fits within an int64
+    cumulative_amount: npt.NDArray[np.int64] = np.zeros(
+        len(amounts) + 1, dtype=np.int64
+    )
+    np.cumsum(amounts, out=cumulative_amount[1:])
+
+    return cumulative_amount[1:] - cumulative_amount[window_starts]
+
+
+def _get_window_starts(
+    group_starts: npt.NDArray[np.bool_],
+    values: npt.NDArray[np.int64],
+    window: int | npt.NDArray[np.int64],
+) -> npt.NDArray[np.intp]:
+    """
+    Finds, for each element, the first element of the same group whose value is at
+    least its own value less its `window`, where values are sorted within each group.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    # Each group is offset beyond the range of the previous group, so a single search
+    # over the whole array never finds an element of another group.
+    group: npt.NDArray[np.int64] = np.cumsum(group_starts, dtype=np.int64) - 1
+    span: int = int(values.max() - values.min()) + max(int(np.max(window)), 0) + 1
+    if int(group[-1]) * span >= np.iinfo(np.int64).max // 2:
+        raise ValueError("Too many users to evaluate the time window in one pass")
+
+    keys: npt.NDArray[np.int64] = (values - values.min()) + group * span
+
+    return np.searchsorted(keys, keys - window, side="left")
+
+
+def _scatter(
+    values: npt.NDArray[np.bool_], indices: npt.NDArray[np.intp], size: int
+) -> npt.NDArray[np.bool_]:
+    scattered: npt.NDArray[np.bool_] = np.zeros(size, dtype=np.bool_)
+    scattered[indices] = values
+    return scattered
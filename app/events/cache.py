@@ -0,0 +1,385 @@
+import contextlib
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.events.constants import (
+    ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+    CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+    CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+)
+from app.events.domains import ActivityEventHistoryDomain, ActivityEventRecordDomain
+from app.events.enums import ActivityEventTypeEnum, AlertStateBackendEnum
+from app.events.models import ActivityEvent
+from app.events.queries import (
+    get_deposit_activity_window,
+    get_deposits_dispatched_since,
+    get_recent_activity_events,
+)
+
+_PENDING_ACTIVITY_EVENTS_KEY = "alert_state_cache_pending_activity_events"
+
+# The number of locks users are spread across by `AlertStateCache.lock_users`
+_USER_LOCK_COUNT: int = 1_024
+
+
+@dataclass
+class AlertStateCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+@dataclass
+class _UserAlertState:
+    recent_activity_events: deque[ActivityEventRecordDomain]
+    recent_deposit_events: deque[ActivityEventRecordDomain]
+    # The deposits dispatched within each second, summed into a single record so it
+    # holds at most one record per second of the window
+    deposits_within_window: deque[ActivityEventRecordDomain]
+    # Every deposit dispatched at or after this time is held within
+    # `deposits_within_window`
+    deposit_activity_window: int = 0
+    expires_at: float = 0
+
+
+class AlertStateCache:
+    """
+    An in-process cache, keyed by `user_id`, of the state evaluated by the alert rules.
+
+    Each user holds a ring buffer of their most recent events, a ring buffer of their most
+    recent deposits and the deposits within the accumulative deposit time window. Users
+    are loaded from the database on a miss and kept up to date by writing through every
+    committed `ActivityEvent`, so the rules of a cached user are evaluated without a query.
+
+    Deposits are summed per second and removed once they leave the window of the latest
+    event, so each user holds at most `window + 1` deposit records however many deposits
+    they make, and the cache holds at most `max_users * (window + 1)` of them. A user
+    whose deposits since the window of the event evaluated span more seconds than that,
+    such as for an event dispatched well before their latest, is retrieved from the
+    database without being cached. An event dispatched earlier than the window held is
+    a miss.
+
+    Users are evicted once they have not been accessed within the TTL, or in least
+    recently used order once the cache holds `max_users`.
+
+    Note: the cache is local to a process. It is only consistent when every event for a
+    user is handled by the same process, and so is only used when `ALERT_STATE_BACKEND`
+    is set to `cache`.
+    """
+
+    def __init__(
+        self,
+        max_users: int = 10_000,
+        ttl: int = 300,
+        lookback: int = CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT - 1,
+        deposit_lookback: int = CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT - 1,
+        window: int = ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+    ) -> None:
+        self.max_users: int = max_users
+        self.ttl: int = ttl
+        self.lookback: int = lookback
+        self.deposit_lookback: int = deposit_lookback
+        self.window: int = window
+        self.stats: AlertStateCacheStats = AlertStateCacheStats()
+
+        self._lock: threading.Lock = threading.Lock()
+        self._users: OrderedDict[int, _UserAlertState] = OrderedDict()
+        self._user_locks: tuple[threading.Lock, ...] = tuple(
+            threading.Lock() for _ in range(_USER_LOCK_COUNT)
+        )
+
+    def init_app(self, app: Flask) -> None:
+        self.max_users = app.config["ALERT_STATE_CACHE_MAX_USERS"]
+        self.ttl = app.config["ALERT_STATE_CACHE_TTL"]
+
+        if app.config["ALERT_STATE_BACKEND"] == AlertStateBackendEnum.CACHE:
+            self.register_write_through()
+
+    def register_write_through(self) -> None:
+        """Writes every committed `ActivityEvent` through to the cache."""
+        if not event.contains(Session, "after_commit", self._commit):
+            event.listen(Session, "after_flush", self._flush)
+            event.listen(Session, "after_commit", self._commit)
+            event.listen(Session, "after_soft_rollback", self._rollback)
+
+    def unregister_write_through(self) -> None:
+        if event.contains(Session, "after_commit", self._commit):
+            event.remove(Session, "after_flush", self._flush)
+            event.remove(Session, "after_commit", self._commit)
+            event.remove(Session, "after_soft_rollback", self._rollback)
+
+    @contextlib.contextmanager
+    def lock_users(self, user_ids: Iterable[int]) -> Iterator[None]:
+        """
+        Holds a lock on each user until the block exits, so the events of a user are
+        evaluated and written through to the cache one at a time.
+
+        A database lock is released by the commit, before the event is written through
+        to the cache, so the cache is serialised by an in-process lock instead. Users
+        share a fixed number of locks, which are acquired in order so concurrent blocks
+        cannot deadlock.
+
+        Args:
+            user_ids: IDs of the users to lock
+        """
+        with contextlib.ExitStack() as stack:
+            for index in sorted({user_id % _USER_LOCK_COUNT for user_id in user_ids}):
+                stack.enter_context(self._user_locks[index])
+
+            yield
+
+    def get_activity_event_history(
+        self, user_id: int, event_received_at: int
+    ) -> ActivityEventHistoryDomain:
+        """
+        Retrieves the history evaluated by the alert rules for a user, loading it from the
+        database when the user is not cached.
+
+        The history holds the deposits within the window of each later event too, so it
+        can be used to evaluate several events, see `move_deposit_window`.
+
+        Args:
+            user_id: ID of the user to retrieve the history for
+            event_received_at: The dispatch time of the current event, which the deposit
+                time window ends at
+
+        Returns:
+            ActivityEventHistoryDomain: The user's history prior to the current event
+        """
+        now: float = time.monotonic()
+        deposit_activity_window: int = get_deposit_activity_window(
+            event_received_at=event_received_at, window=self.window
+        )
+
+        with self._lock:
+            user_alert_state: _UserAlertState | None = self._users.get(user_id)
+
+            if (
+                user_alert_state is not None
+                and user_alert_state.expires_at > now
+                and user_alert_state.deposit_activity_window <= deposit_activity_window
+            ):
+                self.stats.hits += 1
+                user_alert_state.expires_at = now + self.ttl
+                self._users.move_to_end(user_id)
+                return self._to_history(
+                    user_alert_state, event_received_at=event_received_at
+                )
+
+            self.stats.misses += 1
+
+        user_alert_state = self._load(
+            user_id=user_id, deposit_activity_window=deposit_activity_window
+        )
+        user_alert_state.expires_at = now + self.ttl
+
+        # The deposits loaded exceed the bound of a cached user, so they are evaluated
+        # without being cached
+        if len(user_alert_state.deposits_within_window) > self.max_deposits:
+            return self._to_history(
+                user_alert_state, event_received_at=event_received_at
+            )
+
+        with self._lock:
+            self._users[user_id] = user_alert_state
+            self._users.move_to_end(user_id)
+            self._evict(now=now)
+
+            return self._to_history(
+                user_alert_state, event_received_at=event_received_at
+            )
+
+    def record(self, activity_event: ActivityEvent) -> None:
+        """
+        Appends a persisted activity event to the state of its user, if they are cached.
+
+        Events received out of order invalidate the user so that they are reloaded from
+        the database, which orders their history by dispatch time.
+
+        Args:
+            activity_event: The persisted activity event
+        """
+        with self._lock:
+            user_alert_state: _UserAlertState | None = self._users.get(
+                activity_event.user_id
+            )
+
+            if user_alert_state is None:
+                return
+
+            if (
+                user_alert_state.recent_activity_events
+                and activity_event.event_received_at
+                < user_alert_state.recent_activity_events[0].event_received_at
+            ):
+                del self._users[activity_event.user_id]
+                self.stats.size = len(self._users)
+                return
+
+            record = ActivityEventRecordDomain(
+                transaction_type=activity_event.transaction_type,
+                amount=activity_event.amount,
+                event_received_at=activity_event.event_received_at,
+            )
+
+            user_alert_state.recent_activity_events.appendleft(record)
+
+            if record.transaction_type == ActivityEventTypeEnum.DEPOSIT:
+                user_alert_state.recent_deposit_events.appendleft(record)
+                self._add_deposit(user_alert_state, record=record)
+
+    @property
+    def max_deposits(self) -> int:
+        """The most deposit records held for a user, one per second of the window."""
+        return self.window + 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+            self.stats.size = len(self._users)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self.stats = AlertStateCacheStats()
+
+    def _load(self, user_id: int, deposit_activity_window: int) -> _UserAlertState:
+        return _UserAlertState(
+            recent_activity_events=deque(
+                get_recent_activity_events(user_id=user_id, lookback=self.lookback),
+                maxlen=self.lookback,
+            ),
+            recent_deposit_events=deque(
+                get_recent_activity_events(
+                    user_id=user_id,
+                    lookback=self.deposit_lookback,
+                    transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                ),
+                maxlen=self.deposit_lookback,
+            ),
+            deposits_within_window=deque(
+                _sum_deposits_per_second(
+                    get_deposits_dispatched_since(
+                        user_id=user_id, event_received_at=deposit_activity_window
+                    )
+                )
+            ),
+            deposit_activity_window=deposit_activity_window,
+        )
+
+    def _add_deposit(
+        self, user_alert_state: _UserAlertState, record: ActivityEventRecordDomain
+    ) -> None:
+        # Events are recorded in order, so the deposit is the latest one held
+        deposits_within_window = user_alert_state.deposits_within_window
+        if (
+            deposits_within_window
+            and deposits_within_window[0].event_received_at == record.event_received_at
+        ):
+            deposits_within_window[0] = deposits_within_window[0]._replace(
+                amount=deposits_within_window[0].amount + record.amount
+            )
+        else:
+            deposits_within_window.appendleft(record)
+
+        self._move_deposit_window(
+            user_alert_state,
+            deposit_activity_window=get_deposit_activity_window(
+                event_received_at=record.event_received_at, window=self.window
+            ),
+        )
+
+    def _evict(self, now: float) -> None:
+        # Accessing a user moves them to the end and extends their expiry by the TTL, so
+        # users are ordered by both recency and expiry.
+        while self._users and next(iter(self._users.values())).expires_at <= now:
+            self._users.popitem(last=False)
+            self.stats.evictions += 1
+
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self.stats.evictions += 1
+
+        self.stats.size = len(self._users)
+
+    @staticmethod
+    def _move_deposit_window(
+        user_alert_state: _UserAlertState, deposit_activity_window: int
+    ) -> None:
+        # deposits are held newest first, so expired deposits are removed from the right
+        deposits_within_window = user_alert_state.deposits_within_window
+        while (
+            deposits_within_window
+            and deposits_within_window[-1].event_received_at < deposit_activity_window
+        ):
+            deposits_within_window.pop()
+        user_alert_state.deposit_activity_window = max(
+            user_alert_state.deposit_activity_window, deposit_activity_window
+        )
+
+    def _to_history(
+        self, user_alert_state: _UserAlertState, event_received_at: int
+    ) -> ActivityEventHistoryDomain:
+        self._move_deposit_window(
+            user_alert_state,
+            deposit_activity_window=get_deposit_activity_window(
+                event_received_at=event_received_at, window=self.window
+            ),
+        )
+        deposits_within_window = user_alert_state.deposits_within_window
+
+        return ActivityEventHistoryDomain(
+            recent_activity_events=list(user_alert_state.recent_activity_events),
+            recent_deposit_events=list(user_alert_state.recent_deposit_events),
+            amount_deposited_within_window=sum(
+                (
+                    deposit.amount
+                    for deposit in deposits_within_window
+                    if deposit.event_received_at <= event_received_at
+                ),
+                start=0,
+            ),
+            deposits_within_window=list(deposits_within_window),
+        )
+
+    @staticmethod
+    def _flush(session: Session, _flush_context: Any) -> None:
+        # The session still holds its pre-flush state, so new events can be collected
+        # here and written through to the cache once they have been committed.
+        session.info.setdefault(_PENDING_ACTIVITY_EVENTS_KEY, []).extend(
+            model for model in session.new if isinstance(model, ActivityEvent)
+        )
+
+    def _commit(self, session: Session) -> None:
+        for activity_event in session.info.pop(_PENDING_ACTIVITY_EVENTS_KEY, []):
+            self.record(activity_event=activity_event)
+
+    @staticmethod
+    def _rollback(session: Session, _previous_transaction: Any) -> None:
+        session.info.pop(_PENDING_ACTIVITY_EVENTS_KEY, None)
+
+
+def _sum_deposits_per_second(
+    deposits: Iterable[ActivityEventRecordDomain],
+) -> Iterator[ActivityEventRecordDomain]:
+    """Sums deposits ordered by dispatch time into a record for each second."""
+    for _, records in itertools.groupby(
+        deposits, key=lambda deposit: deposit.event_received_at
+    ):
+        first, *rest = records
+        yield first._replace(
+            amount=first.amount + sum((record.amount for record in rest), start=0)
+        )
+
+
+alert_state_cache: AlertStateCache = AlertStateCache()
@@ -0,0 +1,487 @@
+import signal
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import click
+import structlog
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.events.backtest import (
+    ActivityEventArrays,
+    AlertBacktestResult,
+    backtest_alerts,
+    load_activity_event_arrays,
+)
+from app.events.constants import DEPOSIT_VELOCITY_LIMITS, WITHDRAW_VELOCITY_LIMITS
+from app.events.domains import (
+    ActivityEventImportResultDomain,
+    AlertThresholdsDomain,
+)
+from app.events.enums import ActivityEventImportFormatEnum, ActivityEventTypeEnum
+from app.events.imports import import_activity_events
+from app.events.models import UserAlertState
+from app.events.partitions import (
+    ActivityEventPartitionDomain,
+    create_activity_event_partitions,
+    detach_activity_event_partitions,
+)
+from app.events.queries import (
+    get_activity_event_user_ids,
+    get_user_alert_state_user_ids,
+    rebuild_velocity_buckets,
+)
+from app.events.state import build_user_alert_state, compare_user_alert_state
+from app.events.velocity import VELOCITY_ALERT_CODES, get_velocity_granularity
+from app.events.workers import (
+    ActivityEventQueueWorkerPool,
+    drain_activity_event_queue,
+)
+from lib.money import Cents, format_cents, parse_cents
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+commands = AppGroup("events", help="Manage activity events.")
+
+
+@commands.command("backfill-alert-state")
+@click.option(
+    "--batch-size",
+    default=1_000,
+    show_default=True,
+    help="Number of users to commit per transaction.",
+)
+def backfill_alert_state(batch_size: int) -> None:
+    """Builds the alert state of every user from their existing activity events.
+
+    Must be run before `ALERT_STATE_BACKEND` is set to `table`, while events are not
+    being received, as existing states are overwritten.
+    """
+    user_ids: list[int] = get_activity_event_user_ids()
+
+    for index, user_id in enumerate(user_ids, start=1):
+        db.session.merge(build_user_alert_state(user_id=user_id))
+
+        if index % batch_size == 0:
+            db.commit()
+            log.info("Backfilled alert states", count=index, total=len(user_ids))
+
+    db.commit()
+
+    click.echo(f"Backfilled the alert state of {len(user_ids)} users.")
+
+
+@commands.command("backfill-velocity-buckets")
+@click.option(
+    "--batch-size",
+    default=1_000,
+    show_default=True,
+    help="Number of users to commit per transaction.",
+)
+def backfill_velocity_buckets(batch_size: int) -> None:
+    """Rebuilds the velocity buckets of every user from their existing activity events.
+
+    Must be run while events are not being received, as existing buckets are replaced.
+    """
+    user_ids: list[int] = get_activity_event_user_ids()
+
+    for index in range(0, len(user_ids), batch_size):
+        rebuild_velocity_buckets(user_ids=user_ids[index : index + batch_size])
+        db.commit()
+        log.info(
+            "Backfilled velocity buckets",
+            count=min(index + batch_size, len(user_ids)),
+            total=len(user_ids),
+        )
+
+    click.echo(f"Backfilled the velocity buckets of {len(user_ids)} users.")
+
+
+@commands.command("check-alert-state")
+def check_alert_state() -> None:
+    """Compares the alert state of every user with one built from their activity events.
+
+    Exits with a non-zero status if any state is missing or inconsistent.
+    """
+    user_ids: list[int] = sorted(
+        set(get_activity_event_user_ids()) | set(get_user_alert_state_user_ids())
+    )
+
+    inconsistent_user_ids: list[int] = []
+    for user_id in user_ids:
+        mismatches: list[str] = compare_user_alert_state(
+            user_alert_state=db.session.get(UserAlertState, user_id),
+            built_user_alert_state=build_user_alert_state(user_id=user_id),
+        )
+
+        if mismatches:
+            inconsistent_user_ids.append(user_id)
+            click.echo(f"User {user_id} is inconsistent: {', '.join(mismatches)}")
+
+    click.echo(
+        f"Checked the alert state of {len(user_ids)} users, "
+        f"{len(inconsistent_user_ids)} inconsistent."
+    )
+
+    if inconsistent_user_ids:
+        raise SystemExit(1)
+
+
+class AmountParamType(click.ParamType):
+    """Parses an amount with at most two decimal places, such as "100.00", into cents."""
+
+    name = "amount"
+
+    def convert(
+        self, value: Any, param: click.Parameter | None, ctx: click.Context | None
+    ) -> Cents:
+        cents: Cents | None = parse_cents(str(value))
+        if cents is None:
+            self.fail(
+                f"{value!r} is not an amount with at most two decimal places.",
+                param,
+                ctx,
+            )
+
+        return cents
+
+
+def _validate_velocity_rules(
+    transaction_type: ActivityEventTypeEnum,
+) -> Callable[
+    [click.Context, click.Parameter, tuple[tuple[int, int], ...]], dict[int, int]
+]:
+    """Builds a callback keying the values of an option by the registered window of the
+    velocity rule each is for, which must be a rule of `transaction_type`."""
+
+    def callback(
+        _ctx: click.Context,
+        param: click.Parameter,
+        value: tuple[tuple[int, int], ...],
+    ) -> dict[int, int]:
+        for registered_window, _ in value:
+            if registered_window not in VELOCITY_ALERT_CODES[transaction_type]:
+                raise click.BadParameter(
+                    f"No {transaction_type} velocity rule has a window of "
+                    f"{registered_window} seconds.",
+                    param=param,
+                )
+
+        return dict(value)
+
+    return callback
+
+
+def _format_velocity_limits(velocity_limits: dict[int, Cents]) -> str:
+    return ", ".join(
+        f"{window} {format_cents(limit)}" for window, limit in velocity_limits.items()
+    )
+
+
+@commands.command("backtest")
+@click.option(
+    "--single-withdraw-amount-limit",
+    type=AmountParamType(),
+    default=format_cents(AlertThresholdsDomain.single_withdraw_amount_limit),
+    show_default=True,
+)
+@click.option(
+    "--consecutive-withdraw-transaction-limit",
+    type=int,
+    default=AlertThresholdsDomain.consecutive_withdraw_transaction_limit,
+    show_default=True,
+)
+@click.option(
+    "--consecutive-deposit-transaction-limit",
+    type=int,
+    default=AlertThresholdsDomain.consecutive_deposit_transaction_limit,
+    show_default=True,
+)
+@click.option(
+    "--accumulative-deposit-amount-limit",
+    type=AmountParamType(),
+    default=format_cents(AlertThresholdsDomain.accumulative_deposit_amount_limit),
+    show_default=True,
+)
+@click.option(
+    "--accumulative-deposit-time-limit",
+    type=int,
+    default=AlertThresholdsDomain.accumulative_deposit_time_limit,
+    show_default=True,
+    help="Seconds.",
+)
+@click.option(
+    "--deposit-velocity-limit",
+    "deposit_velocity_limits",
+    type=(int, AmountParamType()),
+    multiple=True,
+    callback=_validate_velocity_rules(ActivityEventTypeEnum.DEPOSIT),
+    metavar="WINDOW AMOUNT",
+    help="Limit of the deposit velocity rule registered with a window of WINDOW "
+    "seconds, which may be repeated.  [default: "
+    f"{_format_velocity_limits(DEPOSIT_VELOCITY_LIMITS)}]",
+)
+@click.option(
+    "--deposit-velocity-window",
+    "deposit_velocity_windows",
+    type=(int, click.IntRange(min=1)),
+    multiple=True,
+    callback=_validate_velocity_rules(ActivityEventTypeEnum.DEPOSIT),
+    metavar="WINDOW SECONDS",
+    help="Seconds summed by the deposit velocity rule registered with a window of "
+    "WINDOW seconds, which may be repeated.  [default: WINDOW]",
+)
+@click.option(
+    "--withdraw-velocity-limit",
+    "withdraw_velocity_limits",
+    type=(int, AmountParamType()),
+    multiple=True,
+    callback=_validate_velocity_rules(ActivityEventTypeEnum.WITHDRAW),
+    metavar="WINDOW AMOUNT",
+    help="Limit of the withdraw velocity rule registered with a window of WINDOW "
+    "seconds, which may be repeated.  [default: "
+    f"{_format_velocity_limits(WITHDRAW_VELOCITY_LIMITS)}]",
+)
+@click.option(
+    "--withdraw-velocity-window",
+    "withdraw_velocity_windows",
+    type=(int, click.IntRange(min=1)),
+    multiple=True,
+    callback=_validate_velocity_rules(ActivityEventTypeEnum.WITHDRAW),
+    metavar="WINDOW SECONDS",
+    help="Seconds summed by the withdraw velocity rule registered with a window of "
+    "WINDOW seconds, which may be repeated.  [default: WINDOW]",
+)
+def backtest(
+    single_withdraw_amount_limit: Cents,
+    consecutive_withdraw_transaction_limit: int,
+    consecutive_deposit_transaction_limit: int,
+    accumulative_deposit_amount_limit: Cents,
+    accumulative_deposit_time_limit: int,
+    deposit_velocity_limits: dict[int, Cents],
+    deposit_velocity_windows: dict[int, int],
+    withdraw_velocity_limits: dict[int, Cents],
+    withdraw_velocity_windows: dict[int, int],
+) -> None:
+    """Evaluates the alert rules over every existing activity event.
+
+    Each user's events are replayed in order of `event_received_at`, so the effect of
+    changing a threshold can be measured against the full history. Each velocity rule
+    is selected by the window it is registered with, such as
+    `--withdraw-velocity-limit 30 250.00` for the 30 second withdraw velocity rule.
+    """
+    thresholds: AlertThresholdsDomain = AlertThresholdsDomain(
+        single_withdraw_amount_limit=single_withdraw_amount_limit,
+        consecutive_withdraw_transaction_limit=consecutive_withdraw_transaction_limit,
+        consecutive_deposit_transaction_limit=consecutive_deposit_transaction_limit,
+        accumulative_deposit_amount_limit=accumulative_deposit_amount_limit,
+        accumulative_deposit_time_limit=accumulative_deposit_time_limit,
+    )
+    thresholds.deposit_velocity_limits.update(deposit_velocity_limits)
+    thresholds.deposit_velocity_windows.update(deposit_velocity_windows)
+    thresholds.withdraw_velocity_limits.update(withdraw_velocity_limits)
+    thresholds.withdraw_velocity_windows.update(withdraw_velocity_windows)
+
+    for window in (
+        *thresholds.deposit_velocity_windows.values(),
+        *thresholds.withdraw_velocity_windows.values(),
+    ):
+        try:
+            get_velocity_granularity(window=window)
+        except ValueError as error:
+            raise click.UsageError(str(error)) from error
+
+    arrays: ActivityEventArrays = load_activity_event_arrays()
+
+    started_at: float = time.perf_counter()
+    result: AlertBacktestResult = backtest_alerts(arrays=arrays, thresholds=thresholds)
+    duration: float = time.perf_counter() - started_at
+
+    for code, count in result.counts.items():
+        click.echo(f"{code.name} ({code.value}): {count}")
+
+    click.echo(
+        f"Backtested {len(arrays)} events in {duration:.3f}s"
+        + (f", {len(arrays) / duration:,.0f} events/s." if duration else ".")
+    )
+
+
+@commands.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(list(ActivityEventImportFormatEnum), case_sensitive=False),
+    default=None,
+    help="Format of the file.  [default: from its extension, otherwise ndjson]",
+)
+@click.option(
+    "--source",
+    default=None,
+    help="Name the progress of the import is recorded against.  [default: the "
+    "resolved path]",
+)
+@click.option(
+    "--chunk-size",
+    default=10_000,
+    show_default=True,
+    help="Number of events to validate and load per transaction.",
+)
+@click.option(
+    "--workers",
+    default=4,
+    show_default=True,
+    help="Number of chunks loaded in parallel.",
+)
+def import_events(
+    path: Path,
+    file_format: str | None,
+    source: str | None,
+    chunk_size: int,
+    workers: int,
+) -> None:
+    """Imports historical activity events from an NDJSON or CSV file.
+
+    Each event is in the format accepted by `POST /event`, and CSV files begin with a
+    header naming the fields. Events are validated and loaded with `COPY` in chunks,
+    without being evaluated. An interrupted import resumes from the chunks it did not
+    commit when run again with the same source and chunk size.
+
+    Must be followed by `backfill-alert-state` and `backfill-velocity-buckets`, while
+    events are not being received, so the imported events are included in the history
+    evaluated by the alert rules.
+    """
+    if file_format is None:
+        file_format = (
+            ActivityEventImportFormatEnum.CSV
+            if path.suffix.lower() == ".csv"
+            else ActivityEventImportFormatEnum.NDJSON
+        )
+
+    started_at: float = time.perf_counter()
+    with path.open(newline="", encoding="utf-8") as stream:
+        try:
+            result: ActivityEventImportResultDomain = import_activity_events(
+                app=current_app._get_current_object(),  # type: ignore[attr-defined]  # noqa: SLF001
+                stream=stream,
+                file_format=ActivityEventImportFormatEnum(file_format.lower()),
+                source=source or str(path.resolve()),
+                chunk_size=chunk_size,
+                workers=workers,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e)) from e
+    duration: float = time.perf_counter() - started_at
+
+    if result.resumed_chunk_count:
+        click.echo(f"Resumed after {result.resumed_chunk_count} imported chunks.")
+
+    click.echo(
+        f"Imported {result.imported_count} events in {duration:.3f}s"
+        + (f", {result.imported_count / duration:,.0f} events/s" if duration else "")
+        + f", {result.rejected_count} rejected."
+    )
+
+
+@commands.command("partitions")
+@click.option(
+    "--months-ahead",
+    default=3,
+    show_default=True,
+    help="Number of months after the current month to create partitions for.",
+)
+@click.option(
+    "--retain-months",
+    type=int,
+    default=None,
+    help="Detach the partitions of months before this many months preceding the "
+    "current month.  [default: none are detached]",
+)
+def partitions(months_ahead: int, retain_months: int | None) -> None:
+    """Creates the monthly partitions of `activity_event` ahead of time and detaches old
+    ones.
+
+    Must be run at least once a month, so events are never held by the default
+    partition. Detached partitions are kept as tables of their own, and their events are
+    no longer evaluated by the alert rules.
+    """
+    created: list[ActivityEventPartitionDomain] = create_activity_event_partitions(
+        months_ahead=months_ahead
+    )
+    detached: list[ActivityEventPartitionDomain] = (
+        detach_activity_event_partitions(retain_months=retain_months)
+        if retain_months is not None
+        else []
+    )
+    db.commit()
+
+    for partition in created:
+        click.echo(f"Created partition {partition.name}.")
+    for partition in detached:
+        click.echo(f"Detached partition {partition.name}.")
+
+    click.echo(f"Created {len(created)} and detached {len(detached)} partitions.")
+
+
+@commands.command("process-queue")
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    help="Number of workers.",
+)
+@click.option(
+    "--batch-size",
+    default=100,
+    show_default=True,
+    help="Number of events to evaluate per transaction.",
+)
+@click.option(
+    "--poll-interval",
+    default=0.5,
+    show_default=True,
+    help="Seconds to wait before polling an empty queue.",
+)
+@click.option(
+    "--drain",
+    is_flag=True,
+    help="Evaluate the events already queued and exit.",
+)
+def process_queue(
+    concurrency: int, batch_size: int, poll_interval: float, drain: bool
+) -> None:
+    """Evaluates the events accepted asynchronously by `POST /event`.
+
+    Runs a pool of workers until interrupted or terminated, each stopping once its
+    current batch is committed.
+    """
+    if drain:
+        count: int = drain_activity_event_queue(batch_size=batch_size)
+        click.echo(f"Processed {count} queued events.")
+        return
+
+    pool = ActivityEventQueueWorkerPool(
+        app=current_app._get_current_object(),  # type: ignore[attr-defined]  # noqa: SLF001
+        concurrency=concurrency,
+        batch_size=batch_size,
+        poll_interval=poll_interval,
+    )
+
+    def stop(_signum: int, _frame: object) -> None:
+        pool.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    pool.start()
+    log.info("processing queued events", concurrency=concurrency)
+
+    try:
+        while not pool.wait(timeout=1):
+            pass
+    except KeyboardInterrupt:
+        pool.stop()
+
+    pool.join()
+    log.info("stopped processing queued events")
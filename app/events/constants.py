@@ -1,7 +1,36 @@
-from decimal import Decimal
+from lib.money import Cents
 
-ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT: Decimal = Decimal("200.00")
+ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT: Cents = 200_00
 ACCUMULATIVE_DEPOSIT_TIME_LIMIT: int = 30
 CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT: int = 3
 CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT: int = 3
-SINGLE_WITHDRAW_AMOUNT_LIMIT: Decimal = Decimal("100.00")
+SINGLE_WITHDRAW_AMOUNT_LIMIT: Cents = 100_00
+
+# The number of times a queued event may fail to be evaluated before it is marked failed
+MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS: int = 3
+
+# The largest amount of an activity event, so that the sums of the amounts of a user
+# within the alert state and the velocity buckets remain within a BIGINT
+MAX_ACTIVITY_EVENT_AMOUNT: Cents = 1_000_000_000_00
+
+# The maximum total amount of deposits, and of withdraws, within each velocity window,
+# keyed by the number of seconds the window spans
+DEPOSIT_VELOCITY_LIMITS: dict[int, Cents] = {
+    300: 1000_00,
+    3_600: 2500_00,
+    86_400: 5000_00,
+}
+WITHDRAW_VELOCITY_LIMITS: dict[int, Cents] = {
+    30: 300_00,
+    300: 1000_00,
+    3_600: 2500_00,
+    86_400: 5000_00,
+}
+# The width in seconds of the buckets of each velocity ring, finest first, and the
+# number of buckets each ring holds
+VELOCITY_GRANULARITIES: tuple[int, ...] = (1, 60, 3_600)
+VELOCITY_RING_SIZE: int = 64
+
+# The partition of `activity_event` holding the events outside every monthly partition,
+# so an event is never rejected for its dispatch time
+ACTIVITY_EVENT_DEFAULT_PARTITION = "activity_event_default"
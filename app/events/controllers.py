@@ -1,68 +1,707 @@
-from decimal import Decimal
+import bisect
+import contextlib
+import functools
+import uuid
+from collections.abc import Iterator
 
+import structlog
+
+from app import config, db
+from app.events.cache import alert_state_cache
 from app.events.constants import (
     ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
+    ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
     CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
     CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+    DEPOSIT_VELOCITY_LIMITS,
+    MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS,
     SINGLE_WITHDRAW_AMOUNT_LIMIT,
+    WITHDRAW_VELOCITY_LIMITS,
+)
+from app.events.domains import (
+    ActivityEventFetchPlanDomain,
+    ActivityEventHistoryDomain,
+    ActivityEventRecordDomain,
+    AlertResponseDomain,
+    VelocityBucketDomain,
+)
+from app.events.enums import (
+    ActivityEventTypeEnum,
+    AlertCodeEnum,
+    AlertStateBackendEnum,
+)
+from app.events.models import (
+    ActivityEvent,
+    ActivityEventAlert,
+    QueuedActivityEvent,
+    UserAlertState,
 )
-from app.events.domains import AlertResponseDomain
-from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
-from app.events.models import ActivityEvent
 from app.events.queries import (
-    get_activity_events,
+    get_activity_event_histories,
+    get_activity_event_history,
     get_amount_deposited_within_window,
+    get_deposit_activity_window,
+    get_queued_activity_event_for_update,
+    get_queued_activity_events_for_update,
+    get_recent_activity_events,
+    lock_users,
+    record_queued_activity_event_failure,
+    save_activity_event_with_history,
+)
+from app.events.rules import AlertRule, AlertRuleRegistry
+from app.events.state import (
+    apply_activity_event_to_user_alert_state,
+    get_activity_event_history_from_user_alert_state,
+    get_or_build_user_alert_state_for_update,
+    is_in_order,
+    rebuild_user_alert_state,
+)
+from app.events.velocity import (
+    VELOCITY_ALERT_CODES,
+    VelocityCounter,
+    get_added_velocity_buckets,
+    get_velocity_counter,
+    save_activity_events_to_velocity_counters,
 )
+from lib.money import Cents
+from lib.utils import get_uuid
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+def save_activity_event_and_check_alerts(
+    activity_event: ActivityEvent,
+) -> AlertResponseDomain:
+    """
+    Persist an activity event and check it against the alert rules.
+
+    The history of the user is retrieved from the configured `ALERT_STATE_BACKEND`:
+    - `cache`: read from the in-process cache, which the event is written through to once saved
+    - `table`: read from the user's `UserAlertState`, which is updated within the same
+      transaction as the event is inserted
+    - `query`: retrieved within the same statement as the event is inserted
+
+    The velocity buckets of the user are retrieved within the same statement as the
+    event is inserted and added to them, other than by the `cache` backend which
+    retrieves them within their own statement.
+
+    Concurrent events for the same user are evaluated one at a time, see
+    `serialise_users`.
+
+    Args:
+        activity_event: The activity event being processed
+
+    Returns:
+        AlertResponseDomain: Alert response containing user_id, alert flag, and list of triggered alert codes
+    """
+    if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.TABLE:
+        return save_activity_event_and_check_alerts_with_user_alert_state(
+            activity_event=activity_event
+        )
+
+    with serialise_users(user_ids=[activity_event.user_id]):
+        if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.CACHE:
+            activity_event_history: ActivityEventHistoryDomain = (
+                alert_state_cache.get_activity_event_history(
+                    user_id=activity_event.user_id,
+                    event_received_at=activity_event.event_received_at,
+                )
+            )
+            activity_event_history.velocity_counter = (
+                save_activity_events_to_velocity_counters(
+                    activity_events=[activity_event]
+                )[activity_event.user_id]
+            )
+
+            alert_response: AlertResponseDomain = check_alerts(
+                user_id=activity_event.user_id,
+                current_activity_event=activity_event,
+                activity_event_history=activity_event_history,
+            )
+
+            db.save(model=activity_event)
+
+            return alert_response
+
+        activity_event_history = save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=alert_rules.get_fetch_plan(
+                transaction_type=activity_event.transaction_type
+            ),
+            velocity_buckets=get_added_velocity_buckets(
+                activity_events=[activity_event]
+            )[activity_event.user_id],
+        )
+
+        alert_response = check_alerts(
+            user_id=activity_event.user_id,
+            current_activity_event=activity_event,
+            activity_event_history=activity_event_history,
+        )
+
+        db.commit()
+
+        return alert_response
+
+
+@contextlib.contextmanager
+def serialise_users(user_ids: list[int]) -> Iterator[None]:
+    """
+    Serialises the evaluation of events for each user until the block exits, which must
+    be once the events are committed, while different users are evaluated in parallel.
+
+    The lock used depends on the configured `ALERT_STATE_BACKEND`:
+    - `cache`: an in-process lock, as the cache is local to a process
+    - `table`: none, as the `UserAlertState` of each user is locked for update
+    - `query`: an advisory lock on each user, released by the commit
+
+    Does nothing when `SERIALISE_USER_EVENTS` is disabled.
+
+    Args:
+        user_ids: IDs of the users whose events are evaluated within the block
+    """
+    if not config.SERIALISE_USER_EVENTS:
+        yield
+        return
+
+    if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.CACHE:
+        with alert_state_cache.lock_users(user_ids=user_ids):
+            yield
+        return
+
+    if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.QUERY:
+        lock_users(user_ids=user_ids)
+
+    yield
+
+
+def save_activity_event_and_check_alerts_with_user_alert_state(
+    activity_event: ActivityEvent,
+) -> AlertResponseDomain:
+    """
+    Persist an activity event, check it against the alert rules using the alert state of
+    its user and apply it to the state, within a single transaction.
+
+    The state is locked until the transaction is committed. An event dispatched before
+    the last event applied to the state is checked against the user's history instead,
+    after which the state is rebuilt from the history including the event.
+
+    Args:
+        activity_event: The activity event being processed
+
+    Returns:
+        AlertResponseDomain: Alert response containing user_id, alert flag, and list of triggered alert codes
+    """
+    user_alert_state: UserAlertState = get_or_build_user_alert_state_for_update(
+        user_id=activity_event.user_id
+    )
+    fetch_plan: ActivityEventFetchPlanDomain = alert_rules.get_fetch_plan(
+        transaction_type=activity_event.transaction_type
+    )
+    velocity_buckets: list[VelocityBucketDomain] = get_added_velocity_buckets(
+        activity_events=[activity_event]
+    )[activity_event.user_id]
+
+    if not is_in_order(
+        user_alert_state=user_alert_state, activity_event=activity_event
+    ):
+        activity_event_history: ActivityEventHistoryDomain = (
+            save_activity_event_with_history(
+                activity_event=activity_event,
+                fetch_plan=fetch_plan,
+                velocity_buckets=velocity_buckets,
+            )
+        )
+
+        alert_response: AlertResponseDomain = check_alerts(
+            user_id=activity_event.user_id,
+            current_activity_event=activity_event,
+            activity_event_history=activity_event_history,
+        )
+
+        rebuild_user_alert_state(user_alert_state=user_alert_state)
+        db.commit()
+
+        return alert_response
+
+    activity_event_history = get_activity_event_history_from_user_alert_state(
+        user_alert_state=user_alert_state,
+        event_received_at=activity_event.event_received_at,
+    )
+    # Only the velocity buckets are retrieved alongside the insert, as the rest of the
+    # history is held by the state
+    activity_event_history.velocity_buckets = save_activity_event_with_history(
+        activity_event=activity_event,
+        fetch_plan=ActivityEventFetchPlanDomain(
+            velocity_transaction_types=fetch_plan.velocity_transaction_types
+        ),
+        velocity_buckets=velocity_buckets,
+    ).velocity_buckets
+
+    alert_response = check_alerts(
+        user_id=activity_event.user_id,
+        current_activity_event=activity_event,
+        activity_event_history=activity_event_history,
+    )
+
+    apply_activity_event_to_user_alert_state(
+        user_alert_state=user_alert_state, activity_event=activity_event
+    )
+    db.commit()
+
+    return alert_response
+
+
+def save_activity_events_and_check_alerts(
+    activity_events: list[ActivityEvent],
+) -> list[AlertResponseDomain]:
+    """
+    Persist a batch of activity events and check each of them against the alert rules.
+
+    Every event is inserted within a single transaction, see
+    `add_activity_events_and_check_alerts`.
+
+    Args:
+        activity_events: The activity events being processed, in the order received
+
+    Returns:
+        list[AlertResponseDomain]: Alert responses in the same order as `activity_events`
+    """
+    with serialise_users(
+        user_ids=[activity_event.user_id for activity_event in activity_events]
+    ):
+        alert_responses: list[AlertResponseDomain] = (
+            add_activity_events_and_check_alerts(activity_events=activity_events)
+        )
+
+        db.commit()
+
+    return alert_responses
+
+
+def add_activity_events_and_check_alerts(
+    activity_events: list[ActivityEvent],
+) -> list[AlertResponseDomain]:
+    """
+    Add a batch of activity events to the session and check each of them against the
+    alert rules, without committing. The caller serialises the users of the events with
+    `serialise_users` until the batch is committed.
+
+    Events are grouped by user. The history and velocity counters of every user are
+    retrieved at once and each
+    event of a user is evaluated against it in the order received, with the deposit time
+    window moved to the event before it is evaluated and each event applied to the
+    history once evaluated, so the alerts match those of the events being received one
+    at a time.
+
+    Args:
+        activity_events: The activity events being processed, in the order received
+
+    Returns:
+        list[AlertResponseDomain]: Alert responses in the same order as `activity_events`
+    """
+    activity_events_by_user_id: dict[int, list[ActivityEvent]] = {}
+    for activity_event in activity_events:
+        activity_events_by_user_id.setdefault(activity_event.user_id, []).append(
+            activity_event
+        )
+
+    fetch_plan: ActivityEventFetchPlanDomain = alert_rules.get_fetch_plan()
+    alert_responses: dict[int, AlertResponseDomain] = {}
+    rebuilt_user_alert_states: dict[int, UserAlertState] = {}
+
+    # Users are processed in the order of their ID, so the alert states of users within
+    # concurrent batches are always locked in the same order.
+    user_ids: list[int] = sorted(activity_events_by_user_id)
+
+    user_alert_states: dict[int, UserAlertState] = {}
+    if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.TABLE:
+        user_alert_states = {
+            user_id: get_or_build_user_alert_state_for_update(user_id=user_id)
+            for user_id in user_ids
+        }
+
+    event_received_at_ranges: dict[int, tuple[int, int]] = {
+        user_id: (
+            min(
+                activity_event.event_received_at
+                for activity_event in activity_events_by_user_id[user_id]
+            ),
+            max(
+                activity_event.event_received_at
+                for activity_event in activity_events_by_user_id[user_id]
+            ),
+        )
+        for user_id in user_ids
+    }
+
+    activity_event_histories: dict[int, ActivityEventHistoryDomain]
+    if config.ALERT_STATE_BACKEND == AlertStateBackendEnum.CACHE:
+        activity_event_histories = {
+            user_id: alert_state_cache.get_activity_event_history(
+                user_id=user_id,
+                event_received_at=event_received_at_ranges[user_id][0],
+            )
+            for user_id in user_ids
+        }
+
+        velocity_counters: dict[int, VelocityCounter] = (
+            save_activity_events_to_velocity_counters(activity_events=activity_events)
+        )
+        for user_id in user_ids:
+            activity_event_histories[user_id].velocity_counter = velocity_counters[
+                user_id
+            ]
+    else:
+        activity_event_histories = get_activity_event_histories(
+            event_received_at_ranges=event_received_at_ranges,
+            fetch_plan=fetch_plan,
+            velocity_buckets=get_added_velocity_buckets(
+                activity_events=activity_events
+            ),
+        )
+
+    for user_id in user_ids:
+        user_alert_state: UserAlertState | None = user_alert_states.get(user_id)
+        activity_event_history: ActivityEventHistoryDomain = activity_event_histories[
+            user_id
+        ]
+
+        for activity_event in activity_events_by_user_id[user_id]:
+            move_deposit_window(
+                activity_event_history=activity_event_history,
+                event_received_at=activity_event.event_received_at,
+                fetch_plan=fetch_plan,
+            )
+
+            alert_responses[id(activity_event)] = check_alerts(
+                user_id=user_id,
+                current_activity_event=activity_event,
+                activity_event_history=activity_event_history,
+            )
+
+            apply_activity_event_to_history(
+                activity_event_history=activity_event_history,
+                activity_event=activity_event,
+                fetch_plan=fetch_plan,
+            )
+
+            if user_alert_state is None or user_id in rebuilt_user_alert_states:
+                continue
+
+            if is_in_order(
+                user_alert_state=user_alert_state, activity_event=activity_event
+            ):
+                apply_activity_event_to_user_alert_state(
+                    user_alert_state=user_alert_state, activity_event=activity_event
+                )
+            else:
+                rebuilt_user_alert_states[user_id] = user_alert_state
+
+    db.session.add_all(activity_events)
+
+    if rebuilt_user_alert_states:
+        db.session.flush()
+        for user_alert_state in rebuilt_user_alert_states.values():
+            rebuild_user_alert_state(user_alert_state=user_alert_state)
+
+    return [alert_responses[id(activity_event)] for activity_event in activity_events]
+
+
+def queue_activity_event(queued_activity_event: QueuedActivityEvent) -> uuid.UUID:
+    """
+    Persist an activity event to be evaluated asynchronously by
+    `process_queued_activity_events`.
+
+    Args:
+        queued_activity_event: The activity event being queued
+
+    Returns:
+        uuid.UUID: The ID the event is evaluated and persisted with
+    """
+    # The ID is assigned up front, so it is returned without reloading the event once
+    # it has been expired by the commit
+    activity_event_id: uuid.UUID = get_uuid()
+    queued_activity_event.id = activity_event_id
+
+    db.save(model=queued_activity_event)
+
+    return activity_event_id
+
+
+def process_queued_activity_events(batch_size: int) -> int:
+    """
+    Evaluate a batch of the events queued the longest against the alert rules.
+
+    Within a single transaction the events are moved from the queue to `activity_event`,
+    keeping their IDs, and their alerts are persisted to `activity_event_alert`. Queued
+    events are claimed with `SKIP LOCKED`, so any number of workers can process the queue
+    concurrently.
+
+    When the batch fails, each of its events is evaluated within a transaction of its
+    own, so a single event which cannot be evaluated does not hold back the rest. An
+    event failing by itself has the attempt counted, and once it has failed
+    `MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS` times it is marked failed and no longer claimed.
+
+    Args:
+        batch_size: The maximum number of events to evaluate
+
+    Returns:
+        int: The number of events claimed, 0 once the queue is empty
+    """
+    queued_activity_events: list[QueuedActivityEvent] = (
+        get_queued_activity_events_for_update(limit=batch_size)
+    )
+
+    if not queued_activity_events:
+        # Ends the transaction begun by the claim, so an idle worker holds no snapshot
+        db.commit()
+        return 0
+
+    activity_event_ids: list[uuid.UUID] = [
+        queued_activity_event.id for queued_activity_event in queued_activity_events
+    ]
+
+    try:
+        _evaluate_queued_activity_events(queued_activity_events=queued_activity_events)
+    except Exception:
+        db.session.rollback()
+
+        if len(activity_event_ids) == 1:
+            _record_queued_activity_event_failure(
+                activity_event_id=activity_event_ids[0]
+            )
+        else:
+            log.warning(
+                "failed to evaluate queued events, retrying each by itself",
+                count=len(activity_event_ids),
+                exc_info=True,
+            )
+            for activity_event_id in activity_event_ids:
+                _process_queued_activity_event(activity_event_id=activity_event_id)
+
+    return len(activity_event_ids)
+
+
+def _process_queued_activity_event(activity_event_id: uuid.UUID) -> None:
+    # The claim of the batch was released by its rollback, so the event is claimed again
+    queued_activity_event: QueuedActivityEvent | None = (
+        get_queued_activity_event_for_update(activity_event_id=activity_event_id)
+    )
+
+    if queued_activity_event is None:
+        db.commit()
+        return
+
+    try:
+        _evaluate_queued_activity_events(queued_activity_events=[queued_activity_event])
+    except Exception:
+        db.session.rollback()
+        _record_queued_activity_event_failure(activity_event_id=activity_event_id)
+
+
+def _record_queued_activity_event_failure(activity_event_id: uuid.UUID) -> None:
+    log.exception("failed to evaluate queued event", event_id=str(activity_event_id))
+    record_queued_activity_event_failure(
+        activity_event_id=activity_event_id,
+        max_attempts=MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS,
+    )
+    db.commit()
+
+
+def _evaluate_queued_activity_events(
+    queued_activity_events: list[QueuedActivityEvent],
+) -> None:
+    activity_events: list[ActivityEvent] = [
+        ActivityEvent(
+            id=queued_activity_event.id,
+            transaction_type=queued_activity_event.transaction_type,
+            amount=queued_activity_event.amount,
+            user_id=queued_activity_event.user_id,
+            event_received_at=queued_activity_event.event_received_at,
+        )
+        for queued_activity_event in queued_activity_events
+    ]
+
+    with serialise_users(
+        user_ids=[activity_event.user_id for activity_event in activity_events]
+    ):
+        alert_responses: list[AlertResponseDomain] = (
+            add_activity_events_and_check_alerts(activity_events=activity_events)
+        )
+
+        db.session.add_all(
+            [
+                ActivityEventAlert(
+                    activity_event_id=activity_event.id,
+                    user_id=alert_response.user_id,
+                    alert=alert_response.alert,
+                    alert_codes=sorted(alert_response.alert_codes),
+                )
+                for activity_event, alert_response in zip(
+                    activity_events, alert_responses, strict=True
+                )
+            ]
+        )
+
+        for queued_activity_event in queued_activity_events:
+            db.session.delete(queued_activity_event)
+
+        db.commit()
+
+
+def apply_activity_event_to_history(
+    activity_event_history: ActivityEventHistoryDomain,
+    activity_event: ActivityEvent,
+    fetch_plan: ActivityEventFetchPlanDomain,
+) -> None:
+    """
+    Applies an evaluated activity event to the history of its user, so the history can be
+    used to evaluate the next event of the user.
+
+    Args:
+        activity_event_history: The history of the user, updated in place
+        activity_event: The activity event which has been evaluated
+        fetch_plan: The plan the history was retrieved by, which bounds its size
+    """
+    record = ActivityEventRecordDomain(
+        transaction_type=activity_event.transaction_type,
+        amount=activity_event.amount,
+        event_received_at=activity_event.event_received_at,
+    )
+
+    _insert_record(
+        records=activity_event_history.recent_activity_events,
+        record=record,
+        lookback=fetch_plan.lookback,
+    )
+
+    if activity_event_history.velocity_counter is not None:
+        activity_event_history.velocity_counter.add(
+            transaction_type=activity_event.transaction_type,
+            event_received_at=activity_event.event_received_at,
+            amount=activity_event.amount,
+        )
+
+    if activity_event.transaction_type == ActivityEventTypeEnum.WITHDRAW:
+        if activity_event_history.consecutive_withdraw_count is not None:
+            activity_event_history.consecutive_withdraw_count += 1
+        return
+
+    if activity_event_history.consecutive_withdraw_count is not None:
+        activity_event_history.consecutive_withdraw_count = 0
+
+    _insert_record(
+        records=activity_event_history.recent_deposit_events,
+        record=record,
+        lookback=fetch_plan.deposit_lookback,
+    )
+
+    if activity_event_history.deposits_within_window is not None:
+        bisect.insort_left(
+            activity_event_history.deposits_within_window,
+            record,
+            key=lambda event: -event.event_received_at,
+        )
+
+
+def move_deposit_window(
+    activity_event_history: ActivityEventHistoryDomain,
+    event_received_at: int,
+    fetch_plan: ActivityEventFetchPlanDomain,
+) -> None:
+    """
+    Moves the deposit time window of a history to end at the dispatch time of the next
+    event to be evaluated against it, when the history holds the deposits within it.
+
+    Args:
+        activity_event_history: The history of the user, updated in place
+        event_received_at: The dispatch time of the next event of the user
+        fetch_plan: The plan the history was retrieved by, which sets the window
+    """
+    if (
+        fetch_plan.deposit_window is None
+        or activity_event_history.deposits_within_window is None
+    ):
+        return
+
+    deposit_activity_window: int = get_deposit_activity_window(
+        event_received_at=event_received_at, window=fetch_plan.deposit_window
+    )
+
+    activity_event_history.amount_deposited_within_window = sum(
+        (
+            deposit.amount
+            for deposit in activity_event_history.deposits_within_window
+            if deposit_activity_window <= deposit.event_received_at <= event_received_at
+        ),
+        start=0,
+    )
+
+
+def _insert_record(
+    records: list[ActivityEventRecordDomain],
+    record: ActivityEventRecordDomain,
+    lookback: int,
+) -> None:
+    # records are ordered by dispatch time in descending order, so a record received out
+    # of order is inserted at its position rather than at the front
+    bisect.insort_left(records, record, key=lambda event: -event.event_received_at)
+    del records[max(lookback, 0) :]
 
 
 def check_alerts(
     user_id: int,
     current_activity_event: ActivityEvent,
+    activity_event_history: ActivityEventHistoryDomain | None = None,
 ) -> AlertResponseDomain:
     """
-    Check user activity for potential alerts based on predefined limits and patterns.
+    Check user activity for potential alerts based on the rules within `alert_rules`.
 
     Alert codes are added when:
     - Single withdraw amount exceeds limit
     - Consecutive withdraws exceed limit
     - Consecutive deposits exceed limit
     - Accumulative deposits over time exceed limit
+    - Deposits or withdraws within a velocity window exceed its limit
 
     Args:
         user_id: The ID of the user to check alerts for
         current_activity_event: The current activity event being processed
+        activity_event_history: Optional prefetched history of the user, when omitted the
+            history required by the rules is retrieved by their compiled fetch plan,
+            including the velocity buckets of the user
 
     Returns:
         AlertResponseDomain: Alert response containing user_id, alert flag, and list of triggered alert codes
     """
-    alert_codes: set[int] = set()
-
-    if check_withdraw_limit(
-        activity_event=current_activity_event,
-        withdraw_limit=SINGLE_WITHDRAW_AMOUNT_LIMIT,
-    ):
-        alert_codes.add(int(AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value))
-
-    if check_consecutive_withdraws(
-        user_id=user_id,
-        current_activity_event=current_activity_event,
-        concecutive_limit=CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
-    ):
-        alert_codes.add(int(AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE.value))
-
-    if check_consecutive_deposits(
-        user_id=user_id,
-        current_activity_event=current_activity_event,
-        concecutive_limit=CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+    if activity_event_history is None:
+        activity_event_history = get_activity_event_history(
+            user_id=user_id,
+            fetch_plan=alert_rules.get_fetch_plan(
+                transaction_type=current_activity_event.transaction_type
+            ),
+            event_received_at=current_activity_event.event_received_at,
+        )
+
+    # The velocity rules share the counters built from the buckets retrieved alongside
+    # the history, which are then kept up to date by `apply_activity_event_to_history`
+    if (
+        activity_event_history.velocity_counter is None
+        and activity_event_history.velocity_buckets is not None
     ):
-        alert_codes.add(AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value)
-
-    if check_accumulative_deposits_over_time(
-        user_id=user_id,
-        current_activity_event=current_activity_event,
-        accumulative_limit=ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
-    ):
-        alert_codes.add(int(AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE.value))
+        activity_event_history.velocity_counter = VelocityCounter(
+            buckets=activity_event_history.velocity_buckets
+        )
+
+    alert_codes: set[int] = {
+        int(alert_code.value)
+        for alert_code in alert_rules.evaluate(
+            user_id=user_id,
+            current_activity_event=current_activity_event,
+            activity_event_history=activity_event_history,
+        )
+    }
 
     return AlertResponseDomain(
         user_id=user_id,
@@ -71,9 +710,7 @@ def check_alerts(
     )
 
 
-def check_withdraw_limit(
-    activity_event: ActivityEvent, withdraw_limit: Decimal
-) -> bool:
+def check_withdraw_limit(activity_event: ActivityEvent, withdraw_limit: Cents) -> bool:
     """
     Check if a withdrawal activity exceeds the specified limit.
 
@@ -94,6 +731,7 @@ def check_consecutive_withdraws(
     user_id: int,
     current_activity_event: ActivityEvent,
     concecutive_limit: int,
+    activity_event_history: ActivityEventHistoryDomain | None = None,
 ) -> bool:
     """
     Check if a user has made consecutive withdrawals.
@@ -101,31 +739,47 @@ def check_consecutive_withdraws(
     Args:
         current_activity_event: The current activity event being processed
         concecutive_limit: The number of consecutive withdrawals to check for
+        activity_event_history: Optional prefetched history of the user
 
     Returns:
         bool: True if user has made the specified number of consecutive withdraws, False otherwise
     """
     historic_concecutive_limit = concecutive_limit - 1
 
+    if current_activity_event.transaction_type != ActivityEventTypeEnum.WITHDRAW:
+        return False
+
+    if (
+        activity_event_history
+        and activity_event_history.consecutive_withdraw_count is not None
+    ):
+        return (
+            0
+            < historic_concecutive_limit
+            <= activity_event_history.consecutive_withdraw_count
+        )
+
     # Note: the requirements do not specify that for desposits can be ignored so they are included
     # if they should be excluded then adding `transaction_type=ActivityEventTypeEnum.WITHDRAW` to the query
     # would be sufficient for removing them.
-    withdraw_activity_events: list[ActivityEvent] = get_activity_events(
-        user_id=user_id,
+    withdraw_activity_events: list[ActivityEventRecordDomain] = (
+        activity_event_history.recent_activity_events[:historic_concecutive_limit]
+        if activity_event_history
+        else get_recent_activity_events(
+            user_id=user_id,
+            lookback=historic_concecutive_limit,
+        )
     )
 
     if not withdraw_activity_events:
         return False
 
-    if current_activity_event.transaction_type != ActivityEventTypeEnum.WITHDRAW:
-        return False
-
     if len(withdraw_activity_events) < historic_concecutive_limit:
         return False
 
     return all(
         event.transaction_type == ActivityEventTypeEnum.WITHDRAW
-        for event in withdraw_activity_events[:historic_concecutive_limit]
+        for event in withdraw_activity_events
     )
 
 
@@ -133,6 +787,7 @@ def check_consecutive_deposits(
     user_id: int,
     current_activity_event: ActivityEvent,
     concecutive_limit: int,
+    activity_event_history: ActivityEventHistoryDomain | None = None,
 ) -> bool:
     """
     Checks if a user has made a specified number of consecutive deposits
@@ -142,32 +797,37 @@ def check_consecutive_deposits(
         user_id: The ID of the user to check deposits for
         current_activity_event: The current activity event being processed
         concecutive_limit: The number of consecutive deposits to check for
+        activity_event_history: Optional prefetched history of the user
 
     Returns:
         bool: True if user has made the specified number of consecutive deposits, False otherwise
     """
     historic_concecutive_limit = concecutive_limit - 1
 
+    if current_activity_event.transaction_type != ActivityEventTypeEnum.DEPOSIT:
+        return False
+
     # Note: the requirements specify that for deposits, withdraws can be ignored and have been excluded
-    filtered_activity_event_history: list[ActivityEvent] = get_activity_events(
-        user_id=user_id,
-        transaction_type=ActivityEventTypeEnum.DEPOSIT,
-        order_by_descending=False,
+    filtered_activity_event_history: list[ActivityEventRecordDomain] = (
+        activity_event_history.recent_deposit_events[:historic_concecutive_limit]
+        if activity_event_history
+        else get_recent_activity_events(
+            user_id=user_id,
+            lookback=historic_concecutive_limit,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+        )
     )
 
     if not filtered_activity_event_history:
         return False
 
-    if current_activity_event.transaction_type != ActivityEventTypeEnum.DEPOSIT:
-        return False
-
     if len(filtered_activity_event_history) < historic_concecutive_limit:
         return False
 
-    # check if the deposit amounts are increasing
-    deposit_amounts: list[Decimal] = [
-        event.amount
-        for event in filtered_activity_event_history[:historic_concecutive_limit]
+    # check if the deposit amounts are increasing, the history is returned newest first
+    # so it is reversed to compare the deposits in the order they were received
+    deposit_amounts: list[Cents] = [
+        event.amount for event in reversed(filtered_activity_event_history)
     ] + [current_activity_event.amount]
 
     for i in range(len(deposit_amounts) - 1):
@@ -180,24 +840,153 @@ def check_consecutive_deposits(
 def check_accumulative_deposits_over_time(
     user_id: int,
     current_activity_event: ActivityEvent,
-    accumulative_limit: Decimal,
+    accumulative_limit: Cents,
+    activity_event_history: ActivityEventHistoryDomain | None = None,
 ) -> bool:
     """
-    Check if user's total deposits exceed the accumulative limit within a time window.
+    Check if user's total deposits exceed the accumulative limit within the time window
+    ending at the dispatch time of the current event.
 
     Args:
         user_id: The ID of the user to check deposits for
         current_activity_event: The current activity event being processed
         accumulative_limit: The maximum allowed total deposits
+        activity_event_history: Optional prefetched history of the user
 
     Returns:
         bool: True if total deposits exceed limit, False otherwise
     """
-    deposit_amount: int = get_amount_deposited_within_window(user_id=user_id)
-
     if current_activity_event.transaction_type != ActivityEventTypeEnum.DEPOSIT:
         return False
 
-    total_deposits: Decimal = deposit_amount + current_activity_event.amount
+    deposit_amount: Cents = (
+        activity_event_history.amount_deposited_within_window
+        if activity_event_history
+        else get_amount_deposited_within_window(
+            user_id=user_id,
+            event_received_at=current_activity_event.event_received_at,
+        )
+    )
+
+    total_deposits: Cents = deposit_amount + current_activity_event.amount
 
     return total_deposits > accumulative_limit
+
+
+def check_velocity(
+    user_id: int,
+    current_activity_event: ActivityEvent,
+    transaction_type: ActivityEventTypeEnum,
+    window: int,
+    velocity_limit: Cents,
+    activity_event_history: ActivityEventHistoryDomain | None = None,
+) -> bool:
+    """
+    Check if the user's total amount of a type of activity event exceeds the limit within
+    the velocity window ending at the dispatch time of the current event.
+
+    Args:
+        user_id: The ID of the user to check the events of
+        current_activity_event: The current activity event being processed
+        transaction_type: The type of activity event summed
+        window: The number of seconds the velocity window spans
+        velocity_limit: The maximum allowed total within the window
+        activity_event_history: Optional prefetched history of the user
+
+    Returns:
+        bool: True if the total within the window exceeds the limit, False otherwise
+    """
+    if current_activity_event.transaction_type != transaction_type:
+        return False
+
+    velocity_counter: VelocityCounter = (
+        activity_event_history.velocity_counter
+        if activity_event_history
+        and activity_event_history.velocity_counter is not None
+        else get_velocity_counter(
+            user_id=user_id,
+            event_received_at=current_activity_event.event_received_at,
+        )
+    )
+
+    total_amount: Cents = (
+        velocity_counter.get_total(
+            transaction_type=transaction_type,
+            event_received_at=current_activity_event.event_received_at,
+            window=window,
+        )
+        + current_activity_event.amount
+    )
+
+    return total_amount > velocity_limit
+
+
+def _check_withdraw_limit_rule(
+    user_id: int,  # noqa: ARG001
+    current_activity_event: ActivityEvent,
+    activity_event_history: ActivityEventHistoryDomain | None = None,  # noqa: ARG001
+) -> bool:
+    # The single withdraw limit only evaluates the current event
+    return check_withdraw_limit(
+        activity_event=current_activity_event,
+        withdraw_limit=SINGLE_WITHDRAW_AMOUNT_LIMIT,
+    )
+
+
+alert_rules: AlertRuleRegistry = AlertRuleRegistry(
+    rules=[
+        AlertRule(
+            code=AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            check=_check_withdraw_limit_rule,
+        ),
+        AlertRule(
+            code=AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            check=functools.partial(
+                check_consecutive_withdraws,
+                concecutive_limit=CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+            ),
+            lookback=CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT - 1,
+        ),
+        AlertRule(
+            code=AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            check=functools.partial(
+                check_consecutive_deposits,
+                concecutive_limit=CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+            ),
+            history_transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            lookback=CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT - 1,
+        ),
+        AlertRule(
+            code=AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            check=functools.partial(
+                check_accumulative_deposits_over_time,
+                accumulative_limit=ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
+            ),
+            history_transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            window=ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+        ),
+        *(
+            AlertRule(
+                code=code,
+                transaction_type=transaction_type,
+                check=functools.partial(
+                    check_velocity,
+                    transaction_type=transaction_type,
+                    window=window,
+                    velocity_limit=(
+                        DEPOSIT_VELOCITY_LIMITS
+                        if transaction_type == ActivityEventTypeEnum.DEPOSIT
+                        else WITHDRAW_VELOCITY_LIMITS
+                    )[window],
+                ),
+                velocity_window=window,
+            )
+            for transaction_type, codes in VELOCITY_ALERT_CODES.items()
+            for window, code in codes.items()
+        ),
+    ]
+)
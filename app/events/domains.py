@@ -1,17 +1,143 @@
-from dataclasses import dataclass
-from decimal import Decimal
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, NamedTuple
 
+from app.events.constants import (
+    ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
+    ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+    CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+    CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+    DEPOSIT_VELOCITY_LIMITS,
+    SINGLE_WITHDRAW_AMOUNT_LIMIT,
+    WITHDRAW_VELOCITY_LIMITS,
+)
 from app.events.enums import ActivityEventTypeEnum
+from lib.money import Cents
+
+if TYPE_CHECKING:
+    from app.events.velocity import VelocityCounter
 
 
 @dataclass
 class ActivityEventDomain:
     transaction_type: ActivityEventTypeEnum
-    amount: Decimal
+    amount: Cents
     user_id: int
     event_received_at: int
 
 
+class ActivityEventRecordDomain(NamedTuple):
+    """A lightweight, read-only view of a historic activity event containing only the
+    columns the alert rules evaluate.
+    """
+
+    transaction_type: ActivityEventTypeEnum
+    amount: Cents
+    event_received_at: int
+
+
+class VelocityBucketDomain(NamedTuple):
+    """The total amount of a type of activity event dispatched within the `granularity`
+    seconds from `bucket_start`, held within `slot` of the ring of its granularity.
+    """
+
+    transaction_type: ActivityEventTypeEnum
+    granularity: int
+    slot: int
+    bucket_start: int
+    amount: Cents
+
+
+class ActivityEventImportChunkDomain(NamedTuple):
+    """Consecutive records read by an import, each along with the line it was read from,
+    where a record which could not be parsed is None.
+    """
+
+    start_line: int
+    records: list[tuple[int, dict[str, Any] | None]]
+
+
+@dataclass
+class ActivityEventImportResultDomain:
+    imported_count: int = 0
+    rejected_count: int = 0
+    # The number of chunks committed by a previous run of the same import
+    resumed_chunk_count: int = 0
+
+
+@dataclass
+class ActivityEventHistoryDomain:
+    """The inputs required to evaluate the alert rules for a user, as they were before
+    the current activity event was received.
+    """
+
+    recent_activity_events: list[ActivityEventRecordDomain]
+    recent_deposit_events: list[ActivityEventRecordDomain]
+    amount_deposited_within_window: Cents
+    # The number of withdraws made since the user's last deposit, when maintained by the
+    # source of the history. Otherwise it is derived from `recent_activity_events`.
+    consecutive_withdraw_count: int | None = None
+    # The deposits `amount_deposited_within_window` is summed from, ordered by dispatch
+    # time in descending order, when the history is used to evaluate several events. The
+    # sum is then moved to the window of each event as it is evaluated.
+    deposits_within_window: list[ActivityEventRecordDomain] | None = None
+    # The velocity buckets of the user, when retrieved alongside the history by a fetch
+    # plan including them
+    velocity_buckets: list[VelocityBucketDomain] | None = None
+    # The velocity counters of the user, when retrieved alongside the history. Otherwise
+    # they are built from `velocity_buckets`, or retrieved for the velocity rules.
+    velocity_counter: "VelocityCounter | None" = None
+
+
+@dataclass(frozen=True)
+class ActivityEventFetchPlanDomain:
+    """The history to retrieve for a user so that every applicable alert rule can be
+    evaluated, compiled from the inputs declared by the rules.
+    """
+
+    # The number of most recent events, of any type, to retrieve
+    lookback: int = 0
+    # The number of most recent deposits to retrieve
+    deposit_lookback: int = 0
+    # The number of seconds over which deposits are summed, None if no sum is required
+    deposit_window: int | None = None
+    # The types of activity event whose velocity buckets are retrieved
+    velocity_transaction_types: tuple[ActivityEventTypeEnum, ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.lookback < 1
+            and self.deposit_lookback < 1
+            and self.deposit_window is None
+            and not self.velocity_transaction_types
+        )
+
+
+@dataclass(frozen=True)
+class AlertThresholdsDomain:
+    """The thresholds of the alert rules, by default those within `constants`."""
+
+    single_withdraw_amount_limit: Cents = SINGLE_WITHDRAW_AMOUNT_LIMIT
+    consecutive_withdraw_transaction_limit: int = CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT
+    consecutive_deposit_transaction_limit: int = CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT
+    accumulative_deposit_amount_limit: Cents = ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT
+    accumulative_deposit_time_limit: int = ACCUMULATIVE_DEPOSIT_TIME_LIMIT
+    deposit_velocity_limits: dict[int, Cents] = field(
+        default_factory=lambda: dict(DEPOSIT_VELOCITY_LIMITS)
+    )
+    withdraw_velocity_limits: dict[int, Cents] = field(
+        default_factory=lambda: dict(WITHDRAW_VELOCITY_LIMITS)
+    )
+    # The number of seconds each velocity rule sums over, keyed by the window it is
+    # registered with, by default the same window
+    deposit_velocity_windows: dict[int, int] = field(
+        default_factory=lambda: {window: window for window in DEPOSIT_VELOCITY_LIMITS}
+    )
+    withdraw_velocity_windows: dict[int, int] = field(
+        default_factory=lambda: {window: window for window in WITHDRAW_VELOCITY_LIMITS}
+    )
+
+
 @dataclass
 class AlertResponseDomain:
     alert: bool
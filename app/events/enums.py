@@ -1,16 +1,35 @@
-from enum import Enum, auto
+from enum import Enum, StrEnum
 
 
 class ActivityEventTypeEnum(Enum):
-    DEPOSIT = auto()
-    WITHDRAW = auto()
+    # The values are stored within `activity_event`, so they must never change
+    DEPOSIT = 1
+    WITHDRAW = 2
 
     def __str__(self) -> str:
         return self.name.lower()
 
 
+class AlertStateBackendEnum(StrEnum):
+    QUERY = "query"
+    CACHE = "cache"
+    TABLE = "table"
+
+
+class ActivityEventImportFormatEnum(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class AlertCodeEnum(Enum):
     ACCUMULATIVE_DEPOSIT_CODE = 123
     CONSECUTIVE_DEPOSIT_CODE = 300
     CONSECUTIVE_WITHDRAW_CODE = 30
     WITHDRAWN_LIMIT_EXCEEDED_CODE = 1100
+    DEPOSIT_VELOCITY_5_MINUTES_CODE = 1201
+    DEPOSIT_VELOCITY_1_HOUR_CODE = 1202
+    DEPOSIT_VELOCITY_24_HOURS_CODE = 1203
+    WITHDRAW_VELOCITY_30_SECONDS_CODE = 1301
+    WITHDRAW_VELOCITY_5_MINUTES_CODE = 1302
+    WITHDRAW_VELOCITY_1_HOUR_CODE = 1303
+    WITHDRAW_VELOCITY_24_HOURS_CODE = 1304
@@ -0,0 +1,271 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+import structlog
+from flask import Flask
+
+from app import db
+from app.events.controllers import (
+    add_activity_events_and_check_alerts,
+    save_activity_event_and_check_alerts,
+    serialise_users,
+)
+from app.events.domains import AlertResponseDomain
+from app.events.models import ActivityEvent
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+class _PendingActivityEvent(NamedTuple):
+    activity_event: ActivityEvent
+    alert_response: "Future[AlertResponseDomain]"
+
+
+class ActivityEventGroupCommitter:
+    """
+    Evaluates and persists the activity events of concurrent requests in groups, so each
+    group costs a single multi-row INSERT and a single COMMIT rather than one per event.
+
+    A group is flushed once it holds `max_size` events, or `interval` seconds after its
+    first event was submitted, by a single thread with its own application context. Each
+    request waits until the group holding its event is committed, so an event is never
+    acknowledged before it is durable. Events of a group are evaluated in the order they
+    were submitted, as by `add_activity_events_and_check_alerts`. When a group fails,
+    each of its events is committed by itself instead, so only the requests of the
+    events which fail by themselves fail.
+
+    Pending groups are flushed when the committer is stopped, which happens at exit once
+    started by `init_app`. Events submitted while it is not running, including once its
+    thread has exited unexpectedly, are saved by the request itself. Should the thread
+    exit unexpectedly, the requests still waiting on it fail rather than waiting
+    forever, as do requests whose group is not committed within `timeout` seconds.
+
+    Args:
+        max_size: The maximum number of events committed together
+        interval: The seconds a group waits for further events after its first
+        timeout: The seconds a request waits for its group to be committed
+    """
+
+    def __init__(
+        self, max_size: int = 100, interval: float = 0.005, timeout: float = 30
+    ) -> None:
+        self.max_size: int = max_size
+        self.interval: float = interval
+        self.timeout: float = timeout
+
+        self._app: Flask | None = None
+        self._queue: queue.SimpleQueue[_PendingActivityEvent | None] = (
+            queue.SimpleQueue()
+        )
+        self._lock: threading.Lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def init_app(self, app: Flask) -> None:
+        self._app = app
+        self.max_size = app.config["GROUP_COMMIT_MAX_SIZE"]
+        self.interval = app.config["GROUP_COMMIT_INTERVAL"]
+        self.timeout = app.config["GROUP_COMMIT_TIMEOUT"]
+
+        if app.config["GROUP_COMMIT"]:
+            self.start()
+            atexit.register(self.stop)
+
+    @property
+    def is_running(self) -> bool:
+        thread: threading.Thread | None = self._thread
+        return thread is not None and thread.is_alive()
+
+    def start(self, app: Flask | None = None) -> None:
+        self._app = app or self._app
+
+        if self._app is None:
+            raise RuntimeError("The group committer must be started with an app")
+
+        with self._lock:
+            if self.is_running:
+                return
+
+            self._thread = threading.Thread(
+                target=self._work, name="activity-event-group-committer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Flushes every pending group and stops the committer."""
+        with self._lock:
+            thread: threading.Thread | None = self._thread
+            if thread is None:
+                return
+
+            self._thread = None
+            # A thread which has exited would never take the sentinel, so it would stop
+            # the next thread started instead
+            if not thread.is_alive():
+                return
+
+            self._queue.put(None)
+
+        thread.join(timeout=timeout)
+
+    def save(self, activity_event: ActivityEvent) -> AlertResponseDomain:
+        """
+        Submits an activity event to the next group and waits until the group is
+        committed, or saves the event itself when the committer is not running.
+
+        The event is detached from the committer's session once committed, so its
+        attributes remain readable by the request.
+
+        Args:
+            activity_event: The activity event being processed
+
+        Returns:
+            AlertResponseDomain: Alert response containing user_id, alert flag, and list of triggered alert codes
+
+        Raises:
+            TimeoutError: If the group is not committed within `timeout` seconds
+        """
+        pending = _PendingActivityEvent(
+            activity_event=activity_event, alert_response=Future()
+        )
+
+        with self._lock:
+            is_running: bool = self.is_running
+            if is_running:
+                self._queue.put(pending)
+
+        if not is_running:
+            return save_activity_event_and_check_alerts(activity_event=activity_event)
+
+        return pending.alert_response.result(timeout=self.timeout)
+
+    def _work(self) -> None:
+        group: list[_PendingActivityEvent] = []
+
+        try:
+            assert self._app is not None
+
+            with self._app.app_context():
+                stopping: bool = False
+
+                while not stopping:
+                    group, stopping = self._take_group()
+
+                    if group:
+                        self._flush(group=group)
+        except Exception:
+            log.exception("group committer stopped unexpectedly")
+        finally:
+            self._fail_pending(group=group)
+
+    def _fail_pending(self, group: list[_PendingActivityEvent]) -> None:
+        """
+        Fails the requests still waiting on the committer once its thread exits, for any
+        reason, so none wait forever. Events submitted afterwards are saved by their
+        requests, as the thread is cleared within the lock they are submitted within.
+        """
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+
+            pending_events: list[_PendingActivityEvent] = list(group)
+            while True:
+                try:
+                    pending: _PendingActivityEvent | None = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if pending is not None:
+                    pending_events.append(pending)
+
+        for pending in pending_events:
+            if not pending.alert_response.done():
+                pending.alert_response.set_exception(
+                    RuntimeError("The group committer stopped before the event")
+                )
+
+    def _take_group(self) -> tuple[list[_PendingActivityEvent], bool]:
+        """
+        Takes the events of the next group, waiting for the first indefinitely and for
+        the rest until the group is full or its interval has elapsed.
+
+        Returns:
+            tuple: The events of the group, and whether the committer is stopping
+        """
+        pending: _PendingActivityEvent | None = self._queue.get()
+        if pending is None:
+            return [], True
+
+        group: list[_PendingActivityEvent] = [pending]
+        deadline: float = time.monotonic() + self.interval
+
+        while len(group) < self.max_size:
+            try:
+                pending = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+
+            if pending is None:
+                return group, True
+
+            group.append(pending)
+
+        return group, False
+
+    def _flush(self, group: list[_PendingActivityEvent]) -> None:
+        try:
+            alert_responses: list[AlertResponseDomain] = self._commit(
+                activity_events=[pending.activity_event for pending in group]
+            )
+        except Exception as e:
+            # The events are committed one at a time instead, so only the events which
+            # fail by themselves fail their requests
+            if len(group) > 1:
+                log.warning(
+                    "failed to commit group of events, committing each event",
+                    count=len(group),
+                )
+                for pending in group:
+                    self._flush(group=[pending])
+                return
+
+            log.exception("failed to commit event")
+            group[0].alert_response.set_exception(e)
+            return
+
+        for pending, alert_response in zip(group, alert_responses, strict=True):
+            pending.alert_response.set_result(alert_response)
+
+    def _commit(
+        self, activity_events: list[ActivityEvent]
+    ) -> list[AlertResponseDomain]:
+        try:
+            with serialise_users(
+                user_ids=[activity_event.user_id for activity_event in activity_events]
+            ):
+                alert_responses: list[AlertResponseDomain] = (
+                    add_activity_events_and_check_alerts(
+                        activity_events=activity_events
+                    )
+                )
+
+                # The events are detached once inserted, so the commit does not expire
+                # the attributes read by the requests from their own threads
+                db.session.flush()
+                for activity_event in activity_events:
+                    db.session.expunge(activity_event)
+
+                db.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return alert_responses
+
+
+activity_event_group_committer: ActivityEventGroupCommitter = (
+    ActivityEventGroupCommitter()
+)
@@ -0,0 +1,199 @@
+import csv
+import itertools
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Any
+
+import structlog
+import ujson
+from flask import Flask
+from marshmallow.exceptions import ValidationError
+
+from app import db
+from app.events.domains import (
+    ActivityEventDomain,
+    ActivityEventImportChunkDomain,
+    ActivityEventImportResultDomain,
+)
+from app.events.enums import ActivityEventImportFormatEnum
+from app.events.models import ActivityEventImportChunk
+from app.events.queries import copy_activity_events, get_activity_event_import_chunks
+from app.events.schemas import ActivityEventSchema
+from lib.schemas import compile_schema
+
+if TYPE_CHECKING:
+    from lib.schemas import CompiledSchema
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+def read_activity_event_records(
+    stream: IO[str], file_format: ActivityEventImportFormatEnum
+) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    """
+    Reads the records of an NDJSON or CSV stream in the format accepted by
+    `ActivityEventSchema`, each along with the line it was read from.
+
+    CSV streams begin with a header naming the fields. Blank NDJSON lines are skipped, and
+    a line which is not a JSON object is read as None.
+    """
+    if file_format == ActivityEventImportFormatEnum.CSV:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            record: Any = ujson.loads(line)
+        except ValueError:
+            record = None
+
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def read_activity_event_import_chunks(
+    records: Iterator[tuple[int, dict[str, Any] | None]], chunk_size: int
+) -> Iterator[ActivityEventImportChunkDomain]:
+    """Splits records into chunks of `chunk_size`, which are the same for every run of an
+    import over the same stream.
+    """
+    while chunk := list(itertools.islice(records, chunk_size)):
+        yield ActivityEventImportChunkDomain(start_line=chunk[0][0], records=chunk)
+
+
+def import_activity_event_chunk(
+    source: str, chunk_size: int, chunk: ActivityEventImportChunkDomain
+) -> tuple[int, list[tuple[int, Any]]]:
+    """
+    Validates a chunk of records, then loads the valid records with `COPY` and records
+    the chunk within the same transaction.
+
+    Records are rejected as by `POST /event`.
+
+    Returns:
+        tuple: The number of activity events imported, and the line of each record
+            rejected along with the reason
+    """
+    schema: CompiledSchema[ActivityEventDomain] = compile_schema(ActivityEventSchema)
+    activity_events: list[ActivityEventDomain] = []
+    rejected: list[tuple[int, Any]] = []
+
+    for line_number, record in chunk.records:
+        if record is None:
+            rejected.append((line_number, "Line must be a valid JSON object"))
+            continue
+
+        try:
+            activity_event: ActivityEventDomain = schema.load(record)
+        except ValidationError as e:
+            rejected.append((line_number, e.messages))
+            continue
+
+        if activity_event.amount <= 0:
+            rejected.append((line_number, "Amount must be greater than 0"))
+            continue
+
+        activity_events.append(activity_event)
+
+    copy_activity_events(activity_events=activity_events)
+    db.session.add(
+        ActivityEventImportChunk(
+            source=source,
+            start_line=chunk.start_line,
+            chunk_size=chunk_size,
+            record_count=len(chunk.records),
+            imported_count=len(activity_events),
+        )
+    )
+    db.commit()
+
+    return len(activity_events), rejected
+
+
+def import_activity_events(
+    app: Flask,
+    stream: IO[str],
+    file_format: ActivityEventImportFormatEnum,
+    source: str,
+    chunk_size: int = 10_000,
+    workers: int = 1,
+) -> ActivityEventImportResultDomain:
+    """
+    Imports the activity events of a stream in chunks, loaded with `COPY` by a pool of
+    workers each within their own application context, and so their own connection.
+
+    The stream is read as the chunks are loaded, with at most two chunks per worker held
+    at once. Chunks committed by a previous run of the same `source` are skipped, which
+    requires the same `chunk_size`.
+
+    Imported events are not evaluated, and the alert state and velocity buckets of their
+    users must be rebuilt afterwards.
+
+    Raises:
+        ValueError: If the source was imported with a different chunk size
+    """
+    imported_chunks: dict[int, ActivityEventImportChunk] = {
+        imported_chunk.start_line: imported_chunk
+        for imported_chunk in get_activity_event_import_chunks(source=source)
+    }
+
+    for imported_chunk in imported_chunks.values():
+        if imported_chunk.chunk_size != chunk_size:
+            raise ValueError(
+                f"{source} was imported with a chunk size of {imported_chunk.chunk_size}"
+            )
+
+    result = ActivityEventImportResultDomain()
+    started_at: float = time.perf_counter()
+
+    def import_chunk(
+        chunk: ActivityEventImportChunkDomain,
+    ) -> tuple[int, list[tuple[int, Any]]]:
+        with app.app_context():
+            return import_activity_event_chunk(
+                source=source, chunk_size=chunk_size, chunk=chunk
+            )
+
+    def collect(imported: Future[tuple[int, list[tuple[int, Any]]]]) -> None:
+        imported_count, rejected = imported.result()
+        result.imported_count += imported_count
+        result.rejected_count += len(rejected)
+
+        for line_number, message in rejected:
+            log.warning("rejected event", line=line_number, message=message)
+
+        log.info(
+            "imported events",
+            count=result.imported_count,
+            events_per_second=round(
+                result.imported_count / (time.perf_counter() - started_at)
+            ),
+        )
+
+    pending: deque[Future[tuple[int, list[tuple[int, Any]]]]] = deque()
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="activity-event-importer"
+    ) as executor:
+        for chunk in read_activity_event_import_chunks(
+            records=read_activity_event_records(stream=stream, file_format=file_format),
+            chunk_size=chunk_size,
+        ):
+            if chunk.start_line in imported_chunks:
+                result.resumed_chunk_count += 1
+                continue
+
+            pending.append(executor.submit(import_chunk, chunk))
+
+            if len(pending) >= workers * 2:
+                collect(pending.popleft())
+
+        while pending:
+            collect(pending.popleft())
+
+    return result
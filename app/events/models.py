@@ -1,45 +1,270 @@
 import uuid
 from datetime import datetime
-from decimal import Decimal
 
-from sqlalchemy import UUID, BigInteger, DateTime, Index, Integer, Numeric
+from sqlalchemy import (
+    ARRAY,
+    DDL,
+    UUID,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.testing.entities import ComparableEntity
 from sqlalchemy.types import Enum as SQLAlchemyEnum
 
 from app import db
+from app.events.constants import ACTIVITY_EVENT_DEFAULT_PARTITION
 from app.events.enums import ActivityEventTypeEnum
+from lib.money import Cents
+from lib.types import SmallIntegerEnum
 from lib.utils import get_utc_now, get_uuid
 
 
 class ActivityEvent(db.Model, ComparableEntity):  # type: ignore[name-defined]
     __tablename__ = "activity_event"
 
+    # The columns are ordered widest first, so no padding is required to align them
     id: Mapped[uuid.UUID] = mapped_column(
         type_=UUID(as_uuid=True), primary_key=True, default=get_uuid, nullable=False
     )
 
-    transaction_type: Mapped[ActivityEventTypeEnum] = mapped_column(
-        SQLAlchemyEnum(ActivityEventTypeEnum), nullable=False
-    )
-    amount: Mapped[Decimal] = mapped_column(Numeric, nullable=False)
+    amount: Mapped[Cents] = mapped_column(BigInteger, nullable=False)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    event_received_at: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    # The table is partitioned by dispatch time, which every unique constraint must include
+    event_received_at: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False, nullable=False
+    )
 
     created_at: Mapped[datetime] = mapped_column(
-        type_=DateTime(timezone=True), default=get_utc_now, index=True, nullable=False
+        type_=DateTime(timezone=True), default=get_utc_now, nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
         type_=DateTime(timezone=True),
         default=get_utc_now,
         onupdate=get_utc_now,
-        index=True,
         nullable=False,
     )
 
+    transaction_type: Mapped[ActivityEventTypeEnum] = mapped_column(
+        SmallIntegerEnum(ActivityEventTypeEnum), nullable=False
+    )
+
+    # Events are only ever appended, so every index is maintained by every insert and
+    # only those read by the alert rules are kept
     __table_args__ = (
-        Index("idx_events_created_by_user", "user_id", "event_received_at"),
+        # Covers the lookbacks, so the most recent events of a user are read by an index
+        # only scan
+        Index(
+            "idx_events_created_by_user",
+            "user_id",
+            "event_received_at",
+            postgresql_include=["transaction_type", "amount"],
+        ),
+        # Covers the deposit time window, so it is summed by an index only range scan
+        Index(
+            "idx_events_by_user_transaction_type",
+            "user_id",
+            "transaction_type",
+            "event_received_at",
+            postgresql_include=["amount"],
+        ),
+        # Events are appended in roughly the order they were dispatched, so a summary of
+        # each range of blocks is enough for range scans over every user
+        Index(
+            "brin_events_by_event_received_at",
+            "event_received_at",
+            postgresql_using="brin",
+        ),
+        # Monthly partitions are maintained by `flask events partitions`
+        {"postgresql_partition_by": "RANGE (event_received_at)"},
     )
 
     def __repr__(self) -> str:
         return f"<ActivityEvent: {self.id}>"
+
+
+# Tables created from the models rather than the migrations begin with only the default
+# partition
+event.listen(
+    ActivityEvent.__table__,
+    "after_create",
+    DDL(
+        f"CREATE TABLE {ACTIVITY_EVENT_DEFAULT_PARTITION} "
+        f"PARTITION OF {ActivityEvent.__tablename__} DEFAULT"
+    ),
+)
+
+
+class UserAlertState(db.Model, ComparableEntity):  # type: ignore[name-defined]
+    """
+    The state evaluated by the alert rules for a user, maintained incrementally within the
+    same transaction as each `ActivityEvent` is inserted.
+    """
+
+    __tablename__ = "user_alert_state"
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False, nullable=False
+    )
+
+    consecutive_withdraw_count: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False
+    )
+    # The most recent deposits, ordered by dispatch time in descending order
+    recent_deposit_amounts: Mapped[list[Cents]] = mapped_column(
+        ARRAY(BigInteger), default=list, nullable=False
+    )
+    recent_deposit_received_at: Mapped[list[int]] = mapped_column(
+        ARRAY(BigInteger), default=list, nullable=False
+    )
+    # The deposits within the accumulative deposit time window, ordered by dispatch time
+    # in descending order
+    window_deposit_amounts: Mapped[list[Cents]] = mapped_column(
+        ARRAY(BigInteger), default=list, nullable=False
+    )
+    window_deposit_received_at: Mapped[list[int]] = mapped_column(
+        ARRAY(BigInteger), default=list, nullable=False
+    )
+    window_deposit_total: Mapped[Cents] = mapped_column(
+        BigInteger, default=0, nullable=False
+    )
+    last_event_received_at: Mapped[int | None] = mapped_column(
+        BigInteger, nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        type_=DateTime(timezone=True), default=get_utc_now, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        type_=DateTime(timezone=True),
+        default=get_utc_now,
+        onupdate=get_utc_now,
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<UserAlertState: {self.user_id}>"
+
+
+class UserVelocityBucket(db.Model, ComparableEntity):  # type: ignore[name-defined]
+    """
+    The total amount of a type of activity event a user dispatched within `granularity`
+    seconds of `bucket_start`, maintained within the same statement as each event is
+    evaluated.
+
+    The buckets of each granularity form a ring of `VELOCITY_RING_SIZE` slots, so each
+    bucket replaces the bucket `VELOCITY_RING_SIZE` buckets before it.
+    """
+
+    __tablename__ = "user_velocity_bucket"
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False, nullable=False
+    )
+    transaction_type: Mapped[ActivityEventTypeEnum] = mapped_column(
+        SQLAlchemyEnum(ActivityEventTypeEnum), primary_key=True, nullable=False
+    )
+    granularity: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False, nullable=False
+    )
+    slot: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False, nullable=False
+    )
+
+    bucket_start: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    amount: Mapped[Cents] = mapped_column(BigInteger, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserVelocityBucket: {self.user_id} {self.transaction_type} "
+            f"{self.granularity} {self.slot}>"
+        )
+
+
+class QueuedActivityEvent(db.Model, ComparableEntity):  # type: ignore[name-defined]
+    """
+    An activity event accepted asynchronously, which is held until a worker evaluates it
+    and moves it to `activity_event` with the same ID.
+    """
+
+    __tablename__ = "activity_event_queue"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        type_=UUID(as_uuid=True), primary_key=True, default=get_uuid, nullable=False
+    )
+
+    transaction_type: Mapped[ActivityEventTypeEnum] = mapped_column(
+        SQLAlchemyEnum(ActivityEventTypeEnum), nullable=False
+    )
+    amount: Mapped[Cents] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    event_received_at: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # Workers claim events in the order they were accepted
+    created_at: Mapped[datetime] = mapped_column(
+        type_=DateTime(timezone=True), default=get_utc_now, index=True, nullable=False
+    )
+    # The number of times the event failed to be evaluated by itself, after which it is
+    # no longer claimed once `failed_at` is set
+    attempts: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    failed_at: Mapped[datetime | None] = mapped_column(
+        type_=DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<QueuedActivityEvent: {self.id}>"
+
+
+class ActivityEventAlert(db.Model, ComparableEntity):  # type: ignore[name-defined]
+    """The alerts raised by an activity event which was accepted asynchronously."""
+
+    __tablename__ = "activity_event_alert"
+
+    activity_event_id: Mapped[uuid.UUID] = mapped_column(
+        type_=UUID(as_uuid=True), primary_key=True, nullable=False
+    )
+
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    alert: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    alert_codes: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), default=list, nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        type_=DateTime(timezone=True), default=get_utc_now, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<ActivityEventAlert: {self.activity_event_id}>"
+
+
+class ActivityEventImportChunk(db.Model, ComparableEntity):  # type: ignore[name-defined]
+    """
+    A chunk of the records of an import, committed within the same transaction as its
+    activity events, so an interrupted import resumes from the chunks it did not commit.
+    """
+
+    __tablename__ = "activity_event_import_chunk"
+
+    source: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
+    start_line: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False, nullable=False
+    )
+
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    record_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    imported_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        type_=DateTime(timezone=True), default=get_utc_now, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<ActivityEventImportChunk: {self.source} {self.start_line}>"
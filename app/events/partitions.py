@@ -0,0 +1,165 @@
+import re
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from sqlalchemy import text
+
+from app import db
+from app.events.constants import ACTIVITY_EVENT_DEFAULT_PARTITION
+from app.events.models import ActivityEvent
+from lib.utils import get_epoch_now
+
+_ACTIVITY_EVENT_PARTITION_PATTERN: re.Pattern[str] = re.compile(
+    rf"^{ActivityEvent.__tablename__}_p(\d{{4}})_(\d{{2}})$"
+)
+
+
+class ActivityEventPartitionDomain(NamedTuple):
+    """A monthly partition of `activity_event`, holding the events dispatched from
+    `start` until `end` in epoch seconds.
+    """
+
+    name: str
+    start: int
+    end: int
+
+
+def is_activity_event_partition(name: str) -> bool:
+    """Checks whether a table is a partition of `activity_event`, attached or detached."""
+    return (
+        name == ACTIVITY_EVENT_DEFAULT_PARTITION
+        or _ACTIVITY_EVENT_PARTITION_PATTERN.match(name) is not None
+    )
+
+
+def get_activity_event_partition(
+    event_received_at: int, months: int = 0
+) -> ActivityEventPartitionDomain:
+    """Produces the monthly partition `months` after the one `event_received_at` falls
+    within.
+    """
+    dispatched_at: datetime = datetime.fromtimestamp(event_received_at, tz=UTC)
+    index: int = dispatched_at.year * 12 + dispatched_at.month - 1 + months
+
+    start = datetime(year=index // 12, month=index % 12 + 1, day=1, tzinfo=UTC)
+    end = datetime(
+        year=(index + 1) // 12, month=(index + 1) % 12 + 1, day=1, tzinfo=UTC
+    )
+
+    return ActivityEventPartitionDomain(
+        name=f"{ActivityEvent.__tablename__}_p{start.year:04d}_{start.month:02d}",
+        start=int(start.timestamp()),
+        end=int(end.timestamp()),
+    )
+
+
+def get_activity_event_partitions() -> list[ActivityEventPartitionDomain]:
+    """Retrieves the monthly partitions attached to `activity_event`, in order."""
+    names = db.session.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": ActivityEvent.__tablename__},
+    )
+
+    partitions: list[ActivityEventPartitionDomain] = []
+    for name in names:
+        match: re.Match[str] | None = _ACTIVITY_EVENT_PARTITION_PATTERN.match(name)
+        if match is not None:
+            year, month = int(match[1]), int(match[2])
+            partitions.append(
+                get_activity_event_partition(
+                    event_received_at=int(
+                        datetime(year=year, month=month, day=1, tzinfo=UTC).timestamp()
+                    )
+                )
+            )
+
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def create_activity_event_partitions(
+    months_ahead: int,
+) -> list[ActivityEventPartitionDomain]:
+    """
+    Creates the partition of the current month and of each of the `months_ahead` months
+    after it, unless they already exist.
+
+    Each is filled with the events of its month held by the default partition before it
+    is attached, within the same transaction, as a partition cannot be attached while the
+    default partition holds events within its range.
+
+    Returns:
+        list[ActivityEventPartitionDomain]: The partitions created
+    """
+    now: int = get_epoch_now()
+    existing: set[str] = {
+        partition.name for partition in get_activity_event_partitions()
+    }
+
+    created: list[ActivityEventPartitionDomain] = []
+    for months in range(months_ahead + 1):
+        partition = get_activity_event_partition(event_received_at=now, months=months)
+        if partition.name in existing:
+            continue
+
+        db.session.execute(
+            text(
+                f"CREATE TABLE {partition.name} (LIKE {ActivityEvent.__tablename__} "
+                "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # Table names are built from the partition bounds rather than any input
+        db.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {ACTIVITY_EVENT_DEFAULT_PARTITION} "  # noqa: S608
+                "WHERE event_received_at >= :start AND event_received_at < :end "
+                f"RETURNING *) INSERT INTO {partition.name} SELECT * FROM moved"
+            ),
+            {"start": partition.start, "end": partition.end},
+        )
+        db.session.execute(
+            text(
+                f"ALTER TABLE {ActivityEvent.__tablename__} ATTACH PARTITION "
+                f"{partition.name} FOR VALUES "
+                f"FROM ({partition.start}) TO ({partition.end})"
+            )
+        )
+        created.append(partition)
+
+    return created
+
+
+def detach_activity_event_partitions(
+    retain_months: int,
+) -> list[ActivityEventPartitionDomain]:
+    """
+    Detaches the partitions of the months before the `retain_months` months preceding
+    the current month.
+
+    Detached partitions are kept as tables of their own, so they can be archived or
+    dropped, and their events are no longer evaluated by the alert rules.
+
+    Returns:
+        list[ActivityEventPartitionDomain]: The partitions detached
+    """
+    retained_from: int = get_activity_event_partition(
+        event_received_at=get_epoch_now(), months=-retain_months
+    ).start
+
+    detached: list[ActivityEventPartitionDomain] = []
+    for partition in get_activity_event_partitions():
+        if partition.end > retained_from:
+            continue
+
+        db.session.execute(
+            text(
+                f"ALTER TABLE {ActivityEvent.__tablename__} "
+                f"DETACH PARTITION {partition.name}"
+            )
+        )
+        detached.append(partition)
+
+    return detached
@@ -1,16 +1,67 @@
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+import functools
+import io
+import uuid
+from typing import TYPE_CHECKING, Any
 
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    CompoundSelect,
+    Integer,
+    Select,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    column,
+    delete,
+    insert,
+    literal,
+    null,
+    select,
+    true,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql import func
 
+from app import db
 from app.events.constants import (
     ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+    VELOCITY_GRANULARITIES,
+    VELOCITY_RING_SIZE,
+)
+from app.events.domains import (
+    ActivityEventDomain,
+    ActivityEventFetchPlanDomain,
+    ActivityEventHistoryDomain,
+    ActivityEventRecordDomain,
+    VelocityBucketDomain,
 )
 from app.events.enums import ActivityEventTypeEnum
-from app.events.models import ActivityEvent
+from app.events.models import (
+    ActivityEvent,
+    ActivityEventAlert,
+    ActivityEventImportChunk,
+    QueuedActivityEvent,
+    UserAlertState,
+    UserVelocityBucket,
+)
+from lib.money import Cents
+from lib.utils import get_utc_now, get_uuid
 
 if TYPE_CHECKING:
-    from sqlalchemy import ColumnElement
+    from datetime import datetime
+
+    from sqlalchemy import CTE, ColumnElement, Executable
+    from sqlalchemy.dialects.postgresql import Insert
+
+# The columns of `user_velocity_bucket` added to by an upsert, in the order of the
+# fields of `VelocityBucketDomain` after `user_id`
+_VELOCITY_BUCKET_COLUMNS: tuple[str, ...] = ("user_id", *VelocityBucketDomain._fields)
 
 
 def get_activity_events(
@@ -47,28 +98,1254 @@ def get_activity_events(
     )
 
 
-def get_amount_deposited_within_window(user_id: int) -> int:
-    """Calculate total deposits made by a user within a time window.
+def get_recent_activity_events(
+    user_id: int,
+    lookback: int,
+    transaction_type: ActivityEventTypeEnum | None = None,
+) -> list[ActivityEventRecordDomain]:
+    """
+    Retrieves the most recent activity events for a user, bounded by a lookback depth.
+
+    Only the columns evaluated by the alert rules are selected and both the transaction
+    type filter and the lookback are applied within the query, so the cost is bounded by
+    `lookback` rather than by the size of the user's history.
 
     Args:
-        user_id: ID of user to check deposits for
+        user_id: ID of the user to retrieve events for
+        lookback: Maximum number of events to retrieve
+        transaction_type: Optional transaction type to filter events by
 
     Returns:
-        int: Total amount deposited within window, 0 if no deposits found
+        list[ActivityEventRecordDomain]: Up to `lookback` events sorted by dispatch time in descending order
     """
-    deposit_activity_window: int = int(
-        (
-            datetime.now() - timedelta(seconds=ACCUMULATIVE_DEPOSIT_TIME_LIMIT)
-        ).timestamp()
+    if lookback < 1:
+        return []
+
+    filters: list[ColumnElement[bool]] = [ActivityEvent.user_id == user_id]
+
+    if transaction_type:
+        filters.append(ActivityEvent.transaction_type == transaction_type)
+
+    rows = (
+        ActivityEvent.query.with_entities(
+            ActivityEvent.transaction_type,
+            ActivityEvent.amount,
+            ActivityEvent.event_received_at,
+        )
+        .filter(*filters)
+        .order_by(ActivityEvent.event_received_at.desc())
+        .limit(lookback)
+        .all()
     )
 
+    return [ActivityEventRecordDomain(*row) for row in rows]
+
+
+def get_amount_deposited_within_window(
+    user_id: int,
+    event_received_at: int,
+    window: int = ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+) -> Cents:
+    """Calculate total deposits made by a user within the time window ending at the
+    dispatch time of an event.
+
+    The window is bounded on both sides by event time, so it is read as a single range of
+    the `(user_id, transaction_type, event_received_at)` index, which includes `amount`,
+    of only the partitions it overlaps.
+
+    Args:
+        user_id: ID of user to check deposits for
+        event_received_at: The dispatch time of the event the window ends at
+        window: The number of seconds the window spans
+
+    Returns:
+        Cents: Total amount deposited within window, 0 if no deposits found
+    """
     return (
-        ActivityEvent.query.filter_by(user_id=user_id)
-        .where(
+        db.session.scalar(
+            _get_amount_deposited_within_window_statement(),
+            {
+                "user_id": user_id,
+                "deposit_activity_window": get_deposit_activity_window(
+                    event_received_at=event_received_at, window=window
+                ),
+                "event_received_at": event_received_at,
+            },
+        )
+        or 0
+    )
+
+
+def get_deposits_within_window(
+    user_id: int,
+    event_received_at: int,
+    window: int = ACCUMULATIVE_DEPOSIT_TIME_LIMIT,
+) -> list[ActivityEventRecordDomain]:
+    """Retrieves the deposits made by a user within the time window ending at the dispatch
+    time of an event.
+
+    Args:
+        user_id: ID of user to retrieve deposits for
+        event_received_at: The dispatch time of the event the window ends at
+        window: The number of seconds the window spans
+
+    Returns:
+        list[ActivityEventRecordDomain]: Deposits within the window sorted by dispatch time in descending order
+    """
+    rows = (
+        ActivityEvent.query.with_entities(
+            ActivityEvent.transaction_type,
+            ActivityEvent.amount,
+            ActivityEvent.event_received_at,
+        )
+        .filter(
+            ActivityEvent.user_id == user_id,
+            ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+            ActivityEvent.event_received_at.between(
+                get_deposit_activity_window(
+                    event_received_at=event_received_at, window=window
+                ),
+                event_received_at,
+            ),
+        )
+        .order_by(ActivityEvent.event_received_at.desc())
+        .all()
+    )
+
+    return [ActivityEventRecordDomain(*row) for row in rows]
+
+
+def get_deposits_dispatched_since(
+    user_id: int, event_received_at: int
+) -> list[ActivityEventRecordDomain]:
+    """Retrieves the deposits made by a user dispatched no earlier than `event_received_at`.
+
+    Args:
+        user_id: ID of user to retrieve deposits for
+        event_received_at: The earliest dispatch time of the deposits to retrieve
+
+    Returns:
+        list[ActivityEventRecordDomain]: Deposits sorted by dispatch time in descending order
+    """
+    rows = (
+        ActivityEvent.query.with_entities(
+            ActivityEvent.transaction_type,
+            ActivityEvent.amount,
+            ActivityEvent.event_received_at,
+        )
+        .filter(
+            ActivityEvent.user_id == user_id,
             ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
-            ActivityEvent.event_received_at >= deposit_activity_window,
+            ActivityEvent.event_received_at >= event_received_at,
+        )
+        .order_by(ActivityEvent.event_received_at.desc())
+        .all()
+    )
+
+    return [ActivityEventRecordDomain(*row) for row in rows]
+
+
+def get_consecutive_withdraw_count(user_id: int) -> int:
+    """Counts the withdraws made by a user since their most recent deposit.
+
+    Args:
+        user_id: ID of user to count withdraws for
+
+    Returns:
+        int: Number of consecutive withdraws, 0 if the most recent event is a deposit
+    """
+    last_deposit_received_at = (
+        select(func.max(ActivityEvent.event_received_at))
+        .where(
+            ActivityEvent.user_id == user_id,
+            ActivityEvent.transaction_type != ActivityEventTypeEnum.WITHDRAW,
         )
-        .with_entities(func.sum(ActivityEvent.amount))
+        .scalar_subquery()
+    )
+
+    return (
+        ActivityEvent.query.filter(
+            ActivityEvent.user_id == user_id,
+            ActivityEvent.transaction_type == ActivityEventTypeEnum.WITHDRAW,
+            ActivityEvent.event_received_at
+            > func.coalesce(last_deposit_received_at, -1),
+        )
+        .with_entities(func.count())
         .scalar()
         or 0
     )
+
+
+def get_last_event_received_at(user_id: int) -> int | None:
+    """Retrieves the dispatch time of the most recent event made by a user."""
+    return (
+        ActivityEvent.query.filter(ActivityEvent.user_id == user_id)
+        .with_entities(func.max(ActivityEvent.event_received_at))
+        .scalar()
+    )
+
+
+def lock_users(user_ids: list[int]) -> None:
+    """
+    Takes a transaction-level advisory lock, keyed by `user_id`, on each user until the
+    end of the transaction.
+
+    Locks are taken in order of ID, so transactions locking many users cannot deadlock.
+    Transactions for different users never wait on each other.
+
+    Args:
+        user_ids: IDs of the users to lock
+    """
+    if len(user_ids) == 1:
+        db.session.execute(select(func.pg_advisory_xact_lock(user_ids[0])))
+        return
+
+    # The locks are taken within an aggregate over an ordered subquery, so they are taken
+    # in order rather than in whichever order the rows are produced.
+    ordered_user_ids = (
+        select(
+            func.unnest(cast(bindparam("user_ids"), ARRAY(BigInteger))).label("user_id")
+        )
+        .order_by("user_id")
+        .subquery()
+    )
+    db.session.execute(
+        select(func.count(func.pg_advisory_xact_lock(ordered_user_ids.c.user_id))),
+        {"user_ids": sorted(set(user_ids))},
+    )
+
+
+def get_user_alert_state_for_update(user_id: int) -> UserAlertState | None:
+    """
+    Retrieves the alert state of a user by primary key and locks it until the end of the
+    transaction.
+
+    The row lock serialises concurrent events for the same user, so they are applied to
+    the state one at a time.
+
+    Args:
+        user_id: ID of the user to retrieve the state for
+
+    Returns:
+        UserAlertState | None: The locked alert state of the user, None if they have none
+    """
+    return db.session.get(
+        UserAlertState, user_id, with_for_update=True, populate_existing=True
+    )
+
+
+def create_user_alert_state_for_update(
+    user_alert_state: UserAlertState,
+) -> UserAlertState:
+    """
+    Inserts the alert state of a user who has none and locks it until the end of the
+    transaction.
+
+    Args:
+        user_alert_state: A transient alert state, such as one built from the history of
+            the user
+
+    Returns:
+        UserAlertState: The locked alert state of the user
+    """
+    # Another transaction may create the state concurrently, in which case the insert
+    # waits for it to commit and the state it created is locked instead.
+    now: datetime = get_utc_now()
+    db.session.execute(
+        postgresql.insert(UserAlertState)
+        .values(
+            user_id=user_alert_state.user_id,
+            consecutive_withdraw_count=user_alert_state.consecutive_withdraw_count,
+            recent_deposit_amounts=user_alert_state.recent_deposit_amounts,
+            recent_deposit_received_at=user_alert_state.recent_deposit_received_at,
+            window_deposit_amounts=user_alert_state.window_deposit_amounts,
+            window_deposit_received_at=user_alert_state.window_deposit_received_at,
+            window_deposit_total=user_alert_state.window_deposit_total,
+            last_event_received_at=user_alert_state.last_event_received_at,
+            created_at=now,
+            updated_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=[UserAlertState.user_id])
+    )
+
+    return db.session.get_one(
+        UserAlertState,
+        user_alert_state.user_id,
+        with_for_update=True,
+        populate_existing=True,
+    )
+
+
+def get_user_alert_state_user_ids() -> list[int]:
+    """Retrieves the IDs of all users with an alert state."""
+    return list(db.session.scalars(select(UserAlertState.user_id)))
+
+
+def get_activity_event_user_ids() -> list[int]:
+    """Retrieves the IDs of all users with at least one activity event."""
+    return list(
+        db.session.scalars(
+            select(ActivityEvent.user_id).distinct().order_by(ActivityEvent.user_id)
+        )
+    )
+
+
+def copy_activity_events(activity_events: list[ActivityEventDomain]) -> None:
+    """
+    Inserts activity events with a single `COPY FROM STDIN` within the transaction of the
+    session, bypassing the ORM.
+
+    Neither the alert state nor the velocity buckets of their users are updated.
+    """
+    if not activity_events:
+        return
+
+    now: str = get_utc_now().isoformat()
+    buffer = io.StringIO(
+        "".join(
+            f"{get_uuid()}\t{activity_event.transaction_type.value}\t"
+            f"{activity_event.amount}\t{activity_event.user_id}\t"
+            f"{activity_event.event_received_at}\t"
+            f"{now}\t{now}\n"
+            for activity_event in activity_events
+        )
+    )
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(  # type: ignore[attr-defined]
+            f"COPY {ActivityEvent.__tablename__} (id, transaction_type, amount, "
+            "user_id, event_received_at, created_at, updated_at) FROM STDIN",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def get_activity_event_import_chunks(source: str) -> list[ActivityEventImportChunk]:
+    """Retrieves the chunks of an import which have been committed."""
+    return list(
+        db.session.scalars(
+            select(ActivityEventImportChunk).where(
+                ActivityEventImportChunk.source == source
+            )
+        )
+    )
+
+
+def get_velocity_buckets(
+    user_ids: list[int], event_received_at: int
+) -> dict[int, list[VelocityBucketDomain]]:
+    """
+    Retrieves the velocity buckets of users which may be within a velocity window ending
+    at or after a dispatch time.
+
+    Args:
+        user_ids: IDs of the users to retrieve the buckets for
+        event_received_at: The earliest dispatch time a window is evaluated for
+
+    Returns:
+        dict[int, list[VelocityBucketDomain]]: The buckets of each user, keyed by `user_id`
+    """
+    return _get_velocity_buckets_by_user_id(
+        rows=db.session.execute(
+            _get_velocity_buckets_statement(),
+            {"user_ids": user_ids, "event_received_at": event_received_at},
+        )
+    )
+
+
+def save_velocity_buckets(
+    velocity_buckets: dict[int, list[VelocityBucketDomain]], event_received_at: int
+) -> dict[int, list[VelocityBucketDomain]]:
+    """
+    Adds amounts to the velocity buckets of users and retrieves the buckets as they were
+    before, in a single statement.
+
+    The upsert is issued as a data-modifying CTE, so the buckets selected alongside it do
+    not include the amounts being added. A bucket replaces an earlier bucket within the
+    same slot, and amounts for a bucket which has already been replaced are discarded.
+
+    Args:
+        velocity_buckets: The amounts to add, at most one per slot of each user, keyed by
+            `user_id`
+        event_received_at: The earliest dispatch time a window is evaluated for
+
+    Returns:
+        dict[int, list[VelocityBucketDomain]]: The buckets of each user, keyed by `user_id`
+    """
+    return _get_velocity_buckets_by_user_id(
+        rows=db.session.execute(
+            _get_velocity_buckets_statement().add_cte(
+                _get_velocity_bucket_upsert_cte()
+            ),
+            {
+                "user_ids": list(velocity_buckets),
+                "event_received_at": event_received_at,
+                **_get_velocity_bucket_upsert_parameters(
+                    velocity_buckets=velocity_buckets
+                ),
+            },
+        )
+    )
+
+
+def rebuild_velocity_buckets(user_ids: list[int]) -> None:
+    """
+    Replaces every velocity bucket of users with the buckets summed from their existing
+    activity events, within a single statement per step.
+
+    Only the latest bucket of each slot is kept, as if every event had been added to the
+    rings in the order they were dispatched.
+
+    Args:
+        user_ids: IDs of the users to rebuild the buckets for
+    """
+    db.session.execute(
+        delete(UserVelocityBucket).where(
+            UserVelocityBucket.user_id
+            == any_(bindparam("user_ids", type_=ARRAY(BigInteger)))
+        ),
+        {"user_ids": user_ids},
+    )
+    db.session.execute(_get_velocity_bucket_rebuild(), {"user_ids": user_ids})
+
+
+@functools.cache
+def _get_velocity_bucket_rebuild() -> "Executable":
+    granularities = (
+        values(column("granularity", Integer), name="velocity_granularity")
+        .data([(granularity,) for granularity in VELOCITY_GRANULARITIES])
+        .alias("velocity_granularity")
+    )
+    bucket_index: ColumnElement[int] = (
+        ActivityEvent.event_received_at // granularities.c.granularity
+    )
+    # The types of the buckets are a native enum rather than the SMALLINT of the events
+    transaction_type: ColumnElement[ActivityEventTypeEnum] = cast(
+        case(
+            *(
+                (ActivityEvent.transaction_type == member, member.name)
+                for member in ActivityEventTypeEnum
+            )
+        ),
+        UserVelocityBucket.transaction_type.type,
+    )
+    buckets = (
+        select(
+            ActivityEvent.user_id,
+            transaction_type.label("transaction_type"),
+            granularities.c.granularity,
+            (bucket_index % VELOCITY_RING_SIZE).label("slot"),
+            (bucket_index * granularities.c.granularity).label("bucket_start"),
+            cast(func.sum(ActivityEvent.amount), BigInteger).label("amount"),
+        )
+        .join_from(ActivityEvent, granularities, true())
+        .where(
+            ActivityEvent.user_id
+            == any_(bindparam("user_ids", type_=ARRAY(BigInteger)))
+        )
+        .group_by(
+            ActivityEvent.user_id,
+            ActivityEvent.transaction_type,
+            granularities.c.granularity,
+            bucket_index,
+        )
+        .subquery("velocity_bucket")
+    )
+    slot_columns = (
+        buckets.c.user_id,
+        buckets.c.transaction_type,
+        buckets.c.granularity,
+        buckets.c.slot,
+    )
+
+    # A slot holds the latest of the buckets it has been assigned. The insert is of the
+    # table, as the ORM would read the parameters as rows to insert
+    return insert(UserVelocityBucket.__table__).from_select(
+        _VELOCITY_BUCKET_COLUMNS,
+        select(*buckets.c)
+        .distinct(*slot_columns)
+        .order_by(*slot_columns, buckets.c.bucket_start.desc()),
+    )
+
+
+@functools.cache
+def _get_velocity_buckets_statement() -> Select:
+    # A bucket more than a ring before the earliest dispatch time evaluated is outside
+    # every window, whether or not it has been replaced yet
+    return select(
+        UserVelocityBucket.user_id,
+        UserVelocityBucket.transaction_type,
+        UserVelocityBucket.granularity,
+        UserVelocityBucket.slot,
+        UserVelocityBucket.bucket_start,
+        UserVelocityBucket.amount,
+    ).where(
+        UserVelocityBucket.user_id
+        == any_(bindparam("user_ids", type_=ARRAY(BigInteger))),
+        UserVelocityBucket.bucket_start
+        > bindparam("event_received_at", type_=BigInteger)
+        - UserVelocityBucket.granularity * VELOCITY_RING_SIZE,
+    )
+
+
+def _get_velocity_bucket_upsert_cte() -> "CTE":
+    return (
+        _get_velocity_bucket_upsert()
+        .returning(UserVelocityBucket.user_id)
+        .cte("upserted_velocity_bucket")
+    )
+
+
+@functools.cache
+def _get_velocity_bucket_upsert() -> "Insert":
+    """Builds the upsert of velocity buckets, bound to arrays of their columns so it is
+    built and compiled once however many buckets are added.
+    """
+    buckets = (
+        func.unnest(
+            *(
+                cast(
+                    bindparam(f"velocity_{column}s", type_=ARRAY(column_type)),
+                    ARRAY(column_type),
+                )
+                for column in _VELOCITY_BUCKET_COLUMNS
+                for column_type in (UserVelocityBucket.__table__.c[column].type,)
+            )
+        )
+        .table_valued(*_VELOCITY_BUCKET_COLUMNS)
+        .render_derived(name="velocity_bucket")
+    )
+
+    upsert = postgresql.insert(UserVelocityBucket).from_select(
+        _VELOCITY_BUCKET_COLUMNS, select(*buckets.c)
+    )
+    return upsert.on_conflict_do_update(
+        index_elements=[
+            UserVelocityBucket.user_id,
+            UserVelocityBucket.transaction_type,
+            UserVelocityBucket.granularity,
+            UserVelocityBucket.slot,
+        ],
+        set_={
+            "bucket_start": func.greatest(
+                UserVelocityBucket.bucket_start, upsert.excluded.bucket_start
+            ),
+            "amount": case(
+                (
+                    UserVelocityBucket.bucket_start == upsert.excluded.bucket_start,
+                    UserVelocityBucket.amount + upsert.excluded.amount,
+                ),
+                (
+                    UserVelocityBucket.bucket_start < upsert.excluded.bucket_start,
+                    upsert.excluded.amount,
+                ),
+                else_=UserVelocityBucket.amount,
+            ),
+        },
+    )
+
+
+def _get_velocity_bucket_upsert_parameters(
+    velocity_buckets: dict[int, list[VelocityBucketDomain]],
+) -> dict[str, list[Any]]:
+    rows: list[tuple[Any, ...]] = [
+        (user_id, *bucket)
+        for user_id, buckets in velocity_buckets.items()
+        for bucket in buckets
+    ]
+
+    return {
+        f"velocity_{column}s": [row[index] for row in rows]
+        for index, column in enumerate(
+            (
+                "user_id",
+                "transaction_type",
+                "granularity",
+                "slot",
+                "bucket_start",
+                "amount",
+            )
+        )
+    }
+
+
+def _get_velocity_buckets_by_user_id(
+    rows: Any,
+) -> dict[int, list[VelocityBucketDomain]]:
+    velocity_buckets: dict[int, list[VelocityBucketDomain]] = {}
+
+    for user_id, *row in rows:
+        velocity_buckets.setdefault(user_id, []).append(VelocityBucketDomain(*row))
+
+    return velocity_buckets
+
+
+def get_queued_activity_events_for_update(limit: int) -> list[QueuedActivityEvent]:
+    """
+    Retrieves the events queued the longest and locks them until the end of the
+    transaction, skipping those already locked so concurrent workers claim distinct
+    events. Events which have failed are never retrieved.
+
+    Args:
+        limit: The maximum number of events to retrieve
+
+    Returns:
+        list[QueuedActivityEvent]: The locked events in the order they were queued
+    """
+    return list(
+        db.session.scalars(
+            select(QueuedActivityEvent)
+            .where(QueuedActivityEvent.failed_at.is_(None))
+            .order_by(QueuedActivityEvent.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    )
+
+
+def get_queued_activity_event_for_update(
+    activity_event_id: uuid.UUID,
+) -> QueuedActivityEvent | None:
+    """Retrieves and locks a queued event which has not failed, unless another worker
+    has already claimed it."""
+    return db.session.scalar(
+        select(QueuedActivityEvent)
+        .where(
+            QueuedActivityEvent.id == activity_event_id,
+            QueuedActivityEvent.failed_at.is_(None),
+        )
+        .with_for_update(skip_locked=True)
+    )
+
+
+def record_queued_activity_event_failure(
+    activity_event_id: uuid.UUID, max_attempts: int
+) -> None:
+    """
+    Counts a failed attempt to evaluate a queued event, and marks it failed once it has
+    failed `max_attempts` times so it is no longer claimed.
+
+    Args:
+        activity_event_id: ID of the queued event
+        max_attempts: The number of attempts after which the event is marked failed
+    """
+    db.session.execute(
+        update(QueuedActivityEvent)
+        .where(QueuedActivityEvent.id == activity_event_id)
+        .values(
+            attempts=QueuedActivityEvent.attempts + 1,
+            failed_at=case(
+                (QueuedActivityEvent.attempts + 1 >= max_attempts, get_utc_now()),
+                else_=QueuedActivityEvent.failed_at,
+            ),
+        )
+    )
+
+
+def get_queued_activity_event(
+    activity_event_id: uuid.UUID,
+) -> QueuedActivityEvent | None:
+    return db.session.get(QueuedActivityEvent, activity_event_id)
+
+
+def get_activity_event_alert(activity_event_id: uuid.UUID) -> ActivityEventAlert | None:
+    return db.session.get(ActivityEventAlert, activity_event_id)
+
+
+def get_queued_activity_event_count() -> int:
+    """Counts the events waiting to be evaluated."""
+    return db.session.scalar(select(func.count()).select_from(QueuedActivityEvent)) or 0
+
+
+def get_activity_event_history(
+    user_id: int, fetch_plan: ActivityEventFetchPlanDomain, event_received_at: int
+) -> ActivityEventHistoryDomain:
+    """
+    Retrieves the history of a user described by a fetch plan in a single statement.
+
+    Args:
+        user_id: ID of the user to retrieve the history for
+        fetch_plan: The history required by the alert rules
+        event_received_at: The dispatch time of the event being evaluated, which the
+            deposit time window ends at
+
+    Returns:
+        ActivityEventHistoryDomain: The user's history, parts not included in the plan are empty
+    """
+    if fetch_plan.is_empty:
+        return ActivityEventHistoryDomain(
+            recent_activity_events=[],
+            recent_deposit_events=[],
+            amount_deposited_within_window=0,
+        )
+
+    return _execute_fetch_plan(
+        statement=_get_fetch_plan_statement(
+            fetch_plan=fetch_plan,
+            insert_activity_event=False,
+            upsert_velocity_buckets=False,
+        ),
+        fetch_plan=fetch_plan,
+        parameters={"user_id": user_id, "event_received_at": event_received_at},
+    )
+
+
+def get_activity_event_histories(
+    event_received_at_ranges: dict[int, tuple[int, int]],
+    fetch_plan: ActivityEventFetchPlanDomain,
+    velocity_buckets: dict[int, list[VelocityBucketDomain]] | None = None,
+) -> dict[int, ActivityEventHistoryDomain]:
+    """
+    Retrieves the history of many users described by a fetch plan in a single statement.
+
+    Each user may have several events to evaluate, so rather than their sum the deposits
+    within the time windows of every one of their events are retrieved, within
+    `deposits_within_window`. `amount_deposited_within_window` is the sum within the
+    window of their earliest event. The velocity buckets retrieved may be within the
+    window of any of their events.
+
+    Args:
+        event_received_at_ranges: The earliest and latest dispatch time of the events
+            being evaluated for each user, keyed by `user_id`
+        fetch_plan: The history required by the alert rules
+        velocity_buckets: The amounts to add to the velocity buckets of the users by a
+            data-modifying CTE, at most one per slot of each user, keyed by `user_id`.
+            The buckets retrieved do not include them.
+
+    Returns:
+        dict[int, ActivityEventHistoryDomain]: The history of each user, keyed by `user_id`
+    """
+    activity_event_histories: dict[int, ActivityEventHistoryDomain] = {
+        user_id: ActivityEventHistoryDomain(
+            recent_activity_events=[],
+            recent_deposit_events=[],
+            amount_deposited_within_window=0,
+            deposits_within_window=(
+                [] if fetch_plan.deposit_window is not None else None
+            ),
+            velocity_buckets=[] if fetch_plan.velocity_transaction_types else None,
+        )
+        for user_id in event_received_at_ranges
+    }
+
+    if not event_received_at_ranges:
+        return activity_event_histories
+
+    if fetch_plan.is_empty:
+        if velocity_buckets is not None:
+            db.session.execute(
+                _get_velocity_bucket_upsert(),
+                _get_velocity_bucket_upsert_parameters(
+                    velocity_buckets=velocity_buckets
+                ),
+            )
+        return activity_event_histories
+
+    parameters: dict[str, Any] = {
+        "user_ids": list(activity_event_histories),
+        "earliest_event_received_at": min(
+            earliest_event_received_at
+            for earliest_event_received_at, _ in event_received_at_ranges.values()
+        ),
+    }
+    if velocity_buckets is not None:
+        parameters.update(
+            _get_velocity_bucket_upsert_parameters(velocity_buckets=velocity_buckets)
+        )
+    if fetch_plan.lookback > 0:
+        parameters["lookback"] = fetch_plan.lookback
+    if fetch_plan.deposit_lookback > 0:
+        parameters["deposit_lookback"] = fetch_plan.deposit_lookback
+    if fetch_plan.deposit_window is not None:
+        parameters["deposit_activity_windows"] = [
+            get_deposit_activity_window(
+                event_received_at=earliest_event_received_at,
+                window=fetch_plan.deposit_window,
+            )
+            for earliest_event_received_at, _ in event_received_at_ranges.values()
+        ]
+        parameters["event_received_ats"] = [
+            latest_event_received_at
+            for _, latest_event_received_at in event_received_at_ranges.values()
+        ]
+        parameters["earliest_deposit_activity_window"] = min(
+            parameters["deposit_activity_windows"]
+        )
+        parameters["latest_event_received_at"] = max(parameters["event_received_ats"])
+
+    rows = db.session.execute(
+        _get_fetch_plan_for_users_statement(
+            fetch_plan=fetch_plan,
+            upsert_velocity_buckets=velocity_buckets is not None,
+        ),
+        parameters,
+    )
+
+    for (
+        source,
+        user_id,
+        transaction_type,
+        amount,
+        event_received_at,
+        granularity,
+    ) in rows:
+        activity_event_history = activity_event_histories[user_id]
+        record = ActivityEventRecordDomain(transaction_type, amount, event_received_at)
+
+        if source == "velocity":
+            if activity_event_history.velocity_buckets is not None:
+                activity_event_history.velocity_buckets.append(
+                    _get_velocity_bucket(
+                        transaction_type=transaction_type,
+                        granularity=granularity,
+                        bucket_start=event_received_at,
+                        amount=amount,
+                    )
+                )
+        elif source == "window":
+            if activity_event_history.deposits_within_window is not None:
+                activity_event_history.deposits_within_window.append(record)
+        elif source == "deposit":
+            activity_event_history.recent_deposit_events.append(record)
+        else:
+            activity_event_history.recent_activity_events.append(record)
+
+    for user_id, activity_event_history in activity_event_histories.items():
+        for history in (
+            activity_event_history.recent_activity_events,
+            activity_event_history.recent_deposit_events,
+            activity_event_history.deposits_within_window or [],
+        ):
+            history.sort(key=lambda event: event.event_received_at, reverse=True)
+
+        if activity_event_history.deposits_within_window:
+            earliest_event_received_at: int = event_received_at_ranges[user_id][0]
+            activity_event_history.amount_deposited_within_window = sum(
+                (
+                    deposit.amount
+                    for deposit in activity_event_history.deposits_within_window
+                    if deposit.event_received_at <= earliest_event_received_at
+                ),
+                start=0,
+            )
+
+    return activity_event_histories
+
+
+def save_activity_event_with_history(
+    activity_event: ActivityEvent,
+    fetch_plan: ActivityEventFetchPlanDomain,
+    velocity_buckets: list[VelocityBucketDomain] | None = None,
+) -> ActivityEventHistoryDomain:
+    """
+    Inserts an activity event and retrieves the history described by a fetch plan in a
+    single statement, so evaluating and persisting an event costs one round trip to the
+    database.
+
+    The insert, and the upsert of the velocity buckets of the event when given, are
+    issued as data-modifying CTEs. All parts of the statement share the same snapshot, so
+    the history returned does not include the event being inserted. The caller is
+    responsible for committing the transaction.
+
+    Args:
+        activity_event: The activity event to insert
+        fetch_plan: The history required by the alert rules
+        velocity_buckets: The amounts to add to the velocity buckets of the user, at
+            most one per slot
+
+    Returns:
+        ActivityEventHistoryDomain: The user's history prior to the inserted event
+    """
+    now = get_utc_now()
+    activity_event.id = activity_event.id or get_uuid()
+    activity_event.created_at = activity_event.created_at or now
+    activity_event.updated_at = activity_event.updated_at or now
+
+    return _execute_fetch_plan(
+        statement=_get_fetch_plan_statement(
+            fetch_plan=fetch_plan,
+            insert_activity_event=True,
+            upsert_velocity_buckets=velocity_buckets is not None,
+        ),
+        fetch_plan=fetch_plan,
+        parameters={
+            "id": activity_event.id,
+            "transaction_type": activity_event.transaction_type,
+            "amount": activity_event.amount,
+            "user_id": activity_event.user_id,
+            "event_received_at": activity_event.event_received_at,
+            "created_at": activity_event.created_at,
+            "updated_at": activity_event.updated_at,
+            **(
+                _get_velocity_bucket_upsert_parameters(
+                    velocity_buckets={activity_event.user_id: velocity_buckets}
+                )
+                if velocity_buckets is not None
+                else {}
+            ),
+        },
+    )
+
+
+def _execute_fetch_plan(
+    statement: "Executable",
+    fetch_plan: ActivityEventFetchPlanDomain,
+    parameters: dict[str, Any],
+) -> ActivityEventHistoryDomain:
+    activity_event_history = ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[],
+        amount_deposited_within_window=0,
+    )
+
+    if fetch_plan.lookback > 0:
+        parameters["lookback"] = fetch_plan.lookback
+    if fetch_plan.deposit_lookback > 0:
+        parameters["deposit_lookback"] = fetch_plan.deposit_lookback
+    if fetch_plan.deposit_window is not None:
+        parameters["deposit_activity_window"] = get_deposit_activity_window(
+            event_received_at=parameters["event_received_at"],
+            window=fetch_plan.deposit_window,
+        )
+
+    result = db.session.execute(statement, parameters)
+
+    if fetch_plan.is_empty:
+        return activity_event_history
+
+    velocity_buckets: list[VelocityBucketDomain] = []
+
+    for source, transaction_type, amount, event_received_at, granularity in result:
+        if source == "window":
+            activity_event_history.amount_deposited_within_window = amount
+        elif source == "velocity":
+            velocity_buckets.append(
+                _get_velocity_bucket(
+                    transaction_type=transaction_type,
+                    granularity=granularity,
+                    bucket_start=event_received_at,
+                    amount=amount,
+                )
+            )
+        elif source == "deposit":
+            activity_event_history.recent_deposit_events.append(
+                ActivityEventRecordDomain(transaction_type, amount, event_received_at)
+            )
+        else:
+            activity_event_history.recent_activity_events.append(
+                ActivityEventRecordDomain(transaction_type, amount, event_received_at)
+            )
+
+    # The order of rows across a UNION ALL is not guaranteed, so each part of the
+    # history is sorted by dispatch time in descending order once retrieved.
+    for history in (
+        activity_event_history.recent_activity_events,
+        activity_event_history.recent_deposit_events,
+    ):
+        history.sort(key=lambda event: event.event_received_at, reverse=True)
+
+    if fetch_plan.velocity_transaction_types:
+        activity_event_history.velocity_buckets = velocity_buckets
+
+    return activity_event_history
+
+
+@functools.cache
+def _get_fetch_plan_statement(
+    fetch_plan: ActivityEventFetchPlanDomain,
+    insert_activity_event: bool,
+    upsert_velocity_buckets: bool,
+) -> "Executable":
+    """Builds the statement which executes a fetch plan once per plan, with bound
+    parameters, so it is not rebuilt and recompiled for every event.
+
+    Only the parts of the history included in the plan are selected. When
+    `insert_activity_event` is set the event is inserted by a data-modifying CTE, and
+    when `upsert_velocity_buckets` is set its amount is added to the velocity buckets of
+    the user by another.
+    """
+    inserted_activity_event = insert(ActivityEvent).values(
+        id=bindparam("id"),
+        transaction_type=bindparam("transaction_type"),
+        amount=bindparam("amount"),
+        user_id=bindparam("user_id"),
+        event_received_at=bindparam("event_received_at"),
+        created_at=bindparam("created_at"),
+        updated_at=bindparam("updated_at"),
+    )
+
+    if fetch_plan.is_empty:
+        return (
+            inserted_activity_event.add_cte(_get_velocity_bucket_upsert_cte())
+            if upsert_velocity_buckets
+            else inserted_activity_event
+        )
+
+    # Every part of the history is selected as the same columns, where `granularity` is
+    # only set for velocity buckets and `event_received_at` holds their start
+    columns = (
+        ActivityEvent.transaction_type,
+        ActivityEvent.amount,
+        ActivityEvent.event_received_at,
+        cast(null(), Integer).label("granularity"),
+    )
+
+    selects: list[Select] = []
+
+    if fetch_plan.lookback > 0:
+        selects.append(
+            select(literal("recent").label("source"), *columns)
+            .where(ActivityEvent.user_id == bindparam("user_id"))
+            .order_by(ActivityEvent.event_received_at.desc())
+            .limit(bindparam("lookback", type_=Integer))
+        )
+
+    if fetch_plan.deposit_lookback > 0:
+        selects.append(
+            select(literal("deposit").label("source"), *columns)
+            .where(
+                ActivityEvent.user_id == bindparam("user_id"),
+                ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+            )
+            .order_by(ActivityEvent.event_received_at.desc())
+            .limit(bindparam("deposit_lookback", type_=Integer))
+        )
+
+    if fetch_plan.deposit_window is not None:
+        selects.append(
+            select(
+                literal("window").label("source"),
+                cast(null(), ActivityEvent.transaction_type.type),
+                # Summed as BIGINT rather than NUMERIC, so every amount of the union
+                # remains an integer
+                cast(func.coalesce(func.sum(ActivityEvent.amount), 0), BigInteger),
+                cast(null(), ActivityEvent.event_received_at.type),
+                cast(null(), Integer),
+            ).where(
+                ActivityEvent.user_id == bindparam("user_id"),
+                ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+                ActivityEvent.event_received_at.between(
+                    bindparam("deposit_activity_window"),
+                    bindparam("event_received_at"),
+                ),
+            )
+        )
+
+    selects.extend(
+        _select_velocity_buckets(
+            fetch_plan.velocity_transaction_types,
+            bindparam("user_id"),
+            bindparam("event_received_at", type_=BigInteger),
+        )
+    )
+
+    statement: Select | CompoundSelect = (
+        union_all(*selects) if len(selects) > 1 else selects[0]
+    )
+
+    if insert_activity_event:
+        statement = statement.add_cte(
+            inserted_activity_event.returning(ActivityEvent.id).cte(
+                "inserted_activity_event"
+            )
+        )
+
+    if upsert_velocity_buckets:
+        statement = statement.add_cte(_get_velocity_bucket_upsert_cte())
+
+    return statement
+
+
+def _select_velocity_buckets(
+    transaction_types: tuple[ActivityEventTypeEnum, ...],
+    user_id: "ColumnElement[int]",
+    event_received_at: "ColumnElement[int]",
+    *columns: "ColumnElement[Any]",
+) -> list[Select]:
+    """
+    Selects the velocity buckets of a user which may be within a velocity window ending
+    at or after `event_received_at`, as the columns of the history selected by a fetch
+    plan after any leading `columns`.
+
+    The buckets of each type of activity event are selected separately, so their type is
+    selected as the type of `ActivityEvent.transaction_type` rather than of
+    `UserVelocityBucket.transaction_type`.
+    """
+    return [
+        select(
+            literal("velocity").label("source"),
+            *columns,
+            literal(transaction_type, ActivityEvent.transaction_type.type),
+            UserVelocityBucket.amount,
+            UserVelocityBucket.bucket_start,
+            UserVelocityBucket.granularity,
+        ).where(
+            UserVelocityBucket.user_id == user_id,
+            UserVelocityBucket.transaction_type == transaction_type,
+            # A bucket more than a ring before the earliest dispatch time evaluated is
+            # outside every window, whether or not it has been replaced yet
+            UserVelocityBucket.bucket_start
+            > event_received_at - UserVelocityBucket.granularity * VELOCITY_RING_SIZE,
+        )
+        for transaction_type in transaction_types
+    ]
+
+
+def _get_velocity_bucket(
+    transaction_type: ActivityEventTypeEnum,
+    granularity: int,
+    bucket_start: int,
+    amount: Cents,
+) -> VelocityBucketDomain:
+    return VelocityBucketDomain(
+        transaction_type=transaction_type,
+        granularity=granularity,
+        slot=bucket_start // granularity % VELOCITY_RING_SIZE,
+        bucket_start=bucket_start,
+        amount=amount,
+    )
+
+
+@functools.cache
+def _get_fetch_plan_for_users_statement(
+    fetch_plan: ActivityEventFetchPlanDomain, upsert_velocity_buckets: bool
+) -> "Executable":
+    """Builds the statement which executes a fetch plan for many users once per plan.
+
+    Each lookback is a lateral subquery per user, so every user is limited separately
+    while each subquery is satisfied by the `(user_id, event_received_at)` index. The
+    deposits within the time windows of each user are a range of the
+    `(user_id, transaction_type, event_received_at)` index. When
+    `upsert_velocity_buckets` is set, amounts are added to the velocity buckets of the
+    users by a data-modifying CTE.
+    """
+    arrays = [bindparam("user_ids", type_=ARRAY(BigInteger))]
+    if fetch_plan.deposit_window is not None:
+        # Bound as the type of `event_received_at`, so they are compared in the units
+        # it is stored in
+        arrays += [
+            bindparam(
+                "deposit_activity_windows",
+                type_=ARRAY(ActivityEvent.event_received_at.type),
+            ),
+            bindparam(
+                "event_received_ats", type_=ARRAY(ActivityEvent.event_received_at.type)
+            ),
+        ]
+
+    users = (
+        func.unnest(*arrays)
+        .table_valued(
+            "user_id",
+            *(
+                ("deposit_activity_window", "event_received_at")
+                if fetch_plan.deposit_window is not None
+                else ()
+            ),
+        )
+        .render_derived(name="users")
+    )
+
+    # Every part of the history is selected as the same columns, as by
+    # `_get_fetch_plan_statement`
+    columns = (
+        ActivityEvent.transaction_type,
+        ActivityEvent.amount,
+        ActivityEvent.event_received_at,
+        cast(null(), Integer).label("granularity"),
+    )
+
+    selects: list[Select] = []
+
+    for source, lookback, filters in (
+        ("recent", "lookback", ()),
+        (
+            "deposit",
+            "deposit_lookback",
+            (ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,),
+        ),
+    ):
+        if getattr(fetch_plan, lookback) < 1:
+            continue
+
+        activity_events = (
+            select(*columns)
+            .where(ActivityEvent.user_id == users.c.user_id, *filters)
+            .order_by(ActivityEvent.event_received_at.desc())
+            .limit(bindparam(lookback, type_=Integer))
+            .lateral(source)
+        )
+        selects.append(
+            select(
+                literal(source).label("source"),
+                users.c.user_id,
+                *activity_events.c,
+            ).select_from(users.join(activity_events, true()))
+        )
+
+    if fetch_plan.deposit_window is not None:
+        selects.append(
+            select(literal("window").label("source"), users.c.user_id, *columns)
+            .select_from(users)
+            .join(
+                ActivityEvent,
+                and_(
+                    ActivityEvent.user_id == users.c.user_id,
+                    ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+                    ActivityEvent.event_received_at.between(
+                        users.c.deposit_activity_window, users.c.event_received_at
+                    ),
+                    # The windows of every user are bounded by constants as well, so
+                    # the partitions outside of them are pruned when planned
+                    ActivityEvent.event_received_at.between(
+                        bindparam("earliest_deposit_activity_window"),
+                        bindparam("latest_event_received_at"),
+                    ),
+                ),
+            )
+        )
+
+    selects.extend(
+        _select_velocity_buckets(
+            fetch_plan.velocity_transaction_types,
+            users.c.user_id,
+            bindparam("earliest_event_received_at", type_=BigInteger),
+            users.c.user_id,
+        )
+    )
+
+    statement: Select | CompoundSelect = (
+        union_all(*selects) if len(selects) > 1 else selects[0]
+    )
+
+    if upsert_velocity_buckets:
+        statement = statement.add_cte(_get_velocity_bucket_upsert_cte())
+
+    return statement
+
+
+def get_deposit_activity_window(
+    event_received_at: int, window: int = ACCUMULATIVE_DEPOSIT_TIME_LIMIT
+) -> int:
+    """Produces the earliest `event_received_at` included in the deposit time window
+    ending at the dispatch time of an event, by default the accumulative deposit time
+    window.
+
+    Windows are measured in event time rather than by the clock, so events replayed,
+    backfilled or received late are evaluated against the same window as when they were
+    dispatched.
+    """
+    return event_received_at - window
+
+
+@functools.cache
+def _get_amount_deposited_within_window_statement() -> Select:
+    return select(cast(func.sum(ActivityEvent.amount), BigInteger)).where(
+        ActivityEvent.user_id == bindparam("user_id"),
+        ActivityEvent.transaction_type == ActivityEventTypeEnum.DEPOSIT,
+        ActivityEvent.event_received_at.between(
+            bindparam("deposit_activity_window"), bindparam("event_received_at")
+        ),
+    )
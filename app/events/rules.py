@@ -0,0 +1,192 @@
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Protocol
+
+from app.events.domains import ActivityEventFetchPlanDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.metrics import alert_rule_duration, alert_rule_hits
+
+if TYPE_CHECKING:
+    from app.events.domains import ActivityEventHistoryDomain
+    from app.events.models import ActivityEvent
+
+
+class AlertRuleCheck(Protocol):
+    def __call__(
+        self,
+        user_id: int,
+        current_activity_event: "ActivityEvent",
+        activity_event_history: "ActivityEventHistoryDomain | None" = None,
+    ) -> bool: ...
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    An alert rule and the history it requires to be evaluated.
+
+    Args:
+        code: The alert code added when the rule is triggered
+        transaction_type: The type of activity event the rule is evaluated for
+        check: Evaluates the rule against the current event and the history of its user
+        history_transaction_type: Restricts the history to events of this type
+        lookback: The number of most recent events required
+        window: The number of seconds over which the amounts of events are summed
+        velocity_window: The number of seconds over which the amounts of events of
+            `transaction_type` are summed from the velocity buckets of the user
+    """
+
+    code: AlertCodeEnum
+    transaction_type: ActivityEventTypeEnum
+    check: AlertRuleCheck
+    history_transaction_type: ActivityEventTypeEnum | None = None
+    lookback: int = 0
+    window: int | None = None
+    velocity_window: int | None = None
+
+    def __post_init__(self) -> None:
+        # The history retrieved for a user holds the most recent events of any type and
+        # the most recent deposits, and sums deposits within a window.
+        if self.history_transaction_type not in (None, ActivityEventTypeEnum.DEPOSIT):
+            raise ValueError(
+                f"Alert rule {self.code.name} can only restrict its history to deposits"
+            )
+
+        if self.window is not None and self.history_transaction_type is None:
+            raise ValueError(
+                f"Alert rule {self.code.name} can only sum deposits within a window"
+            )
+
+
+class AlertRuleRegistry:
+    """
+    The alert rules evaluated for each activity event.
+
+    The history required by the rules evaluated for a type of event is compiled into a
+    single fetch plan, so it is retrieved once and shared by every rule however many
+    rules are registered.
+    """
+
+    def __init__(self, rules: list[AlertRule] | None = None) -> None:
+        self._rules: dict[AlertCodeEnum, AlertRule] = {}
+        self._fetch_plans: dict[
+            ActivityEventTypeEnum | None, ActivityEventFetchPlanDomain
+        ] = {}
+
+        for rule in rules or []:
+            self.register(rule=rule)
+
+    @property
+    def rules(self) -> list[AlertRule]:
+        return list(self._rules.values())
+
+    def register(self, rule: AlertRule) -> AlertRule:
+        if rule.code in self._rules:
+            raise ValueError(f"Alert rule {rule.code.name} is already registered")
+
+        self._rules[rule.code] = rule
+        self._fetch_plans.clear()
+
+        return rule
+
+    def get_rules(
+        self, transaction_type: ActivityEventTypeEnum | None = None
+    ) -> list[AlertRule]:
+        """Retrieves the rules evaluated for a type of activity event, or every rule."""
+        return [
+            rule
+            for rule in self._rules.values()
+            if transaction_type is None or rule.transaction_type == transaction_type
+        ]
+
+    def get_fetch_plan(
+        self, transaction_type: ActivityEventTypeEnum | None = None
+    ) -> ActivityEventFetchPlanDomain:
+        """
+        Compiles the history required by the rules evaluated for a type of activity event
+        into a single fetch plan.
+
+        Args:
+            transaction_type: The type of the current activity event, when omitted the
+                plan satisfies every rule
+
+        Returns:
+            ActivityEventFetchPlanDomain: The smallest history satisfying every rule
+        """
+        if transaction_type not in self._fetch_plans:
+            rules: list[AlertRule] = self.get_rules(transaction_type=transaction_type)
+            windows: list[int] = [
+                rule.window for rule in rules if rule.window is not None
+            ]
+
+            self._fetch_plans[transaction_type] = ActivityEventFetchPlanDomain(
+                lookback=max(
+                    (
+                        rule.lookback
+                        for rule in rules
+                        if rule.history_transaction_type is None
+                    ),
+                    default=0,
+                ),
+                deposit_lookback=max(
+                    (
+                        rule.lookback
+                        for rule in rules
+                        if rule.history_transaction_type
+                        == ActivityEventTypeEnum.DEPOSIT
+                    ),
+                    default=0,
+                ),
+                deposit_window=max(windows) if windows else None,
+                velocity_transaction_types=tuple(
+                    transaction_type
+                    for transaction_type in ActivityEventTypeEnum
+                    if any(
+                        rule.velocity_window is not None
+                        and rule.transaction_type == transaction_type
+                        for rule in rules
+                    )
+                ),
+            )
+
+        return self._fetch_plans[transaction_type]
+
+    def evaluate(
+        self,
+        user_id: int,
+        current_activity_event: "ActivityEvent",
+        activity_event_history: "ActivityEventHistoryDomain",
+    ) -> list[AlertCodeEnum]:
+        """
+        Evaluates the rules for the current activity event against the shared history.
+        The time taken to evaluate each rule, and whether it was triggered, are recorded
+        within the metrics by its code.
+
+        Args:
+            user_id: The ID of the user to check alerts for
+            current_activity_event: The current activity event being processed
+            activity_event_history: The history retrieved by the compiled fetch plan
+
+        Returns:
+            list[AlertCodeEnum]: The codes of the triggered rules
+        """
+        alert_codes: list[AlertCodeEnum] = []
+
+        for rule in self.get_rules(
+            transaction_type=current_activity_event.transaction_type
+        ):
+            started_at: float = time.perf_counter()
+            triggered: bool = rule.check(
+                user_id=user_id,
+                current_activity_event=current_activity_event,
+                activity_event_history=activity_event_history,
+            )
+            alert_rule_duration.labels(rule.code.name).observe(
+                time.perf_counter() - started_at
+            )
+
+            if triggered:
+                alert_rule_hits.labels(rule.code.name).inc()
+                alert_codes.append(rule.code)
+
+        return alert_codes
@@ -1,20 +1,35 @@
+from marshmallow import validate
+
+from app.events.constants import MAX_ACTIVITY_EVENT_AMOUNT
 from app.events.domains import ActivityEventDomain, AlertResponseDomain
 from app.events.enums import ActivityEventTypeEnum
 from lib import fields
+from lib.money import format_cents
 from lib.schemas import BaseSchema
+from lib.types import BIGINT_MAX
 
 
 class ActivityEventSchema(BaseSchema[ActivityEventDomain]):
     transaction_type = fields.CaseInsensitiveEnum(
         ActivityEventTypeEnum, required=True, data_key="type"
     )
-    amount = fields.Decimal(required=True)
+    amount = fields.Cents(
+        required=True,
+        validate=validate.Range(
+            max=MAX_ACTIVITY_EVENT_AMOUNT,
+            # The amount is compared in cents but reported as it is written
+            error="Must be less than or equal to "
+            f"{format_cents(MAX_ACTIVITY_EVENT_AMOUNT)}.",
+        ),
+    )
     user_id = fields.Integer(required=True)
 
     # NOTE: The field `t` maps to event_received_at and represents a Unix epoch timestamp.
     # While this naming aligns with the API contract, a more descriptive field name
     # in future API versions would help improve clarity and maintainability.
-    event_received_at = fields.Integer(required=True, data_key="t")
+    event_received_at = fields.Integer(
+        required=True, data_key="t", validate=validate.Range(min=0, max=BIGINT_MAX)
+    )
 
 
 class AlertResponseSchema(BaseSchema[AlertResponseDomain]):
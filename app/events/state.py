@@ -0,0 +1,285 @@
+from typing import TYPE_CHECKING
+
+from app.events.constants import CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT
+from app.events.domains import ActivityEventHistoryDomain, ActivityEventRecordDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent, UserAlertState
+from app.events.queries import (
+    create_user_alert_state_for_update,
+    get_consecutive_withdraw_count,
+    get_deposit_activity_window,
+    get_deposits_within_window,
+    get_last_event_received_at,
+    get_recent_activity_events,
+    get_user_alert_state_for_update,
+)
+
+if TYPE_CHECKING:
+    from lib.money import Cents
+
+# The number of previous deposits required by the consecutive deposits rule
+RECENT_DEPOSIT_LIMIT: int = CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT - 1
+
+# The columns of `UserAlertState` derived from the history of a user
+USER_ALERT_STATE_FIELDS: tuple[str, ...] = (
+    "consecutive_withdraw_count",
+    "recent_deposit_amounts",
+    "recent_deposit_received_at",
+    "window_deposit_amounts",
+    "window_deposit_received_at",
+    "window_deposit_total",
+    "last_event_received_at",
+)
+
+
+def is_in_order(
+    user_alert_state: UserAlertState, activity_event: ActivityEvent
+) -> bool:
+    """
+    Checks that an activity event was dispatched no earlier than the events already applied
+    to the alert state, so it can be applied incrementally.
+    """
+    return (
+        user_alert_state.last_event_received_at is None
+        or activity_event.event_received_at >= user_alert_state.last_event_received_at
+    )
+
+
+def get_activity_event_history_from_user_alert_state(
+    user_alert_state: UserAlertState, event_received_at: int
+) -> ActivityEventHistoryDomain:
+    """
+    Builds the history evaluated by the alert rules from the alert state of a user.
+
+    Deposits that have left the accumulative deposit time window ending at the current
+    event since the state was last updated are excluded from the windowed total.
+
+    Args:
+        user_alert_state: The alert state of the user
+        event_received_at: The dispatch time of the current event, no earlier than the
+            events already applied to the state
+
+    Returns:
+        ActivityEventHistoryDomain: The user's history prior to the current event
+    """
+    deposit_activity_window: int = get_deposit_activity_window(
+        event_received_at=event_received_at
+    )
+
+    return ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=amount,
+                event_received_at=event_received_at,
+            )
+            for amount, event_received_at in zip(
+                user_alert_state.recent_deposit_amounts,
+                user_alert_state.recent_deposit_received_at,
+                strict=True,
+            )
+        ],
+        amount_deposited_within_window=sum(
+            (
+                amount
+                for amount, event_received_at in zip(
+                    user_alert_state.window_deposit_amounts,
+                    user_alert_state.window_deposit_received_at,
+                    strict=True,
+                )
+                if event_received_at >= deposit_activity_window
+            ),
+            start=0,
+        ),
+        consecutive_withdraw_count=user_alert_state.consecutive_withdraw_count,
+    )
+
+
+def apply_activity_event_to_user_alert_state(
+    user_alert_state: UserAlertState, activity_event: ActivityEvent
+) -> None:
+    """
+    Applies an activity event, dispatched after every event already applied, to the alert
+    state of its user.
+
+    Args:
+        user_alert_state: The alert state of the user
+        activity_event: The activity event being processed
+    """
+    deposit_activity_window: int = get_deposit_activity_window(
+        event_received_at=activity_event.event_received_at
+    )
+
+    window_deposits: list[tuple[Cents, int]] = [
+        (amount, event_received_at)
+        for amount, event_received_at in zip(
+            user_alert_state.window_deposit_amounts,
+            user_alert_state.window_deposit_received_at,
+            strict=True,
+        )
+        if event_received_at >= deposit_activity_window
+    ]
+
+    if activity_event.transaction_type == ActivityEventTypeEnum.DEPOSIT:
+        user_alert_state.consecutive_withdraw_count = 0
+        user_alert_state.recent_deposit_amounts = [
+            activity_event.amount,
+            *user_alert_state.recent_deposit_amounts,
+        ][:RECENT_DEPOSIT_LIMIT]
+        user_alert_state.recent_deposit_received_at = [
+            activity_event.event_received_at,
+            *user_alert_state.recent_deposit_received_at,
+        ][:RECENT_DEPOSIT_LIMIT]
+
+        if activity_event.event_received_at >= deposit_activity_window:
+            window_deposits.insert(
+                0, (activity_event.amount, activity_event.event_received_at)
+            )
+    else:
+        user_alert_state.consecutive_withdraw_count += 1
+
+    user_alert_state.window_deposit_amounts = [amount for amount, _ in window_deposits]
+    user_alert_state.window_deposit_received_at = [
+        event_received_at for _, event_received_at in window_deposits
+    ]
+    user_alert_state.window_deposit_total = sum(
+        user_alert_state.window_deposit_amounts, start=0
+    )
+    user_alert_state.last_event_received_at = activity_event.event_received_at
+
+
+def build_user_alert_state(user_id: int) -> UserAlertState:
+    """
+    Builds the alert state of a user from their full history of activity events, with
+    the deposit time window ending at their most recent event.
+
+    Args:
+        user_id: ID of the user to build the state for
+
+    Returns:
+        UserAlertState: A transient alert state, which is not added to the session
+    """
+    last_event_received_at: int | None = get_last_event_received_at(user_id=user_id)
+    # A user without activity events has an empty state, which needs no further queries
+    if last_event_received_at is None:
+        return UserAlertState(
+            user_id=user_id,
+            consecutive_withdraw_count=0,
+            recent_deposit_amounts=[],
+            recent_deposit_received_at=[],
+            window_deposit_amounts=[],
+            window_deposit_received_at=[],
+            window_deposit_total=0,
+            last_event_received_at=None,
+        )
+
+    recent_deposits: list[ActivityEventRecordDomain] = get_recent_activity_events(
+        user_id=user_id,
+        lookback=RECENT_DEPOSIT_LIMIT,
+        transaction_type=ActivityEventTypeEnum.DEPOSIT,
+    )
+    window_deposits: list[ActivityEventRecordDomain] = get_deposits_within_window(
+        user_id=user_id, event_received_at=last_event_received_at
+    )
+
+    return UserAlertState(
+        user_id=user_id,
+        consecutive_withdraw_count=get_consecutive_withdraw_count(user_id=user_id),
+        recent_deposit_amounts=[deposit.amount for deposit in recent_deposits],
+        recent_deposit_received_at=[
+            deposit.event_received_at for deposit in recent_deposits
+        ],
+        window_deposit_amounts=[deposit.amount for deposit in window_deposits],
+        window_deposit_received_at=[
+            deposit.event_received_at for deposit in window_deposits
+        ],
+        window_deposit_total=sum(
+            (deposit.amount for deposit in window_deposits), start=0
+        ),
+        last_event_received_at=last_event_received_at,
+    )
+
+
+def get_or_build_user_alert_state_for_update(user_id: int) -> UserAlertState:
+    """
+    Retrieves the alert state of a user and locks it until the end of the transaction.
+
+    A user without a state, such as one whose events were saved before the `table`
+    backend was enabled or backfilled, has it built from their history of activity
+    events, so their events are never evaluated against an empty state.
+
+    Args:
+        user_id: ID of the user to retrieve the state for
+
+    Returns:
+        UserAlertState: The locked alert state of the user
+    """
+    user_alert_state: UserAlertState | None = get_user_alert_state_for_update(
+        user_id=user_id
+    )
+    if user_alert_state is not None:
+        return user_alert_state
+
+    return create_user_alert_state_for_update(
+        user_alert_state=build_user_alert_state(user_id=user_id)
+    )
+
+
+def rebuild_user_alert_state(user_alert_state: UserAlertState) -> None:
+    """Replaces the alert state of a user with one built from their full history."""
+    built_user_alert_state: UserAlertState = build_user_alert_state(
+        user_id=user_alert_state.user_id
+    )
+
+    for field in USER_ALERT_STATE_FIELDS:
+        setattr(user_alert_state, field, getattr(built_user_alert_state, field))
+
+
+def compare_user_alert_state(
+    user_alert_state: UserAlertState | None, built_user_alert_state: UserAlertState
+) -> list[str]:
+    """
+    Compares a stored alert state with one built from the full history of the user, with
+    both deposit time windows ending at the most recent event of the user.
+
+    Args:
+        user_alert_state: The stored alert state, None if the user has no state
+        built_user_alert_state: The alert state built by `build_user_alert_state`
+
+    Returns:
+        list[str]: The names of the fields that differ, empty if the states are consistent
+    """
+    if user_alert_state is None:
+        return ["user_alert_state"]
+
+    event_received_at: int = built_user_alert_state.last_event_received_at or 0
+    stored: ActivityEventHistoryDomain = (
+        get_activity_event_history_from_user_alert_state(
+            user_alert_state=user_alert_state, event_received_at=event_received_at
+        )
+    )
+    built: ActivityEventHistoryDomain = (
+        get_activity_event_history_from_user_alert_state(
+            user_alert_state=built_user_alert_state,
+            event_received_at=event_received_at,
+        )
+    )
+
+    mismatches: list[str] = [
+        field
+        for field in (
+            "consecutive_withdraw_count",
+            "recent_deposit_events",
+            "amount_deposited_within_window",
+        )
+        if getattr(stored, field) != getattr(built, field)
+    ]
+
+    if (
+        user_alert_state.last_event_received_at
+        != built_user_alert_state.last_event_received_at
+    ):
+        mismatches.append("last_event_received_at")
+
+    return mismatches
@@ -0,0 +1,234 @@
+from collections.abc import Iterable
+
+from app.events.constants import VELOCITY_GRANULARITIES, VELOCITY_RING_SIZE
+from app.events.domains import VelocityBucketDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.models import ActivityEvent
+from app.events.queries import get_velocity_buckets, save_velocity_buckets
+from lib.money import Cents
+
+# The alert code of each velocity rule, keyed by the type of activity event it sums and
+# then by the number of seconds its window spans
+VELOCITY_ALERT_CODES: dict[ActivityEventTypeEnum, dict[int, AlertCodeEnum]] = {
+    ActivityEventTypeEnum.DEPOSIT: {
+        300: AlertCodeEnum.DEPOSIT_VELOCITY_5_MINUTES_CODE,
+        3_600: AlertCodeEnum.DEPOSIT_VELOCITY_1_HOUR_CODE,
+        86_400: AlertCodeEnum.DEPOSIT_VELOCITY_24_HOURS_CODE,
+    },
+    ActivityEventTypeEnum.WITHDRAW: {
+        30: AlertCodeEnum.WITHDRAW_VELOCITY_30_SECONDS_CODE,
+        300: AlertCodeEnum.WITHDRAW_VELOCITY_5_MINUTES_CODE,
+        3_600: AlertCodeEnum.WITHDRAW_VELOCITY_1_HOUR_CODE,
+        86_400: AlertCodeEnum.WITHDRAW_VELOCITY_24_HOURS_CODE,
+    },
+}
+
+
+def get_velocity_granularity(window: int) -> int:
+    """
+    Selects the finest granularity whose ring holds every bucket overlapped by a velocity
+    window, wherever the window ends.
+
+    Raises:
+        ValueError: If the window spans more buckets than the coarsest ring holds
+    """
+    for granularity in VELOCITY_GRANULARITIES:
+        if window // granularity + 2 <= VELOCITY_RING_SIZE:
+            return granularity
+
+    raise ValueError(f"A velocity window of {window} seconds cannot be counted")
+
+
+def get_velocity_window_start(event_received_at: int, window: int) -> int:
+    """Produces the start of the earliest bucket included in a velocity window ending at
+    the dispatch time of an event.
+
+    Windows are aligned to the buckets they are summed from, so a window includes up to
+    one bucket's width of events dispatched before it, such as up to 25 hours of events
+    for a 24 hour window summed from one hour buckets. The partial leading bucket cannot
+    be subtracted using a finer ring, as the finest ring spanning the window is the one
+    it is summed from, so every finer ring has replaced the buckets at its start. The
+    tolerance errs towards raising an alert, and is at most the window divided by
+    `VELOCITY_RING_SIZE - 2` when the window spans every bucket of its ring.
+    """
+    granularity: int = get_velocity_granularity(window=window)
+    return (event_received_at - window) // granularity * granularity
+
+
+class VelocityCounter:
+    """
+    Hierarchical time-bucket counters of the amounts of the activity events of a user.
+
+    Every amount is added to a bucket of each granularity, so the total within any
+    velocity window is summed from at most `VELOCITY_RING_SIZE` buckets of the finest ring
+    spanning it, rather than from every event within it.
+
+    Args:
+        buckets: The buckets to begin with, at most one per slot
+    """
+
+    def __init__(self, buckets: Iterable[VelocityBucketDomain] = ()) -> None:
+        self._rings: dict[
+            tuple[ActivityEventTypeEnum, int], list[VelocityBucketDomain | None]
+        ] = {}
+
+        for bucket in buckets:
+            self._get_ring(
+                transaction_type=bucket.transaction_type,
+                granularity=bucket.granularity,
+            )[bucket.slot] = bucket
+
+    @property
+    def buckets(self) -> list[VelocityBucketDomain]:
+        return [
+            bucket
+            for ring in self._rings.values()
+            for bucket in ring
+            if bucket is not None
+        ]
+
+    def add(
+        self,
+        transaction_type: ActivityEventTypeEnum,
+        event_received_at: int,
+        amount: Cents,
+    ) -> None:
+        """
+        Adds the amount of an activity event to its bucket of each granularity.
+
+        An event dispatched within a bucket which has already been replaced is outside
+        every window the ring can answer, so it is not counted.
+        """
+        for granularity in VELOCITY_GRANULARITIES:
+            index: int = event_received_at // granularity
+            slot: int = index % VELOCITY_RING_SIZE
+            bucket_start: int = index * granularity
+
+            ring: list[VelocityBucketDomain | None] = self._get_ring(
+                transaction_type=transaction_type, granularity=granularity
+            )
+            bucket: VelocityBucketDomain | None = ring[slot]
+
+            if bucket is None or bucket.bucket_start < bucket_start:
+                ring[slot] = VelocityBucketDomain(
+                    transaction_type=transaction_type,
+                    granularity=granularity,
+                    slot=slot,
+                    bucket_start=bucket_start,
+                    amount=amount,
+                )
+            elif bucket.bucket_start == bucket_start:
+                ring[slot] = bucket._replace(amount=bucket.amount + amount)
+
+    def get_total(
+        self,
+        transaction_type: ActivityEventTypeEnum,
+        event_received_at: int,
+        window: int,
+    ) -> Cents:
+        """
+        Sums the amounts of a type of activity event within the velocity window ending at
+        a dispatch time, in O(`VELOCITY_RING_SIZE`).
+
+        Events dispatched after the window ends are excluded, unless they are within the
+        same bucket as its end, while events up to one bucket before it starts are
+        included, as described by `get_velocity_window_start`.
+        """
+        ring: list[VelocityBucketDomain | None] = self._rings.get(
+            (transaction_type, get_velocity_granularity(window=window)), []
+        )
+        window_start: int = get_velocity_window_start(
+            event_received_at=event_received_at, window=window
+        )
+
+        return sum(
+            (
+                bucket.amount
+                for bucket in ring
+                if bucket is not None
+                and window_start <= bucket.bucket_start <= event_received_at
+            ),
+            start=0,
+        )
+
+    def _get_ring(
+        self, transaction_type: ActivityEventTypeEnum, granularity: int
+    ) -> list[VelocityBucketDomain | None]:
+        return self._rings.setdefault(
+            (transaction_type, granularity), [None] * VELOCITY_RING_SIZE
+        )
+
+
+def get_velocity_counter(user_id: int, event_received_at: int) -> VelocityCounter:
+    """Retrieves the velocity counters of a user for an event dispatched at
+    `event_received_at`."""
+    return VelocityCounter(
+        buckets=get_velocity_buckets(
+            user_ids=[user_id], event_received_at=event_received_at
+        ).get(user_id, [])
+    )
+
+
+def get_added_velocity_buckets(
+    activity_events: list[ActivityEvent],
+) -> dict[int, list[VelocityBucketDomain]]:
+    """
+    Aggregates the amounts of activity events into the velocity buckets they are added
+    to, at most one per slot of each user, so a statement adding them is bounded by the
+    number of buckets rather than events.
+
+    Args:
+        activity_events: The activity events being processed
+
+    Returns:
+        dict[int, list[VelocityBucketDomain]]: The buckets of each user, keyed by `user_id`
+    """
+    added_velocity_counters: dict[int, VelocityCounter] = {}
+    for activity_event in activity_events:
+        added_velocity_counters.setdefault(
+            activity_event.user_id, VelocityCounter()
+        ).add(
+            transaction_type=activity_event.transaction_type,
+            event_received_at=activity_event.event_received_at,
+            amount=activity_event.amount,
+        )
+
+    return {
+        user_id: velocity_counter.buckets
+        for user_id, velocity_counter in added_velocity_counters.items()
+    }
+
+
+def save_activity_events_to_velocity_counters(
+    activity_events: list[ActivityEvent],
+) -> dict[int, VelocityCounter]:
+    """
+    Adds activity events to the velocity buckets of their users and retrieves the counters
+    of each user as they were before the events, in a single statement.
+
+    Used when the history of the users is not retrieved from the database, as otherwise
+    the buckets are added to and retrieved within the same statement as the history.
+
+    Args:
+        activity_events: The activity events being processed
+
+    Returns:
+        dict[int, VelocityCounter]: The counters of each user, keyed by `user_id`
+    """
+    if not activity_events:
+        return {}
+
+    added_velocity_buckets: dict[int, list[VelocityBucketDomain]] = (
+        get_added_velocity_buckets(activity_events=activity_events)
+    )
+    velocity_buckets: dict[int, list[VelocityBucketDomain]] = save_velocity_buckets(
+        velocity_buckets=added_velocity_buckets,
+        event_received_at=min(
+            activity_event.event_received_at for activity_event in activity_events
+        ),
+    )
+
+    return {
+        user_id: VelocityCounter(buckets=velocity_buckets.get(user_id, []))
+        for user_id in added_velocity_buckets
+    }
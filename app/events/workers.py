@@ -0,0 +1,100 @@
+import threading
+
+import structlog
+from flask import Flask
+
+from app import db
+from app.events.controllers import process_queued_activity_events
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+class ActivityEventQueueWorkerPool:
+    """
+    A pool of threads which each drain the activity event queue in batches.
+
+    Each worker has its own application context, and so its own session and connection.
+    Workers poll the queue only once a batch comes back short of `batch_size`, so a
+    backlog is drained without waiting.
+
+    Args:
+        app: The application the workers run within
+        concurrency: The number of workers
+        batch_size: The maximum number of events evaluated per transaction
+        poll_interval: The seconds a worker waits before polling an empty queue
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        concurrency: int = 4,
+        batch_size: int = 100,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.app: Flask = app
+        self.concurrency: int = concurrency
+        self.batch_size: int = batch_size
+        self.poll_interval: float = poll_interval
+
+        self._stopping: threading.Event = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._work,
+                name=f"activity-event-queue-worker-{index}",
+                daemon=True,
+            )
+            for index in range(self.concurrency)
+        ]
+
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Signals the workers to stop once their current batch is committed."""
+        self._stopping.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until the pool is stopped, or the timeout elapses."""
+        return self._stopping.wait(timeout=timeout)
+
+    def _work(self) -> None:
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    processed: int = process_queued_activity_events(
+                        batch_size=self.batch_size
+                    )
+                except Exception:
+                    db.session.rollback()
+                    log.exception("failed to process queued events")
+                    processed = 0
+
+                if processed:
+                    log.debug("processed queued events", count=processed)
+
+                if processed < self.batch_size:
+                    self._stopping.wait(timeout=self.poll_interval)
+
+
+def drain_activity_event_queue(batch_size: int = 100) -> int:
+    """
+    Evaluates queued events in the current thread until the queue is empty.
+
+    Returns:
+        int: The number of events claimed, including each attempt of an event which
+            failed to be evaluated
+    """
+    total: int = 0
+
+    while processed := process_queued_activity_events(batch_size=batch_size):
+        total += processed
+
+    return total
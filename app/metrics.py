@@ -0,0 +1,112 @@
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from flask import Blueprint, Flask, Response, g, request
+from sqlalchemy.pool import QueuePool
+
+from lib.metrics import CONTENT_TYPE, Counter, Gauge, Histogram, MetricsRegistry
+
+if TYPE_CHECKING:
+    from sqlalchemy.pool import ConnectionPoolEntry
+
+registry: MetricsRegistry = MetricsRegistry()
+
+request_duration: Histogram = Histogram(
+    name="http_request_duration_seconds",
+    documentation="The time taken to handle a request.",
+    registry=registry,
+    labelnames=("method", "route", "status"),
+)
+requests_in_flight: Gauge = Gauge(
+    name="http_requests_in_flight",
+    documentation="The number of requests being handled.",
+    registry=registry,
+)
+request_queries: Histogram = Histogram(
+    name="http_request_queries",
+    documentation="The number of statements executed while handling a request.",
+    registry=registry,
+    labelnames=("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+alert_rule_duration: Histogram = Histogram(
+    name="alert_rule_evaluation_duration_seconds",
+    documentation="The time taken to evaluate an alert rule against an event.",
+    registry=registry,
+    labelnames=("code",),
+    buckets=(0.000_001, 0.000_005, 0.000_01, 0.000_05, 0.000_1, 0.000_5, 0.001, 0.01),
+)
+alert_rule_hits: Counter = Counter(
+    name="alert_rule_hits_total",
+    documentation="The number of events which triggered an alert rule.",
+    registry=registry,
+    labelnames=("code",),
+)
+db_pool_checkout_wait: Histogram = Histogram(
+    name="db_pool_checkout_wait_seconds",
+    documentation="The time waited to check a connection out of the database pool.",
+    registry=registry,
+    buckets=(0.000_1, 0.000_5, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+routes: Blueprint = Blueprint(name="metrics", import_name=__name__)
+
+
+@routes.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """Exposes the metrics of every process of the application, in the text format read
+    by Prometheus.
+    """
+    return Response(registry.generate(), content_type=CONTENT_TYPE)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    A queue pool recording how long each checkout waits for a connection, including the
+    time taken to open one when none are idle.
+    """
+
+    def _do_get(self) -> "ConnectionPoolEntry":
+        started_at: float = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at)
+
+
+def _start_request() -> None:
+    g.metrics_started_at = time.perf_counter()
+    requests_in_flight.inc()
+
+
+def _record_status(response: Response) -> Response:
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(_exception: BaseException | None) -> None:
+    # The request was rejected before its metrics were started
+    if (started_at := g.pop("metrics_started_at", None)) is None:
+        return
+
+    requests_in_flight.dec()
+
+    # Requests matching no route are labelled together, rather than by their path
+    route: str = request.url_rule.rule if request.url_rule else "unmatched"
+    request_duration.labels(
+        request.method, route, str(g.pop("metrics_status", 500))
+    ).observe(time.perf_counter() - started_at)
+    # The statements are counted by the hooks of `app.datastores.db`
+    if (query_stats := g.get("query_stats")) is not None:
+        request_queries.labels(request.method, route).observe(query_stats.count)
+
+
+def init_app(app: Flask) -> None:
+    directory: str = app.config["METRICS_DIR"]
+    registry.configure(directory=Path(directory) if directory else None)
+
+    app.register_blueprint(blueprint=routes)
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
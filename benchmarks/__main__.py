@@ -0,0 +1,27 @@
+"""Runs every benchmark module, or only those named on the command line.
+
+Usage:
+    python -m benchmarks
+    python -m benchmarks bench_history_lookback
+"""
+
+import importlib
+import pkgutil
+import sys
+
+import benchmarks
+
+
+def main(names: list[str]) -> None:
+    modules: list[str] = names or sorted(
+        module.name
+        for module in pkgutil.iter_modules(benchmarks.__path__)
+        if module.name.startswith("bench_")
+    )
+
+    for name in modules:
+        importlib.import_module(f"benchmarks.{name}").main()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
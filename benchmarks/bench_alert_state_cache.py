@@ -0,0 +1,80 @@
+"""Compares evaluating and persisting events for hot users through each alert state
+backend: the single statement query path, the in-process alert state cache and the
+`user_alert_state` table.
+"""
+
+from collections.abc import Callable
+
+from app import config, db
+from app.events.cache import alert_state_cache
+from app.events.controllers import save_activity_event_and_check_alerts
+from app.events.enums import AlertStateBackendEnum
+from app.events.models import ActivityEvent
+from app.events.state import build_user_alert_state
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    build_activity_events,
+    count_statements,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+    seed_activity_events,
+)
+
+HISTORY_SIZE: int = 1_000
+ITERATIONS: int = 1_000
+
+
+def main() -> None:
+    with benchmark_app():
+        delete_benchmark_activity_events()
+
+        timings: list[Timings] = []
+        statements_per_event: dict[str, float] = {}
+        try:
+            for index, backend in enumerate(AlertStateBackendEnum):
+                user_id: int = BENCHMARK_USER_ID_OFFSET + index
+                seed_activity_events(user_id=user_id, count=HISTORY_SIZE)
+                build_activity_event = build_activity_events(
+                    user_id=user_id, start=BENCHMARK_EPOCH + HISTORY_SIZE
+                )
+
+                config.ALERT_STATE_BACKEND = backend
+                if backend == AlertStateBackendEnum.CACHE:
+                    alert_state_cache.register_write_through()
+                if backend == AlertStateBackendEnum.TABLE:
+                    db.save(model=build_user_alert_state(user_id=user_id))
+
+                def save_and_check_alerts(
+                    build: Callable[[], ActivityEvent] = build_activity_event,
+                ) -> None:
+                    save_activity_event_and_check_alerts(activity_event=build())
+
+                with count_statements() as statements:
+                    timings.append(
+                        measure(
+                            backend,
+                            save_and_check_alerts,
+                            iterations=ITERATIONS,
+                            warmup=0,
+                        )
+                    )
+                statements_per_event[backend] = statements.count / ITERATIONS
+
+                alert_state_cache.unregister_write_through()
+        finally:
+            alert_state_cache.unregister_write_through()
+            config.ALERT_STATE_BACKEND = AlertStateBackendEnum.QUERY
+            delete_benchmark_activity_events()
+
+    report(f"Alert state backends ({HISTORY_SIZE} events of history)", timings)
+    for name, count in statements_per_event.items():
+        print(f"{name}: {count:.2f} statements per event (excluding COMMIT)")
+    print(f"cache: {alert_state_cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
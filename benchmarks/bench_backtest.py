@@ -0,0 +1,94 @@
+"""Measures the throughput of the vectorised backtest, over synthetic events held in
+memory and over events loaded from the database with `load_activity_event_arrays`.
+"""
+
+import numpy as np
+
+from app.events.backtest import (
+    ActivityEventArrays,
+    backtest_alerts,
+    load_activity_event_arrays,
+)
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+    seed_activity_events,
+)
+from lib.money import CENTS_PER_UNIT
+
+EVENTS: int = 5_000_000
+USERS: int = 100_000
+SEEDED_USERS: int = 200
+SEEDED_EVENTS_PER_USER: int = 500
+
+
+def build_activity_event_arrays(events: int, users: int) -> ActivityEventArrays:
+    rng: np.random.Generator = np.random.default_rng(seed=0)
+    user_id: np.ndarray = np.sort(rng.integers(0, users, size=events, dtype=np.int64))
+
+    # Events are spread a few seconds apart, so deposits regularly fall either side of
+    # the accumulative deposit time window
+    event_received_at: np.ndarray = BENCHMARK_EPOCH + np.cumsum(
+        rng.integers(1, 20, size=events, dtype=np.int64)
+    )
+
+    return ActivityEventArrays(
+        id=np.zeros(events, dtype="V16"),
+        user_id=user_id + BENCHMARK_USER_ID_OFFSET,
+        event_received_at=event_received_at,
+        is_deposit=rng.random(size=events) < 0.6,
+        amount=rng.integers(1, 150, size=events, dtype=np.int64) * CENTS_PER_UNIT,
+    )
+
+
+def main() -> None:
+    arrays: ActivityEventArrays = build_activity_event_arrays(
+        events=EVENTS, users=USERS
+    )
+
+    timings: list[Timings] = [
+        measure(
+            f"backtest {EVENTS:,} events",
+            lambda: backtest_alerts(arrays=arrays),
+            iterations=5,
+            warmup=1,
+        )
+    ]
+    events_per_second: dict[str, float] = {
+        timings[-1].name: timings[-1].ops_per_second * EVENTS
+    }
+
+    with benchmark_app():
+        delete_benchmark_activity_events()
+        try:
+            for user_id in range(SEEDED_USERS):
+                seed_activity_events(
+                    user_id=BENCHMARK_USER_ID_OFFSET + user_id,
+                    count=SEEDED_EVENTS_PER_USER,
+                )
+
+            events: int = len(load_activity_event_arrays())
+            timings.append(
+                measure(
+                    f"load {events:,} events",
+                    load_activity_event_arrays,
+                    iterations=5,
+                    warmup=1,
+                )
+            )
+            events_per_second[timings[-1].name] = timings[-1].ops_per_second * events
+        finally:
+            delete_benchmark_activity_events()
+
+    report("Alert backtest", timings)
+    for name, count in events_per_second.items():
+        print(f"{name}: {count:,.0f} events per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compares the throughput of posting events one at a time to `POST /event`, both
+synchronously and queued with `Prefer: respond-async`, against posting them in batches of
+increasing size to `POST /event/batch`, and as a single NDJSON stream to
+`POST /event/stream`.
+"""
+
+import itertools
+import time
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import ujson
+
+from app.events.workers import drain_activity_event_queue
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+)
+
+if TYPE_CHECKING:
+    from flask.testing import FlaskClient
+
+EVENTS: int = 5_000
+USERS: int = 100
+BATCH_SIZES: tuple[int, ...] = (10, 100, 1_000)
+QUEUE_BATCH_SIZE: int = 100
+
+
+def build_event_payloads() -> Iterator[dict]:
+    for index in itertools.count():
+        yield {
+            "type": "deposit" if index % 3 else "withdraw",
+            "amount": f"{10 + index % 50}.00",
+            "user_id": BENCHMARK_USER_ID_OFFSET + index % USERS,
+            "t": BENCHMARK_EPOCH + index,
+        }
+
+
+def main() -> None:
+    with benchmark_app() as app:
+        delete_benchmark_activity_events()
+        client: FlaskClient = app.test_client()
+        event_payloads: Iterator[dict] = build_event_payloads()
+
+        timings: list[Timings] = []
+        events_per_second: dict[str, float] = {}
+        try:
+
+            def post_event() -> None:
+                client.post("/event", json=next(event_payloads))
+
+            timings.append(measure("single event", post_event, iterations=EVENTS))
+            events_per_second["single event"] = timings[-1].ops_per_second
+
+            def post_event_async() -> None:
+                client.post(
+                    "/event",
+                    json=next(event_payloads),
+                    headers={"Prefer": "respond-async"},
+                )
+
+            timings.append(
+                measure("single event (async)", post_event_async, iterations=EVENTS)
+            )
+            events_per_second["single event (async)"] = timings[-1].ops_per_second
+
+            started_at: float = time.perf_counter()
+            queued: int = drain_activity_event_queue(batch_size=QUEUE_BATCH_SIZE)
+            events_per_second[f"drain queue in batches of {QUEUE_BATCH_SIZE}"] = (
+                queued / (time.perf_counter() - started_at)
+            )
+
+            for batch_size in BATCH_SIZES:
+
+                def post_batch(size: int = batch_size) -> None:
+                    client.post(
+                        "/event/batch",
+                        json=list(itertools.islice(event_payloads, size)),
+                    )
+
+                name: str = f"batch of {batch_size}"
+                timings.append(
+                    measure(name, post_batch, iterations=max(EVENTS // batch_size, 2))
+                )
+                events_per_second[name] = timings[-1].ops_per_second * batch_size
+
+            def post_stream() -> None:
+                # The response is streamed, so it is read to evaluate every event
+                client.post(
+                    "/event/stream",
+                    data=b"".join(
+                        ujson.dumps(event_payload).encode() + b"\n"
+                        for event_payload in itertools.islice(event_payloads, EVENTS)
+                    ),
+                    content_type="application/x-ndjson",
+                ).get_data()
+
+            name = f"stream of {EVENTS}"
+            timings.append(measure(name, post_stream, iterations=2, warmup=1))
+            events_per_second[name] = timings[-1].ops_per_second * EVENTS
+        finally:
+            delete_benchmark_activity_events()
+
+    report(f"Event ingestion ({USERS} users)", timings)
+    for name, count in events_per_second.items():
+        print(f"{name}: {count:,.0f} events per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compares the throughput of loading historical events with `db.save_all` against
+`import_activity_events`, which validates NDJSON in chunks and loads them with `COPY`,
+with an increasing number of workers.
+"""
+
+import io
+import time
+import uuid
+
+import ujson
+from sqlalchemy import delete
+
+from app import db
+from app.events.enums import ActivityEventImportFormatEnum, ActivityEventTypeEnum
+from app.events.imports import import_activity_events
+from app.events.models import ActivityEvent, ActivityEventImportChunk
+from benchmarks.bench_batch_ingestion import build_event_payloads
+from benchmarks.utils import benchmark_app, delete_benchmark_activity_events
+
+EVENTS: int = 100_000
+SAVE_ALL_EVENTS: int = 10_000
+CHUNK_SIZE: int = 10_000
+WORKER_COUNTS: tuple[int, ...] = (1, 2, 4)
+
+
+def build_ndjson(count: int) -> str:
+    payloads = build_event_payloads()
+    return "".join(ujson.dumps(next(payloads)) + "\n" for _ in range(count))
+
+
+def main() -> None:
+    ndjson: str = build_ndjson(count=EVENTS)
+    events_per_second: dict[str, float] = {}
+
+    with benchmark_app() as app:
+        delete_benchmark_activity_events()
+        try:
+            payloads = build_event_payloads()
+            activity_events: list[ActivityEvent] = [
+                ActivityEvent(
+                    transaction_type=(
+                        ActivityEventTypeEnum.DEPOSIT
+                        if payload["type"] == "deposit"
+                        else ActivityEventTypeEnum.WITHDRAW
+                    ),
+                    amount=payload["amount"],
+                    user_id=payload["user_id"],
+                    event_received_at=payload["t"],
+                )
+                for payload in (next(payloads) for _ in range(SAVE_ALL_EVENTS))
+            ]
+
+            started_at: float = time.perf_counter()
+            db.save_all(models=activity_events)
+            events_per_second["db.save_all"] = SAVE_ALL_EVENTS / (
+                time.perf_counter() - started_at
+            )
+            delete_benchmark_activity_events()
+
+            for workers in WORKER_COUNTS:
+                source: str = f"benchmark-{uuid.uuid4()}"
+
+                started_at = time.perf_counter()
+                import_activity_events(
+                    app=app,
+                    stream=io.StringIO(ndjson),
+                    file_format=ActivityEventImportFormatEnum.NDJSON,
+                    source=source,
+                    chunk_size=CHUNK_SIZE,
+                    workers=workers,
+                )
+                events_per_second[f"COPY import ({workers} workers)"] = EVENTS / (
+                    time.perf_counter() - started_at
+                )
+
+                db.session.execute(
+                    delete(ActivityEventImportChunk).where(
+                        ActivityEventImportChunk.source == source
+                    )
+                )
+                delete_benchmark_activity_events()
+        finally:
+            delete_benchmark_activity_events()
+
+    print("\nHistorical events loaded per second")
+    for name, rate in events_per_second.items():
+        print(f"{name:<32} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
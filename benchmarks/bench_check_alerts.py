@@ -0,0 +1,134 @@
+"""Measures evaluating the alert rules of an event against a prefetched history held in
+memory, with amounts held as integers of cents against amounts held as `Decimal`, as
+they were before, and loading an amount from a request payload with each field.
+
+No statements are executed, so only the arithmetic and comparisons of the rules and the
+parsing of amounts are measured.
+"""
+
+import itertools
+from collections.abc import Callable, Iterator
+from decimal import Decimal
+from typing import Any
+
+from app.events.controllers import (
+    alert_rules,
+    apply_activity_event_to_history,
+    check_alerts,
+    move_deposit_window,
+)
+from app.events.domains import ActivityEventFetchPlanDomain, ActivityEventHistoryDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from app.events.velocity import VelocityCounter
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    measure,
+    report,
+)
+from lib import fields
+
+HISTORY_SIZE: int = 100
+EVENTS: int = 1_000
+ITERATIONS: int = 50_000
+
+
+def build_activity_events(
+    to_amount: Callable[[int], Any], count: int, start: int
+) -> list[ActivityEvent]:
+    return [
+        ActivityEvent(
+            transaction_type=(
+                ActivityEventTypeEnum.DEPOSIT
+                if index % 2
+                else ActivityEventTypeEnum.WITHDRAW
+            ),
+            amount=to_amount((10 + index % 90) * 100 + index % 100),
+            user_id=BENCHMARK_USER_ID_OFFSET,
+            event_received_at=start + index,
+        )
+        for index in range(count)
+    ]
+
+
+def build_activity_event_history(
+    activity_events: list[ActivityEvent], zero: Any
+) -> ActivityEventHistoryDomain:
+    fetch_plan: ActivityEventFetchPlanDomain = alert_rules.get_fetch_plan()
+    activity_event_history = ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[],
+        amount_deposited_within_window=zero,
+        consecutive_withdraw_count=0,
+        deposits_within_window=[],
+        velocity_counter=VelocityCounter(),
+    )
+
+    for activity_event in activity_events:
+        apply_activity_event_to_history(
+            activity_event_history=activity_event_history,
+            activity_event=activity_event,
+            fetch_plan=fetch_plan,
+        )
+    move_deposit_window(
+        activity_event_history=activity_event_history,
+        event_received_at=BENCHMARK_EPOCH + HISTORY_SIZE,
+        fetch_plan=fetch_plan,
+    )
+
+    return activity_event_history
+
+
+def measure_check_alerts(name: str, to_amount: Callable[[int], Any]) -> Timings:
+    activity_event_history: ActivityEventHistoryDomain = build_activity_event_history(
+        activity_events=build_activity_events(
+            to_amount=to_amount, count=HISTORY_SIZE, start=BENCHMARK_EPOCH
+        ),
+        zero=to_amount(0),
+    )
+    activity_events: Iterator[ActivityEvent] = itertools.cycle(
+        build_activity_events(
+            to_amount=to_amount, count=EVENTS, start=BENCHMARK_EPOCH + HISTORY_SIZE
+        )
+    )
+
+    return measure(
+        f"check_alerts ({name})",
+        lambda: check_alerts(
+            user_id=BENCHMARK_USER_ID_OFFSET,
+            current_activity_event=next(activity_events),
+            activity_event_history=activity_event_history,
+        ),
+        iterations=ITERATIONS,
+        warmup=1_000,
+    )
+
+
+def measure_load_amount(name: str, field: Any) -> Timings:
+    amounts: Iterator[str] = itertools.cycle(
+        f"{amount // 100}.{amount % 100:02d}" for amount in range(1_000, 100_000, 7)
+    )
+
+    return measure(
+        f"load amount ({name})",
+        lambda: field.deserialize(next(amounts)),
+        iterations=ITERATIONS,
+        warmup=1_000,
+    )
+
+
+def main() -> None:
+    timings: list[Timings] = [
+        measure_check_alerts("Decimal amounts", to_amount=lambda cents: Decimal(cents)),
+        measure_check_alerts("integer cents", to_amount=int),
+        measure_load_amount("Decimal field", field=fields.Decimal()),
+        measure_load_amount("integer cents field", field=fields.Cents()),
+    ]
+
+    report("Check alerts", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measures how the throughput of `save_activity_event_and_check_alerts` scales with the
+number of threads, when every thread sends events for its own user and when every thread
+sends events for the same user, which are serialised.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from flask import Flask
+
+from app.events.controllers import save_activity_event_and_check_alerts
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    benchmark_app,
+    build_activity_events,
+    delete_benchmark_activity_events,
+)
+
+EVENTS_PER_THREAD: int = 500
+THREAD_COUNTS: tuple[int, ...] = (1, 2, 4, 8)
+
+
+def run_threads(app: Flask, threads: int, get_user_id: Callable[[int], int]) -> float:
+    """Runs `threads` threads which each save `EVENTS_PER_THREAD` events, returning the
+    number of events saved per second.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def work(index: int) -> None:
+        build = build_activity_events(
+            user_id=get_user_id(index),
+            start=BENCHMARK_EPOCH + index * EVENTS_PER_THREAD,
+        )
+
+        with app.app_context():
+            barrier.wait()
+            for _ in range(EVENTS_PER_THREAD):
+                save_activity_event_and_check_alerts(activity_event=build())
+
+    workers: list[threading.Thread] = [
+        threading.Thread(target=work, args=(index,)) for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    started_at: float = time.perf_counter()
+    for worker in workers:
+        worker.join()
+
+    return threads * EVENTS_PER_THREAD / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    results: dict[str, list[float]] = {}
+
+    with benchmark_app() as app:
+        delete_benchmark_activity_events()
+        try:
+            for name, get_user_id in (
+                ("user per thread", lambda index: BENCHMARK_USER_ID_OFFSET + index),
+                ("same user", lambda _index: BENCHMARK_USER_ID_OFFSET),
+            ):
+                results[name] = []
+                for threads in THREAD_COUNTS:
+                    results[name].append(
+                        run_threads(app=app, threads=threads, get_user_id=get_user_id)
+                    )
+                    delete_benchmark_activity_events()
+        finally:
+            delete_benchmark_activity_events()
+
+    print("\nConcurrent events per second")
+    print(f"{'threads':<20}" + "".join(f"{threads:>12}" for threads in THREAD_COUNTS))
+    for name, events_per_second in results.items():
+        print(
+            f"{name:<20}" + "".join(f"{count:>12,.0f}" for count in events_per_second)
+        )
+
+
+if __name__ == "__main__":
+    main()
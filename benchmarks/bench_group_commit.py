@@ -0,0 +1,116 @@
+"""Measures the throughput of single events sent by concurrent threads, when each event is
+committed within its own transaction and when they are committed together by the
+`ActivityEventGroupCommitter`, along with the number of commits each needs per second.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.events.controllers import save_activity_event_and_check_alerts
+from app.events.group_commit import ActivityEventGroupCommitter
+from app.events.models import ActivityEvent
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    benchmark_app,
+    build_activity_events,
+    delete_benchmark_activity_events,
+)
+
+EVENTS_PER_THREAD: int = 250
+THREAD_COUNTS: tuple[int, ...] = (1, 8, 24)
+
+
+def run_threads(
+    app: Flask, threads: int, save: Callable[[ActivityEvent], object]
+) -> tuple[float, float]:
+    """Runs `threads` threads which each save `EVENTS_PER_THREAD` events for their own
+    user, returning the number of events saved and commits issued per second.
+    """
+    barrier = threading.Barrier(threads + 1)
+    commits: list[int] = [0]
+
+    def count_commit(_session: Session) -> None:
+        commits[0] += 1
+
+    def work(index: int) -> None:
+        build = build_activity_events(
+            user_id=BENCHMARK_USER_ID_OFFSET + index,
+            start=BENCHMARK_EPOCH + index * EVENTS_PER_THREAD,
+        )
+
+        with app.app_context():
+            barrier.wait()
+            for _ in range(EVENTS_PER_THREAD):
+                save(build())
+
+    workers: list[threading.Thread] = [
+        threading.Thread(target=work, args=(index,)) for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+
+    event.listen(Session, "after_commit", count_commit)
+    try:
+        barrier.wait()
+        started_at: float = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed: float = time.perf_counter() - started_at
+    finally:
+        event.remove(Session, "after_commit", count_commit)
+
+    return threads * EVENTS_PER_THREAD / elapsed, commits[0] / elapsed
+
+
+def main() -> None:
+    results: dict[str, list[tuple[float, float]]] = {}
+
+    with benchmark_app() as app:
+        group_committer = ActivityEventGroupCommitter(max_size=100, interval=0.005)
+        group_committer.start(app=app)
+
+        delete_benchmark_activity_events()
+        try:
+            for name, save in (
+                (
+                    "commit per event",
+                    lambda activity_event: save_activity_event_and_check_alerts(
+                        activity_event=activity_event
+                    ),
+                ),
+                (
+                    "group commit",
+                    lambda activity_event: group_committer.save(
+                        activity_event=activity_event
+                    ),
+                ),
+            ):
+                results[name] = []
+                for threads in THREAD_COUNTS:
+                    results[name].append(
+                        run_threads(app=app, threads=threads, save=save)
+                    )
+                    delete_benchmark_activity_events()
+        finally:
+            group_committer.stop()
+            delete_benchmark_activity_events()
+
+    print("\nConcurrent single events per second (commits per second)")
+    print(f"{'threads':<20}" + "".join(f"{threads:>22}" for threads in THREAD_COUNTS))
+    for name, rates in results.items():
+        print(
+            f"{name:<20}"
+            + "".join(
+                f"{f'{events:,.0f} ({commits:,.0f})':>22}" for events, commits in rates
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
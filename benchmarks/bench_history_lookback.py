@@ -0,0 +1,80 @@
+"""Compares the unbounded history fetch previously used by the consecutive alert rules
+with the bounded lookback fetch, for users with increasingly long histories.
+
+The bounded fetch and `check_alerts` should stay flat as the history grows, while the
+unbounded fetch grows linearly with it.
+"""
+
+from functools import partial
+
+from app.events.constants import CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT
+from app.events.controllers import check_alerts
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from app.events.queries import get_activity_events, get_recent_activity_events
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+    seed_activity_events,
+)
+
+HISTORY_SIZES: list[int] = [100, 1_000, 10_000, 25_000]
+
+
+def main() -> None:
+    with benchmark_app():
+        delete_benchmark_activity_events()
+
+        timings: list[Timings] = []
+        try:
+            for index, history_size in enumerate(HISTORY_SIZES):
+                user_id: int = BENCHMARK_USER_ID_OFFSET + index
+                seed_activity_events(user_id=user_id, count=history_size)
+
+                current_activity_event: ActivityEvent = ActivityEvent(
+                    transaction_type=ActivityEventTypeEnum.WITHDRAW,
+                    amount=50_00,
+                    user_id=user_id,
+                    event_received_at=BENCHMARK_EPOCH + history_size,
+                )
+
+                timings.extend(
+                    [
+                        measure(
+                            f"unbounded fetch ({history_size} events)",
+                            partial(get_activity_events, user_id=user_id),
+                            iterations=20,
+                        ),
+                        measure(
+                            f"bounded fetch ({history_size} events)",
+                            partial(
+                                get_recent_activity_events,
+                                user_id=user_id,
+                                lookback=CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT - 1,
+                            ),
+                            iterations=500,
+                        ),
+                        measure(
+                            f"check_alerts ({history_size} events)",
+                            partial(
+                                check_alerts,
+                                user_id=user_id,
+                                current_activity_event=current_activity_event,
+                            ),
+                            iterations=500,
+                        ),
+                    ]
+                )
+        finally:
+            delete_benchmark_activity_events()
+
+    report("History lookback", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Compares the insert throughput and lookup latency of `activity_event` with its current
+indexes against the layout it previously had, which also indexed `created_at`,
+`updated_at` and `event_received_at` with b-trees and did not cover the lookbacks.
+
+The previous layout is recreated for the duration of the benchmark and the current
+layout is restored afterwards, so it should only be run against a test database.
+"""
+
+import itertools
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+
+from sqlalchemy import insert, text
+
+from app import db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from app.events.queries import (
+    get_amount_deposited_within_window,
+    get_recent_activity_events,
+)
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+    seed_activity_events,
+)
+
+HISTORY_SIZE: int = 10_000
+INSERTS: int = 2_000
+BULK_INSERT_SIZE: int = 20_000
+USERS: int = 100
+
+PREVIOUS_INDEXES: tuple[str, ...] = (
+    "CREATE INDEX bench_ix_activity_event_created_at ON activity_event (created_at)",
+    "CREATE INDEX bench_ix_activity_event_updated_at ON activity_event (updated_at)",
+    "CREATE INDEX bench_ix_activity_event_event_received_at "
+    "ON activity_event (event_received_at)",
+    "CREATE INDEX bench_idx_events_created_by_user "
+    "ON activity_event (user_id, event_received_at)",
+)
+
+
+def vacuum_activity_events() -> None:
+    """Sets the visibility map of the seeded history, which index only scans rely on, as
+    autovacuum would once the table has settled.
+    """
+    db.session.commit()
+    with db.engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        connection.execute(text("VACUUM ANALYZE activity_event"))
+
+
+@contextmanager
+def previous_index_layout() -> Iterator[None]:
+    db.session.execute(text("DROP INDEX idx_events_created_by_user"))
+    db.session.execute(text("DROP INDEX brin_events_by_event_received_at"))
+    for statement in PREVIOUS_INDEXES:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+    try:
+        yield
+    finally:
+        db.session.rollback()
+        for name in (
+            "bench_ix_activity_event_created_at",
+            "bench_ix_activity_event_updated_at",
+            "bench_ix_activity_event_event_received_at",
+            "bench_idx_events_created_by_user",
+        ):
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for index in ActivityEvent.__table__.indexes:
+            if index.name in (
+                "idx_events_created_by_user",
+                "brin_events_by_event_received_at",
+            ):
+                index.create(bind=db.session.connection(), checkfirst=True)
+        db.session.commit()
+
+
+def measure_layout(layout: str) -> list[Timings]:
+    delete_benchmark_activity_events()
+    user_id: int = BENCHMARK_USER_ID_OFFSET
+    seed_activity_events(user_id=user_id, count=HISTORY_SIZE)
+    vacuum_activity_events()
+
+    received_at: Iterator[int] = itertools.count(BENCHMARK_EPOCH + HISTORY_SIZE)
+
+    def insert_activity_event() -> None:
+        event_received_at: int = next(received_at)
+        db.session.execute(
+            insert(ActivityEvent).values(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=10_00,
+                user_id=BENCHMARK_USER_ID_OFFSET + 1 + event_received_at % USERS,
+                event_received_at=event_received_at,
+            )
+        )
+        db.session.commit()
+
+    def bulk_insert_activity_events() -> None:
+        start: int = next(received_at)
+        db.session.execute(
+            insert(ActivityEvent),
+            [
+                {
+                    "transaction_type": ActivityEventTypeEnum.WITHDRAW,
+                    "amount": 10_00,
+                    "user_id": BENCHMARK_USER_ID_OFFSET + 1 + index % USERS,
+                    "event_received_at": start + index,
+                }
+                for index in range(BULK_INSERT_SIZE)
+            ],
+        )
+        db.session.commit()
+
+    timings: list[Timings] = [
+        measure(
+            f"recent events lookback ({layout})",
+            partial(get_recent_activity_events, user_id=user_id, lookback=3),
+            iterations=1_000,
+        ),
+        measure(
+            f"deposit window sum ({layout})",
+            partial(
+                get_amount_deposited_within_window,
+                user_id=user_id,
+                event_received_at=BENCHMARK_EPOCH + HISTORY_SIZE,
+            ),
+            iterations=1_000,
+        ),
+        measure(f"single insert ({layout})", insert_activity_event, iterations=INSERTS),
+    ]
+
+    bulk: Timings = measure(
+        f"bulk insert ({layout})", bulk_insert_activity_events, iterations=5, warmup=1
+    )
+    # Reported per event rather than per batch, so it is comparable with single inserts
+    timings.append(
+        Timings(
+            name=bulk.name,
+            samples=[sample / BULK_INSERT_SIZE for sample in bulk.samples],
+        )
+    )
+
+    return timings
+
+
+def main() -> None:
+    with benchmark_app():
+        timings: list[Timings] = []
+        try:
+            # Discarded, so neither layout is measured against a cold cache
+            measure_layout("warmup")
+            with previous_index_layout():
+                timings.extend(measure_layout("previous indexes"))
+            timings.extend(measure_layout("current indexes"))
+        finally:
+            delete_benchmark_activity_events()
+
+    report("Index layout", timings)
+
+
+if __name__ == "__main__":
+    main()
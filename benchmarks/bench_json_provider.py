@@ -0,0 +1,74 @@
+"""Compares decoding request bodies and encoding responses with the default JSON
+provider of Flask against `UJSONProvider`, for a single event sent to `POST /event` and
+a batch sent to `POST /event/batch`.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from app import create_app
+from benchmarks.utils import Timings, measure, report
+from lib.json import UJSONProvider
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+BATCH_SIZE: int = 500
+ITERATIONS: int = 5_000
+
+EVENT: dict[str, Any] = {
+    "type": "deposit",
+    "amount": "100.00",
+    "user_id": 1,
+    "t": 1577836800,
+}
+ALERT_RESPONSE: dict[str, Any] = {
+    "alert": True,
+    "alert_codes": [123, 300],
+    "user_id": 1,
+}
+
+
+def measure_provider(name: str, provider: JSONProvider) -> list[Timings]:
+    body: bytes = provider.dumps(EVENT).encode()
+    batch_body: bytes = provider.dumps([EVENT] * BATCH_SIZE).encode()
+    batch_response: list[dict[str, Any]] = [ALERT_RESPONSE] * BATCH_SIZE
+
+    return [
+        measure(
+            f"decode event ({name})",
+            lambda: provider.loads(body),
+            iterations=ITERATIONS,
+        ),
+        measure(
+            f"encode alert response ({name})",
+            lambda: provider.response(ALERT_RESPONSE),
+            iterations=ITERATIONS,
+        ),
+        measure(
+            f"decode batch ({name})",
+            lambda: provider.loads(batch_body),
+            iterations=ITERATIONS // 10,
+        ),
+        measure(
+            f"encode batch response ({name})",
+            lambda: provider.response(batch_response),
+            iterations=ITERATIONS // 10,
+        ),
+    ]
+
+
+def main() -> None:
+    app: Flask = create_app()
+
+    timings: list[Timings] = [
+        *measure_provider("default", DefaultJSONProvider(app)),
+        *measure_provider("ujson", UJSONProvider(app)),
+    ]
+
+    report("JSON provider", timings)
+
+
+if __name__ == "__main__":
+    main()
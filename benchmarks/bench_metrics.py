@@ -0,0 +1,93 @@
+"""Measures updating a metric, with its values held in memory against written through to
+the memory mapped file of the process within `METRICS_DIR`, and generating the metrics
+summed from the files of several workers.
+"""
+
+import tempfile
+from pathlib import Path
+
+from benchmarks.utils import Timings, measure, report
+from lib.metrics import Counter, Histogram, MetricsRegistry
+
+ITERATIONS: int = 100_000
+# The number of workers whose files are summed, each of which is written by a registry of
+# its own from this process
+WORKERS: int = 4
+ROUTES: int = 10
+
+
+def build_registry(
+    directory: Path | None,
+) -> tuple[MetricsRegistry, Counter, Histogram]:
+    registry = MetricsRegistry()
+    registry.configure(directory=directory)
+    counter = Counter(
+        name="events_total",
+        documentation="Events.",
+        registry=registry,
+        labelnames=("code",),
+    )
+    histogram = Histogram(
+        name="request_duration_seconds",
+        documentation="Request duration.",
+        registry=registry,
+        labelnames=("method", "route", "status"),
+    )
+
+    return registry, counter, histogram
+
+
+def measure_updates(name: str, directory: Path | None) -> list[Timings]:
+    _, counter, histogram = build_registry(directory=directory)
+
+    return [
+        measure(
+            f"counter inc ({name})",
+            lambda: counter.labels("1100").inc(),
+            iterations=ITERATIONS,
+            warmup=1_000,
+        ),
+        measure(
+            f"histogram observe ({name})",
+            lambda: histogram.labels("POST", "/event", "201").observe(0.002),
+            iterations=ITERATIONS,
+            warmup=1_000,
+        ),
+    ]
+
+
+def measure_generate(directory: Path) -> Timings:
+    registry: MetricsRegistry | None = None
+    for worker in range(WORKERS):
+        worker_directory: Path = directory / str(worker)
+        registry, _, histogram = build_registry(directory=worker_directory)
+        for route in range(ROUTES):
+            histogram.labels("POST", f"/route/{route}", "201").observe(0.002)
+
+        # Each worker writes to the shared directory under a file name of its own
+        for path in worker_directory.glob("*.db"):
+            path.rename(directory / f"{path.stem}_{worker}.db")
+
+    assert registry is not None
+    registry.configure(directory=directory)
+
+    return measure(
+        f"generate ({WORKERS} workers, {ROUTES} routes)",
+        registry.generate,
+        iterations=1_000,
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        timings: list[Timings] = [
+            *measure_updates("in memory", directory=None),
+            *measure_updates("METRICS_DIR", directory=Path(directory) / "updates"),
+            measure_generate(directory=Path(directory) / "generate"),
+        ]
+
+    report("Metrics", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compares ingesting events keyed by random UUIDv4 identifiers against the time-ordered
+UUIDv7 identifiers produced by `get_uuid`, by insert throughput, the size of the
+primary key index and the WAL written.
+
+Each is inserted into a table of its own with the primary key of `activity_event`, in
+committed batches as events are ingested, so the only difference is the order of the
+identifiers.
+"""
+
+import time
+import uuid
+from collections.abc import Callable
+
+from sqlalchemy import text
+
+from app import db
+from benchmarks.utils import BENCHMARK_EPOCH, benchmark_app
+from lib.utils import get_uuid
+
+EVENTS: int = 500_000
+BATCH_SIZE: int = 1_000
+TABLE: str = "benchmark_primary_key_order"
+
+
+def measure_ingest(
+    get_id: Callable[[], uuid.UUID],
+) -> tuple[float, int, int]:
+    """Returns the events inserted per second, the size of the primary key index and the
+    WAL written, both in bytes.
+    """
+    db.session.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    db.session.execute(
+        text(
+            f"CREATE TABLE {TABLE} (id UUID NOT NULL, amount BIGINT NOT NULL, "
+            "user_id BIGINT NOT NULL, event_received_at BIGINT NOT NULL, "
+            f"PRIMARY KEY (id, event_received_at))"
+        )
+    )
+    db.session.commit()
+
+    wal_start: str = db.session.scalar(text("SELECT pg_current_wal_lsn()"))
+    started_at: float = time.perf_counter()
+    for start in range(0, EVENTS, BATCH_SIZE):
+        db.session.execute(
+            text(
+                f"INSERT INTO {TABLE} (id, amount, user_id, event_received_at) "  # noqa: S608
+                "VALUES (:id, :amount, :user_id, :event_received_at)"
+            ),
+            [
+                {
+                    "id": get_id(),
+                    "amount": 1000,
+                    "user_id": index % 100,
+                    "event_received_at": BENCHMARK_EPOCH + index,
+                }
+                for index in range(start, start + BATCH_SIZE)
+            ],
+        )
+        db.session.commit()
+    events_per_second: float = EVENTS / (time.perf_counter() - started_at)
+
+    wal_bytes: int = db.session.scalar(
+        text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :wal_start)"),
+        {"wal_start": wal_start},
+    )
+    index_bytes: int = db.session.scalar(
+        text(f"SELECT pg_relation_size('{TABLE}_pkey')")
+    )
+    db.session.execute(text(f"DROP TABLE {TABLE}"))
+    db.session.commit()
+
+    return events_per_second, index_bytes, int(wal_bytes)
+
+
+def main() -> None:
+    results: dict[str, tuple[float, int, int]] = {}
+
+    with benchmark_app():
+        try:
+            results["UUIDv4"] = measure_ingest(get_id=uuid.uuid4)
+            results["UUIDv7"] = measure_ingest(get_id=get_uuid)
+        finally:
+            db.session.rollback()
+            db.session.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            db.session.commit()
+
+    print("\nPrimary key order")
+    print(f"{'identifier':<12} {'events/s':>12} {'index MB':>10} {'WAL MB':>10}")
+    for name, (events_per_second, index_bytes, wal_bytes) in results.items():
+        print(
+            f"{name:<12} {events_per_second:>12,.0f} "
+            f"{index_bytes / 1024 / 1024:>10.1f} {wal_bytes / 1024 / 1024:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
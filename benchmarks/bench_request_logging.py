@@ -0,0 +1,92 @@
+"""Measures the latency added to a request by logging it, synchronously with each
+renderer and through the background thread of `LOG_ASYNC`, with every successful
+request logged and with a tenth of them sampled.
+
+Each mode is measured within a process of its own, as structlog is configured once per
+process, and the records are written to /dev/null.
+"""
+
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, jsonify
+
+from benchmarks.utils import Timings, measure, report
+from lib import logging
+
+ITERATIONS: int = 5_000
+
+EVENT: dict[str, Any] = {
+    "type": "deposit",
+    "amount": "100.00",
+    "user_id": 1,
+    "t": 1577836800,
+}
+ALERT_RESPONSE: dict[str, Any] = {
+    "alert": True,
+    "alert_codes": [123, 300],
+    "user_id": 1,
+}
+
+MODES: dict[str, dict[str, Any]] = {
+    "not logged": {"LOG_LEVEL": "error"},
+    "synchronous, text": {"LOGFMT": "text"},
+    "synchronous, json": {"LOGFMT": "json"},
+    "asynchronous, json": {"LOGFMT": "json", "LOG_ASYNC": True},
+    "asynchronous, json, 10% sampled": {
+        "LOGFMT": "json",
+        "LOG_ASYNC": True,
+        "LOG_SAMPLE_RATE": 0.1,
+    },
+}
+
+
+def measure_mode(name: str, config: dict[str, Any]) -> Timings:
+    app = Flask(__name__)
+    app.config.update(
+        {
+            "LOG_LEVEL": "info",
+            "LOGFMT": "text",
+            "LOG_ASYNC": False,
+            "LOG_QUEUE_SIZE": 10_000,
+            "LOG_SAMPLE_RATE": 1.0,
+            "LOG_BODY_MAX_SIZE": 1_024,
+            **config,
+        }
+    )
+
+    @app.post("/event")
+    def create_event() -> Response:
+        return jsonify(ALERT_RESPONSE)
+
+    with Path(os.devnull).open("w") as devnull, contextlib.redirect_stdout(devnull):
+        logging.init_app(app=app)
+        client = app.test_client()
+
+        timings: Timings = measure(
+            name, lambda: client.post("/event", json=EVENT), iterations=ITERATIONS
+        )
+        # The records still queued are written before the process exits
+        logging.stop_log_listener()
+
+    return timings
+
+
+def main() -> None:
+    timings: list[Timings] = []
+
+    for name, config in MODES.items():
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            timings.append(executor.submit(measure_mode, name, config).result())
+
+    report("Request logging", timings)
+
+
+if __name__ == "__main__":
+    main()
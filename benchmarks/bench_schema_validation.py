@@ -0,0 +1,59 @@
+"""Compares the validation of a `POST /event` request by new `ActivityEventSchema` and
+`AlertResponseSchema` instances, as each request previously created, against the
+schemas compiled by `compile_schema`.
+
+Each iteration loads the request payload and dumps the alert response, which is the
+validation performed for every request.
+"""
+
+from typing import TYPE_CHECKING
+
+from app.events.domains import AlertResponseDomain
+from app.events.schemas import ActivityEventSchema, AlertResponseSchema
+from benchmarks.utils import Timings, measure, report
+from lib.schemas import compile_schema
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+ITERATIONS: int = 50_000
+
+PAYLOAD: dict = {"type": "deposit", "amount": "100.00", "user_id": 1, "t": 1577836800}
+ALERT_RESPONSE: AlertResponseDomain = AlertResponseDomain(
+    alert=True, alert_codes=[123, 300], user_id=1
+)
+
+
+def validate_with_schemas() -> None:
+    ActivityEventSchema().load(PAYLOAD)
+    AlertResponseSchema().dump(ALERT_RESPONSE)
+
+
+def validate_with_compiled_schemas() -> None:
+    compile_schema(ActivityEventSchema).load(PAYLOAD)
+    compile_schema(AlertResponseSchema).dump(ALERT_RESPONSE)
+
+
+def validate_with_compiled_schemas_falling_back() -> None:
+    # An amount in any form other than two decimal places is loaded by the schema
+    compile_schema(ActivityEventSchema).load(PAYLOAD | {"amount": 100})
+    compile_schema(AlertResponseSchema).dump(ALERT_RESPONSE)
+
+
+def main() -> None:
+    benchmarks: dict[str, Callable[[], None]] = {
+        "schema instance per request": validate_with_schemas,
+        "compiled schemas": validate_with_compiled_schemas,
+        "compiled schemas, falling back": validate_with_compiled_schemas_falling_back,
+    }
+
+    timings: list[Timings] = [
+        measure(name, func, iterations=ITERATIONS, warmup=1_000)
+        for name, func in benchmarks.items()
+    ]
+
+    report("Request validation", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compares evaluating and persisting an event with a query per rule followed by an
+insert, a single query for the compiled fetch plan followed by an insert, and the single
+statement which inserts the event and retrieves the compiled fetch plan at once.
+"""
+
+from typing import TYPE_CHECKING
+
+from app import db
+from app.events.constants import (
+    ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
+    CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+    CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+    SINGLE_WITHDRAW_AMOUNT_LIMIT,
+)
+from app.events.controllers import (
+    alert_rules,
+    check_accumulative_deposits_over_time,
+    check_alerts,
+    check_consecutive_deposits,
+    check_consecutive_withdraws,
+    check_withdraw_limit,
+)
+from app.events.queries import save_activity_event_with_history
+from benchmarks.utils import (
+    BENCHMARK_EPOCH,
+    BENCHMARK_USER_ID_OFFSET,
+    Timings,
+    benchmark_app,
+    build_activity_events,
+    count_statements,
+    delete_benchmark_activity_events,
+    measure,
+    report,
+    seed_activity_events,
+)
+
+if TYPE_CHECKING:
+    from app.events.models import ActivityEvent
+
+HISTORY_SIZE: int = 1_000
+ITERATIONS: int = 1_000
+
+
+def main() -> None:
+    with benchmark_app():
+        delete_benchmark_activity_events()
+
+        timings: list[Timings] = []
+        statements_per_event: dict[str, float] = {}
+        try:
+            user_id: int = BENCHMARK_USER_ID_OFFSET
+            seed_activity_events(user_id=user_id, count=HISTORY_SIZE)
+            build_activity_event = build_activity_events(
+                user_id=user_id, start=BENCHMARK_EPOCH + HISTORY_SIZE
+            )
+
+            def query_per_rule() -> None:
+                activity_event: ActivityEvent = build_activity_event()
+                check_withdraw_limit(
+                    activity_event=activity_event,
+                    withdraw_limit=SINGLE_WITHDRAW_AMOUNT_LIMIT,
+                )
+                check_consecutive_withdraws(
+                    user_id=user_id,
+                    current_activity_event=activity_event,
+                    concecutive_limit=CONSECUTIVE_WITHDRAW_TRANSACTION_LIMIT,
+                )
+                check_consecutive_deposits(
+                    user_id=user_id,
+                    current_activity_event=activity_event,
+                    concecutive_limit=CONSECUTIVE_DEPOSIT_TRANSACTION_LIMIT,
+                )
+                check_accumulative_deposits_over_time(
+                    user_id=user_id,
+                    current_activity_event=activity_event,
+                    accumulative_limit=ACCUMULATIVE_DEPOSIT_AMOUNT_LIMIT,
+                )
+                db.save(model=activity_event)
+
+            def fetch_plan() -> None:
+                activity_event: ActivityEvent = build_activity_event()
+                check_alerts(user_id=user_id, current_activity_event=activity_event)
+                db.save(model=activity_event)
+
+            def single_statement() -> None:
+                activity_event: ActivityEvent = build_activity_event()
+                check_alerts(
+                    user_id=user_id,
+                    current_activity_event=activity_event,
+                    activity_event_history=save_activity_event_with_history(
+                        activity_event=activity_event,
+                        fetch_plan=alert_rules.get_fetch_plan(
+                            transaction_type=activity_event.transaction_type
+                        ),
+                    ),
+                )
+                db.commit()
+
+            for name, func in (
+                ("query per rule + insert", query_per_rule),
+                ("fetch plan + insert", fetch_plan),
+                ("single statement", single_statement),
+            ):
+                with count_statements() as statements:
+                    timings.append(measure(name, func, iterations=ITERATIONS, warmup=0))
+                statements_per_event[name] = statements.count / ITERATIONS
+        finally:
+            delete_benchmark_activity_events()
+
+    report(f"Evaluate and persist ({HISTORY_SIZE} events of history)", timings)
+    for name, count in statements_per_event.items():
+        print(f"{name}: {count:.2f} statements per event (excluding COMMIT)")
+
+
+if __name__ == "__main__":
+    main()
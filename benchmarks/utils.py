@@ -0,0 +1,178 @@
+import itertools
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from flask import Flask
+from sqlalchemy import delete, event, insert
+
+from app import create_app, db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import (
+    ActivityEvent,
+    ActivityEventAlert,
+    QueuedActivityEvent,
+    UserAlertState,
+    UserVelocityBucket,
+)
+from lib.money import CENTS_PER_UNIT
+
+# Benchmarks seed users within this range so they never collide with real data and
+# can be removed afterwards.
+BENCHMARK_USER_ID_OFFSET: int = 900_000_000
+BENCHMARK_EPOCH: int = 1577836800
+
+
+@dataclass
+class Timings:
+    name: str
+    samples: list[float]
+
+    @property
+    def mean_ms(self) -> float:
+        return statistics.fmean(self.samples) * 1000
+
+    @property
+    def p50_ms(self) -> float:
+        return statistics.median(self.samples) * 1000
+
+    @property
+    def p99_ms(self) -> float:
+        return statistics.quantiles(self.samples, n=100)[-1] * 1000
+
+    @property
+    def ops_per_second(self) -> float:
+        return len(self.samples) / sum(self.samples)
+
+
+@contextmanager
+def benchmark_app() -> Iterator[Flask]:
+    """Creates the application and its tables against the configured `DATABASE_URI`."""
+    app: Flask = create_app()
+
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    iterations: int,
+    warmup: int = 5,
+) -> Timings:
+    for _ in range(warmup):
+        func()
+
+    samples: list[float] = []
+    for _ in range(iterations):
+        start: float = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return Timings(name=name, samples=samples)
+
+
+@dataclass
+class StatementCounter:
+    count: int = 0
+
+    def __call__(self, *_args: Any) -> None:
+        self.count += 1
+
+
+@contextmanager
+def count_statements() -> Iterator[StatementCounter]:
+    """Counts the statements executed against the database, excluding transaction
+    control such as COMMIT.
+    """
+    counter: StatementCounter = StatementCounter()
+    event.listen(db.engine, "before_cursor_execute", counter)
+
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", counter)
+
+
+def build_activity_events(user_id: int, start: int) -> Callable[[], ActivityEvent]:
+    """Produces a callable which builds alternating withdraw and deposit events for a
+    user, with strictly increasing dispatch times from `start`.
+    """
+    counter = itertools.count()
+
+    def build() -> ActivityEvent:
+        index: int = next(counter)
+        return ActivityEvent(
+            transaction_type=(
+                ActivityEventTypeEnum.DEPOSIT
+                if index % 2
+                else ActivityEventTypeEnum.WITHDRAW
+            ),
+            amount=(10 + index % 90) * CENTS_PER_UNIT,
+            user_id=user_id,
+            event_received_at=start + index,
+        )
+
+    return build
+
+
+def report(title: str, timings: list[Timings]) -> None:
+    print(f"\n{title}")
+    print(
+        f"{'benchmark':<48} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>12}"
+    )
+    for timing in timings:
+        print(
+            f"{timing.name:<48} {timing.mean_ms:>10.3f} {timing.p50_ms:>10.3f} "
+            f"{timing.p99_ms:>10.3f} {timing.ops_per_second:>12.1f}"
+        )
+
+
+def seed_activity_events(user_id: int, count: int) -> None:
+    """Bulk inserts `count` alternating deposit and withdraw events for a user."""
+    db.session.execute(
+        insert(ActivityEvent),
+        [
+            {
+                "transaction_type": (
+                    ActivityEventTypeEnum.DEPOSIT
+                    if i % 2
+                    else ActivityEventTypeEnum.WITHDRAW
+                ),
+                "amount": (10 + i % 90) * CENTS_PER_UNIT,
+                "user_id": user_id,
+                "event_received_at": BENCHMARK_EPOCH + i,
+            }
+            for i in range(count)
+        ],
+    )
+    db.session.commit()
+
+
+def delete_benchmark_activity_events() -> None:
+    db.session.execute(
+        delete(ActivityEvent).where(ActivityEvent.user_id >= BENCHMARK_USER_ID_OFFSET)
+    )
+    db.session.execute(
+        delete(UserAlertState).where(UserAlertState.user_id >= BENCHMARK_USER_ID_OFFSET)
+    )
+    db.session.execute(
+        delete(UserVelocityBucket).where(
+            UserVelocityBucket.user_id >= BENCHMARK_USER_ID_OFFSET
+        )
+    )
+    db.session.execute(
+        delete(QueuedActivityEvent).where(
+            QueuedActivityEvent.user_id >= BENCHMARK_USER_ID_OFFSET
+        )
+    )
+    db.session.execute(
+        delete(ActivityEventAlert).where(
+            ActivityEventAlert.user_id >= BENCHMARK_USER_ID_OFFSET
+        )
+    )
+    db.session.commit()
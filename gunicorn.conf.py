@@ -0,0 +1,24 @@
+"""Server hooks read by gunicorn from the working directory, alongside the settings given
+on its command line.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from lib import metrics
+
+
+def on_starting(_server: Any) -> None:
+    # Every worker writes its metrics to a directory shared by the server, cleared of the
+    # metrics of any previous server
+    directory: str = os.environ.setdefault(
+        "METRICS_DIR", tempfile.mkdtemp(prefix="audit-api-metrics-")
+    )
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    metrics.clear_directory(directory=Path(directory))
+
+
+def child_exit(_server: Any, worker: Any) -> None:
+    metrics.mark_process_dead(pid=worker.pid, directory=Path(os.environ["METRICS_DIR"]))
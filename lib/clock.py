@@ -0,0 +1,59 @@
+import contextlib
+from collections.abc import Iterator
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import TypeVar
+
+
+class Clock:
+    """The source of the current time, by default the system clock."""
+
+    def now(self) -> datetime:
+        return datetime.now(tz=UTC)
+
+    def timestamp(self) -> int:
+        return int(self.now().timestamp())
+
+
+class ReplayClock(Clock):
+    """
+    A clock which follows the events being replayed rather than the system clock, so a
+    replay runs as fast as its events can be evaluated.
+
+    Args:
+        timestamp: The epoch time the replay starts from
+    """
+
+    def __init__(self, timestamp: int = 0) -> None:
+        self._timestamp: int = timestamp
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self._timestamp, tz=UTC)
+
+    def advance_to(self, timestamp: int) -> None:
+        """Moves the clock forward to `timestamp`, it never moves backwards."""
+        self._timestamp = max(self._timestamp, timestamp)
+
+
+_clock: ContextVar[Clock] = ContextVar("clock", default=Clock())
+
+ClockT = TypeVar("ClockT", bound=Clock)
+
+
+def get_clock() -> Clock:
+    return _clock.get()
+
+
+@contextlib.contextmanager
+def use_clock(clock: ClockT) -> Iterator[ClockT]:
+    """
+    Replaces the clock of the current context until the block exits.
+
+    Threads begin with the system clock, so each thread replaying events uses its own.
+    """
+    token = _clock.set(clock)
+
+    try:
+        yield clock
+    finally:
+        _clock.reset(token)
@@ -3,6 +3,13 @@ from typing import Any
 
 from marshmallow import fields
 
+from lib.money import (
+    Cents as CentsType,
+    format_cents,
+    parse_cents,
+    to_cents,
+)
+
 # Adjust the defaults for marshmallow fields to provide sensible defaults
 Boolean = functools.partial(fields.Boolean, allow_none=False, required=True)
 DateTime = functools.partial(fields.DateTime, allow_none=False, required=True)
@@ -34,3 +41,35 @@ class CaseInsensitiveEnum(fields.Enum):
         self, value: Any, attr: str | None, data: Any, **kwargs: Any
     ) -> Any:
         return super()._deserialize(value.upper(), attr, data, **kwargs)
+
+
+class IntegerCents(fields.Decimal):
+    """
+    Field loads an amount as an integer of cents and dumps it as an amount with two
+    decimal places.
+
+    Amounts written with at most two decimal places are parsed without constructing a
+    `Decimal`. Any other value is loaded as a `Decimal` field would load it, so the
+    values accepted and rejected are the same.
+    """
+
+    def _serialize(self, value: Any, *_args: Any, **_kwargs: Any) -> str | None:
+        if value is None:
+            return None
+
+        return format_cents(value)
+
+    def _deserialize(  # type: ignore[override]
+        self, value: Any, *_args: Any, **_kwargs: Any
+    ) -> CentsType:
+        if isinstance(value, str):
+            cents: CentsType | None = parse_cents(value)
+            if cents is not None:
+                return cents
+
+        return to_cents(self._validated(value))
+
+
+Cents = functools.partial(
+    IntegerCents, allow_none=False, required=True, places=2, as_string=True
+)
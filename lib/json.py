@@ -0,0 +1,55 @@
+import dataclasses
+from datetime import date
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+import ujson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+
+def _default(o: Any) -> Any:
+    """
+    Converts the objects ujson does not encode natively into values it does, as the
+    default provider of Flask would.
+    """
+    if isinstance(o, UUID):
+        return str(o)
+
+    if isinstance(o, Enum):
+        return o.value
+
+    if isinstance(o, date):
+        return http_date(o)
+
+    # The fields are encoded as they are read, rather than copied recursively into a
+    # new dictionary by `dataclasses.asdict`
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
+
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class UJSONProvider(JSONProvider):
+    """
+    Encodes and decodes JSON with ujson, for both `request.json` and `jsonify`.
+
+    Unlike the default provider of Flask, keys are not sorted and non-ASCII characters
+    are not escaped. `Decimal` values are encoded natively by ujson as JSON numbers, at
+    the precision of a float, so exact amounts should be dumped as strings by their
+    fields.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("escape_forward_slashes", False)
+
+        return ujson.dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return ujson.loads(s, **kwargs)
@@ -1,9 +1,14 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
 from typing import Any, TextIO
 
 import structlog
-from flask import request
+import ujson
+from flask import current_app, request
 from flask.app import Flask
 from flask.wrappers import Response
 
@@ -16,6 +21,10 @@ LOG_LEVELS = {
 
 log: structlog.stdlib.BoundLogger = structlog.get_logger()
 
+# The listener rendering the records queued by `LOG_ASYNC`, None while logging is
+# synchronous
+_log_listener: logging.handlers.QueueListener | None = None
+
 
 def context(**kwargs: Any) -> None:
     _ = structlog.contextvars.bind_contextvars(**kwargs)
@@ -25,7 +34,34 @@ def clear_context() -> None:
     structlog.contextvars.clear_contextvars()
 
 
+def _decode_body(body: bytes, max_size: int) -> str:
+    """
+    Decodes a body to be logged, truncated to `max_size` bytes. Only the logged bytes
+    are decoded, straight from the buffer of the body rather than a copy of them.
+    """
+    if len(body) <= max_size:
+        return body.decode(errors="replace")
+
+    return f"{str(memoryview(body)[:max_size], 'utf-8', 'replace')}..."
+
+
 def log_inbound_request(response: Response) -> Response:
+    level: int = logging.ERROR if response.status_code >= 500 else logging.INFO
+
+    # The attributes, and the bodies in particular, are only read when the record would
+    # be logged
+    if not log.isEnabledFor(level):
+        return response
+
+    # Successful requests are sampled, while every failed request is logged
+    sample_rate: float = current_app.config["LOG_SAMPLE_RATE"]
+    if (
+        response.status_code < 400
+        and sample_rate < 1
+        and random.random() >= sample_rate  # noqa: S311
+    ):
+        return response
+
     log_attrs: dict[str, Any] = {
         "method": request.method,
         "path": request.path,
@@ -33,13 +69,27 @@ def log_inbound_request(response: Response) -> Response:
         "remote_addr": request.remote_addr,
         "status": response.status_code,
         "user_agent": request.user_agent.to_header(),
-        "response_body": response.get_data(as_text=True),
     }
+    if response.status_code < 400 and sample_rate < 1:
+        log_attrs["sample_rate"] = sample_rate
+
+    # Streamed responses are produced while the request body is read, so neither body is
+    # buffered to be logged.
+    if not response.is_streamed:
+        max_size: int = current_app.config["LOG_BODY_MAX_SIZE"]
+        bodies: dict[str, bytes] = {"response_body": response.get_data()}
 
-    if request.method in ("PATCH", "POST", "PUT"):
-        log_attrs["request_body"] = request.get_data(as_text=True)
+        # The request body is the buffer `request.json` was parsed from, which is read
+        # once and cached by the request
+        if request.method in ("PATCH", "POST", "PUT"):
+            bodies["request_body"] = request.get_data(cache=True)
 
-    if log_attrs["status"] >= 500:
+        for name, body in bodies.items():
+            log_attrs[name] = _decode_body(body=body, max_size=max_size)
+            if len(body) > max_size:
+                log_attrs[f"{name}_size"] = len(body)
+
+    if level >= logging.ERROR:
         log.error("received request", **log_attrs)
     else:
         log.info("received request", **log_attrs)
@@ -51,7 +101,9 @@ def get_renderer(
     format: str,
 ) -> structlog.processors.JSONRenderer | structlog.dev.ConsoleRenderer:
     if format == "json":
-        return structlog.processors.JSONRenderer()
+        return structlog.processors.JSONRenderer(
+            serializer=ujson.dumps, escape_forward_slashes=False
+        )
 
     return structlog.dev.ConsoleRenderer()
 
@@ -86,28 +138,148 @@ def configure_logger(app: Flask, logger: logging.Logger) -> logging.Logger:
     return logger
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records over a bounded queue to the thread of a `QueueListener`, which renders
+    and writes them.
+
+    Once the queue is full, records below `ERROR` are dropped and counted, and the count
+    is logged once there is room again. Errors wait for room, so every error is logged.
+    """
+
+    def __init__(self, record_queue: queue.Queue[logging.LogRecord]) -> None:
+        super().__init__(record_queue)
+        self.record_queue: queue.Queue[logging.LogRecord] = record_queue
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The record is rendered by the listener, so it is queued as it is rather than
+        # formatted by the thread which logged it
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Records are enqueued while the lock of the handler is held, so the count of
+        # dropped records is not updated concurrently
+        if record.levelno >= logging.ERROR:
+            self.record_queue.put(record)
+            return
+
+        try:
+            if self.dropped:
+                self.record_queue.put_nowait(
+                    logging.makeLogRecord(
+                        {
+                            "name": __name__,
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"dropped {self.dropped} log records",
+                        }
+                    )
+                )
+                self.dropped = 0
+
+            self.record_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_log_listener(
+    stream: TextIO,
+    renderer: structlog.processors.JSONRenderer | structlog.dev.ConsoleRenderer,
+    queue_size: int,
+) -> DroppingQueueHandler:
+    """
+    Starts a thread rendering the records handed to the returned handler with
+    `renderer` and writing them to `stream`, in place of any listener already started.
+    """
+    global _log_listener  # noqa: PLW0603
+
+    stop_log_listener()
+
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                renderer,
+            ],
+            # Records of the standard library loggers are rendered like those of
+            # structlog
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+            ],
+        )
+    )
+
+    queue_handler = DroppingQueueHandler(record_queue=queue.Queue(maxsize=queue_size))
+    _log_listener = logging.handlers.QueueListener(
+        queue_handler.record_queue, stream_handler
+    )
+    _log_listener.start()
+
+    return queue_handler
+
+
+def stop_log_listener() -> None:
+    """Writes every record still queued, then stops the thread of the listener."""
+    global _log_listener  # noqa: PLW0603
+
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
 def init_app(app: Flask) -> None:
     werkzeug_logger = logging.getLogger("werkzeug")
     werkzeug_logger.disabled = True
 
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=LOG_LEVELS[app.config["LOG_LEVEL"]],
+    renderer: structlog.processors.JSONRenderer | structlog.dev.ConsoleRenderer = (
+        get_renderer(app.config["LOGFMT"])
     )
+    processors: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.UnicodeDecoder(),
+    ]
+
+    if app.config["LOG_ASYNC"]:
+        # Records are rendered and written by a background thread, and those still
+        # queued are written before the process exits
+        logging.basicConfig(
+            handlers=[
+                start_log_listener(
+                    stream=sys.stdout,
+                    renderer=renderer,
+                    queue_size=app.config["LOG_QUEUE_SIZE"],
+                )
+            ],
+            level=LOG_LEVELS[app.config["LOG_LEVEL"]],
+            force=True,
+        )
+        atexit.register(stop_log_listener)
+        # Exceptions are formatted before the record is queued, as the listener cannot
+        # see the exception being handled by the thread which logged it
+        processors += [
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ]
+    else:
+        logging.basicConfig(
+            format="%(message)s",
+            stream=sys.stdout,
+            level=LOG_LEVELS[app.config["LOG_LEVEL"]],
+        )
+        processors.append(renderer)
 
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.UnicodeDecoder(),
-            get_renderer(app.config["LOGFMT"]),
-        ],
+        processors=processors,
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
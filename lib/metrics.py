@@ -0,0 +1,552 @@
+import bisect
+import math
+import mmap
+import os
+import struct
+import threading
+import weakref
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import ClassVar, Generic, TypeVar
+
+import ujson
+
+# The content type of the text format read by Prometheus
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+# The kinds of metric whose values are only summed across live processes, and so whose
+# files are removed by `mark_process_dead`
+_LIVE_KINDS: tuple[str, ...] = ("gauge",)
+
+# A value file starts with the number of bytes used, followed by entries each holding
+# the size of a key, the key, padding to 8 bytes and the value as a double
+_HEADER: struct.Struct = struct.Struct("<I4x")
+_KEY_SIZE: struct.Struct = struct.Struct("<I")
+_VALUE: struct.Struct = struct.Struct("<d")
+_INITIAL_FILE_SIZE: int = 64 * 1_024
+
+
+def _align(size: int) -> int:
+    return size + (-size % 8)
+
+
+def _read_entries(data: bytes | mmap.mmap) -> Iterator[tuple[str, float, int]]:
+    """Yields the key, value and offset of the value of each entry of a value file."""
+    if len(data) < _HEADER.size:
+        return
+
+    used: int = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    position: int = _HEADER.size
+
+    while position + _KEY_SIZE.size <= used:
+        (key_size,) = _KEY_SIZE.unpack_from(data, position)
+        key_end: int = position + _KEY_SIZE.size + key_size
+        value_offset: int = _align(key_end)
+        if value_offset + _VALUE.size > used:
+            return
+
+        (value,) = _VALUE.unpack_from(data, value_offset)
+        yield (
+            bytes(data[position + _KEY_SIZE.size : key_end]).decode(),
+            value,
+            value_offset,
+        )
+        position = value_offset + _VALUE.size
+
+
+class _ValueFile:
+    """
+    The values of one kind of metric written by a single process, memory mapped so each
+    update is a write to memory rather than a system call.
+
+    The file of a process is only written by that process, so the values held by a
+    previous process with the same ID are carried on from.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._fd: int = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < _INITIAL_FILE_SIZE:
+            os.ftruncate(self._fd, _INITIAL_FILE_SIZE)
+        self._mmap: mmap.mmap = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+
+        self.values: dict[str, float] = {}
+        self._offsets: dict[str, int] = {}
+        self._used: int = _HEADER.size
+        for key, value, value_offset in _read_entries(self._mmap):
+            self.values[key] = value
+            self._offsets[key] = value_offset
+            self._used = value_offset + _VALUE.size
+
+    def write(self, key: str, value: float) -> None:
+        self.values[key] = value
+
+        if (value_offset := self._offsets.get(key)) is not None:
+            _VALUE.pack_into(self._mmap, value_offset, value)
+            return
+
+        encoded: bytes = key.encode()
+        value_offset = _align(self._used + _KEY_SIZE.size + len(encoded))
+        used: int = value_offset + _VALUE.size
+        if used > len(self._mmap):
+            self._grow(size=used)
+
+        _KEY_SIZE.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[
+            self._used + _KEY_SIZE.size : self._used + _KEY_SIZE.size + len(encoded)
+        ] = encoded
+        _VALUE.pack_into(self._mmap, value_offset, value)
+        # The entry is only read by other processes once it is complete
+        _HEADER.pack_into(self._mmap, 0, used)
+
+        self._offsets[key] = value_offset
+        self._used = used
+
+    def _grow(self, size: int) -> None:
+        new_size: int = len(self._mmap)
+        while new_size < size:
+            new_size *= 2
+
+        self._mmap.close()
+        os.ftruncate(self._fd, new_size)
+        self._mmap = mmap.mmap(self._fd, new_size)
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
+
+
+class MetricsStore:
+    """
+    Holds the values of every metric of a process, keyed by the name and labels of each
+    sample.
+
+    When given a directory the values of each kind of metric are also written to a file
+    of their own for each process, named `<kind>_<pid>.db`, from which the values of
+    every process writing to the directory, such as each gunicorn worker, are summed.
+    Otherwise only the values of the current process are read.
+
+    Updates are applied under a lock held only while the values are written to memory.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory: Path | None = directory
+        self._lock: threading.Lock = threading.Lock()
+        self._values: dict[str, dict[str, float]] = {}
+        self._files: dict[str, _ValueFile] = {}
+
+        _stores.add(self)
+
+    def add(self, kind: str, amounts: Iterable[tuple[str, float]]) -> None:
+        with self._lock:
+            values: dict[str, float] = self._get_values(kind=kind)
+            value_file: _ValueFile | None = self._files.get(kind)
+            for key, amount in amounts:
+                if value_file is None:
+                    values[key] = values.get(key, 0.0) + amount
+                else:
+                    value_file.write(key=key, value=values.get(key, 0.0) + amount)
+
+    def set(self, kind: str, key: str, value: float) -> None:
+        with self._lock:
+            values: dict[str, float] = self._get_values(kind=kind)
+            if (value_file := self._files.get(kind)) is None:
+                values[key] = value
+            else:
+                value_file.write(key=key, value=value)
+
+    def read(self) -> dict[str, float]:
+        """Sums the values of each sample across every process writing to the directory."""
+        if self.directory is None:
+            with self._lock:
+                return {
+                    key: value
+                    for values in self._values.values()
+                    for key, value in values.items()
+                }
+
+        totals: dict[str, float] = {}
+        for path in self.directory.glob("*.db"):
+            try:
+                data: bytes = path.read_bytes()
+            except FileNotFoundError:
+                # Removed by `mark_process_dead` once listed
+                continue
+
+            for key, value, _ in _read_entries(data):
+                totals[key] = totals.get(key, 0.0) + value
+
+        return totals
+
+    def reset(self) -> None:
+        """Discards the values of the process, such as those inherited by a fork."""
+        for value_file in self._files.values():
+            value_file.close()
+
+        self._lock = threading.Lock()
+        self._values = {}
+        self._files = {}
+
+    def _get_values(self, kind: str) -> dict[str, float]:
+        if kind not in self._values:
+            if self.directory is None:
+                self._values[kind] = {}
+            else:
+                self._files[kind] = _ValueFile(
+                    path=self.directory / f"{kind}_{os.getpid()}.db"
+                )
+                self._values[kind] = self._files[kind].values
+
+        return self._values[kind]
+
+
+_stores: weakref.WeakSet[MetricsStore] = weakref.WeakSet()
+
+
+def _reset_stores() -> None:
+    for store in _stores:
+        store.reset()
+
+
+# A forked process counts from zero into files of its own, rather than writing its
+# parent's values to its parent's files
+os.register_at_fork(after_in_child=_reset_stores)
+
+
+def clear_directory(directory: Path) -> None:
+    """Removes the values written to a directory, such as by the workers of a previous
+    server.
+    """
+    for path in directory.glob("*.db"):
+        path.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid: int, directory: Path) -> None:
+    """Removes the gauges of a process which has exited, while its counters and
+    histograms are still summed with those of the processes replacing it.
+    """
+    for kind in _LIVE_KINDS:
+        (directory / f"{kind}_{pid}.db").unlink(missing_ok=True)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    if value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_sample(
+    name: str, labelnames: Iterable[str], label_values: Iterable[str], value: float
+) -> str:
+    labels: str = ",".join(
+        f'{labelname}="{_escape(label_value)}"'
+        for labelname, label_value in zip(labelnames, label_values, strict=True)
+    )
+    if labels:
+        return f"{name}{{{labels}}} {_format_value(value)}"
+
+    return f"{name} {_format_value(value)}"
+
+
+def _sample_key(name: str, label_values: Iterable[str]) -> str:
+    return ujson.dumps([name, list(label_values)])
+
+
+_ChildT = TypeVar("_ChildT")
+
+
+class Metric(Generic[_ChildT]):
+    """
+    A metric with a sample for each combination of the values of its labels, each
+    updated through the child returned by `labels`.
+    """
+
+    kind: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        registry: "MetricsRegistry",
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.registry: MetricsRegistry = registry
+        self.labelnames: tuple[str, ...] = labelnames
+        self._children: dict[tuple[str, ...], _ChildT] = {}
+
+        registry.register(metric=self)
+
+    def labels(self, *label_values: str) -> _ChildT:
+        if (child := self._children.get(label_values)) is None:
+            if len(label_values) != len(self.labelnames):
+                raise ValueError(
+                    f"Metric {self.name} is labelled by {', '.join(self.labelnames)}"
+                )
+
+            child = self._children.setdefault(
+                label_values, self._create_child(label_values=label_values)
+            )
+
+        return child
+
+    def _create_child(self, label_values: tuple[str, ...]) -> _ChildT:
+        raise NotImplementedError
+
+    def expose(self, samples: dict[str, dict[tuple[str, ...], float]]) -> list[str]:
+        """Formats the samples of the metric in the text format read by Prometheus."""
+        values: dict[tuple[str, ...], float] = samples.get(self.name, {})
+        if not self.labelnames:
+            values = {(): values.get((), 0.0)}
+
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *(
+                _format_sample(
+                    name=self.name,
+                    labelnames=self.labelnames,
+                    label_values=label_values,
+                    value=value,
+                )
+                for label_values, value in sorted(values.items())
+            ),
+        ]
+
+
+class CounterChild:
+    def __init__(self, metric: "Counter", label_values: tuple[str, ...]) -> None:
+        self._metric: Counter = metric
+        self._key: str = _sample_key(name=metric.name, label_values=label_values)
+
+    def inc(self, amount: float = 1) -> None:
+        self._metric.registry.store.add(
+            kind=self._metric.kind, amounts=((self._key, amount),)
+        )
+
+
+class Counter(Metric[CounterChild]):
+    """A total which only increases, such as the number of times a rule is triggered."""
+
+    kind = "counter"
+
+    def _create_child(self, label_values: tuple[str, ...]) -> CounterChild:
+        return CounterChild(metric=self, label_values=label_values)
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount=amount)
+
+
+class GaugeChild:
+    def __init__(self, metric: "Gauge", label_values: tuple[str, ...]) -> None:
+        self._metric: Gauge = metric
+        self._key: str = _sample_key(name=metric.name, label_values=label_values)
+
+    def inc(self, amount: float = 1) -> None:
+        self._metric.registry.store.add(
+            kind=self._metric.kind, amounts=((self._key, amount),)
+        )
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(amount=-amount)
+
+    def set(self, value: float) -> None:
+        self._metric.registry.store.set(
+            kind=self._metric.kind, key=self._key, value=value
+        )
+
+
+class Gauge(Metric[GaugeChild]):
+    """
+    A value which increases and decreases, such as the number of requests in flight.
+    Only the values of live processes are summed.
+    """
+
+    kind = "gauge"
+
+    def _create_child(self, label_values: tuple[str, ...]) -> GaugeChild:
+        return GaugeChild(metric=self, label_values=label_values)
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount=amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount=amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value=value)
+
+
+class HistogramChild:
+    def __init__(self, metric: "Histogram", label_values: tuple[str, ...]) -> None:
+        self._metric: Histogram = metric
+        # Each observation is counted within the first bucket it fits, and the buckets are
+        # only made cumulative when exposed
+        self._bucket_keys: list[str] = [
+            _sample_key(
+                name=f"{metric.name}_bucket",
+                label_values=(*label_values, _format_value(upper_bound)),
+            )
+            for upper_bound in metric.upper_bounds
+        ]
+        self._sum_key: str = _sample_key(
+            name=f"{metric.name}_sum", label_values=label_values
+        )
+        self._count_key: str = _sample_key(
+            name=f"{metric.name}_count", label_values=label_values
+        )
+
+    def observe(self, value: float) -> None:
+        self._metric.registry.store.add(
+            kind=self._metric.kind,
+            amounts=(
+                (
+                    self._bucket_keys[
+                        bisect.bisect_left(self._metric.upper_bounds, value)
+                    ],
+                    1,
+                ),
+                (self._sum_key, value),
+                (self._count_key, 1),
+            ),
+        )
+
+
+class Histogram(Metric[HistogramChild]):
+    """
+    Counts observations, such as the time taken to handle requests, within buckets of
+    their upper bounds, alongside their count and sum.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        registry: "MetricsRegistry",
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.upper_bounds: list[float] = sorted({*map(float, buckets), math.inf})
+        super().__init__(
+            name=name,
+            documentation=documentation,
+            registry=registry,
+            labelnames=labelnames,
+        )
+
+    def _create_child(self, label_values: tuple[str, ...]) -> HistogramChild:
+        return HistogramChild(metric=self, label_values=label_values)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value=value)
+
+    def expose(self, samples: dict[str, dict[tuple[str, ...], float]]) -> list[str]:
+        buckets: dict[tuple[str, ...], float] = samples.get(f"{self.name}_bucket", {})
+        sums: dict[tuple[str, ...], float] = samples.get(f"{self.name}_sum", {})
+        counts: dict[tuple[str, ...], float] = samples.get(f"{self.name}_count", {})
+        if not self.labelnames:
+            counts = {(): counts.get((), 0.0)}
+
+        lines: list[str] = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for label_values, count in sorted(counts.items()):
+            cumulative: float = 0.0
+            for upper_bound in self.upper_bounds:
+                le: str = _format_value(upper_bound)
+                cumulative += buckets.get((*label_values, le), 0.0)
+                lines.append(
+                    _format_sample(
+                        name=f"{self.name}_bucket",
+                        labelnames=(*self.labelnames, "le"),
+                        label_values=(*label_values, le),
+                        value=cumulative,
+                    )
+                )
+
+            lines.extend(
+                (
+                    _format_sample(
+                        name=f"{self.name}_sum",
+                        labelnames=self.labelnames,
+                        label_values=label_values,
+                        value=sums.get(label_values, 0.0),
+                    ),
+                    _format_sample(
+                        name=f"{self.name}_count",
+                        labelnames=self.labelnames,
+                        label_values=label_values,
+                        value=count,
+                    ),
+                )
+            )
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of an application and the store of their values, exposed together in the
+    text format read by Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self.store: MetricsStore = MetricsStore()
+        self._metrics: dict[str, Metric] = {}
+
+    def configure(self, directory: Path | None = None) -> None:
+        """
+        Stores the values of the metrics within a directory shared by every process of the
+        application, or within the current process when omitted.
+        """
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self.store.reset()
+        self.store = MetricsStore(directory=directory)
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+
+    def generate(self) -> str:
+        samples: dict[str, dict[tuple[str, ...], float]] = {}
+        for key, value in self.store.read().items():
+            name, label_values = ujson.loads(key)
+            samples.setdefault(name, {})[tuple(label_values)] = value
+
+        return "".join(
+            f"{line}\n"
+            for metric in self._metrics.values()
+            for line in metric.expose(samples=samples)
+        )
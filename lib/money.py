@@ -0,0 +1,50 @@
+import re
+from decimal import Decimal
+
+# Amounts are held as integers of cents, so they are compared and summed without
+# allocating a `Decimal` or consulting a decimal context
+Cents = int
+
+CENTS_PER_UNIT: int = 100
+
+_AMOUNT_PATTERN: re.Pattern[str] = re.compile(r"(-?)(\d+)(?:\.(\d{1,2}))?")
+
+
+def parse_cents(amount: str) -> Cents | None:
+    """
+    Parses an amount written with at most two decimal places, such as "42.00", into
+    cents without constructing a `Decimal`.
+
+    Returns:
+        Cents | None: The amount in cents, None if it is written in any other form
+    """
+    match: re.Match[str] | None = _AMOUNT_PATTERN.fullmatch(amount)
+    if match is None:
+        return None
+
+    sign, units, fraction = match.groups()
+    cents: Cents = int(units) * CENTS_PER_UNIT + (
+        int(fraction.ljust(2, "0")) if fraction else 0
+    )
+
+    return -cents if sign else cents
+
+
+def to_cents(amount: Decimal) -> Cents:
+    """
+    Converts a `Decimal` amount to cents.
+
+    Raises:
+        ValueError: If the amount has more than two decimal places
+    """
+    cents: Decimal = amount.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount {amount} cannot be represented in cents")
+
+    return int(cents)
+
+
+def format_cents(cents: Cents) -> str:
+    """Formats cents as an amount with two decimal places, such as "42.00"."""
+    units, fraction = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{'-' if cents < 0 else ''}{units}.{fraction:02d}"
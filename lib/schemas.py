@@ -1,8 +1,18 @@
+import functools
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from typing import Any, Generic, Literal, TypeVar, get_args, get_origin, overload
 
 import ujson
-from marshmallow import EXCLUDE, Schema, post_load
+from marshmallow import (
+    EXCLUDE,
+    Schema,
+    fields as marshmallow_fields,
+    post_load,
+    validate,
+)
+
+from lib.fields import CaseInsensitiveEnum, IntegerCents
+from lib.money import format_cents, parse_cents
 
 T = TypeVar("T")
 
@@ -86,3 +96,342 @@ class BaseSchema(Schema, Generic[T]):
         many: bool = False,
     ) -> list[dict[str, Any]] | dict[str, Any]:
         return super().dump(data, many=many)  # type: ignore[no-any-return]
+
+
+class _FallbackError(Exception):
+    """
+    Raised by a compiled field when a value is not in the form it converts, so the data
+    is loaded or dumped by the schema instead.
+    """
+
+
+Converter = Callable[[Any], Any]
+
+
+def _convert_exact_type(value_type: type) -> Callable[[Any], Converter]:
+    def compile_field(_field: Any) -> Converter:
+        def convert(value: Any) -> Any:
+            if type(value) is not value_type:
+                raise _FallbackError
+
+            return value
+
+        return convert
+
+    return compile_field
+
+
+def _compile_load_cents(field: Any) -> Converter | None:
+    # Amounts with at most two decimal places are only loaded unchanged when the field
+    # does not round them to fewer places
+    if field.places is not None and field.places.as_tuple().exponent > -2:
+        return None
+
+    def load_cents(value: Any) -> Any:
+        if type(value) is not str or (cents := parse_cents(value)) is None:
+            raise _FallbackError
+
+        return cents
+
+    return load_cents
+
+
+def _compile_dump_cents(_field: Any) -> Converter:
+    def dump_cents(value: Any) -> Any:
+        if type(value) is not int:
+            raise _FallbackError
+
+        return format_cents(value)
+
+    return dump_cents
+
+
+def _compile_load_enum(field: Any) -> Converter | None:
+    if field.by_value:
+        return None
+
+    members: Mapping[str, Any] = field.enum.__members__
+    # The names and lowercase names of the members, which are the values loaded most
+    # often, are looked up without converting them to uppercase first
+    enum_members: dict[str, Any] = {
+        name: members[name.upper()]
+        for member_name in members
+        for name in (member_name, member_name.lower())
+        if name.upper() in members
+    }
+
+    def load_enum(value: Any) -> Any:
+        if type(value) is not str or (member := enum_members.get(value)) is None:
+            raise _FallbackError
+
+        return member
+
+    return load_enum
+
+
+def _compile_dump_enum(field: Any) -> Converter | None:
+    if field.by_value:
+        return None
+
+    enum_names: dict[Any, str] = {
+        member: member.name.lower() for member in field.enum.__members__.values()
+    }
+
+    def dump_enum(value: Any) -> Any:
+        try:
+            return enum_names[value]
+        except (KeyError, TypeError) as e:
+            raise _FallbackError from e
+
+    return dump_enum
+
+
+def _compile_list(
+    compile_inner: Callable[[Any], Converter | None],
+) -> Callable[[Any], Converter | None]:
+    def compile_field(field: Any) -> Converter | None:
+        convert_inner: Converter | None = compile_inner(field.inner)
+        if convert_inner is None:
+            return None
+
+        def convert_list(value: Any) -> Any:
+            if type(value) is not list:
+                raise _FallbackError
+
+            return [convert_inner(item) for item in value]
+
+        return convert_list
+
+    return compile_field
+
+
+def _compile_dump_integer(field: Any) -> Converter | None:
+    return None if field.as_string else _convert_exact_type(int)(field)
+
+
+def _compile_range(convert: Converter, validator: validate.Range) -> Converter:
+    def convert_in_range(value: Any) -> Any:
+        value = convert(value)
+        # Values outside the range are rejected by the schema, with its error message
+        if validator.min is not None and (
+            value < validator.min
+            or (not validator.min_inclusive and value == validator.min)
+        ):
+            raise _FallbackError
+        if validator.max is not None and (
+            value > validator.max
+            or (not validator.max_inclusive and value == validator.max)
+        ):
+            raise _FallbackError
+
+        return value
+
+    return convert_in_range
+
+
+def _compile_load_field(field: marshmallow_fields.Field) -> Converter | None:
+    """
+    Compiles a field into a function which loads the values of the field that are in
+    their canonical form, such as an integer for an `Integer` field, and raises
+    `_FallbackError` for any other value. Returns None if the field is not supported.
+
+    `Range` validators are compiled alongside the field, while a field with any other
+    validator is not supported.
+    """
+    compile_field: Callable[[Any], Converter | None] | None = _LOAD_FIELD_COMPILERS.get(
+        type(field)
+    )
+    if compile_field is None or not all(
+        type(validator) is validate.Range for validator in field.validators
+    ):
+        return None
+
+    convert: Converter | None = compile_field(field)
+    if convert is None:
+        return None
+
+    for validator in field.validators:
+        convert = _compile_range(convert, validator)  # type: ignore[arg-type]
+
+    return convert
+
+
+def _compile_dump_field(field: marshmallow_fields.Field) -> Converter | None:
+    """
+    Compiles a field into a function which dumps the values of the field that are in
+    their canonical form and raises `_FallbackError` for any other value. Returns None
+    if the field is not supported.
+    """
+    compile_field: Callable[[Any], Converter | None] | None = _DUMP_FIELD_COMPILERS.get(
+        type(field)
+    )
+    if compile_field is None:
+        return None
+
+    return compile_field(field)
+
+
+_LOAD_FIELD_COMPILERS: dict[type, Callable[[Any], Converter | None]] = {
+    marshmallow_fields.Boolean: _convert_exact_type(bool),
+    marshmallow_fields.Integer: _convert_exact_type(int),
+    marshmallow_fields.String: _convert_exact_type(str),
+    marshmallow_fields.List: _compile_list(_compile_load_field),
+    CaseInsensitiveEnum: _compile_load_enum,
+    IntegerCents: _compile_load_cents,
+}
+_DUMP_FIELD_COMPILERS: dict[type, Callable[[Any], Converter | None]] = {
+    marshmallow_fields.Boolean: _convert_exact_type(bool),
+    marshmallow_fields.Integer: _compile_dump_integer,
+    marshmallow_fields.String: _convert_exact_type(str),
+    marshmallow_fields.List: _compile_list(_compile_dump_field),
+    CaseInsensitiveEnum: _compile_dump_enum,
+    IntegerCents: _compile_dump_cents,
+}
+
+
+class CompiledSchema(Generic[T]):
+    """
+    Loads and dumps data with a schema compiled from the fields of a `BaseSchema`.
+
+    Each field is compiled into a function which converts the values in its canonical
+    form, such as `"100.00"` for an amount, without the generic field dispatch of
+    marshmallow. Data holding any other value, a missing or null field, or a field
+    which could not be compiled, is loaded or dumped by the schema itself, so the
+    results and validation errors are identical to those of the schema.
+    """
+
+    def __init__(self, schema: BaseSchema[T]) -> None:
+        self.schema: BaseSchema[T] = schema
+        self._load_fields: list[tuple[str, str, Converter]] | None = (
+            self._compile_load_fields()
+        )
+        self._dump_fields: list[tuple[str, str, Converter]] | None = (
+            self._compile_dump_fields()
+        )
+
+    def _compile_load_fields(
+        self,
+    ) -> list[tuple[str, str, Converter]] | None:
+        # Only the post load hook of `BaseSchema` is supported, and unknown fields must
+        # be excluded as they would otherwise be rejected
+        hooks: dict[str, list[tuple[str, bool, dict]]] = self.schema._hooks  # noqa: SLF001
+        if self.schema.unknown != EXCLUDE or [
+            (tag, name) for tag, tag_hooks in hooks.items() for name, *_ in tag_hooks
+        ] != [("post_load", "to_domain")]:
+            return None
+
+        load_fields: list[tuple[str, str, Converter]] = []
+        for name, field in self.schema.load_fields.items():
+            load: Converter | None = _compile_load_field(field)
+            if load is None:
+                return None
+
+            load_fields.append((field.data_key or name, field.attribute or name, load))
+
+        return load_fields
+
+    def _compile_dump_fields(
+        self,
+    ) -> list[tuple[str, str, Converter]] | None:
+        hooks: dict[str, list[tuple[str, bool, dict]]] = self.schema._hooks  # noqa: SLF001
+        if hooks.get("pre_dump") or hooks.get("post_dump"):
+            return None
+
+        dump_fields: list[tuple[str, str, Converter]] = []
+        for name, field in self.schema.dump_fields.items():
+            dump: Converter | None = _compile_dump_field(field)
+            if dump is None or "." in (field.attribute or name):
+                return None
+
+            dump_fields.append((field.data_key or name, field.attribute or name, dump))
+
+        return dump_fields
+
+    def _load_one(self, data: Any) -> T:
+        if type(data) is not dict or self._load_fields is None:
+            raise _FallbackError
+
+        try:
+            return self.schema.to_domain(
+                {
+                    attribute: load(data[data_key])
+                    for data_key, attribute, load in self._load_fields
+                }
+            )
+        except KeyError as e:
+            raise _FallbackError from e
+
+    def _dump_one(self, obj: Any) -> dict[str, Any]:
+        if self._dump_fields is None:
+            raise _FallbackError
+
+        # Values are read as marshmallow reads them, by key from a dictionary and by
+        # attribute from any object which cannot be indexed
+        get: Callable[[str], Any]
+        if type(obj) is dict:
+            get = obj.__getitem__
+        elif hasattr(obj, "__getitem__"):
+            raise _FallbackError
+        else:
+            get = functools.partial(getattr, obj)
+
+        try:
+            return {
+                data_key: dump(get(attribute))
+                for data_key, attribute, dump in self._dump_fields
+            }
+        except (AttributeError, KeyError) as e:
+            raise _FallbackError from e
+
+    @overload
+    def load(self, data: Any, *, many: Literal[True]) -> list[T]: ...
+
+    @overload
+    def load(self, data: Any, *, many: Literal[False] = False) -> T: ...
+
+    def load(self, data: Any, *, many: bool = False) -> T | list[T]:
+        try:
+            if not many:
+                return self._load_one(data)
+
+            if type(data) is not list:
+                raise _FallbackError
+
+            return [self._load_one(item) for item in data]
+        except _FallbackError:
+            if many:
+                return self.schema.load(data, many=True)
+
+            return self.schema.load(data)
+
+    @overload
+    def dump(self, data: Any, *, many: Literal[True]) -> list[dict[str, Any]]: ...
+
+    @overload
+    def dump(self, data: Any, *, many: Literal[False] = False) -> dict[str, Any]: ...
+
+    def dump(
+        self, data: Any, *, many: bool = False
+    ) -> list[dict[str, Any]] | dict[str, Any]:
+        try:
+            if not many:
+                return self._dump_one(data)
+
+            if type(data) is not list:
+                raise _FallbackError
+
+            return [self._dump_one(item) for item in data]
+        except _FallbackError:
+            if many:
+                return self.schema.dump(data, many=True)
+
+            return self.schema.dump(data)
+
+
+@functools.cache
+def compile_schema(schema_cls: type[BaseSchema[T]]) -> CompiledSchema[T]:
+    """
+    Compiles a schema once, so the compiled schema and the schema instance it falls
+    back to are shared by every request.
+    """
+    return CompiledSchema(schema=schema_cls())
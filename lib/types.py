@@ -0,0 +1,34 @@
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+# The largest value a BIGINT column holds
+BIGINT_MAX: int = 2**63 - 1
+
+
+class SmallIntegerEnum(TypeDecorator[Enum]):
+    """
+    Stores an enum as a SMALLINT of its value, which is half the width of a native enum.
+    The values of the enum must be integers which never change.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[Enum]) -> None:
+        super().__init__()
+        self.enum_class: type[Enum] = enum_class
+
+    def process_bind_param(self, value: Any, _dialect: Any) -> int | None:
+        if value is None:
+            return None
+
+        return int(self.enum_class(value).value)
+
+    def process_result_value(self, value: Any, _dialect: Any) -> Enum | None:
+        if value is None:
+            return None
+
+        return self.enum_class(value)
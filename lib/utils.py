@@ -1,21 +1,68 @@
-from datetime import UTC, datetime
-from uuid import UUID, uuid4
+import os
+import threading
+import time
+from datetime import datetime
+from uuid import UUID
+
+from lib.clock import get_clock
+
+_UUID7_COUNTER_MAX: int = 0xFFF
+
+_uuid7_lock: threading.Lock = threading.Lock()
+_uuid7_last_timestamp: int = 0
+_uuid7_counter: int = 0
 
 
 def get_uuid() -> UUID:
-    """Produces a string uuid4 when provided as the default value within
-    a SQLAlchemy model.
+    """Produces a UUIDv7 when provided as the default value within a SQLAlchemy model.
+
+    The first 48 bits are the epoch time in milliseconds, so identifiers generated
+    later sort after those generated earlier and are appended to the right of the
+    primary key index rather than inserted onto a random page of it. The 12 bits after
+    the version are a counter, so identifiers generated within the same millisecond, or
+    after the system clock moved backwards, are ordered as well.
     """
-    return uuid4()
+    global _uuid7_last_timestamp, _uuid7_counter  # noqa: PLW0603
+
+    # The system clock is read rather than the clock of the current context, as
+    # identifiers must be unique even while the time is frozen or replayed
+    timestamp: int = time.time_ns() // 1_000_000
+    random_bytes: bytes = os.urandom(10)
+
+    with _uuid7_lock:
+        if timestamp > _uuid7_last_timestamp:
+            # The counter begins at a random value below half its range, which leaves
+            # room for it to increment within the millisecond
+            _uuid7_counter = int.from_bytes(random_bytes[:2]) & (
+                _UUID7_COUNTER_MAX >> 1
+            )
+            _uuid7_last_timestamp = timestamp
+        elif _uuid7_counter < _UUID7_COUNTER_MAX:
+            _uuid7_counter += 1
+        else:
+            _uuid7_counter = 0
+            _uuid7_last_timestamp += 1
+
+        timestamp, counter = _uuid7_last_timestamp, _uuid7_counter
+
+    return UUID(
+        int=(timestamp & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | int.from_bytes(random_bytes[2:]) & 0x3FFF_FFFF_FFFF_FFFF
+    )
 
 
 def get_utc_now() -> datetime:
     """Produces the current datetime as UTC when provided as a default within
     a SQLAlchemy model. Also used to freeze datetime via freezegun during testing.
+
+    The time is read from the clock of the current context, see `lib.clock`.
     """
-    return datetime.now(tz=UTC)
+    return get_clock().now()
 
 
 def get_epoch_now() -> int:
     """Produces the current time in epoch format."""
-    return int(datetime.now().timestamp())
+    return get_clock().timestamp()
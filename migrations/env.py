@@ -5,6 +5,8 @@ from alembic import context
 from flask import current_app
 from sqlalchemy import MetaData
 
+from app.events.partitions import is_activity_event_partition
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -42,6 +44,10 @@ def include_object(object, name, type_, reflected, compare_to):  # NOQA: U100
     if name in managed_tables and type_ == "table" and reflected and compare_to is None:
         return False
 
+    # Partitions of `activity_event` are maintained by `flask events partitions`
+    if type_ == "table" and reflected and is_activity_event_partition(name):
+        return False
+
     return True
 
 
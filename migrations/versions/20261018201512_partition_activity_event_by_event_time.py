@@ -0,0 +1,101 @@
+"""partition activity event by event time
+
+Revision ID: 0180cddfff32
+Revises: 99aac85ca9a2
+Create Date: 2026-10-18 20:15:12.402716
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0180cddfff32"
+down_revision = "99aac85ca9a2"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("idx_events_created_by_user", ["user_id", "event_received_at"], {}),
+    (
+        "idx_events_by_user_transaction_type",
+        ["user_id", "transaction_type", "event_received_at"],
+        {"postgresql_include": ["amount"]},
+    ),
+    ("ix_activity_event_created_at", ["created_at"], {}),
+    ("ix_activity_event_event_received_at", ["event_received_at"], {}),
+    ("ix_activity_event_updated_at", ["updated_at"], {}),
+]
+
+COLUMNS = "id, transaction_type, amount, user_id, event_received_at, created_at, updated_at"
+
+
+def _create_activity_event_table(name, primary_key, **kwargs):
+    op.create_table(
+        name,
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column(
+            "transaction_type",
+            postgresql.ENUM(
+                "DEPOSIT", "WITHDRAW", name="activityeventtypeenum", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "event_received_at", sa.Integer(), autoincrement=False, nullable=False
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint(*primary_key, name="activity_event_pkey"),
+        **kwargs,
+    )
+
+    for index_name, columns, options in INDEXES:
+        op.create_index(index_name, name, columns, unique=False, **options)
+
+
+def _drop_activity_event_indexes():
+    for index_name, _, options in reversed(INDEXES):
+        op.drop_index(index_name, table_name="activity_event", **options)
+
+    op.drop_constraint("activity_event_pkey", "activity_event", type_="primary")
+
+
+def upgrade():
+    # The existing table is replaced by a partitioned table holding only the default
+    # partition. Its events are moved into monthly partitions as they are created by
+    # `flask events partitions`.
+    _drop_activity_event_indexes()
+    op.rename_table("activity_event", "activity_event_unpartitioned")
+
+    _create_activity_event_table(
+        "activity_event",
+        primary_key=["id", "event_received_at"],
+        postgresql_partition_by="RANGE (event_received_at)",
+    )
+    op.execute("CREATE TABLE activity_event_default PARTITION OF activity_event DEFAULT")
+
+    op.execute(
+        f"INSERT INTO activity_event ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM activity_event_unpartitioned"
+    )
+    op.drop_table("activity_event_unpartitioned")
+
+
+def downgrade():
+    # Dropping the partitioned table drops every attached partition, detached partitions
+    # are kept
+    _drop_activity_event_indexes()
+    op.rename_table("activity_event", "activity_event_partitioned")
+
+    _create_activity_event_table("activity_event", primary_key=["id"])
+
+    op.execute(
+        f"INSERT INTO activity_event ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM activity_event_partitioned"
+    )
+    op.drop_table("activity_event_partitioned")
@@ -0,0 +1,142 @@
+"""compact activity event row format
+
+Revision ID: a087111a7cd1
+Revises: bd0e26ace5c5
+Create Date: 2026-10-18 20:31:42.746431
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "a087111a7cd1"
+down_revision = "bd0e26ace5c5"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "idx_events_created_by_user",
+        ["user_id", "event_received_at"],
+        {"postgresql_include": ["transaction_type", "amount"]},
+    ),
+    (
+        "idx_events_by_user_transaction_type",
+        ["user_id", "transaction_type", "event_received_at"],
+        {"postgresql_include": ["amount"]},
+    ),
+    (
+        "brin_events_by_event_received_at",
+        ["event_received_at"],
+        {"postgresql_using": "brin"},
+    ),
+]
+
+COLUMNS = (
+    "id, transaction_type, amount, user_id, event_received_at, created_at, updated_at"
+)
+
+
+def _create_activity_event_table(columns):
+    op.create_table(
+        "activity_event",
+        *columns,
+        sa.PrimaryKeyConstraint("id", "event_received_at", name="activity_event_pkey"),
+        postgresql_partition_by="RANGE (event_received_at)",
+    )
+    op.execute(
+        "CREATE TABLE activity_event_default PARTITION OF activity_event DEFAULT"
+    )
+
+
+def _drop_activity_event_indexes():
+    for index_name, _, options in reversed(INDEXES):
+        op.drop_index(index_name, table_name="activity_event", **options)
+
+    op.drop_constraint("activity_event_pkey", "activity_event", type_="primary")
+
+
+def _create_activity_event_indexes():
+    for index_name, columns, options in INDEXES:
+        op.create_index(index_name, "activity_event", columns, unique=False, **options)
+
+
+def upgrade():
+    # Partition keys cannot change type, so the table is rebuilt with only the default
+    # partition and the monthly partitions must be created again by
+    # `flask events partitions`. Amounts are stored in cents, dispatch times in
+    # milliseconds and transaction types as the values of `ActivityEventTypeEnum`.
+    _drop_activity_event_indexes()
+    op.rename_table("activity_event", "activity_event_numeric")
+    op.rename_table("activity_event_default", "activity_event_numeric_default")
+
+    _create_activity_event_table(
+        [
+            sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column("amount", sa.BigInteger(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column(
+                "event_received_at",
+                sa.BigInteger(),
+                autoincrement=False,
+                nullable=False,
+            ),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("transaction_type", sa.SmallInteger(), nullable=False),
+        ]
+    )
+
+    # The indexes are created once the events are copied, which is faster than
+    # maintaining them for every row
+    op.execute(
+        f"INSERT INTO activity_event ({COLUMNS}) "
+        "SELECT id, CASE transaction_type WHEN 'DEPOSIT' THEN 1 ELSE 2 END, "
+        "CAST(amount * 100 AS BIGINT), user_id, "
+        "CAST(event_received_at AS BIGINT) * 1000, created_at, updated_at "
+        "FROM activity_event_numeric"
+    )
+    _create_activity_event_indexes()
+    op.drop_table("activity_event_numeric")
+
+
+def downgrade():
+    _drop_activity_event_indexes()
+    op.rename_table("activity_event", "activity_event_compact")
+    op.rename_table("activity_event_default", "activity_event_compact_default")
+
+    _create_activity_event_table(
+        [
+            sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column(
+                "transaction_type",
+                postgresql.ENUM(
+                    "DEPOSIT",
+                    "WITHDRAW",
+                    name="activityeventtypeenum",
+                    create_type=False,
+                ),
+                nullable=False,
+            ),
+            sa.Column("amount", sa.Numeric(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column(
+                "event_received_at", sa.Integer(), autoincrement=False, nullable=False
+            ),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        ]
+    )
+
+    op.execute(
+        f"INSERT INTO activity_event ({COLUMNS}) "
+        "SELECT id, CAST(CASE transaction_type WHEN 1 THEN 'DEPOSIT' ELSE 'WITHDRAW' END "
+        "AS activityeventtypeenum), ROUND(amount / 100.0, 2), user_id, "
+        "CAST(event_received_at / 1000 AS INTEGER), created_at, updated_at "
+        "FROM activity_event_compact"
+    )
+    _create_activity_event_indexes()
+    op.drop_table("activity_event_compact")
@@ -0,0 +1,93 @@
+"""store amounts as integer cents
+
+Revision ID: 311473a6aea5
+Revises: a087111a7cd1
+Create Date: 2026-10-18 20:45:17.323140
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "311473a6aea5"
+down_revision = "a087111a7cd1"
+branch_labels = None
+depends_on = None
+
+AMOUNT_COLUMNS = [
+    ("activity_event_queue", "amount"),
+    ("user_alert_state", "window_deposit_total"),
+    ("user_velocity_bucket", "amount"),
+]
+AMOUNT_ARRAY_COLUMNS = [
+    ("user_alert_state", "recent_deposit_amounts"),
+    ("user_alert_state", "window_deposit_amounts"),
+]
+
+
+def _create_scale_amounts_function(from_type, to_type, expression):
+    # A subquery cannot be used to convert a column in place, so the elements of the
+    # arrays are scaled by a function instead
+    op.execute(
+        f"""
+        CREATE FUNCTION pg_temp.scale_amounts(amounts {from_type}[])
+        RETURNS {to_type}[] AS $$
+            SELECT coalesce(
+                array_agg(({expression})::{to_type} ORDER BY position),
+                '{{}}'
+            )
+            FROM unnest(amounts) WITH ORDINALITY AS elements(amount, position)
+        $$ LANGUAGE sql IMMUTABLE
+        """
+    )
+
+
+def upgrade():
+    for table_name, column_name in AMOUNT_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.Numeric(),
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using=f"({column_name} * 100)::bigint",
+        )
+
+    _create_scale_amounts_function("numeric", "bigint", "amount * 100")
+    for table_name, column_name in AMOUNT_ARRAY_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=postgresql.ARRAY(sa.Numeric()),
+            type_=postgresql.ARRAY(sa.BigInteger()),
+            existing_nullable=False,
+            postgresql_using=f"pg_temp.scale_amounts({column_name})",
+        )
+    op.execute("DROP FUNCTION pg_temp.scale_amounts(numeric[])")
+
+
+def downgrade():
+    _create_scale_amounts_function("bigint", "numeric", "round(amount / 100.0, 2)")
+    for table_name, column_name in reversed(AMOUNT_ARRAY_COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=postgresql.ARRAY(sa.BigInteger()),
+            type_=postgresql.ARRAY(sa.Numeric()),
+            existing_nullable=False,
+            postgresql_using=f"pg_temp.scale_amounts({column_name})",
+        )
+    op.execute("DROP FUNCTION pg_temp.scale_amounts(bigint[])")
+
+    for table_name, column_name in reversed(AMOUNT_COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.BigInteger(),
+            type_=sa.Numeric(),
+            existing_nullable=False,
+            postgresql_using=f"round({column_name} / 100.0, 2)",
+        )
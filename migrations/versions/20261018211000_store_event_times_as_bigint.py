@@ -0,0 +1,69 @@
+"""store event times as bigint
+
+Revision ID: 017b726f9061
+Revises: 311473a6aea5
+Create Date: 2026-10-18 21:10:00.576943
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "017b726f9061"
+down_revision = "311473a6aea5"
+branch_labels = None
+depends_on = None
+
+# The dispatch times held outside of `activity_event`, which overflow in 2038 as INTEGER
+EVENT_TIME_COLUMNS = [
+    ("activity_event_queue", "event_received_at", False),
+    ("user_alert_state", "last_event_received_at", True),
+    ("user_velocity_bucket", "bucket_start", False),
+]
+EVENT_TIME_ARRAY_COLUMNS = [
+    ("user_alert_state", "recent_deposit_received_at"),
+    ("user_alert_state", "window_deposit_received_at"),
+]
+
+
+def upgrade():
+    for table_name, column_name, nullable in EVENT_TIME_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.INTEGER(),
+            type_=sa.BigInteger(),
+            existing_nullable=nullable,
+        )
+
+    for table_name, column_name in EVENT_TIME_ARRAY_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=postgresql.ARRAY(sa.INTEGER()),
+            type_=sa.ARRAY(sa.BigInteger()),
+            existing_nullable=False,
+        )
+
+
+def downgrade():
+    for table_name, column_name in reversed(EVENT_TIME_ARRAY_COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.ARRAY(sa.BigInteger()),
+            type_=postgresql.ARRAY(sa.INTEGER()),
+            existing_nullable=False,
+        )
+
+    for table_name, column_name, nullable in reversed(EVENT_TIME_COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.BigInteger(),
+            type_=sa.INTEGER(),
+            existing_nullable=nullable,
+        )
@@ -0,0 +1,92 @@
+"""store dispatch times in seconds
+
+Revision ID: db86166ac72b
+Revises: 017b726f9061
+Create Date: 2026-10-18 21:20:00.318204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "db86166ac72b"
+down_revision = "017b726f9061"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "idx_events_created_by_user",
+        ["user_id", "event_received_at"],
+        {"postgresql_include": ["transaction_type", "amount"]},
+    ),
+    (
+        "idx_events_by_user_transaction_type",
+        ["user_id", "transaction_type", "event_received_at"],
+        {"postgresql_include": ["amount"]},
+    ),
+    (
+        "brin_events_by_event_received_at",
+        ["event_received_at"],
+        {"postgresql_using": "brin"},
+    ),
+]
+
+COLUMNS = (
+    "id, transaction_type, amount, user_id, event_received_at, created_at, updated_at"
+)
+
+
+def _rebuild_activity_event_table(event_received_at):
+    # The monthly partitions are bounded by the previous units, so the table is rebuilt
+    # with only the default partition and they must be created again by
+    # `flask events partitions`
+    for index_name, _, options in reversed(INDEXES):
+        op.drop_index(index_name, table_name="activity_event", **options)
+
+    op.drop_constraint("activity_event_pkey", "activity_event", type_="primary")
+    op.rename_table("activity_event", "activity_event_previous")
+    op.rename_table("activity_event_default", "activity_event_previous_default")
+
+    op.create_table(
+        "activity_event",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "event_received_at", sa.BigInteger(), autoincrement=False, nullable=False
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("transaction_type", sa.SmallInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "event_received_at", name="activity_event_pkey"),
+        postgresql_partition_by="RANGE (event_received_at)",
+    )
+    op.execute(
+        "CREATE TABLE activity_event_default PARTITION OF activity_event DEFAULT"
+    )
+
+    # The indexes are created once the events are copied, which is faster than
+    # maintaining them for every row
+    op.execute(
+        f"INSERT INTO activity_event ({COLUMNS}) "
+        "SELECT id, transaction_type, amount, user_id, "
+        f"{event_received_at}, created_at, updated_at "
+        "FROM activity_event_previous"
+    )
+    for index_name, columns, options in INDEXES:
+        op.create_index(index_name, "activity_event", columns, unique=False, **options)
+
+    op.drop_table("activity_event_previous")
+
+
+def upgrade():
+    # Dispatch times are stored in the seconds they are received in, rather than scaled
+    # to milliseconds which were never more precise than a second
+    _rebuild_activity_event_table("event_received_at / 1000")
+
+
+def downgrade():
+    _rebuild_activity_event_table("event_received_at * 1000")
@@ -0,0 +1,33 @@
+"""count queued event attempts
+
+Revision ID: 933f2bb3313c
+Revises: db86166ac72b
+Create Date: 2026-10-18 21:30:00.571585
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "933f2bb3313c"
+down_revision = "db86166ac72b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "activity_event_queue",
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "activity_event_queue",
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("activity_event_queue", "failed_at")
+    op.drop_column("activity_event_queue", "attempts")
@@ -1,19 +1,28 @@
-from decimal import Decimal
+from collections.abc import Callable
+from contextlib import AbstractContextManager
 from http import HTTPStatus
 from typing import TYPE_CHECKING
 
 import pytest
 from flask.testing import FlaskClient
 from freezegun import freeze_time
+from sqlalchemy import select
 
 from app import db
-from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.cache import alert_state_cache
+from app.events.enums import (
+    ActivityEventTypeEnum,
+    AlertCodeEnum,
+    AlertStateBackendEnum,
+)
 from app.events.models import ActivityEvent
 from tests.factories.activity_event_factory import ActivityEventFactory
 
 if TYPE_CHECKING:
     from werkzeug.test import TestResponse
 
+    from app.datastores import StatementRecord
+
 
 @pytest.fixture
 def desposit_event_as_dict() -> dict:
@@ -31,14 +40,14 @@ def historic_activity_events_as_model() -> list[ActivityEvent]:
         ActivityEventFactory(
             is_default_user=True,
             transaction_type=ActivityEventTypeEnum.DEPOSIT,
-            amount=Decimal("50.00"),
+            amount=50_00,
             is_received=True,
             event_received_at=1577836801,
         ),
         ActivityEventFactory(
             is_default_user=True,
             transaction_type=ActivityEventTypeEnum.DEPOSIT,
-            amount=Decimal("75.00"),
+            amount=75_00,
             is_received=True,
             event_received_at=1577836802,
         ),
@@ -212,6 +221,61 @@ def test_create_event_when_type_unsupported(
     }
 
 
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_event_when_amount_out_of_range(
+    client: FlaskClient,
+) -> None:
+    activity_event: dict = {
+        "type": "deposit",
+        "amount": "100000000000000000.00",
+        "user_id": 1,
+        "t": 0,
+    }
+
+    response: TestResponse = client.post(
+        "/event",
+        json=activity_event,
+        headers=[],
+    )
+
+    assert response.status_code == 422
+    assert response.json == {
+        "code": 422,
+        "message": str({"amount": ["Must be less than or equal to 1000000000.00."]}),
+    }
+    assert ActivityEvent.query.count() == 0
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_event_when_time_out_of_range(
+    client: FlaskClient,
+) -> None:
+    activity_event: dict = {
+        "type": "deposit",
+        "amount": "10.00",
+        "user_id": 1,
+        "t": 2**63,
+    }
+
+    response: TestResponse = client.post(
+        "/event",
+        json=activity_event,
+        headers=[],
+    )
+
+    assert response.status_code == 422
+    assert response.json == {
+        "code": 422,
+        "message": str(
+            {
+                "t": [
+                    f"Must be greater than or equal to 0 and less than or equal to {2**63 - 1}."
+                ]
+            }
+        ),
+    }
+
+
 @freeze_time("2020-01-01T00:00:00+00:00")
 def test_create_event_when_fields_are_missing(
     client: FlaskClient,
@@ -234,3 +298,97 @@ def test_create_event_when_fields_are_missing(
             }
         ),
     }
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+@pytest.mark.parametrize("backend", [AlertStateBackendEnum.CACHE], indirect=True)
+def test_create_event_with_alert_state_cache(
+    client: FlaskClient,
+    backend: AlertStateBackendEnum,  # noqa: ARG001
+) -> None:
+    responses: list[TestResponse] = [
+        client.post(
+            "/event",
+            json={
+                "type": "deposit",
+                "amount": amount,
+                "user_id": 1,
+                "t": 1577836800 + index,
+            },
+            headers=[],
+        )
+        for index, amount in enumerate(["10.00", "20.00", "30.00"])
+    ]
+
+    assert [response.json for response in responses] == [
+        {"alert": False, "alert_codes": [], "user_id": 1},
+        {"alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value],
+            "user_id": 1,
+        },
+    ]
+    assert alert_state_cache.stats.misses == 1
+    assert alert_state_cache.stats.hits == 2
+
+
+def test_create_event_within_query_budget(
+    client: FlaskClient,
+    withdraw_event_as_dict: dict,
+    query_budget: Callable[[int], AbstractContextManager[list["StatementRecord"]]],
+) -> None:
+    # The advisory lock of the user, and the insert of the event and the upsert of their
+    # velocity buckets alongside the retrieval of their history and buckets
+    with query_budget(2):
+        response: TestResponse = client.post("/event", json=withdraw_event_as_dict)
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@freeze_time("2040-01-01T00:00:00+00:00")
+def test_create_event_after_2038(
+    client: FlaskClient,
+    backend: AlertStateBackendEnum,  # noqa: ARG001
+) -> None:
+    # Dispatch times past 2038 overflow a 32-bit integer in every table they are held in
+    responses: list[TestResponse] = [
+        client.post(
+            "/event",
+            json={
+                "type": transaction_type,
+                "amount": amount,
+                "user_id": 1,
+                "t": 2_200_000_000 + index,
+            },
+        )
+        for index, (transaction_type, amount) in enumerate(
+            [
+                ("deposit", "10.00"),
+                ("deposit", "20.00"),
+                ("deposit", "30.00"),
+                ("withdraw", "150.00"),
+            ]
+        )
+    ]
+
+    assert [response.status_code for response in responses] == [HTTPStatus.CREATED] * 4
+    assert [response.json for response in responses][2:] == [
+        {
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value],
+            "user_id": 1,
+        },
+        {
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value],
+            "user_id": 1,
+        },
+    ]
+    assert list(
+        db.session.scalars(
+            select(ActivityEvent.event_received_at).order_by(
+                ActivityEvent.event_received_at
+            )
+        )
+    ) == [2_200_000_000, 2_200_000_001, 2_200_000_002, 2_200_000_003]
@@ -0,0 +1,96 @@
+import uuid
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+from flask.testing import FlaskClient
+from freezegun import freeze_time
+
+from app.events.enums import AlertCodeEnum
+from app.events.models import ActivityEvent, QueuedActivityEvent
+from app.events.workers import drain_activity_event_queue
+
+if TYPE_CHECKING:
+    from werkzeug.test import TestResponse
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_event_when_respond_async_is_preferred(client: FlaskClient) -> None:
+    response: TestResponse = client.post(
+        "/event",
+        json={"type": "withdraw", "amount": "150.00", "user_id": 1, "t": 1577836799},
+        headers={"Prefer": "wait=5, respond-async"},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json is not None
+    event_id: str = response.json["id"]
+    assert response.json == {"id": event_id, "status": "queued"}
+    assert response.headers["Location"] == f"/event/{event_id}/alerts"
+    assert response.headers["Preference-Applied"] == "respond-async"
+    assert QueuedActivityEvent.query.count() == 1
+    assert ActivityEvent.query.count() == 0
+
+    response = client.get(f"/event/{event_id}/alerts")
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json == {"id": event_id, "status": "queued"}
+
+    assert drain_activity_event_queue() == 1
+
+    response = client.get(f"/event/{event_id}/alerts")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {
+        "alert": True,
+        "alert_codes": [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value],
+        "user_id": 1,
+    }
+    assert QueuedActivityEvent.query.count() == 0
+    assert str(ActivityEvent.query.one().id) == event_id
+
+
+def test_create_event_when_respond_async_is_preferred_and_amount_is_zero(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event",
+        json={"type": "deposit", "amount": "0.00", "user_id": 1, "t": 1577836799},
+        headers={"Prefer": "respond-async"},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert QueuedActivityEvent.query.count() == 0
+
+
+def test_get_event_alerts_when_event_is_unknown(client: FlaskClient) -> None:
+    response: TestResponse = client.get(f"/event/{uuid.uuid4()}/alerts")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json == {"error": "Event not found"}
+
+
+@freeze_time("2040-01-01T00:00:00+00:00")
+def test_create_event_when_respond_async_is_preferred_after_2038(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event",
+        json={"type": "withdraw", "amount": "150.00", "user_id": 1, "t": 2_200_000_000},
+        headers={"Prefer": "respond-async"},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert QueuedActivityEvent.query.one().event_received_at == 2_200_000_000
+
+    assert drain_activity_event_queue() == 1
+
+    assert response.json is not None
+    response = client.get(f"/event/{response.json['id']}/alerts")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {
+        "alert": True,
+        "alert_codes": [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value],
+        "user_id": 1,
+    }
+    assert ActivityEvent.query.one().event_received_at == 2_200_000_000
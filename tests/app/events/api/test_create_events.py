@@ -0,0 +1,157 @@
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+import pytest
+from flask.testing import FlaskClient
+from freezegun import freeze_time
+
+from app import config
+from app.events.enums import AlertCodeEnum
+from app.events.models import ActivityEvent
+
+if TYPE_CHECKING:
+    from werkzeug.test import TestResponse
+
+    from app.datastores import StatementRecord
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event/batch",
+        json=[
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {"type": "withdraw", "amount": "150.00", "user_id": 2, "t": 1577836791},
+            {"type": "deposit", "amount": "20.00", "user_id": 1, "t": 1577836792},
+            {"type": "deposit", "amount": "30.00", "user_id": 1, "t": 1577836793},
+        ],
+        headers=[],
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == [
+        {"alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value],
+            "user_id": 2,
+        },
+        {"alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value],
+            "user_id": 1,
+        },
+    ]
+    assert ActivityEvent.query.count() == 4
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_when_amount_is_zero(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event/batch",
+        json=[
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {"type": "deposit", "amount": "0.00", "user_id": 1, "t": 1577836791},
+        ],
+        headers=[],
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json == {"error": "Amount of event 1 must be greater than 0"}
+    assert ActivityEvent.query.count() == 0
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_when_fields_are_missing(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event/batch",
+        json=[
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {"type": "deposit", "amount": "10.00", "user_id": 1},
+        ],
+        headers=[],
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json == {
+        "code": 422,
+        "message": str({1: {"t": ["Missing data for required field."]}}),
+    }
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_when_amount_out_of_range(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post(
+        "/event/batch",
+        json=[
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {
+                "type": "deposit",
+                "amount": "100000000000000000.00",
+                "user_id": 1,
+                "t": 1577836791,
+            },
+        ],
+        headers=[],
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json == {
+        "code": 422,
+        "message": str(
+            {1: {"amount": ["Must be less than or equal to 1000000000.00."]}}
+        ),
+    }
+    assert ActivityEvent.query.count() == 0
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_when_batch_is_too_large(
+    client: FlaskClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(config, "EVENT_BATCH_MAX_SIZE", 1)
+
+    response: TestResponse = client.post(
+        "/event/batch",
+        json=[
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {"type": "deposit", "amount": "20.00", "user_id": 1, "t": 1577836791},
+        ],
+        headers=[],
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json == {"error": "Batch must contain at most 1 events"}
+
+
+@pytest.mark.parametrize("size", [1, 50])
+def test_create_events_within_query_budget(
+    client: FlaskClient,
+    size: int,
+    query_budget: Callable[[int], AbstractContextManager[list["StatementRecord"]]],
+) -> None:
+    # The statements executed do not grow with the number of events or users: the
+    # advisory locks of the users, the upsert of their velocity buckets alongside the
+    # retrieval of their history and buckets, and the insert of the events
+    with query_budget(3):
+        response: TestResponse = client.post(
+            "/event/batch",
+            json=[
+                {"type": "deposit", "amount": "10.00", "user_id": index % 5, "t": index}
+                for index in range(size)
+            ],
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,139 @@
+import io
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+import pytest
+import ujson
+from flask.testing import FlaskClient
+from freezegun import freeze_time
+
+from app import config
+from app.events.enums import AlertCodeEnum
+from app.events.models import ActivityEvent
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from werkzeug.test import TestResponse
+
+
+def _build_body(*lines: dict | str) -> bytes:
+    return b"".join(
+        (line if isinstance(line, str) else ujson.dumps(line)).encode() + b"\n"
+        for line in lines
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_stream(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "EVENT_STREAM_BATCH_SIZE", 2)
+
+    response: TestResponse = client.post(
+        "/event/stream",
+        data=_build_body(
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            {"type": "withdraw", "amount": "150.00", "user_id": 2, "t": 1577836791},
+            "",
+            {"type": "deposit", "amount": "20.00", "user_id": 1, "t": 1577836792},
+            {"type": "deposit", "amount": "30.00", "user_id": 1, "t": 1577836793},
+        ),
+        content_type="application/x-ndjson",
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/x-ndjson"
+    assert [ujson.loads(line) for line in response.get_data().splitlines()] == [
+        {"line": 1, "alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "line": 2,
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.value],
+            "user_id": 2,
+        },
+        {"line": 4, "alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "line": 5,
+            "alert": True,
+            "alert_codes": [AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value],
+            "user_id": 1,
+        },
+    ]
+    assert ActivityEvent.query.count() == 4
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_stream_with_invalid_lines(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "EVENT_STREAM_MAX_LINE_SIZE", 100)
+
+    response: TestResponse = client.post(
+        "/event/stream",
+        data=_build_body(
+            "{not json",
+            {"type": "deposit", "amount": "0.00", "user_id": 1, "t": 1577836790},
+            {"type": "deposit", "user_id": 1, "t": 1577836790},
+            {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+            "x" * 250,
+            {"type": "deposit", "amount": "20.00", "user_id": 1, "t": 1577836791},
+            {"type": "deposit", "amount": "1e17", "user_id": 1, "t": 1577836792},
+        ),
+        content_type="application/x-ndjson",
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [ujson.loads(line) for line in response.get_data().splitlines()] == [
+        {"line": 1, "message": "Line must be valid JSON", "code": 400},
+        {"line": 2, "message": "Amount must be greater than 0", "code": 400},
+        {
+            "line": 3,
+            "message": {"amount": ["Missing data for required field."]},
+            "code": 422,
+        },
+        {"line": 4, "alert": False, "alert_codes": [], "user_id": 1},
+        {"line": 5, "message": "Line must be at most 100 bytes", "code": 413},
+        {"line": 6, "alert": False, "alert_codes": [], "user_id": 1},
+        {
+            "line": 7,
+            "message": {"amount": ["Must be less than or equal to 1000000000.00."]},
+            "code": 422,
+        },
+    ]
+    assert ActivityEvent.query.count() == 2
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_create_events_stream_commits_each_batch_as_it_is_read(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "EVENT_STREAM_BATCH_SIZE", 1)
+
+    response: TestResponse = client.post(
+        "/event/stream",
+        input_stream=io.BytesIO(
+            _build_body(
+                {"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836790},
+                {"type": "deposit", "amount": "20.00", "user_id": 1, "t": 1577836791},
+            )
+        ),
+        content_type="application/x-ndjson",
+        buffered=False,
+    )
+    lines: Iterator[bytes] = response.iter_encoded()
+
+    assert response.is_streamed
+    assert ujson.loads(next(lines))["line"] == 1
+    assert ActivityEvent.query.count() == 1
+    assert ujson.loads(next(lines))["line"] == 2
+    assert ActivityEvent.query.count() == 2
+
+
+def test_create_events_stream_when_content_type_is_not_ndjson(
+    client: FlaskClient,
+) -> None:
+    response: TestResponse = client.post("/event/stream", json=[])
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+    assert response.json == {"error": "Content-Type must be application/x-ndjson"}
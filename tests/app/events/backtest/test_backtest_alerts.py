@@ -0,0 +1,198 @@
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from app import db
+from app.events.backtest import (
+    ActivityEventArrays,
+    AlertBacktestResult,
+    backtest_alerts,
+    get_activity_event_id,
+    load_activity_event_arrays,
+)
+from app.events.controllers import save_activity_event_and_check_alerts
+from app.events.domains import AlertResponseDomain, AlertThresholdsDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.models import ActivityEvent
+from lib.clock import ReplayClock, use_clock
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    import uuid
+
+
+def _build_activity_events(seed: int) -> list[ActivityEvent]:
+    # Amounts and gaps are small enough that every rule is triggered, and the gaps
+    # between a user's events straddle the accumulative deposit time window. The last
+    # users make amounts large enough to trigger the velocity rules.
+    rng: np.random.Generator = np.random.default_rng(seed=seed)
+    activity_events: list[ActivityEvent] = []
+
+    for user_id in range(1, 11):
+        maximum_amount: int = 15_000 if user_id < 7 else 150_000
+        event_received_at: int = 1577836800
+        for _ in range(rng.integers(0, 30, endpoint=True)):
+            event_received_at += int(rng.integers(1, 20, endpoint=True))
+            activity_events.append(
+                ActivityEventFactory(
+                    user_id=user_id,
+                    transaction_type=list(ActivityEventTypeEnum)[int(rng.integers(2))],
+                    amount=int(rng.integers(1, maximum_amount, endpoint=True)),
+                    event_received_at=event_received_at,
+                )
+            )
+
+    return sorted(
+        activity_events, key=lambda activity_event: activity_event.event_received_at
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_backtest_alerts_matches_check_alerts(seed: int) -> None:
+    # The events are replayed as fast as they can be evaluated, with the clock following
+    # their dispatch times
+    expected: dict[uuid.UUID, list[int]] = {}
+    with use_clock(ReplayClock()) as clock:
+        for activity_event in _build_activity_events(seed=seed):
+            clock.advance_to(activity_event.event_received_at)
+            alert_response: AlertResponseDomain = save_activity_event_and_check_alerts(
+                activity_event=activity_event
+            )
+            expected[activity_event.id] = sorted(alert_response.alert_codes)
+
+            assert activity_event.created_at == datetime.fromtimestamp(
+                activity_event.event_received_at, tz=UTC
+            )
+
+    arrays: ActivityEventArrays = load_activity_event_arrays()
+    result: AlertBacktestResult = backtest_alerts(arrays=arrays)
+
+    assert len(arrays) == len(expected)
+    assert {
+        get_activity_event_id(arrays=arrays, index=index): sorted(
+            result.get_alert_codes(index=index)
+        )
+        for index in range(len(arrays))
+    } == expected
+    assert all(result.counts.values())
+
+
+def test_backtest_alerts_with_thresholds() -> None:
+    arrays = ActivityEventArrays(
+        id=np.zeros(4, dtype="V16"),
+        user_id=np.array([1, 1, 1, 2], dtype=np.int64),
+        event_received_at=np.array([0, 10, 50, 0], dtype=np.int64),
+        is_deposit=np.array([True, True, True, False]),
+        amount=np.array([10_00, 20_00, 30_00, 40_00], dtype=np.int64),
+    )
+
+    result: AlertBacktestResult = backtest_alerts(
+        arrays=arrays,
+        thresholds=AlertThresholdsDomain(
+            single_withdraw_amount_limit=39_99,
+            consecutive_withdraw_transaction_limit=1,
+            consecutive_deposit_transaction_limit=2,
+            accumulative_deposit_amount_limit=29_50,
+            accumulative_deposit_time_limit=10,
+        ),
+    )
+
+    assert result.counts == {
+        **{code: 0 for code in AlertCodeEnum},
+        AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE: 1,
+        AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE: 0,
+        AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE: 2,
+        AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE: 2,
+    }
+    assert result.get_alert_codes(index=1) == [300, 123]
+
+
+def test_backtest_command(
+    app: Flask, deposit_activity_events_as_model: list[ActivityEvent]
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+
+    result = app.test_cli_runner().invoke(
+        args=["events", "backtest", "--consecutive-deposit-transaction-limit", "2"]
+    )
+
+    assert result.exit_code == 0
+    assert "CONSECUTIVE_DEPOSIT_CODE (300): " in result.output
+    assert f"Backtested {len(deposit_activity_events_as_model)} events" in result.output
+
+
+def test_backtest_command_fails_on_invalid_amount(app: Flask) -> None:
+    result = app.test_cli_runner().invoke(
+        args=["events", "backtest", "--single-withdraw-amount-limit", "ten"]
+    )
+
+    assert result.exit_code == 2
+    assert "'ten' is not an amount with at most two decimal places." in result.output
+
+
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        pytest.param([], 1, id="default"),
+        pytest.param(["--withdraw-velocity-limit", "30", "450.00"], 0, id="limit"),
+        pytest.param(["--withdraw-velocity-window", "30", "10"], 0, id="window"),
+        pytest.param(
+            [
+                "--withdraw-velocity-limit",
+                "30",
+                "100.00",
+                "--withdraw-velocity-window",
+                "30",
+                "10",
+            ],
+            3,
+            id="limit_and_window",
+        ),
+    ],
+)
+def test_backtest_command_with_velocity_thresholds(
+    app: Flask, args: list[str], expected: int
+) -> None:
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True,
+                is_withdraw=True,
+                amount=150_00,
+                event_received_at=1577836800 + index * 15,
+            )
+            for index in range(3)
+        ]
+    )
+
+    result = app.test_cli_runner().invoke(args=["events", "backtest", *args])
+
+    assert result.exit_code == 0
+    assert f"WITHDRAW_VELOCITY_30_SECONDS_CODE (1301): {expected}\n" in result.output
+
+
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        pytest.param(
+            ["--deposit-velocity-limit", "30", "100.00"],
+            "No deposit velocity rule has a window of 30 seconds.",
+            id="unregistered_window",
+        ),
+        pytest.param(
+            ["--withdraw-velocity-window", "86400", "864000"],
+            "A velocity window of 864000 seconds cannot be counted",
+            id="uncountable_window",
+        ),
+    ],
+)
+def test_backtest_command_fails_on_invalid_velocity_rule(
+    app: Flask, args: list[str], expected: str
+) -> None:
+    result = app.test_cli_runner().invoke(args=["events", "backtest", *args])
+
+    assert result.exit_code == 2
+    assert expected in result.output
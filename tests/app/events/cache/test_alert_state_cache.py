@@ -0,0 +1,381 @@
+from collections.abc import Generator
+from datetime import timedelta
+
+import pytest
+from freezegun import freeze_time
+
+from app import db
+from app.events.cache import AlertStateCache, AlertStateCacheStats
+from app.events.domains import ActivityEventHistoryDomain, ActivityEventRecordDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+@pytest.fixture
+def alert_state_cache() -> Generator[AlertStateCache]:
+    alert_state_cache = AlertStateCache(max_users=2, ttl=60)
+    alert_state_cache.register_write_through()
+
+    yield alert_state_cache
+
+    alert_state_cache.unregister_write_through()
+
+
+@pytest.fixture
+def historic_activity_events_as_model() -> list[ActivityEvent]:
+    return [
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=50_00,
+            event_received_at=1577836769,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=75_00,
+            event_received_at=1577836771,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=25_00,
+            event_received_at=1577836772,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_activity_event_history_loads_user_on_miss(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836800
+        )
+    )
+
+    assert activity_event_history == ActivityEventHistoryDomain(
+        recent_activity_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.WITHDRAW,
+                amount=25_00,
+                event_received_at=1577836772,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+        ],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=50_00,
+                event_received_at=1577836769,
+            ),
+        ],
+        amount_deposited_within_window=75_00,
+        deposits_within_window=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+        ],
+    )
+    assert alert_state_cache.stats == AlertStateCacheStats(
+        hits=0, misses=1, evictions=0, size=1
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_activity_event_history_writes_through_saved_events(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    db.save(
+        model=ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=100_00,
+            event_received_at=1577836780,
+        )
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836800
+        )
+    )
+
+    assert [
+        event.amount for event in activity_event_history.recent_activity_events
+    ] == [
+        100_00,
+        25_00,
+    ]
+    assert [event.amount for event in activity_event_history.recent_deposit_events] == [
+        100_00,
+        75_00,
+    ]
+    assert activity_event_history.amount_deposited_within_window == 175_00
+    assert alert_state_cache.stats.hits == 1
+    assert alert_state_cache.stats.misses == 1
+
+
+def test_get_activity_event_history_excludes_deposits_outside_window(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836802
+        )
+    )
+
+    assert activity_event_history.amount_deposited_within_window == 0
+    assert alert_state_cache.stats.hits == 1
+
+
+def test_get_activity_event_history_excludes_deposits_dispatched_after_event(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836770
+        )
+    )
+
+    assert activity_event_history.amount_deposited_within_window == 50_00
+
+
+def test_get_activity_event_history_reloads_user_for_event_before_window(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836802
+    )
+
+    # The deposits within the window of the earlier event have been removed
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836790
+        )
+    )
+
+    assert activity_event_history.amount_deposited_within_window == 125_00
+    assert alert_state_cache.stats.misses == 2
+
+
+def test_get_activity_event_history_holds_a_deposit_record_per_second(
+    alert_state_cache: AlertStateCache,
+) -> None:
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True,
+                is_deposit=True,
+                amount=10_00,
+                event_received_at=1577836800 + index // 3,
+            )
+            for index in range(300)
+        ]
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836899
+        )
+    )
+
+    # Deposits dispatched within the same second are summed, and those before the
+    # window of the latest deposit are removed
+    assert activity_event_history.deposits_within_window is not None
+    assert len(activity_event_history.deposits_within_window) == (
+        alert_state_cache.max_deposits
+    )
+    assert activity_event_history.deposits_within_window[0] == (
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=30_00,
+            event_received_at=1577836899,
+        )
+    )
+    assert activity_event_history.amount_deposited_within_window == 31 * 30_00
+    assert alert_state_cache.stats.hits == 1
+
+
+def test_get_activity_event_history_does_not_cache_deposits_beyond_the_bound(
+    alert_state_cache: AlertStateCache,
+) -> None:
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True,
+                is_deposit=True,
+                amount=10_00,
+                event_received_at=1577836800 + index,
+            )
+            for index in range(100)
+        ]
+    )
+
+    # The deposits since the window of the event span more seconds than are held
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836830
+        )
+    )
+
+    assert activity_event_history.amount_deposited_within_window == 31 * 10_00
+    assert alert_state_cache.stats.size == 0
+
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836899
+    )
+
+    assert alert_state_cache.stats.misses == 2
+    assert alert_state_cache.stats.size == 1
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_record_invalidates_user_for_out_of_order_events(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    db.save(
+        model=ActivityEventFactory(
+            is_default_user=True,
+            is_withdraw=True,
+            event_received_at=1577836770,
+        )
+    )
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    assert alert_state_cache.stats.misses == 2
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_invalidated_users_are_removed_from_the_size(
+    alert_state_cache: AlertStateCache,
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+    for user_id in (1, 2):
+        alert_state_cache.get_activity_event_history(
+            user_id=user_id, event_received_at=1577836800
+        )
+    assert alert_state_cache.stats.size == 2
+
+    # An out of order event invalidates its user
+    db.save(
+        model=ActivityEventFactory(
+            is_default_user=True,
+            is_withdraw=True,
+            event_received_at=1577836770,
+        )
+    )
+
+    assert alert_state_cache.stats.size == 1
+
+    alert_state_cache.invalidate(user_id=2)
+
+    assert alert_state_cache.stats.size == 0
+
+
+def test_record_ignores_uncommitted_events(
+    alert_state_cache: AlertStateCache,
+) -> None:
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+
+    db.session.add(
+        ActivityEventFactory(
+            is_default_user=True,
+            is_deposit=True,
+            event_received_at=1577836780,
+        )
+    )
+    db.session.flush()
+    db.session.rollback()
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836800
+        )
+    )
+
+    assert activity_event_history.recent_activity_events == []
+
+
+def test_get_activity_event_history_evicts_least_recently_used_users(
+    alert_state_cache: AlertStateCache,
+) -> None:
+    for user_id in (1, 2, 1, 3):
+        alert_state_cache.get_activity_event_history(
+            user_id=user_id, event_received_at=1577836800
+        )
+
+    alert_state_cache.get_activity_event_history(
+        user_id=1, event_received_at=1577836800
+    )
+    alert_state_cache.get_activity_event_history(
+        user_id=2, event_received_at=1577836800
+    )
+
+    assert alert_state_cache.stats == AlertStateCacheStats(
+        hits=2, misses=4, evictions=2, size=2
+    )
+
+
+def test_get_activity_event_history_expires_users_after_ttl(
+    alert_state_cache: AlertStateCache,
+) -> None:
+    with freeze_time("2020-01-01T00:00:00+00:00") as frozen_time:
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836800
+        )
+        frozen_time.tick(timedelta(seconds=61))
+        alert_state_cache.get_activity_event_history(
+            user_id=1, event_received_at=1577836800
+        )
+
+    assert alert_state_cache.stats.hits == 0
+    assert alert_state_cache.stats.misses == 2
@@ -0,0 +1,108 @@
+from flask import Flask
+from freezegun import freeze_time
+
+from app import db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent, UserAlertState
+from app.events.state import build_user_alert_state
+from app.events.velocity import VelocityCounter, get_velocity_counter
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_backfill_alert_state(
+    app: Flask,
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+
+    result = app.test_cli_runner().invoke(
+        args=["events", "backfill-alert-state", "--batch-size", "1"]
+    )
+
+    assert result.exit_code == 0
+    assert "Backfilled the alert state of 1 users." in result.output
+
+    user_alert_state: UserAlertState = db.session.get_one(UserAlertState, 1)
+    assert user_alert_state.recent_deposit_amounts == [
+        75_00,
+        50_00,
+    ]
+    assert user_alert_state.window_deposit_total == 125_00
+    assert user_alert_state.last_event_received_at == 1577836802
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_check_alert_state(
+    app: Flask,
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+    db.save(model=build_user_alert_state(user_id=1))
+
+    result = app.test_cli_runner().invoke(args=["events", "check-alert-state"])
+
+    assert result.exit_code == 0
+    assert "Checked the alert state of 1 users, 0 inconsistent." in result.output
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_check_alert_state_with_inconsistent_state(
+    app: Flask,
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+    user_alert_state: UserAlertState = build_user_alert_state(user_id=1)
+    user_alert_state.window_deposit_amounts = [75_00]
+    user_alert_state.window_deposit_received_at = [1577836802]
+    db.save(model=user_alert_state)
+
+    result = app.test_cli_runner().invoke(args=["events", "check-alert-state"])
+
+    assert result.exit_code == 1
+    assert "User 1 is inconsistent: amount_deposited_within_window" in result.output
+
+
+def test_backfill_velocity_buckets(
+    app: Flask,
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+
+    result = app.test_cli_runner().invoke(
+        args=["events", "backfill-velocity-buckets", "--batch-size", "1"]
+    )
+
+    assert result.exit_code == 0
+    assert "Backfilled the velocity buckets of 1 users." in result.output
+
+    velocity_counter: VelocityCounter = get_velocity_counter(
+        user_id=1, event_received_at=1577836802
+    )
+    assert (
+        velocity_counter.get_total(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            event_received_at=1577836802,
+            window=300,
+        )
+        == 125_00
+    )
+
+
+@freeze_time("2020-01-10T00:00:00+00:00")
+def test_partitions(app: Flask) -> None:
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["events", "partitions", "--months-ahead", "1"])
+
+    assert result.exit_code == 0
+    assert "Created partition activity_event_p2020_01." in result.output
+    assert "Created 2 and detached 0 partitions." in result.output
+
+    with freeze_time("2020-03-10T00:00:00+00:00"):
+        result = runner.invoke(
+            args=["events", "partitions", "--months-ahead", "0", "--retain-months", "1"]
+        )
+
+    assert result.exit_code == 0
+    assert "Detached partition activity_event_p2020_01." in result.output
+    assert "Created 1 and detached 1 partitions." in result.output
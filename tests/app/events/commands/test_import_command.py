@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from flask import Flask
+
+from app.events.models import ActivityEvent, ActivityEventImportChunk
+
+
+def test_import(app: Flask, tmp_path: Path) -> None:
+    path: Path = tmp_path / "events.csv"
+    path.write_text(
+        "type,amount,user_id,t\n"
+        "deposit,10.00,1,1577836800\n"
+        "withdraw,-20.00,2,1577836801\n"
+        "withdraw,30.00,3,1577836802\n"
+    )
+
+    result = app.test_cli_runner().invoke(
+        args=["events", "import", str(path), "--chunk-size", "2", "--workers", "1"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 events in" in result.output
+    assert "1 rejected." in result.output
+    assert ActivityEvent.query.count() == 2
+    assert ActivityEventImportChunk.query.filter_by(source=str(path)).count() == 2
+
+
+def test_import_with_a_different_chunk_size(app: Flask, tmp_path: Path) -> None:
+    path: Path = tmp_path / "events.ndjson"
+    path.write_text(
+        '{"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836800}\n'
+    )
+    runner = app.test_cli_runner()
+
+    runner.invoke(args=["events", "import", str(path), "--workers", "1"])
+    result = runner.invoke(
+        args=["events", "import", str(path), "--chunk-size", "5", "--workers", "1"]
+    )
+
+    assert result.exit_code == 2
+    assert "was imported with a chunk size of 10000" in result.output
+    assert ActivityEvent.query.count() == 1
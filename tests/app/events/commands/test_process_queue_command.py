@@ -0,0 +1,24 @@
+from flask import Flask
+from freezegun import freeze_time
+
+from app import db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent, ActivityEventAlert, QueuedActivityEvent
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_process_queue_when_draining(app: Flask) -> None:
+    queued_activity_event = QueuedActivityEvent(
+        user_id=1,
+        transaction_type=ActivityEventTypeEnum.WITHDRAW,
+        amount=150_00,
+        event_received_at=1577836800,
+    )
+    db.save(model=queued_activity_event)
+
+    result = app.test_cli_runner().invoke(args=["events", "process-queue", "--drain"])
+
+    assert result.exit_code == 0
+    assert "Processed 1 queued events." in result.output
+    assert ActivityEvent.query.count() == 1
+    assert db.session.get_one(ActivityEventAlert, queued_activity_event.id).alert
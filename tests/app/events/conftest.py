@@ -1,12 +1,29 @@
-from decimal import Decimal
+from collections.abc import Generator
 
 import pytest
 
-from app.events.enums import ActivityEventTypeEnum
+from app import config
+from app.events.cache import alert_state_cache
+from app.events.enums import ActivityEventTypeEnum, AlertStateBackendEnum
 from app.events.models import ActivityEvent
 from tests.factories.activity_event_factory import ActivityEventFactory
 
 
+@pytest.fixture(params=list(AlertStateBackendEnum))
+def backend(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> Generator[AlertStateBackendEnum]:
+    """Runs a test against each alert state backend, or those it is parametrized with
+    indirectly, with events written through to the alert state cache."""
+    monkeypatch.setattr(config, "ALERT_STATE_BACKEND", request.param)
+    alert_state_cache.register_write_through()
+
+    yield request.param
+
+    alert_state_cache.unregister_write_through()
+    alert_state_cache.clear()
+
+
 @pytest.fixture
 def withdraw_activity_events_as_model() -> list[ActivityEvent]:
     return [
@@ -37,14 +54,14 @@ def deposit_activity_events_as_model() -> list[ActivityEvent]:
         ActivityEventFactory(
             is_default_user=True,
             transaction_type=ActivityEventTypeEnum.DEPOSIT,
-            amount=Decimal("75.00"),
+            amount=75_00,
             is_received=True,
             event_received_at=1577836802,
         ),
         ActivityEventFactory(
             is_default_user=True,
             transaction_type=ActivityEventTypeEnum.DEPOSIT,
-            amount=Decimal("50.00"),
+            amount=50_00,
             is_received=True,
             event_received_at=1577836801,
         ),
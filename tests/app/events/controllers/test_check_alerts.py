@@ -1,12 +1,16 @@
-from decimal import Decimal
-
 import pytest
 
 from app import db
 from app.events.controllers import check_alerts
-from app.events.domains import AlertResponseDomain
+from app.events.domains import (
+    ActivityEventHistoryDomain,
+    ActivityEventRecordDomain,
+    AlertResponseDomain,
+)
 from app.events.enums import ActivityEventTypeEnum
 from app.events.models import ActivityEvent
+from app.events.velocity import VelocityCounter
+from lib.money import Cents
 from lib.utils import get_epoch_now
 from tests.factories.activity_event_factory import ActivityEventFactory
 
@@ -15,7 +19,7 @@ from tests.factories.activity_event_factory import ActivityEventFactory
     ("amount", "transaction_type", "expected"),
     [
         pytest.param(
-            Decimal("99.99"),
+            99_99,
             ActivityEventTypeEnum.WITHDRAW,
             AlertResponseDomain(
                 user_id=1,
@@ -25,7 +29,7 @@ from tests.factories.activity_event_factory import ActivityEventFactory
             id="withdraw_below_limit",
         ),
         pytest.param(
-            Decimal("100.00"),
+            100_00,
             ActivityEventTypeEnum.WITHDRAW,
             AlertResponseDomain(
                 user_id=1,
@@ -35,7 +39,7 @@ from tests.factories.activity_event_factory import ActivityEventFactory
             id="withdraw_at_limit",
         ),
         pytest.param(
-            Decimal("100.01"),
+            100_01,
             ActivityEventTypeEnum.WITHDRAW,
             AlertResponseDomain(
                 user_id=1,
@@ -47,7 +51,7 @@ from tests.factories.activity_event_factory import ActivityEventFactory
     ],
 )
 def test_check_alerts_for_withdraw_limits(
-    amount: Decimal,
+    amount: Cents,
     transaction_type: ActivityEventTypeEnum,
     expected: AlertResponseDomain,
 ) -> None:
@@ -87,6 +91,7 @@ def test_check_alerts_for_withdraw_limits(
             ActivityEventFactory(
                 is_default_user=True,
                 is_withdraw=True,
+                event_received_at=1577836801,
             ),
             [
                 ActivityEventFactory(
@@ -147,6 +152,7 @@ def test_check_alerts_for_concecutive_withdraw_limit(
             ActivityEventFactory(
                 is_default_user=True,
                 is_deposit=True,
+                event_received_at=1577836900,
             ),
             [
                 ActivityEventFactory(
@@ -173,20 +179,21 @@ def test_check_alerts_for_concecutive_withdraw_limit(
             ActivityEventFactory(
                 is_default_user=True,
                 transaction_type=ActivityEventTypeEnum.DEPOSIT,
-                amount=Decimal("100.00"),
+                amount=100_00,
+                event_received_at=1577836900,
             ),
             [
                 ActivityEventFactory(
                     is_default_user=True,
                     transaction_type=ActivityEventTypeEnum.DEPOSIT,
-                    amount=Decimal("50.00"),
+                    amount=50_00,
                     is_received=True,
                     event_received_at=1577836799,
                 ),
                 ActivityEventFactory(
                     is_default_user=True,
                     transaction_type=ActivityEventTypeEnum.DEPOSIT,
-                    amount=Decimal("75.00"),
+                    amount=75_00,
                     is_received=True,
                     event_received_at=1577836800,
                 ),
@@ -247,3 +254,79 @@ def test_check_alerts_for_accumulative_deposits_over_time(
     )
 
     assert alert_response == expected
+
+
+def test_check_alerts_with_prefetched_history() -> None:
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        transaction_type=ActivityEventTypeEnum.DEPOSIT,
+        amount=100_00,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836799,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=50_00,
+                event_received_at=1577836798,
+            ),
+        ],
+        amount_deposited_within_window=125_00,
+    )
+
+    alert_response: AlertResponseDomain = check_alerts(
+        user_id=1,
+        current_activity_event=activity_event,
+        activity_event_history=activity_event_history,
+    )
+
+    assert alert_response == AlertResponseDomain(
+        user_id=1,
+        alert=True,
+        alert_codes=[123, 300],
+    )
+
+
+@pytest.mark.parametrize(
+    ("event_received_at", "expected"),
+    [
+        pytest.param(1577836800, [1301, 1302], id="within_30_seconds"),
+        pytest.param(1577836830, [1302], id="within_5_minutes"),
+        pytest.param(1577837100, [], id="outside_every_window"),
+    ],
+)
+def test_check_alerts_for_velocity(event_received_at: int, expected: list[int]) -> None:
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        transaction_type=ActivityEventTypeEnum.WITHDRAW,
+        amount=100_00,
+        event_received_at=event_received_at,
+    )
+
+    velocity_counter = VelocityCounter()
+    for index in range(10):
+        velocity_counter.add(
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            event_received_at=1577836780 + index,
+            amount=100_00,
+        )
+
+    alert_response: AlertResponseDomain = check_alerts(
+        user_id=1,
+        current_activity_event=activity_event,
+        activity_event_history=ActivityEventHistoryDomain(
+            recent_activity_events=[],
+            recent_deposit_events=[],
+            amount_deposited_within_window=0,
+            velocity_counter=velocity_counter,
+        ),
+    )
+
+    assert sorted(alert_response.alert_codes) == expected
@@ -2,6 +2,7 @@ from freezegun import freeze_time
 
 from app import db
 from app.events.controllers import check_consecutive_deposits
+from app.events.enums import ActivityEventTypeEnum
 from app.events.models import ActivityEvent
 from tests.factories.activity_event_factory import ActivityEventFactory
 
@@ -120,3 +121,50 @@ def test_check_consecutive_deposits_when_exceeding_the_limit_with_increasing_amo
     )
 
     assert exceeded_consecutive_deposits is True
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_check_consecutive_deposits_only_evaluates_the_most_recent_deposits() -> None:
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=10_00,
+                event_received_at=1577836799,
+            ),
+            ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=20_00,
+                event_received_at=1577836800,
+            ),
+            ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=90_00,
+                event_received_at=1577836801,
+            ),
+            ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=80_00,
+                event_received_at=1577836802,
+            ),
+        ]
+    )
+
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        transaction_type=ActivityEventTypeEnum.DEPOSIT,
+        amount=30_00,
+        event_received_at=1577836803,
+    )
+
+    exceeded_consecutive_deposits: bool = check_consecutive_deposits(
+        user_id=1,
+        current_activity_event=activity_event,
+        concecutive_limit=3,
+    )
+
+    assert exceeded_consecutive_deposits is False
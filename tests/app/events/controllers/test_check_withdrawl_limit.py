@@ -1,11 +1,10 @@
-from decimal import Decimal
-
 import pytest
 from freezegun import freeze_time
 
 from app.events.controllers import check_withdraw_limit
 from app.events.enums import ActivityEventTypeEnum
 from app.events.models import ActivityEvent
+from lib.money import Cents
 from lib.utils import get_epoch_now
 
 
@@ -13,60 +12,60 @@ from lib.utils import get_epoch_now
 @pytest.mark.parametrize(
     ("WITHDRAW_amount", "withdraw_limit", "expected"),
     [
-        pytest.param(Decimal("0"), Decimal("100"), False, id="zero_WITHDRAW"),
+        pytest.param(0, 100_00, False, id="zero_WITHDRAW"),
         pytest.param(
-            Decimal("50"),
-            Decimal("100"),
+            50_00,
+            100_00,
             False,
             id="half_of_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("99.99"),
-            Decimal("100"),
+            99_99,
+            100_00,
             False,
             id="below_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("100.00"),
-            Decimal("100"),
+            100_00,
+            100_00,
             False,
             id="equal_to_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("100.01"),
-            Decimal("100"),
+            100_01,
+            100_00,
             True,
             id="exceeds_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("100.01"),
-            Decimal("200"),
+            100_01,
+            200_00,
             False,
             id="double_the_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("199.99"),
-            Decimal("200"),
+            199_99,
+            200_00,
             False,
             id="below_increased_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("200"),
-            Decimal("200"),
+            200_00,
+            200_00,
             False,
             id="matching_increased_WITHDRAW_limit",
         ),
         pytest.param(
-            Decimal("201"),
-            Decimal("200"),
+            201_00,
+            200_00,
             True,
             id="exceeds_increased_WITHDRAW_limit",
         ),
     ],
 )
 def test_check_withdraw_limit(
-    WITHDRAW_amount: Decimal,
-    withdraw_limit: Decimal,
+    WITHDRAW_amount: Cents,
+    withdraw_limit: Cents,
     expected: bool,
 ) -> None:
     activity_event: ActivityEvent = ActivityEvent(
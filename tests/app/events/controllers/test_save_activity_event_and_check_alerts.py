@@ -0,0 +1,105 @@
+from typing import TYPE_CHECKING
+
+import pytest
+from freezegun import freeze_time
+
+from app import config, db
+from app.events.controllers import save_activity_event_and_check_alerts
+from app.events.enums import (
+    ActivityEventTypeEnum,
+    AlertCodeEnum,
+    AlertStateBackendEnum,
+)
+from app.events.models import ActivityEvent, UserAlertState
+from app.events.state import build_user_alert_state, compare_user_alert_state
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    from app.events.domains import AlertResponseDomain
+
+
+@pytest.fixture(autouse=True)
+def _enable_user_alert_state_table(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "ALERT_STATE_BACKEND", AlertStateBackendEnum.TABLE)
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_and_check_alerts_with_user_alert_state() -> None:
+    alert_responses: list[AlertResponseDomain] = [
+        save_activity_event_and_check_alerts(
+            activity_event=ActivityEventFactory(
+                is_default_user=True,
+                is_withdraw=True,
+                event_received_at=event_received_at,
+            )
+        )
+        for event_received_at in (1577836797, 1577836798, 1577836799)
+    ]
+
+    assert [alert_response.alert_codes for alert_response in alert_responses] == [
+        [],
+        [],
+        [AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE.value],
+    ]
+
+    user_alert_state: UserAlertState = db.session.get_one(UserAlertState, 1)
+    assert user_alert_state.consecutive_withdraw_count == 3
+    assert user_alert_state.last_event_received_at == 1577836799
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_and_check_alerts_with_user_alert_state_out_of_order(
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    for activity_event in deposit_activity_events_as_model:
+        save_activity_event_and_check_alerts(activity_event=activity_event)
+
+    alert_response: AlertResponseDomain = save_activity_event_and_check_alerts(
+        activity_event=ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=100_00,
+            event_received_at=1577836800,
+        )
+    )
+
+    # The deposits dispatched after the event are outside of its deposit time window
+    assert alert_response.alert_codes == [AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE.value]
+    assert (
+        compare_user_alert_state(
+            user_alert_state=db.session.get_one(UserAlertState, 1),
+            built_user_alert_state=build_user_alert_state(user_id=1),
+        )
+        == []
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_and_check_alerts_without_user_alert_state() -> None:
+    # Withdraws saved before the alert state of the user was backfilled
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True,
+                is_withdraw=True,
+                event_received_at=event_received_at,
+            )
+            for event_received_at in (1577836797, 1577836798)
+        ]
+    )
+
+    alert_response: AlertResponseDomain = save_activity_event_and_check_alerts(
+        activity_event=ActivityEventFactory(
+            is_default_user=True, is_withdraw=True, event_received_at=1577836799
+        )
+    )
+
+    # The state is built from the history of the user, rather than evaluated as empty
+    assert alert_response.alert_codes == [AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE.value]
+    assert (
+        compare_user_alert_state(
+            user_alert_state=db.session.get_one(UserAlertState, 1),
+            built_user_alert_state=build_user_alert_state(user_id=1),
+        )
+        == []
+    )
@@ -0,0 +1,106 @@
+from typing import TYPE_CHECKING
+
+from freezegun import freeze_time
+
+from app import db
+from app.events.cache import alert_state_cache
+from app.events.controllers import (
+    save_activity_event_and_check_alerts,
+    save_activity_events_and_check_alerts,
+)
+from app.events.enums import (
+    ActivityEventTypeEnum,
+    AlertCodeEnum,
+    AlertStateBackendEnum,
+)
+from app.events.models import ActivityEvent, UserAlertState, UserVelocityBucket
+from app.events.state import build_user_alert_state, compare_user_alert_state
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    from app.events.domains import AlertResponseDomain
+
+
+def _build_activity_events() -> list[ActivityEvent]:
+    # Interleaves two users, including an event received out of order and deposits
+    # either side of the accumulative deposit time window
+    return [
+        ActivityEventFactory(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            event_received_at=event_received_at,
+        )
+        for user_id, transaction_type, amount, event_received_at in [
+            (1, ActivityEventTypeEnum.DEPOSIT, 50_00, 1577836700),
+            (2, ActivityEventTypeEnum.WITHDRAW, 20_00, 1577836780),
+            (1, ActivityEventTypeEnum.DEPOSIT, 60_00, 1577836781),
+            (2, ActivityEventTypeEnum.WITHDRAW, 120_00, 1577836782),
+            (1, ActivityEventTypeEnum.DEPOSIT, 70_00, 1577836783),
+            (2, ActivityEventTypeEnum.WITHDRAW, 30_00, 1577836784),
+            (1, ActivityEventTypeEnum.DEPOSIT, 80_00, 1577836782),
+            (1, ActivityEventTypeEnum.WITHDRAW, 10_00, 1577836790),
+            (1, ActivityEventTypeEnum.DEPOSIT, 90_00, 1577836791),
+        ]
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_events_and_check_alerts_matches_single_events(
+    backend: AlertStateBackendEnum,
+) -> None:
+    expected: list[AlertResponseDomain] = [
+        save_activity_event_and_check_alerts(activity_event=activity_event)
+        for activity_event in _build_activity_events()
+    ]
+    db.session.rollback()
+    db.session.execute(ActivityEvent.__table__.delete())
+    db.session.execute(UserAlertState.__table__.delete())
+    db.session.execute(UserVelocityBucket.__table__.delete())
+    alert_state_cache.clear()
+
+    alert_responses: list[AlertResponseDomain] = save_activity_events_and_check_alerts(
+        activity_events=_build_activity_events()
+    )
+
+    assert [sorted(response.alert_codes) for response in alert_responses] == [
+        sorted(response.alert_codes) for response in expected
+    ]
+    assert any(response.alert for response in alert_responses)
+    assert ActivityEvent.query.count() == len(expected)
+
+    if backend == AlertStateBackendEnum.TABLE:
+        for user_id in (1, 2):
+            assert (
+                compare_user_alert_state(
+                    user_alert_state=db.session.get(UserAlertState, user_id),
+                    built_user_alert_state=build_user_alert_state(user_id=user_id),
+                )
+                == []
+            )
+
+
+def test_save_activity_events_and_check_alerts_moves_deposit_window_to_each_event(
+    backend: AlertStateBackendEnum,  # noqa: ARG001
+) -> None:
+    alert_responses: list[AlertResponseDomain] = save_activity_events_and_check_alerts(
+        activity_events=[
+            ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=amount,
+                event_received_at=event_received_at,
+            )
+            for amount, event_received_at in [
+                (150_00, 1577836800),
+                (100_00, 1577836810),
+                (90_00, 1577836845),
+            ]
+        ]
+    )
+
+    assert [response.alert_codes for response in alert_responses] == [
+        [],
+        [AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE.value],
+        [],
+    ]
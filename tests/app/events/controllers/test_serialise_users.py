@@ -0,0 +1,153 @@
+import itertools
+import threading
+import time
+from collections.abc import Callable, Generator
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app.datastores import SQLAlchemy
+from app.events.controllers import (
+    save_activity_event_and_check_alerts,
+    save_activity_events_and_check_alerts,
+)
+from app.events.domains import AlertResponseDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum, AlertStateBackendEnum
+from app.events.models import ActivityEvent, UserAlertState, UserVelocityBucket
+
+THREADS: int = 8
+EVENTS_PER_USER: int = 12
+WITHDRAW_USER_IDS: tuple[int, ...] = (1, 2)
+DEPOSIT_USER_IDS: tuple[int, ...] = (3, 4)
+
+
+@pytest.fixture
+def _committing_session(db: SQLAlchemy) -> Generator[None]:
+    """
+    Replaces the session of the test, which is bound to a single connection within a
+    transaction, with a session per thread which commits to the database.
+    """
+    test_session: scoped_session = db.session
+    db.session = scoped_session(sessionmaker(bind=db.engine))
+
+    yield
+
+    db.session.remove()
+    db.session = test_session
+
+    user_ids: tuple[int, ...] = WITHDRAW_USER_IDS + DEPOSIT_USER_IDS
+    with db.engine.begin() as connection:
+        connection.execute(
+            delete(ActivityEvent).where(ActivityEvent.user_id.in_(user_ids))
+        )
+        connection.execute(
+            delete(UserAlertState).where(UserAlertState.user_id.in_(user_ids))
+        )
+        connection.execute(
+            delete(UserVelocityBucket).where(UserVelocityBucket.user_id.in_(user_ids))
+        )
+
+
+def _build_activity_events() -> list[ActivityEvent]:
+    # Every event is dispatched at the same time, so within the accumulative deposit time
+    # window of each other, and each user only makes withdraws or equal deposits, so the
+    # number of alerts raised for a user does not depend on the order their events are
+    # evaluated in.
+    now: int = int(time.time())
+
+    return [
+        ActivityEvent(
+            user_id=user_id,
+            transaction_type=(
+                ActivityEventTypeEnum.WITHDRAW
+                if user_id in WITHDRAW_USER_IDS
+                else ActivityEventTypeEnum.DEPOSIT
+            ),
+            amount=50_00,
+            event_received_at=now,
+        )
+        for _ in range(EVENTS_PER_USER)
+        for user_id in WITHDRAW_USER_IDS + DEPOSIT_USER_IDS
+    ]
+
+
+def _save_individually(
+    activity_events: list[ActivityEvent],
+) -> list[AlertResponseDomain]:
+    return [
+        save_activity_event_and_check_alerts(activity_event=activity_event)
+        for activity_event in activity_events
+    ]
+
+
+def _save_in_batches(activity_events: list[ActivityEvent]) -> list[AlertResponseDomain]:
+    return list(
+        itertools.chain.from_iterable(
+            save_activity_events_and_check_alerts(
+                activity_events=activity_events[index : index + 3]
+            )
+            for index in range(0, len(activity_events), 3)
+        )
+    )
+
+
+@pytest.mark.usefixtures("_committing_session")
+@pytest.mark.parametrize("save", [_save_individually, _save_in_batches])
+def test_concurrent_events_for_the_same_user_are_serialised(
+    backend: AlertStateBackendEnum,  # noqa: ARG001
+    save: Callable[[list[ActivityEvent]], list[AlertResponseDomain]],
+) -> None:
+    activity_events: list[ActivityEvent] = _build_activity_events()
+
+    # Every thread receives events for every user, so each user's events race
+    barrier = threading.Barrier(THREADS)
+    alert_responses: list[AlertResponseDomain] = []
+    errors: list[BaseException] = []
+
+    def work(thread_activity_events: list[ActivityEvent]) -> None:
+        try:
+            barrier.wait()
+            alert_responses.extend(save(thread_activity_events))
+        except BaseException as e:
+            errors.append(e)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=work, args=(activity_events[index::THREADS],))
+        for index in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+    alert_counts: dict[tuple[int, int], int] = {}
+    for alert_response in alert_responses:
+        for alert_code in alert_response.alert_codes:
+            key = (alert_response.user_id, alert_code)
+            alert_counts[key] = alert_counts.get(key, 0) + 1
+
+    # The nth withdraw alerts once the two before it are withdraws and once the
+    # withdraws within 30 seconds exceed 300.00, and the nth deposit alerts once the
+    # deposits within the window exceed 200.00
+    assert alert_counts == {
+        **{
+            (user_id, AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE.value): EVENTS_PER_USER
+            - 2
+            for user_id in WITHDRAW_USER_IDS
+        },
+        **{
+            (
+                user_id,
+                AlertCodeEnum.WITHDRAW_VELOCITY_30_SECONDS_CODE.value,
+            ): EVENTS_PER_USER - 6
+            for user_id in WITHDRAW_USER_IDS
+        },
+        **{
+            (user_id, AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE.value): EVENTS_PER_USER
+            - 4
+            for user_id in DEPOSIT_USER_IDS
+        },
+    }
@@ -0,0 +1,279 @@
+import threading
+import time
+from collections.abc import Generator
+
+import pytest
+from flask import Flask
+from sqlalchemy import delete, event
+from sqlalchemy.exc import DataError
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from app import db as _db
+from app.datastores import SQLAlchemy
+from app.events import group_commit
+from app.events.domains import AlertResponseDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.group_commit import ActivityEventGroupCommitter
+from app.events.models import ActivityEvent, UserAlertState, UserVelocityBucket
+
+THREADS: int = 8
+EVENTS_PER_THREAD: int = 5
+
+
+@pytest.fixture
+def _committing_session(db: SQLAlchemy) -> Generator[None]:
+    """
+    Replaces the session of the test, which is bound to a single connection within a
+    transaction, with a session per thread which commits to the database.
+    """
+    test_session: scoped_session = db.session
+    db.session = scoped_session(sessionmaker(bind=db.engine))
+
+    yield
+
+    db.session.remove()
+    db.session = test_session
+
+    user_ids: list[int] = list(range(1, THREADS + 1))
+    with db.engine.begin() as connection:
+        connection.execute(
+            delete(ActivityEvent).where(ActivityEvent.user_id.in_(user_ids))
+        )
+        connection.execute(
+            delete(UserAlertState).where(UserAlertState.user_id.in_(user_ids))
+        )
+        connection.execute(
+            delete(UserVelocityBucket).where(UserVelocityBucket.user_id.in_(user_ids))
+        )
+
+
+@pytest.fixture
+def group_committer(app: Flask) -> Generator[ActivityEventGroupCommitter]:
+    group_committer = ActivityEventGroupCommitter(max_size=THREADS, interval=0.05)
+    group_committer.start(app=app)
+
+    yield group_committer
+
+    group_committer.stop(timeout=5)
+
+
+def _build_activity_event(user_id: int, index: int) -> ActivityEvent:
+    return ActivityEvent(
+        user_id=user_id,
+        transaction_type=ActivityEventTypeEnum.WITHDRAW,
+        amount=50_00,
+        event_received_at=1577836800 + index,
+    )
+
+
+def _save_concurrently(
+    group_committer: ActivityEventGroupCommitter, events_per_thread: int
+) -> tuple[list[AlertResponseDomain], list[BaseException]]:
+    """Saves `events_per_thread` withdraws for the user of each of `THREADS` threads."""
+    barrier = threading.Barrier(THREADS)
+    alert_responses: list[AlertResponseDomain] = []
+    errors: list[BaseException] = []
+
+    def work(user_id: int) -> None:
+        try:
+            barrier.wait()
+            alert_responses.extend(
+                group_committer.save(
+                    activity_event=_build_activity_event(user_id=user_id, index=index)
+                )
+                for index in range(events_per_thread)
+            )
+        except BaseException as e:
+            errors.append(e)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=work, args=(user_id,))
+        for user_id in range(1, THREADS + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return alert_responses, errors
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_concurrent_events_are_committed_in_groups(
+    group_committer: ActivityEventGroupCommitter,
+) -> None:
+    commits: list[Session] = []
+
+    def count_commit(session: Session) -> None:
+        commits.append(session)
+
+    event.listen(Session, "after_commit", count_commit)
+    try:
+        alert_responses, errors = _save_concurrently(
+            group_committer=group_committer, events_per_thread=EVENTS_PER_THREAD
+        )
+    finally:
+        event.remove(Session, "after_commit", count_commit)
+
+    assert errors == []
+    assert len(commits) < THREADS * EVENTS_PER_THREAD
+
+    # Each user's events are evaluated in order, so the third withdraw onwards alerts
+    assert sorted(
+        alert_response.alert_codes.count(AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE.value)
+        for alert_response in alert_responses
+    ) == sorted(([0, 0] + [1] * (EVENTS_PER_THREAD - 2)) * THREADS)
+    assert _db.session.query(ActivityEvent).count() == THREADS * EVENTS_PER_THREAD
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_stop_flushes_pending_events(app: Flask) -> None:
+    group_committer = ActivityEventGroupCommitter(max_size=1_000, interval=60)
+    group_committer.start(app=app)
+
+    saving = threading.Thread(
+        target=_save_concurrently,
+        kwargs={"group_committer": group_committer, "events_per_thread": 1},
+    )
+    saving.start()
+
+    # The group waits for further events well beyond the test, unless it is stopped.
+    # Events submitted after it is stopped are saved by their own thread instead.
+    time.sleep(0.2)
+    started_at: float = time.monotonic()
+
+    group_committer.stop(timeout=5)
+    saving.join(timeout=5)
+
+    assert time.monotonic() - started_at < 5
+    assert not saving.is_alive()
+    assert not group_committer.is_running
+    assert _db.session.query(ActivityEvent).count() == THREADS
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_failed_group_fails_every_event(
+    group_committer: ActivityEventGroupCommitter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail(activity_events: list[ActivityEvent]) -> list[AlertResponseDomain]:  # noqa: ARG001
+        raise RuntimeError("failed")
+
+    monkeypatch.setattr(group_commit, "add_activity_events_and_check_alerts", fail)
+
+    alert_responses, errors = _save_concurrently(
+        group_committer=group_committer, events_per_thread=1
+    )
+
+    assert alert_responses == []
+    assert len(errors) == THREADS
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert _db.session.query(ActivityEvent).count() == 0
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_failed_group_commits_each_valid_event(app: Flask) -> None:
+    # The group is only flushed once it holds both events
+    group_committer = ActivityEventGroupCommitter(max_size=2, interval=60)
+    group_committer.start(app=app)
+    valid_activity_event: ActivityEvent = _build_activity_event(user_id=1, index=0)
+    # Beyond a BIGINT, so the event fails to be inserted
+    invalid_activity_event: ActivityEvent = _build_activity_event(user_id=2, index=0)
+    invalid_activity_event.amount = 2**63
+
+    barrier = threading.Barrier(2)
+    results: dict[int, AlertResponseDomain | BaseException] = {}
+
+    def work(activity_event: ActivityEvent) -> None:
+        barrier.wait()
+        try:
+            results[activity_event.user_id] = group_committer.save(
+                activity_event=activity_event
+            )
+        except Exception as e:
+            results[activity_event.user_id] = e
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=work, args=(activity_event,))
+        for activity_event in (valid_activity_event, invalid_activity_event)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    group_committer.stop(timeout=5)
+
+    assert results[1] == AlertResponseDomain(alert=False, alert_codes=[], user_id=1)
+    assert isinstance(results[2], DataError)
+    assert _db.session.query(ActivityEvent.user_id).all() == [(1,)]
+
+
+def test_save_when_not_running_saves_the_event_itself() -> None:
+    group_committer = ActivityEventGroupCommitter()
+
+    alert_response: AlertResponseDomain = group_committer.save(
+        activity_event=_build_activity_event(user_id=1, index=0)
+    )
+
+    assert alert_response == AlertResponseDomain(alert=False, alert_codes=[], user_id=1)
+    assert ActivityEvent.query.count() == 1
+
+
+def test_save_when_the_committer_is_killed(
+    app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    group_committer = ActivityEventGroupCommitter(max_size=2, interval=60, timeout=5)
+    taking = threading.Event()
+    killing = threading.Event()
+
+    def kill() -> None:
+        taking.set()
+        killing.wait(timeout=5)
+        raise RuntimeError("killed")
+
+    monkeypatch.setattr(group_committer, "_take_group", kill)
+    group_committer.start(app=app)
+    assert taking.wait(timeout=5)
+
+    # The event is waiting on the committer as its thread exits
+    results: list[AlertResponseDomain | BaseException] = []
+
+    def save() -> None:
+        try:
+            results.append(
+                group_committer.save(
+                    activity_event=_build_activity_event(user_id=1, index=0)
+                )
+            )
+        except Exception as e:
+            results.append(e)
+
+    saving = threading.Thread(target=save)
+    saving.start()
+    time.sleep(0.1)
+    killing.set()
+    saving.join(timeout=5)
+
+    assert not saving.is_alive()
+    assert len(results) == 1
+    assert isinstance(results[0], RuntimeError)
+    assert not group_committer.is_running
+
+    # Once the committer is dead the event is saved by the request itself
+    alert_response: AlertResponseDomain = group_committer.save(
+        activity_event=_build_activity_event(user_id=1, index=1)
+    )
+
+    assert alert_response == AlertResponseDomain(alert=False, alert_codes=[], user_id=1)
+    assert ActivityEvent.query.count() == 1
+    group_committer.stop(timeout=5)
+
+
+def test_save_times_out_waiting_for_the_committer(app: Flask) -> None:
+    # The group waits for further events well beyond the timeout
+    group_committer = ActivityEventGroupCommitter(max_size=2, interval=60, timeout=0.1)
+    group_committer.start(app=app)
+
+    with pytest.raises(TimeoutError):
+        group_committer.save(activity_event=_build_activity_event(user_id=1, index=0))
+
+    group_committer.stop(timeout=5)
@@ -0,0 +1,164 @@
+import io
+from collections.abc import Generator
+
+import pytest
+from flask import Flask
+from sqlalchemy import delete, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app import db as _db
+from app.datastores import SQLAlchemy
+from app.events.domains import ActivityEventImportResultDomain
+from app.events.enums import ActivityEventImportFormatEnum, ActivityEventTypeEnum
+from app.events.imports import import_activity_events
+from app.events.models import ActivityEvent, ActivityEventImportChunk
+from lib.money import Cents
+
+SOURCE: str = "events.ndjson"
+USER_IDS: tuple[int, ...] = (1, 2, 3)
+
+NDJSON_LINES: list[str] = [
+    '{"type": "deposit", "amount": "10.00", "user_id": 1, "t": 1577836800}',
+    '{"type": "withdraw", "amount": "20.00", "user_id": 2, "t": 1577836801}',
+    "",
+    "not json",
+    '{"type": "deposit", "amount": "0", "user_id": 3, "t": 1577836802}',
+    '{"type": "withdraw", "amount": "30.00", "user_id": 3, "t": 1577836803}',
+    '{"type": "refund", "amount": "40.00", "user_id": 1, "t": 1577836804}',
+]
+
+
+@pytest.fixture
+def _committing_session(db: SQLAlchemy) -> Generator[None]:
+    """
+    Replaces the session of the test, which is bound to a single connection within a
+    transaction, with a session per thread which commits to the database.
+    """
+    test_session: scoped_session = db.session
+    db.session = scoped_session(sessionmaker(bind=db.engine))
+
+    yield
+
+    db.session.remove()
+    db.session = test_session
+
+    with db.engine.begin() as connection:
+        connection.execute(
+            delete(ActivityEvent).where(ActivityEvent.user_id.in_(USER_IDS))
+        )
+        connection.execute(delete(ActivityEventImportChunk))
+
+
+def _get_imported_activity_events() -> list[tuple[int, ActivityEventTypeEnum, Cents]]:
+    return [
+        (row.user_id, row.transaction_type, row.amount)
+        for row in _db.session.execute(
+            select(
+                ActivityEvent.user_id,
+                ActivityEvent.transaction_type,
+                ActivityEvent.amount,
+            ).order_by(ActivityEvent.event_received_at)
+        )
+    ]
+
+
+@pytest.mark.usefixtures("_committing_session")
+@pytest.mark.parametrize("workers", [1, 3])
+def test_import_activity_events_from_ndjson(app: Flask, workers: int) -> None:
+    result: ActivityEventImportResultDomain = import_activity_events(
+        app=app,
+        stream=io.StringIO("\n".join(NDJSON_LINES)),
+        file_format=ActivityEventImportFormatEnum.NDJSON,
+        source=SOURCE,
+        chunk_size=2,
+        workers=workers,
+    )
+
+    assert result == ActivityEventImportResultDomain(
+        imported_count=3, rejected_count=3, resumed_chunk_count=0
+    )
+    assert _get_imported_activity_events() == [
+        (1, ActivityEventTypeEnum.DEPOSIT, 10_00),
+        (2, ActivityEventTypeEnum.WITHDRAW, 20_00),
+        (3, ActivityEventTypeEnum.WITHDRAW, 30_00),
+    ]
+    assert sorted(
+        (chunk.start_line, chunk.record_count, chunk.imported_count)
+        for chunk in _db.session.scalars(select(ActivityEventImportChunk))
+    ) == [(1, 2, 2), (4, 2, 0), (6, 2, 1)]
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_import_activity_events_from_csv(app: Flask) -> None:
+    result: ActivityEventImportResultDomain = import_activity_events(
+        app=app,
+        stream=io.StringIO(
+            "type,amount,user_id,t\r\n"
+            "deposit,10.00,1,1577836800\r\n"
+            "WITHDRAW,20.00,2,1577836801\r\n"
+            "withdraw,,3,1577836802\r\n"
+        ),
+        file_format=ActivityEventImportFormatEnum.CSV,
+        source=SOURCE,
+        chunk_size=10,
+    )
+
+    assert result == ActivityEventImportResultDomain(
+        imported_count=2, rejected_count=1, resumed_chunk_count=0
+    )
+    assert _get_imported_activity_events() == [
+        (1, ActivityEventTypeEnum.DEPOSIT, 10_00),
+        (2, ActivityEventTypeEnum.WITHDRAW, 20_00),
+    ]
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_import_activity_events_resumes_from_uncommitted_chunks(app: Flask) -> None:
+    _db.save(
+        model=ActivityEventImportChunk(
+            source=SOURCE,
+            start_line=1,
+            chunk_size=2,
+            record_count=2,
+            imported_count=2,
+        )
+    )
+
+    result: ActivityEventImportResultDomain = import_activity_events(
+        app=app,
+        stream=io.StringIO("\n".join(NDJSON_LINES)),
+        file_format=ActivityEventImportFormatEnum.NDJSON,
+        source=SOURCE,
+        chunk_size=2,
+    )
+
+    assert result == ActivityEventImportResultDomain(
+        imported_count=1, rejected_count=3, resumed_chunk_count=1
+    )
+    assert _get_imported_activity_events() == [
+        (3, ActivityEventTypeEnum.WITHDRAW, 30_00),
+    ]
+
+
+@pytest.mark.usefixtures("_committing_session")
+def test_import_activity_events_with_a_different_chunk_size(app: Flask) -> None:
+    _db.save(
+        model=ActivityEventImportChunk(
+            source=SOURCE,
+            start_line=1,
+            chunk_size=2,
+            record_count=2,
+            imported_count=2,
+        )
+    )
+
+    with pytest.raises(ValueError, match="was imported with a chunk size of 2"):
+        import_activity_events(
+            app=app,
+            stream=io.StringIO("\n".join(NDJSON_LINES)),
+            file_format=ActivityEventImportFormatEnum.NDJSON,
+            source=SOURCE,
+            chunk_size=3,
+        )
+
+    assert _get_imported_activity_events() == []
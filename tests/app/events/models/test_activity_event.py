@@ -0,0 +1,48 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from app import db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    import uuid
+
+
+def test_activity_event_is_stored_as_integers() -> None:
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        transaction_type=ActivityEventTypeEnum.WITHDRAW,
+        amount=12_34,
+        event_received_at=1577836800,
+    )
+    db.save(model=activity_event)
+
+    assert db.session.execute(
+        text("SELECT transaction_type, amount, event_received_at FROM activity_event")
+    ).one() == (2, 1234, 1577836800)
+
+    db.session.expire_all()
+    stored: ActivityEvent = db.session.scalars(db.select(ActivityEvent)).one()
+
+    assert stored.transaction_type == ActivityEventTypeEnum.WITHDRAW
+    assert stored.amount == 12_34
+    assert stored.event_received_at == 1577836800
+
+
+def test_activity_event_ids_are_time_ordered() -> None:
+    activity_events: list[ActivityEvent] = [
+        ActivityEventFactory(
+            is_default_user=True, is_deposit=True, event_received_at=1577836800 + index
+        )
+        for index in range(100)
+    ]
+    db.save_all(models=activity_events)
+
+    ids: list[uuid.UUID] = [activity_event.id for activity_event in activity_events]
+
+    assert all(id_.version == 7 for id_ in ids)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
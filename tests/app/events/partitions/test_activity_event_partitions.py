@@ -0,0 +1,107 @@
+from freezegun import freeze_time
+from sqlalchemy import text
+
+from app import db
+from app.events.models import ActivityEvent
+from app.events.partitions import (
+    ActivityEventPartitionDomain,
+    create_activity_event_partitions,
+    detach_activity_event_partitions,
+    get_activity_event_partition,
+    get_activity_event_partitions,
+    is_activity_event_partition,
+)
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+def _get_partition_counts() -> dict[str, int]:
+    rows = db.session.execute(
+        text(
+            "SELECT CAST(tableoid AS regclass)::text, count(*) FROM activity_event "
+            "GROUP BY tableoid"
+        )
+    )
+    return {name: count for name, count in rows}
+
+
+def test_get_activity_event_partition() -> None:
+    assert get_activity_event_partition(
+        event_received_at=1577836799
+    ) == ActivityEventPartitionDomain(
+        name="activity_event_p2019_12", start=1575158400, end=1577836800
+    )
+    assert get_activity_event_partition(
+        event_received_at=1577836800, months=-1
+    ) == ActivityEventPartitionDomain(
+        name="activity_event_p2019_12", start=1575158400, end=1577836800
+    )
+    assert get_activity_event_partition(event_received_at=1577836800, months=13) == (
+        ActivityEventPartitionDomain(
+            name="activity_event_p2021_02", start=1612137600, end=1614556800
+        )
+    )
+
+
+def test_is_activity_event_partition() -> None:
+    assert is_activity_event_partition("activity_event_p2020_01")
+    assert is_activity_event_partition("activity_event_default")
+    assert not is_activity_event_partition("activity_event")
+    assert not is_activity_event_partition("activity_event_queue")
+
+
+@freeze_time("2020-01-10T00:00:00+00:00")
+def test_create_activity_event_partitions_moves_events_from_the_default() -> None:
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                is_default_user=True, is_deposit=True, event_received_at=1577836799
+            ),
+            ActivityEventFactory(
+                is_default_user=True, is_deposit=True, event_received_at=1577836800
+            ),
+        ]
+    )
+
+    created: list[ActivityEventPartitionDomain] = create_activity_event_partitions(
+        months_ahead=1
+    )
+
+    assert [partition.name for partition in created] == [
+        "activity_event_p2020_01",
+        "activity_event_p2020_02",
+    ]
+    assert get_activity_event_partitions() == created
+    assert _get_partition_counts() == {
+        "activity_event_default": 1,
+        "activity_event_p2020_01": 1,
+    }
+    assert create_activity_event_partitions(months_ahead=1) == []
+
+    db.save(
+        model=ActivityEventFactory(
+            is_default_user=True, is_withdraw=True, event_received_at=1580515200
+        )
+    )
+    assert _get_partition_counts()["activity_event_p2020_02"] == 1
+
+
+def test_detach_activity_event_partitions() -> None:
+    with freeze_time("2020-01-10T00:00:00+00:00"):
+        create_activity_event_partitions(months_ahead=2)
+    db.save(
+        model=ActivityEventFactory(
+            is_default_user=True, is_deposit=True, event_received_at=1577836800
+        )
+    )
+
+    with freeze_time("2020-03-10T00:00:00+00:00"):
+        detached: list[ActivityEventPartitionDomain] = detach_activity_event_partitions(
+            retain_months=1
+        )
+
+    assert [partition.name for partition in detached] == ["activity_event_p2020_01"]
+    assert [partition.name for partition in get_activity_event_partitions()] == [
+        "activity_event_p2020_02",
+        "activity_event_p2020_03",
+    ]
+    assert ActivityEvent.query.count() == 0
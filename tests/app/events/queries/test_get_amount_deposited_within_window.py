@@ -1,15 +1,20 @@
-from decimal import Decimal
+from typing import TYPE_CHECKING, Any
 
 import pytest
 from freezegun import freeze_time
+from sqlalchemy import event, text
 
 from app import db
 from app.events.controllers import (
     get_amount_deposited_within_window,
 )
 from app.events.models import ActivityEvent
+from app.events.partitions import create_activity_event_partitions
 from tests.factories.activity_event_factory import ActivityEventFactory
 
+if TYPE_CHECKING:
+    from lib.money import Cents
+
 
 @pytest.fixture
 def deposit_activity_events_as_model() -> list[ActivityEvent]:
@@ -37,30 +42,96 @@ def deposit_activity_events_as_model() -> list[ActivityEvent]:
     ]
 
 
-@freeze_time("2020-01-01T00:00:00+00:00")
 def test_get_amount_deposited_within_window(
     deposit_activity_events_as_model: list[ActivityEvent],
 ) -> None:
     db.save_all(models=deposit_activity_events_as_model)
 
-    deposited_amount: int = get_amount_deposited_within_window(user_id=1)
+    deposited_amount: Cents = get_amount_deposited_within_window(
+        user_id=1, event_received_at=1577836802
+    )
 
-    assert deposited_amount == Decimal("300.00")
+    assert deposited_amount == 300_00
 
 
-@freeze_time("2020-01-01T00:00:00+00:00")
 def test_get_amount_deposited_for_user_outside_window(
     deposit_activity_events_as_model: list[ActivityEvent],
 ) -> None:
     db.save_all(models=deposit_activity_events_as_model)
 
-    with freeze_time("2020-01-01T00:00:31+00:00"):
-        deposited_amount: int = get_amount_deposited_within_window(user_id=1)
+    deposited_amount: Cents = get_amount_deposited_within_window(
+        user_id=1, event_received_at=1577836831
+    )
+
+    assert deposited_amount == 100_00
+
+
+def test_get_amount_deposited_within_window_excludes_later_deposits(
+    deposit_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=deposit_activity_events_as_model)
+
+    deposited_amount: Cents = get_amount_deposited_within_window(
+        user_id=1, event_received_at=1577836800
+    )
 
-    assert deposited_amount == Decimal("100.00")
+    assert deposited_amount == 200_00
 
 
 def test_get_amount_deposited_within_window_without_data() -> None:
-    deposited_amount: int = get_amount_deposited_within_window(user_id=1)
+    deposited_amount: Cents = get_amount_deposited_within_window(
+        user_id=1, event_received_at=1577836800
+    )
+
+    assert deposited_amount == 0
+
+
+@freeze_time("2019-12-15T00:00:00+00:00")
+def test_get_amount_deposited_within_window_is_a_bounded_index_only_scan() -> None:
+    create_activity_event_partitions(months_ahead=1)
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                user_id=user_id,
+                is_deposit=index % 2 == 0,
+                is_withdraw=index % 2 == 1,
+                event_received_at=1577836700 + index,
+            )
+            for user_id in range(1, 21)
+            for index in range(20)
+        ]
+    )
+
+    # The test table is neither vacuumed nor large enough for the planner to prefer the
+    # index without being told to
+    db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    db.session.execute(text("SET LOCAL enable_bitmapscan = off"))
+    db.session.execute(text("ANALYZE activity_event"))
+
+    connection = db.session.connection()
+    executed: list[tuple[str, Any]] = []
+
+    def capture(*args: Any) -> None:
+        executed.append((args[2], args[3]))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        get_amount_deposited_within_window(user_id=1, event_received_at=1577836710)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    statement, parameters = executed[-1]
+    plan: str = "\n".join(
+        row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    )
 
-    assert deposited_amount == Decimal("0.00")
+    # Only the partition of December 2019 overlaps the window
+    assert (
+        "Index Only Scan using activity_event_p2019_12_user_id_transaction_type" in plan
+    )
+    assert "activity_event_p2020_01" not in plan
+    assert "activity_event_default" not in plan
+    assert (
+        "(event_received_at >= 1577836680) AND (event_received_at <= 1577836710)"
+        in plan
+    )
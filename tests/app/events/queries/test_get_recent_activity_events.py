@@ -0,0 +1,157 @@
+from typing import Any
+
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import event, text
+
+from app import db
+from app.events.domains import ActivityEventRecordDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from app.events.queries import get_recent_activity_events
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+@pytest.fixture
+def ordered_activity_events_as_model() -> list[ActivityEvent]:
+    return [
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=10_00,
+            event_received_at=1577836799,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=20_00,
+            event_received_at=1577836800,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=30_00,
+            event_received_at=1577836801,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=40_00,
+            event_received_at=1577836802,
+        ),
+        ActivityEventFactory(
+            user_id=2,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=50_00,
+            event_received_at=1577836803,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_recent_activity_events(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=ordered_activity_events_as_model)
+
+    activity_events: list[ActivityEventRecordDomain] = get_recent_activity_events(
+        user_id=1,
+        lookback=2,
+    )
+
+    assert activity_events == [
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=40_00,
+            event_received_at=1577836802,
+        ),
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=30_00,
+            event_received_at=1577836801,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_recent_activity_events_filtered_by_transaction_type(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=ordered_activity_events_as_model)
+
+    activity_events: list[ActivityEventRecordDomain] = get_recent_activity_events(
+        user_id=1,
+        lookback=2,
+        transaction_type=ActivityEventTypeEnum.DEPOSIT,
+    )
+
+    assert [event.amount for event in activity_events] == [
+        40_00,
+        20_00,
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_recent_activity_events_when_lookback_exceeds_history(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=ordered_activity_events_as_model)
+
+    activity_events: list[ActivityEventRecordDomain] = get_recent_activity_events(
+        user_id=1,
+        lookback=10,
+    )
+
+    assert len(activity_events) == 4
+
+
+@pytest.mark.parametrize("lookback", [0, -1])
+def test_get_recent_activity_events_without_lookback(lookback: int) -> None:
+    activity_events: list[ActivityEventRecordDomain] = get_recent_activity_events(
+        user_id=1,
+        lookback=lookback,
+    )
+
+    assert activity_events == []
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_recent_activity_events_is_an_index_only_scan() -> None:
+    db.save_all(
+        models=[
+            ActivityEventFactory(
+                user_id=user_id,
+                is_deposit=index % 2 == 0,
+                is_withdraw=index % 2 == 1,
+                event_received_at=1577836700 + index,
+            )
+            for user_id in range(1, 21)
+            for index in range(20)
+        ]
+    )
+
+    # The test table is neither vacuumed nor large enough for the planner to prefer the
+    # index without being told to
+    db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    db.session.execute(text("SET LOCAL enable_bitmapscan = off"))
+    db.session.execute(text("ANALYZE activity_event"))
+
+    connection = db.session.connection()
+    executed: list[tuple[str, Any]] = []
+
+    def capture(*args: Any) -> None:
+        executed.append((args[2], args[3]))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        get_recent_activity_events(user_id=1, lookback=3)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    statement, parameters = executed[-1]
+    plan: str = "\n".join(
+        row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    )
+
+    # Every column selected is included within the `(user_id, event_received_at)` index
+    assert "Index Only Scan Backward using activity_event_default_user_id_event" in plan
@@ -0,0 +1,320 @@
+import dataclasses
+
+import pytest
+from freezegun import freeze_time
+
+from app import db
+from app.events.domains import (
+    ActivityEventFetchPlanDomain,
+    ActivityEventHistoryDomain,
+    ActivityEventRecordDomain,
+)
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent
+from app.events.queries import (
+    get_activity_event_histories,
+    get_activity_event_history,
+    get_velocity_buckets,
+    save_activity_event_with_history,
+    save_velocity_buckets,
+)
+from app.events.velocity import get_added_velocity_buckets
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+@pytest.fixture
+def historic_activity_events_as_model() -> list[ActivityEvent]:
+    return [
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=50_00,
+            event_received_at=1577836769,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=75_00,
+            event_received_at=1577836771,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=25_00,
+            event_received_at=1577836772,
+        ),
+        ActivityEventFactory(
+            user_id=2,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=90_00,
+            event_received_at=1577836773,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_with_history(
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_deposit=True,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=ActivityEventFetchPlanDomain(
+                lookback=2, deposit_lookback=2, deposit_window=30
+            ),
+        )
+    )
+
+    assert activity_event_history == ActivityEventHistoryDomain(
+        recent_activity_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.WITHDRAW,
+                amount=25_00,
+                event_received_at=1577836772,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+        ],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=50_00,
+                event_received_at=1577836769,
+            ),
+        ],
+        amount_deposited_within_window=75_00,
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_with_history_persists_the_event() -> None:
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_deposit=True,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=ActivityEventFetchPlanDomain(
+                lookback=2, deposit_lookback=2, deposit_window=30
+            ),
+        )
+    )
+    db.commit()
+
+    assert activity_event_history == ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[],
+        amount_deposited_within_window=0,
+    )
+    assert (
+        db.session.get(
+            ActivityEvent, (activity_event.id, activity_event.event_received_at)
+        )
+        is not None
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_with_history_only_retrieves_the_planned_history(
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_withdraw=True,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=ActivityEventFetchPlanDomain(lookback=1),
+        )
+    )
+
+    assert activity_event_history == ActivityEventHistoryDomain(
+        recent_activity_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.WITHDRAW,
+                amount=25_00,
+                event_received_at=1577836772,
+            ),
+        ],
+        recent_deposit_events=[],
+        amount_deposited_within_window=0,
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_with_history_with_an_empty_fetch_plan() -> None:
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_withdraw=True,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=ActivityEventFetchPlanDomain(),
+        )
+    )
+
+    assert activity_event_history.recent_activity_events == []
+    assert (
+        db.session.get(
+            ActivityEvent, (activity_event.id, activity_event.event_received_at)
+        )
+        is not None
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_get_activity_event_history(
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event_history: ActivityEventHistoryDomain = get_activity_event_history(
+        user_id=1,
+        fetch_plan=ActivityEventFetchPlanDomain(deposit_lookback=1, deposit_window=30),
+        event_received_at=1577836800,
+    )
+
+    assert activity_event_history == ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=75_00,
+                event_received_at=1577836771,
+            ),
+        ],
+        amount_deposited_within_window=75_00,
+    )
+
+
+def test_get_activity_event_histories(
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    fetch_plan = ActivityEventFetchPlanDomain(
+        lookback=1, deposit_lookback=2, deposit_window=30
+    )
+    activity_event_histories: dict[int, ActivityEventHistoryDomain] = (
+        get_activity_event_histories(
+            event_received_at_ranges={
+                user_id: (1577836800, 1577836800) for user_id in (1, 2, 3)
+            },
+            fetch_plan=fetch_plan,
+        )
+    )
+
+    assert {
+        user_id: dataclasses.replace(
+            activity_event_history, deposits_within_window=None
+        )
+        for user_id, activity_event_history in activity_event_histories.items()
+    } == {
+        user_id: get_activity_event_history(
+            user_id=user_id, fetch_plan=fetch_plan, event_received_at=1577836800
+        )
+        for user_id in (1, 2, 3)
+    }
+    assert activity_event_histories[2].amount_deposited_within_window == 90_00
+    assert activity_event_histories[2].deposits_within_window == [
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=90_00,
+            event_received_at=1577836773,
+        ),
+    ]
+
+
+def test_get_activity_event_histories_retrieves_deposits_within_every_window(
+    historic_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=historic_activity_events_as_model)
+
+    activity_event_histories: dict[int, ActivityEventHistoryDomain] = (
+        get_activity_event_histories(
+            event_received_at_ranges={1: (1577836770, 1577836801)},
+            fetch_plan=ActivityEventFetchPlanDomain(deposit_window=30),
+        )
+    )
+
+    assert activity_event_histories[1].amount_deposited_within_window == 50_00
+    assert activity_event_histories[1].deposits_within_window == [
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=75_00,
+            event_received_at=1577836771,
+        ),
+        ActivityEventRecordDomain(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=50_00,
+            event_received_at=1577836769,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_save_activity_event_with_history_adds_to_its_velocity_buckets() -> None:
+    historic_activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_deposit=True,
+        amount=50_00,
+        event_received_at=1577836799,
+    )
+    save_velocity_buckets(
+        velocity_buckets=get_added_velocity_buckets([historic_activity_event]),
+        event_received_at=1577836799,
+    )
+    activity_event: ActivityEvent = ActivityEventFactory(
+        is_default_user=True,
+        is_deposit=True,
+        amount=75_00,
+        event_received_at=1577836800,
+    )
+
+    activity_event_history: ActivityEventHistoryDomain = (
+        save_activity_event_with_history(
+            activity_event=activity_event,
+            fetch_plan=ActivityEventFetchPlanDomain(
+                velocity_transaction_types=(ActivityEventTypeEnum.DEPOSIT,)
+            ),
+            velocity_buckets=get_added_velocity_buckets([activity_event])[1],
+        )
+    )
+
+    # The buckets are retrieved as they were before the event was added to them
+    assert activity_event_history.velocity_buckets is not None
+    assert sorted(activity_event_history.velocity_buckets) == sorted(
+        get_added_velocity_buckets([historic_activity_event])[1]
+    )
+    assert sorted(
+        get_velocity_buckets(user_ids=[1], event_received_at=1577836800)[1]
+    ) == sorted(
+        get_added_velocity_buckets([historic_activity_event, activity_event])[1]
+    )
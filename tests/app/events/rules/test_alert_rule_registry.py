@@ -0,0 +1,174 @@
+import pytest
+
+from app.events.controllers import alert_rules
+from app.events.domains import ActivityEventFetchPlanDomain, ActivityEventHistoryDomain
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from app.events.models import ActivityEvent
+from app.events.rules import AlertRule, AlertRuleRegistry
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+def _check_large_amount(
+    user_id: int,  # noqa: ARG001
+    current_activity_event: ActivityEvent,
+    activity_event_history: ActivityEventHistoryDomain | None = None,  # noqa: ARG001
+) -> bool:
+    return current_activity_event.amount > 500_00
+
+
+@pytest.mark.parametrize(
+    ("transaction_type", "expected"),
+    [
+        pytest.param(
+            ActivityEventTypeEnum.WITHDRAW,
+            ActivityEventFetchPlanDomain(
+                lookback=2,
+                velocity_transaction_types=(ActivityEventTypeEnum.WITHDRAW,),
+            ),
+            id="withdraw",
+        ),
+        pytest.param(
+            ActivityEventTypeEnum.DEPOSIT,
+            ActivityEventFetchPlanDomain(
+                deposit_lookback=2,
+                deposit_window=30,
+                velocity_transaction_types=(ActivityEventTypeEnum.DEPOSIT,),
+            ),
+            id="deposit",
+        ),
+    ],
+)
+def test_get_fetch_plan(
+    transaction_type: ActivityEventTypeEnum,
+    expected: ActivityEventFetchPlanDomain,
+) -> None:
+    assert alert_rules.get_fetch_plan(transaction_type=transaction_type) == expected
+
+
+def test_get_fetch_plan_combines_the_inputs_of_every_rule() -> None:
+    registry = AlertRuleRegistry(
+        rules=[
+            AlertRule(
+                code=AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                check=_check_large_amount,
+                history_transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                lookback=2,
+            ),
+            AlertRule(
+                code=AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                check=_check_large_amount,
+                history_transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                lookback=5,
+                window=60,
+            ),
+        ]
+    )
+
+    assert registry.get_fetch_plan(
+        transaction_type=ActivityEventTypeEnum.DEPOSIT
+    ) == ActivityEventFetchPlanDomain(deposit_lookback=5, deposit_window=60)
+    assert (
+        registry.get_fetch_plan(transaction_type=ActivityEventTypeEnum.WITHDRAW)
+        == ActivityEventFetchPlanDomain()
+    )
+
+    registry.register(
+        rule=AlertRule(
+            code=AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            check=_check_large_amount,
+            lookback=3,
+        )
+    )
+
+    assert registry.get_fetch_plan(
+        transaction_type=ActivityEventTypeEnum.WITHDRAW
+    ) == ActivityEventFetchPlanDomain(lookback=3)
+
+    registry.register(
+        rule=AlertRule(
+            code=AlertCodeEnum.WITHDRAW_VELOCITY_30_SECONDS_CODE,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            check=_check_large_amount,
+            velocity_window=30,
+        )
+    )
+
+    assert registry.get_fetch_plan() == ActivityEventFetchPlanDomain(
+        lookback=3,
+        deposit_lookback=5,
+        deposit_window=60,
+        velocity_transaction_types=(ActivityEventTypeEnum.WITHDRAW,),
+    )
+
+
+def test_evaluate() -> None:
+    registry = AlertRuleRegistry(
+        rules=[
+            AlertRule(
+                code=AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE,
+                transaction_type=ActivityEventTypeEnum.WITHDRAW,
+                check=_check_large_amount,
+            ),
+        ]
+    )
+    activity_event_history = ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[],
+        amount_deposited_within_window=0,
+    )
+
+    assert registry.evaluate(
+        user_id=1,
+        current_activity_event=ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=600_00,
+        ),
+        activity_event_history=activity_event_history,
+    ) == [AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE]
+    assert (
+        registry.evaluate(
+            user_id=1,
+            current_activity_event=ActivityEventFactory(
+                is_default_user=True,
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=600_00,
+            ),
+            activity_event_history=activity_event_history,
+        )
+        == []
+    )
+
+
+def test_register_duplicate_rule() -> None:
+    rule = AlertRule(
+        code=AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE,
+        transaction_type=ActivityEventTypeEnum.WITHDRAW,
+        check=_check_large_amount,
+    )
+    registry = AlertRuleRegistry(rules=[rule])
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(rule=rule)
+
+
+def test_alert_rule_with_unsupported_inputs() -> None:
+    with pytest.raises(ValueError, match="restrict its history to deposits"):
+        AlertRule(
+            code=AlertCodeEnum.CONSECUTIVE_WITHDRAW_CODE,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            check=_check_large_amount,
+            history_transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            lookback=2,
+        )
+
+    with pytest.raises(ValueError, match="sum deposits within a window"):
+        AlertRule(
+            code=AlertCodeEnum.ACCUMULATIVE_DEPOSIT_CODE,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            check=_check_large_amount,
+            window=30,
+        )
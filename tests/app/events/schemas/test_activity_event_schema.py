@@ -1,12 +1,11 @@
-from decimal import Decimal
-
 import pytest
 from freezegun import freeze_time
 from marshmallow import ValidationError
 
-from app.events.domains import ActivityEventDomain
+from app.events.domains import ActivityEventDomain, AlertResponseDomain
 from app.events.enums import ActivityEventTypeEnum
-from app.events.schemas import ActivityEventSchema
+from app.events.schemas import ActivityEventSchema, AlertResponseSchema
+from lib.schemas import CompiledSchema, compile_schema
 
 
 @pytest.fixture
@@ -33,7 +32,7 @@ def activity_event_as_payload() -> dict:
 def activity_event_as_domain() -> ActivityEventDomain:
     return ActivityEventDomain(
         transaction_type=ActivityEventTypeEnum.DEPOSIT,
-        amount=Decimal("100.00"),
+        amount=100_00,
         user_id=1,
         event_received_at=1577836800,
     )
@@ -77,3 +76,179 @@ def test_valid_schema_dump(
     activity_event: dict = ActivityEventSchema().dump(activity_event_as_domain)
 
     assert activity_event == activity_event_as_request_payload
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+@pytest.mark.parametrize(
+    ("amount", "expected"),
+    [
+        pytest.param("100.00", 100_00, id="two_places"),
+        pytest.param("100.5", 100_50, id="one_place"),
+        pytest.param("100", 100_00, id="no_places"),
+        pytest.param("-0.01", -1, id="negative"),
+        pytest.param(100, 100_00, id="integer"),
+        pytest.param(100.25, 100_25, id="float"),
+        pytest.param("1e2", 100_00, id="exponent"),
+        pytest.param("100.", 100_00, id="trailing_point"),
+        pytest.param(" 100.00 ", 100_00, id="whitespace"),
+        # Amounts with more places are quantized to two, as a `Decimal` field would
+        pytest.param("100.005", 100_00, id="rounded_half_to_even"),
+        pytest.param("100.015", 100_02, id="rounded_half_to_even_up"),
+    ],
+)
+def test_valid_schema_load_amount(
+    activity_event_as_request_payload: dict, amount: str | float, expected: int
+) -> None:
+    activity_event: ActivityEventDomain = ActivityEventSchema().load(
+        activity_event_as_request_payload | {"amount": amount}
+    )
+
+    assert activity_event.amount == expected
+
+
+@pytest.mark.parametrize(
+    ("amount", "expected"),
+    [
+        pytest.param("ten", "Not a valid number.", id="word"),
+        pytest.param(
+            "NaN",
+            "Special numeric values (nan or infinity) are not permitted.",
+            id="nan",
+        ),
+        pytest.param("1.0.0", "Not a valid number.", id="two_points"),
+    ],
+)
+def test_valid_schema_load_fails_on_invalid_amount(
+    activity_event_as_request_payload: dict, amount: str, expected: str
+) -> None:
+    with pytest.raises(ValidationError) as e:
+        ActivityEventSchema().load(
+            activity_event_as_request_payload | {"amount": amount}
+        )
+
+    assert e.value.messages == {"amount": [expected]}
+
+
+def test_compile_schema_is_cached() -> None:
+    assert compile_schema(ActivityEventSchema) is compile_schema(ActivityEventSchema)
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_compiled_schema_load_does_not_fall_back(
+    activity_event_as_request_payload: dict,
+    activity_event_as_domain: ActivityEventDomain,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    compiled_schema: CompiledSchema[ActivityEventDomain] = compile_schema(
+        ActivityEventSchema
+    )
+    monkeypatch.setattr(compiled_schema.schema, "load", None)
+
+    assert compiled_schema.load(activity_event_as_request_payload) == (
+        activity_event_as_domain
+    )
+    assert compiled_schema.load(
+        [activity_event_as_request_payload | {"type": "DEPOSIT", "extra": 1}], many=True
+    ) == [activity_event_as_domain]
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        pytest.param({"type": "Deposit"}, id="mixed_case_type"),
+        pytest.param({"type": "transfer"}, id="unknown_type"),
+        pytest.param({"amount": 100}, id="integer_amount"),
+        pytest.param({"amount": "1e2"}, id="exponent_amount"),
+        pytest.param({"amount": "100.005"}, id="rounded_amount"),
+        pytest.param({"amount": "ten"}, id="invalid_amount"),
+        pytest.param({"amount": None}, id="null_amount"),
+        pytest.param({"user_id": "1"}, id="string_user_id"),
+        pytest.param({"user_id": 1.0}, id="float_user_id"),
+        pytest.param({"user_id": 1.5}, id="fractional_user_id"),
+        pytest.param({"user_id": True}, id="boolean_user_id"),
+        pytest.param({"t": [1577836800]}, id="list_t"),
+        pytest.param({"amount": "100000000000000000.00"}, id="overflowing_amount"),
+        pytest.param({"t": -1}, id="negative_t"),
+        pytest.param({"t": 2**63}, id="overflowing_t"),
+    ],
+)
+def test_compiled_schema_load_matches_schema(
+    activity_event_as_request_payload: dict, changes: dict
+) -> None:
+    payload: dict = activity_event_as_request_payload | changes
+
+    try:
+        expected: object = ActivityEventSchema().load(payload)
+    except ValidationError as e:
+        expected = e.messages
+
+    try:
+        result: object = compile_schema(ActivityEventSchema).load(payload)
+    except ValidationError as e:
+        result = e.messages
+
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        pytest.param({}, id="empty"),
+        pytest.param([], id="list"),
+        pytest.param("event", id="string"),
+    ],
+)
+def test_compiled_schema_load_fails_as_schema(payload: object) -> None:
+    with pytest.raises(ValidationError) as expected:
+        ActivityEventSchema().load(payload)  # type: ignore[call-overload]
+
+    with pytest.raises(ValidationError) as e:
+        compile_schema(ActivityEventSchema).load(payload)
+
+    assert e.value.messages == expected.value.messages
+
+
+def test_compiled_schema_load_many_fails_as_schema(
+    activity_event_as_request_payload: dict,
+) -> None:
+    payload: list[dict] = [
+        activity_event_as_request_payload,
+        activity_event_as_request_payload | {"amount": "ten"},
+    ]
+
+    with pytest.raises(ValidationError) as e:
+        compile_schema(ActivityEventSchema).load(payload, many=True)
+
+    assert e.value.messages == {1: {"amount": ["Not a valid number."]}}
+
+
+@pytest.mark.parametrize(
+    "alert_response",
+    [
+        pytest.param(
+            AlertResponseDomain(alert=True, alert_codes=[30, 123], user_id=1),
+            id="domain",
+        ),
+        pytest.param(
+            {"alert": False, "alert_codes": [], "user_id": 1}, id="dictionary"
+        ),
+        pytest.param({"alert": 1, "alert_codes": (30,), "user_id": 1}, id="fallback"),
+        pytest.param({"alert": True, "user_id": 1}, id="missing_alert_codes"),
+    ],
+)
+def test_compiled_schema_dump_matches_schema(alert_response: object) -> None:
+    expected: dict = AlertResponseSchema().dump(alert_response)
+
+    assert compile_schema(AlertResponseSchema).dump(alert_response) == expected
+    assert compile_schema(AlertResponseSchema).dump([alert_response], many=True) == [
+        expected
+    ]
+
+
+def test_compiled_schema_dump_of_activity_event(
+    activity_event_as_domain: ActivityEventDomain,
+    activity_event_as_request_payload: dict,
+) -> None:
+    assert compile_schema(ActivityEventSchema).dump(activity_event_as_domain) == (
+        activity_event_as_request_payload
+    )
@@ -0,0 +1,162 @@
+import pytest
+from freezegun import freeze_time
+
+from app import db
+from app.events.domains import ActivityEventHistoryDomain, ActivityEventRecordDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import ActivityEvent, UserAlertState
+from app.events.state import (
+    apply_activity_event_to_user_alert_state,
+    build_user_alert_state,
+    compare_user_alert_state,
+    get_activity_event_history_from_user_alert_state,
+)
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+
+@pytest.fixture
+def ordered_activity_events_as_model() -> list[ActivityEvent]:
+    return [
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=10_00,
+            event_received_at=1577836700,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=20_00,
+            event_received_at=1577836780,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=30_00,
+            event_received_at=1577836790,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            amount=40_00,
+            event_received_at=1577836795,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=50_00,
+            event_received_at=1577836798,
+        ),
+        ActivityEventFactory(
+            is_default_user=True,
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            amount=60_00,
+            event_received_at=1577836799,
+        ),
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_build_user_alert_state(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=ordered_activity_events_as_model)
+
+    user_alert_state: UserAlertState = build_user_alert_state(user_id=1)
+
+    assert user_alert_state.consecutive_withdraw_count == 2
+    assert user_alert_state.recent_deposit_amounts == [
+        40_00,
+        20_00,
+    ]
+    assert user_alert_state.recent_deposit_received_at == [1577836795, 1577836780]
+    assert user_alert_state.window_deposit_amounts == [
+        40_00,
+        20_00,
+    ]
+    assert user_alert_state.window_deposit_total == 60_00
+    assert user_alert_state.last_event_received_at == 1577836799
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_build_user_alert_state_without_activity_events() -> None:
+    user_alert_state: UserAlertState = build_user_alert_state(user_id=1)
+
+    assert user_alert_state.consecutive_withdraw_count == 0
+    assert user_alert_state.recent_deposit_amounts == []
+    assert user_alert_state.window_deposit_total == 0
+    assert user_alert_state.last_event_received_at is None
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_apply_activity_event_to_user_alert_state_matches_build(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    user_alert_state: UserAlertState = build_user_alert_state(user_id=1)
+
+    for activity_event in ordered_activity_events_as_model:
+        apply_activity_event_to_user_alert_state(
+            user_alert_state=user_alert_state, activity_event=activity_event
+        )
+        db.save(model=activity_event)
+
+        assert (
+            compare_user_alert_state(
+                user_alert_state=user_alert_state,
+                built_user_alert_state=build_user_alert_state(user_id=1),
+            )
+            == []
+        )
+
+
+def test_get_activity_event_history_from_user_alert_state_excludes_expired_deposits() -> (
+    None
+):
+    user_alert_state = UserAlertState(
+        user_id=1,
+        consecutive_withdraw_count=1,
+        recent_deposit_amounts=[40_00, 20_00],
+        recent_deposit_received_at=[1577836795, 1577836700],
+        window_deposit_amounts=[40_00, 20_00],
+        window_deposit_received_at=[1577836795, 1577836700],
+        window_deposit_total=60_00,
+        last_event_received_at=1577836799,
+    )
+
+    assert get_activity_event_history_from_user_alert_state(
+        user_alert_state=user_alert_state, event_received_at=1577836800
+    ) == ActivityEventHistoryDomain(
+        recent_activity_events=[],
+        recent_deposit_events=[
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=40_00,
+                event_received_at=1577836795,
+            ),
+            ActivityEventRecordDomain(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                amount=20_00,
+                event_received_at=1577836700,
+            ),
+        ],
+        amount_deposited_within_window=40_00,
+        consecutive_withdraw_count=1,
+    )
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+def test_compare_user_alert_state_reports_mismatches(
+    ordered_activity_events_as_model: list[ActivityEvent],
+) -> None:
+    db.save_all(models=ordered_activity_events_as_model)
+    user_alert_state: UserAlertState = build_user_alert_state(user_id=1)
+    user_alert_state.consecutive_withdraw_count = 0
+
+    assert compare_user_alert_state(
+        user_alert_state=user_alert_state,
+        built_user_alert_state=build_user_alert_state(user_id=1),
+    ) == ["consecutive_withdraw_count"]
+    assert compare_user_alert_state(
+        user_alert_state=None,
+        built_user_alert_state=build_user_alert_state(user_id=1),
+    ) == ["user_alert_state"]
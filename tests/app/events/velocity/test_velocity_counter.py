@@ -0,0 +1,216 @@
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app import db
+from app.events.enums import ActivityEventTypeEnum
+from app.events.queries import rebuild_velocity_buckets
+from app.events.velocity import (
+    VELOCITY_ALERT_CODES,
+    VelocityCounter,
+    get_velocity_counter,
+    get_velocity_granularity,
+    save_activity_events_to_velocity_counters,
+)
+from lib.money import Cents
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    from app.events.models import ActivityEvent
+
+
+def _build_velocity_counter(
+    activity_events: list[tuple[ActivityEventTypeEnum, int, Cents]],
+) -> VelocityCounter:
+    velocity_counter = VelocityCounter()
+
+    for transaction_type, event_received_at, amount in activity_events:
+        velocity_counter.add(
+            transaction_type=transaction_type,
+            event_received_at=event_received_at,
+            amount=amount,
+        )
+
+    return velocity_counter
+
+
+@pytest.mark.parametrize(
+    ("window", "expected"),
+    [
+        pytest.param(30, 1, id="30_seconds"),
+        pytest.param(300, 60, id="5_minutes"),
+        pytest.param(3_600, 60, id="1_hour"),
+        pytest.param(86_400, 3_600, id="24_hours"),
+    ],
+)
+def test_get_velocity_granularity(window: int, expected: int) -> None:
+    assert get_velocity_granularity(window=window) == expected
+
+
+def test_get_velocity_granularity_beyond_every_ring() -> None:
+    with pytest.raises(ValueError, match="cannot be counted"):
+        get_velocity_granularity(window=86_400 * 7)
+
+
+@pytest.mark.parametrize(
+    ("event_received_at", "window", "expected"),
+    [
+        pytest.param(1577836830, 30, 60_00, id="seconds_ring"),
+        pytest.param(1577836831, 30, 50_00, id="seconds_ring_moved"),
+        pytest.param(1577836830, 300, 160_00, id="minutes_ring"),
+        # The window starts at 1577836500, the start of the minute of 1577836559
+        pytest.param(1577836859, 300, 160_00, id="minutes_ring_aligned"),
+        pytest.param(1577923200, 86_400, 60_00, id="hours_ring"),
+        # The window starts at 1577833200, the start of the hour of 1577836799
+        pytest.param(1577923199, 86_400, 160_00, id="hours_ring_aligned"),
+        pytest.param(1577926800, 86_400, 0, id="hours_ring_moved"),
+    ],
+)
+def test_velocity_counter_get_total(
+    event_received_at: int, window: int, expected: Cents
+) -> None:
+    velocity_counter: VelocityCounter = _build_velocity_counter(
+        [
+            (ActivityEventTypeEnum.WITHDRAW, 1577836500, 100_00),
+            (ActivityEventTypeEnum.DEPOSIT, 1577836790, 25_00),
+            (ActivityEventTypeEnum.WITHDRAW, 1577836800, 10_00),
+            (ActivityEventTypeEnum.WITHDRAW, 1577836830, 50_00),
+        ]
+    )
+
+    assert (
+        velocity_counter.get_total(
+            transaction_type=ActivityEventTypeEnum.WITHDRAW,
+            event_received_at=event_received_at,
+            window=window,
+        )
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "window",
+    [
+        pytest.param(window, id=f"{transaction_type}_{window}")
+        for transaction_type, codes in VELOCITY_ALERT_CODES.items()
+        for window in codes
+    ],
+)
+def test_velocity_counter_get_total_includes_at_most_a_bucket_before_the_window(
+    window: int,
+) -> None:
+    granularity: int = get_velocity_granularity(window=window)
+    # The start of an hour, so it is the start of a bucket of every granularity
+    velocity_counter: VelocityCounter = _build_velocity_counter(
+        [(ActivityEventTypeEnum.DEPOSIT, 1577836800, 10_00)]
+    )
+
+    def get_total(event_received_at: int) -> Cents:
+        return velocity_counter.get_total(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            event_received_at=event_received_at,
+            window=window,
+        )
+
+    assert get_total(1577836800 + window) == 10_00
+    assert get_total(1577836800 + window + granularity - 1) == 10_00
+    assert get_total(1577836800 + window + granularity) == 0
+
+
+def test_velocity_counter_replaces_buckets_once_the_ring_wraps() -> None:
+    velocity_counter: VelocityCounter = _build_velocity_counter(
+        [
+            (ActivityEventTypeEnum.DEPOSIT, 1577836800, 10_00),
+            (ActivityEventTypeEnum.DEPOSIT, 1577836864, 20_00),
+            # The bucket of this event has already been replaced, so it is discarded
+            (ActivityEventTypeEnum.DEPOSIT, 1577836800, 30_00),
+        ]
+    )
+
+    assert (
+        velocity_counter.get_total(
+            transaction_type=ActivityEventTypeEnum.DEPOSIT,
+            event_received_at=1577836864,
+            window=30,
+        )
+        == 20_00
+    )
+    assert len(velocity_counter.buckets) == 1 + 2 + 1
+
+
+def test_save_activity_events_to_velocity_counters() -> None:
+    first_activity_events: list[ActivityEvent] = [
+        ActivityEventFactory(
+            user_id=user_id, is_deposit=True, event_received_at=1577836800
+        )
+        for user_id in (1, 1, 2)
+    ]
+    second_activity_events: list[ActivityEvent] = [
+        ActivityEventFactory(
+            user_id=user_id, is_deposit=True, event_received_at=1577836810
+        )
+        for user_id in (1, 2, 3)
+    ]
+
+    first_velocity_counters: dict[int, VelocityCounter] = (
+        save_activity_events_to_velocity_counters(activity_events=first_activity_events)
+    )
+    second_velocity_counters: dict[int, VelocityCounter] = (
+        save_activity_events_to_velocity_counters(
+            activity_events=second_activity_events
+        )
+    )
+
+    def get_totals(velocity_counters: dict[int, VelocityCounter]) -> dict[int, Cents]:
+        return {
+            user_id: velocity_counter.get_total(
+                transaction_type=ActivityEventTypeEnum.DEPOSIT,
+                event_received_at=1577836810,
+                window=300,
+            )
+            for user_id, velocity_counter in velocity_counters.items()
+        }
+
+    # Each counter is retrieved as it was before the events were added
+    assert get_totals(first_velocity_counters) == {1: 0, 2: 0}
+    assert get_totals(second_velocity_counters) == {
+        1: 200_00,
+        2: 100_00,
+        3: 0,
+    }
+    assert get_totals(
+        {
+            user_id: get_velocity_counter(user_id=user_id, event_received_at=1577836810)
+            for user_id in (1, 2, 3)
+        }
+    ) == {1: 300_00, 2: 200_00, 3: 100_00}
+
+
+def test_rebuild_velocity_buckets_matches_saved_buckets() -> None:
+    activity_events: list[ActivityEvent] = [
+        ActivityEventFactory(
+            user_id=index % 2 + 1,
+            is_deposit=index % 3 != 0,
+            is_withdraw=index % 3 == 0,
+            event_received_at=1577836800 + index * 45,
+        )
+        for index in range(200)
+    ]
+
+    for activity_event in activity_events:
+        save_activity_events_to_velocity_counters(activity_events=[activity_event])
+    saved_velocity_counters: dict[int, VelocityCounter] = {
+        user_id: get_velocity_counter(user_id=user_id, event_received_at=1577836800)
+        for user_id in (1, 2)
+    }
+
+    db.save_all(models=activity_events)
+    rebuild_velocity_buckets(user_ids=[1, 2])
+
+    for user_id, saved_velocity_counter in saved_velocity_counters.items():
+        rebuilt_velocity_counter: VelocityCounter = get_velocity_counter(
+            user_id=user_id, event_received_at=1577836800
+        )
+        assert set(rebuilt_velocity_counter.buckets) == set(
+            saved_velocity_counter.buckets
+        )
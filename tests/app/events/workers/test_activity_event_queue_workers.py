@@ -0,0 +1,205 @@
+import threading
+from collections.abc import Generator
+from dataclasses import asdict
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from freezegun import freeze_time
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app import db
+from app.datastores import SQLAlchemy
+from app.events import workers
+from app.events.constants import MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS
+from app.events.controllers import (
+    process_queued_activity_events,
+    save_activity_event_and_check_alerts,
+)
+from app.events.domains import ActivityEventDomain, AlertResponseDomain
+from app.events.enums import ActivityEventTypeEnum
+from app.events.models import (
+    ActivityEvent,
+    ActivityEventAlert,
+    QueuedActivityEvent,
+    UserAlertState,
+    UserVelocityBucket,
+)
+from app.events.queries import save_velocity_buckets
+from app.events.velocity import get_added_velocity_buckets
+from app.events.workers import ActivityEventQueueWorkerPool, drain_activity_event_queue
+from lib.types import BIGINT_MAX
+from tests.factories.activity_event_factory import ActivityEventFactory
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection
+    from werkzeug.test import TestResponse
+
+
+@pytest.fixture
+def _rollback_to_savepoint_session(db: SQLAlchemy) -> Generator[None]:
+    """
+    Replaces the session of the test with one whose commits and rollbacks release and
+    roll back a savepoint, so a rollback only discards what was written since the last
+    commit rather than the whole test.
+    """
+    test_session: scoped_session = db.session
+    connection: Connection = db.engine.connect()
+    connection.begin()
+    db.session = scoped_session(
+        sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
+    )
+
+    yield
+
+    db.session.remove()
+    db.session = test_session
+    connection.close()
+
+
+def _build_activity_events() -> list[ActivityEventDomain]:
+    return [
+        ActivityEventDomain(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            event_received_at=event_received_at,
+        )
+        for user_id, transaction_type, amount, event_received_at in [
+            (1, ActivityEventTypeEnum.DEPOSIT, 50_00, 1577836780),
+            (2, ActivityEventTypeEnum.WITHDRAW, 120_00, 1577836781),
+            (1, ActivityEventTypeEnum.DEPOSIT, 60_00, 1577836782),
+            (2, ActivityEventTypeEnum.WITHDRAW, 20_00, 1577836783),
+            (1, ActivityEventTypeEnum.DEPOSIT, 70_00, 1577836784),
+            (2, ActivityEventTypeEnum.WITHDRAW, 30_00, 1577836785),
+            (1, ActivityEventTypeEnum.DEPOSIT, 80_00, 1577836786),
+        ]
+    ]
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+def test_process_queued_activity_events_matches_single_events(batch_size: int) -> None:
+    expected: list[AlertResponseDomain] = [
+        save_activity_event_and_check_alerts(
+            activity_event=ActivityEvent(**asdict(activity_event))
+        )
+        for activity_event in _build_activity_events()
+    ]
+    db.session.execute(ActivityEvent.__table__.delete())
+    db.session.execute(UserAlertState.__table__.delete())
+    db.session.execute(UserVelocityBucket.__table__.delete())
+
+    queued_activity_events: list[QueuedActivityEvent] = db.save_all(
+        models=[
+            QueuedActivityEvent(**asdict(activity_event))
+            for activity_event in _build_activity_events()
+        ]
+    )
+    queued_activity_event_ids = [event.id for event in queued_activity_events]
+
+    assert drain_activity_event_queue(batch_size=batch_size) == len(expected)
+
+    assert QueuedActivityEvent.query.count() == 0
+    assert ActivityEvent.query.count() == len(expected)
+    assert [
+        sorted(db.session.get_one(ActivityEventAlert, event_id).alert_codes)
+        for event_id in queued_activity_event_ids
+    ] == [sorted(alert_response.alert_codes) for alert_response in expected]
+    assert any(alert_response.alert for alert_response in expected)
+
+
+@freeze_time("2020-01-01T00:00:00+00:00")
+@pytest.mark.usefixtures("_rollback_to_savepoint_session")
+def test_process_queued_activity_events_when_an_event_always_fails(
+    client: FlaskClient,
+) -> None:
+    # The velocity bucket of the second user is full, so adding to it always overflows
+    save_velocity_buckets(
+        velocity_buckets=get_added_velocity_buckets(
+            [
+                ActivityEventFactory(
+                    user_id=2,
+                    is_withdraw=True,
+                    amount=BIGINT_MAX,
+                    event_received_at=1577836781,
+                )
+            ]
+        ),
+        event_received_at=1577836781,
+    )
+    queued_activity_events: list[QueuedActivityEvent] = db.save_all(
+        models=[
+            QueuedActivityEvent(**asdict(activity_event))
+            for activity_event in _build_activity_events()[:3]
+        ]
+    )
+    first_event_id, failing_event_id, third_event_id = (
+        queued_activity_event.id for queued_activity_event in queued_activity_events
+    )
+
+    assert process_queued_activity_events(batch_size=100) == 3
+
+    # The other events are evaluated by themselves once the batch fails
+    assert {
+        activity_event_alert.activity_event_id
+        for activity_event_alert in ActivityEventAlert.query.all()
+    } == {first_event_id, third_event_id}
+    assert db.session.get_one(QueuedActivityEvent, failing_event_id).attempts == 1
+
+    response: TestResponse = client.get(f"/event/{failing_event_id}/alerts")
+    assert response.status_code == HTTPStatus.ACCEPTED
+
+    assert drain_activity_event_queue(batch_size=100) == (
+        MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS - 1
+    )
+
+    failed_activity_event: QueuedActivityEvent = db.session.get_one(
+        QueuedActivityEvent, failing_event_id
+    )
+    db.session.refresh(failed_activity_event)
+    assert failed_activity_event.attempts == MAX_QUEUED_ACTIVITY_EVENT_ATTEMPTS
+    assert failed_activity_event.failed_at is not None
+    assert process_queued_activity_events(batch_size=100) == 0
+
+    response = client.get(f"/event/{failing_event_id}/alerts")
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json == {"id": str(failing_event_id), "status": "failed"}
+
+
+def test_process_queued_activity_events_when_queue_is_empty() -> None:
+    assert process_queued_activity_events(batch_size=10) == 0
+
+
+def test_activity_event_queue_worker_pool(
+    app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Each worker drains a full batch, then polls once the batch comes back short
+    batches: list[int] = [2, 2, 1, 0]
+    drained = threading.Event()
+    lock = threading.Lock()
+
+    def process(batch_size: int) -> int:
+        assert batch_size == 2
+        with lock:
+            if not batches:
+                drained.set()
+                return 0
+            return batches.pop(0)
+
+    monkeypatch.setattr(workers, "process_queued_activity_events", process)
+
+    pool = ActivityEventQueueWorkerPool(
+        app=app, concurrency=2, batch_size=2, poll_interval=0.01
+    )
+    pool.start()
+
+    assert drained.wait(timeout=5)
+
+    pool.stop()
+    pool.join(timeout=5)
+
+    assert pool.wait(timeout=0)
+    assert batches == []
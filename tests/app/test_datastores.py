@@ -0,0 +1,74 @@
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import structlog
+from flask.testing import FlaskClient
+
+from app import datastores, db
+from app.events.models import ActivityEvent
+
+if TYPE_CHECKING:
+    from werkzeug.test import TestResponse
+
+ACTIVITY_EVENT: dict[str, Any] = {
+    "type": "withdraw",
+    "amount": "150.00",
+    "user_id": 1,
+    "t": 0,
+}
+
+
+class _WarningLogger:
+    def __init__(self) -> None:
+        self.records: list[tuple[str, dict[str, Any]]] = []
+
+    def warning(self, event: str, **kwargs: Any) -> None:
+        self.records.append((event, kwargs))
+
+
+def test_request_binds_query_stats_to_the_request_log(client: FlaskClient) -> None:
+    response: TestResponse = client.post("/event", json=ACTIVITY_EVENT)
+    assert response.status_code == HTTPStatus.CREATED
+
+    log_context: dict[str, Any] = structlog.contextvars.get_contextvars()
+    assert log_context["query_count"] == 2
+    assert log_context["db_time"] > 0
+
+
+def test_record_statements_records_call_sites() -> None:
+    with db.record_statements() as statements:
+        ActivityEvent.query.count()
+
+    [statement] = statements
+    assert statement.statement.startswith("SELECT count(*)")
+    assert statement.rowcount == 1
+    assert statement.duration > 0
+    assert statement.call_site.startswith("tests/app/test_datastores.py:")
+    assert statement.call_site.endswith(" in test_record_statements_records_call_sites")
+
+
+def test_slow_statements_are_logged(monkeypatch: pytest.MonkeyPatch) -> None:
+    warning_logger = _WarningLogger()
+    monkeypatch.setattr(datastores, "log", warning_logger)
+    monkeypatch.setattr(db, "slow_query_threshold", 0)
+
+    ActivityEvent.query.count()
+
+    [(event, log_attrs)] = warning_logger.records
+    assert event == "slow statement"
+    assert log_attrs["statement"].startswith("SELECT count(*)")
+    assert log_attrs["rowcount"] == 1
+    assert log_attrs["call_site"].endswith(" in test_slow_statements_are_logged")
+
+
+def test_statements_below_the_threshold_are_not_logged(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    warning_logger = _WarningLogger()
+    monkeypatch.setattr(datastores, "log", warning_logger)
+    monkeypatch.setattr(db, "slow_query_threshold", 60)
+
+    ActivityEvent.query.count()
+
+    assert warning_logger.records == []
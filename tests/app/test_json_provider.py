@@ -0,0 +1,78 @@
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+from flask import Flask, jsonify
+from flask.testing import FlaskClient
+
+from app.events.enums import ActivityEventTypeEnum, AlertCodeEnum
+from lib.json import UJSONProvider
+
+if TYPE_CHECKING:
+    from werkzeug.test import TestResponse
+
+
+@dataclass
+class _Alert:
+    code: AlertCodeEnum
+    received_at: datetime
+
+
+def test_app_uses_ujson_provider(app: Flask) -> None:
+    assert isinstance(app.json, UJSONProvider)
+
+
+def test_jsonify_encodes_objects() -> None:
+    event_id: uuid.UUID = uuid.UUID("01890a5d-ac96-774b-bcce-b302099a8057")
+
+    response = jsonify(
+        {
+            "id": event_id,
+            "type": ActivityEventTypeEnum.DEPOSIT,
+            "amount": Decimal("1.5"),
+            "alerts": [
+                _Alert(
+                    code=AlertCodeEnum.CONSECUTIVE_DEPOSIT_CODE,
+                    received_at=datetime(2020, 1, 1, tzinfo=UTC),
+                )
+            ],
+            "note": "café/ü",
+        }
+    )
+
+    assert response.mimetype == "application/json"
+    assert response.get_data(as_text=True) == (
+        '{"id":"01890a5d-ac96-774b-bcce-b302099a8057","type":1,"amount":1.5,'
+        '"alerts":[{"code":300,"received_at":"Wed, 01 Jan 2020 00:00:00 GMT"}],'
+        '"note":"café/ü"}'
+    )
+
+
+def test_jsonify_fails_on_unknown_object() -> None:
+    with pytest.raises(
+        TypeError, match="Object of type object is not JSON serializable"
+    ):
+        jsonify({"value": object()})
+
+
+def test_request_json_is_decoded(app: Flask) -> None:
+    with app.test_request_context(
+        "/event",
+        method="POST",
+        data=b'{"amount": "1.50", "t": 1}',
+        content_type="application/json",
+    ) as context:
+        assert context.request.json == {"amount": "1.50", "t": 1}
+
+
+def test_invalid_request_json_is_rejected(client: FlaskClient) -> None:
+    response: TestResponse = client.post(
+        "/event", data="{", headers={"Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 400
+    assert response.json is not None
+    assert response.json["code"] == 400
@@ -0,0 +1,177 @@
+import io
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from flask import Flask, Response
+from flask.testing import FlaskClient
+
+from lib import logging as request_logging
+
+if TYPE_CHECKING:
+    from werkzeug.test import TestResponse
+
+ACTIVITY_EVENT: dict[str, Any] = {
+    "type": "deposit",
+    "amount": "-100.00",
+    "user_id": 1,
+    "t": 0,
+}
+
+
+class _RecordingLogger:
+    def __init__(self, level: int) -> None:
+        self.level: int = level
+        self.records: list[tuple[int, str, dict[str, Any]]] = []
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level
+
+    def info(self, event: str, **kwargs: Any) -> None:
+        self.records.append((logging.INFO, event, kwargs))
+
+    def error(self, event: str, **kwargs: Any) -> None:
+        self.records.append((logging.ERROR, event, kwargs))
+
+
+@pytest.fixture
+def recording_logger(monkeypatch: pytest.MonkeyPatch) -> _RecordingLogger:
+    recording_logger = _RecordingLogger(level=logging.INFO)
+    monkeypatch.setattr(request_logging, "log", recording_logger)
+
+    return recording_logger
+
+
+def test_log_inbound_request_logs_bodies(
+    app: Flask, client: FlaskClient, recording_logger: _RecordingLogger
+) -> None:
+    response: TestResponse = client.post("/event", json=ACTIVITY_EVENT)
+
+    [(level, event, log_attrs)] = recording_logger.records
+    assert (level, event) == (logging.INFO, "received request")
+    assert log_attrs["status"] == 400
+    assert log_attrs["request_body"] == app.json.dumps(ACTIVITY_EVENT)
+    assert log_attrs["response_body"] == response.get_data(as_text=True)
+    assert "request_body_size" not in log_attrs
+
+
+def test_log_inbound_request_truncates_bodies(
+    app: Flask,
+    client: FlaskClient,
+    recording_logger: _RecordingLogger,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setitem(app.config, "LOG_BODY_MAX_SIZE", 10)
+
+    response: TestResponse = client.post("/event", data="é" * 20 + "e")
+
+    [(_, _, log_attrs)] = recording_logger.records
+    assert log_attrs["request_body"] == "é" * 5 + "..."
+    assert log_attrs["request_body_size"] == 41
+    assert log_attrs["response_body"] == response.get_data(as_text=True)[:10] + "..."
+    assert log_attrs["response_body_size"] == len(response.get_data())
+
+
+def test_log_inbound_request_skips_dropped_records(
+    client: FlaskClient, recording_logger: _RecordingLogger
+) -> None:
+    recording_logger.level = logging.ERROR
+
+    client.post("/event", json=ACTIVITY_EVENT)
+
+    assert recording_logger.records == []
+
+
+@pytest.mark.parametrize(
+    ("random_value", "status", "expected"),
+    [
+        pytest.param(0.25, 200, [{"status": 200, "sample_rate": 0.5}], id="sampled"),
+        pytest.param(0.75, 200, [], id="dropped"),
+        pytest.param(0.75, 404, [{"status": 404}], id="failed"),
+    ],
+)
+def test_log_inbound_request_samples_successful_requests(
+    app: Flask,
+    recording_logger: _RecordingLogger,
+    monkeypatch: pytest.MonkeyPatch,
+    random_value: float,
+    status: int,
+    expected: list[dict[str, Any]],
+) -> None:
+    monkeypatch.setitem(app.config, "LOG_SAMPLE_RATE", 0.5)
+    monkeypatch.setattr(request_logging.random, "random", lambda: random_value)
+
+    with app.test_request_context("/event"):
+        request_logging.log_inbound_request(Response("{}", status=status))
+
+    assert [
+        {key: log_attrs[key] for key in ("status", "sample_rate") if key in log_attrs}
+        for _, _, log_attrs in recording_logger.records
+    ] == expected
+
+
+def _build_record(level: int, message: str) -> logging.LogRecord:
+    return logging.makeLogRecord({"levelno": level, "msg": message})
+
+
+def _drain(record_queue: queue.Queue[logging.LogRecord]) -> list[str]:
+    messages: list[str] = []
+    while not record_queue.empty():
+        messages.append(record_queue.get_nowait().getMessage())
+
+    return messages
+
+
+def test_dropping_queue_handler_drops_records_once_full() -> None:
+    record_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+    handler = request_logging.DroppingQueueHandler(record_queue=record_queue)
+
+    for message in ("first", "second", "third"):
+        handler.handle(_build_record(logging.INFO, message))
+
+    assert handler.dropped == 1
+    assert _drain(record_queue) == ["first", "second"]
+
+    handler.handle(_build_record(logging.INFO, "fourth"))
+
+    assert handler.dropped == 0
+    assert _drain(record_queue) == ["dropped 1 log records", "fourth"]
+
+
+def test_dropping_queue_handler_waits_to_queue_errors() -> None:
+    record_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=1)
+    handler = request_logging.DroppingQueueHandler(record_queue=record_queue)
+    handler.handle(_build_record(logging.INFO, "first"))
+
+    consumer = threading.Timer(0.05, record_queue.get)
+    consumer.start()
+    handler.handle(_build_record(logging.ERROR, "error"))
+    consumer.join()
+
+    assert handler.dropped == 0
+    assert _drain(record_queue) == ["error"]
+
+
+def test_stop_log_listener_writes_queued_records() -> None:
+    stream = io.StringIO()
+    logger: logging.Logger = logging.getLogger("tests.app.test_logging")
+    logger.propagate = False
+    handler: request_logging.DroppingQueueHandler = request_logging.start_log_listener(
+        stream=stream,
+        renderer=request_logging.get_renderer("json"),
+        queue_size=100,
+    )
+    logger.addHandler(handler)
+
+    try:
+        for index in range(50):
+            logger.warning("queued record %s", index)
+    finally:
+        request_logging.stop_log_listener()
+        logger.removeHandler(handler)
+
+    lines: list[str] = stream.getvalue().splitlines()
+    assert len(lines) == 50
+    assert lines[-1].startswith('{"event":"queued record 49","logger":"tests.app.')
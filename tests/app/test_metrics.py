@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+import pytest
+from flask.testing import FlaskClient
+
+from app import db
+from app.events.enums import AlertCodeEnum
+from lib.metrics import (
+    CONTENT_TYPE,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    mark_process_dead,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from werkzeug.test import TestResponse
+
+
+def _read_samples(exposition: str) -> dict[str, float]:
+    return {
+        sample: float(value)
+        for line in exposition.splitlines()
+        if not line.startswith("#")
+        for sample, _, value in (line.rpartition(" "),)
+    }
+
+
+def _get_metrics(client: FlaskClient) -> dict[str, float]:
+    response: TestResponse = client.get("/metrics")
+    assert response.status_code == HTTPStatus.OK
+    assert response.content_type == CONTENT_TYPE
+
+    return _read_samples(response.get_data(as_text=True))
+
+
+def _increment_in_child_process(counter: Counter, gauge: Gauge) -> None:
+    counter.inc(amount=2)
+    gauge.inc()
+
+
+def test_get_metrics_exposes_requests_and_alert_rules(client: FlaskClient) -> None:
+    withdraw_limit_code: str = AlertCodeEnum.WITHDRAWN_LIMIT_EXCEEDED_CODE.name
+    request_count: str = (
+        'http_request_duration_seconds_count{method="POST",route="/event",status="201"}'
+    )
+    query_count: str = 'http_request_queries_count{method="POST",route="/event"}'
+    rule_count: str = (
+        f'alert_rule_evaluation_duration_seconds_count{{code="{withdraw_limit_code}"}}'
+    )
+    rule_hits: str = f'alert_rule_hits_total{{code="{withdraw_limit_code}"}}'
+    before: dict[str, float] = _get_metrics(client=client)
+
+    response: TestResponse = client.post(
+        "/event", json={"type": "withdraw", "amount": "150.00", "user_id": 1, "t": 0}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+    after: dict[str, float] = _get_metrics(client=client)
+    assert after[request_count] == before.get(request_count, 0) + 1
+    assert after[query_count] == before.get(query_count, 0) + 1
+    assert after['http_request_queries_sum{method="POST",route="/event"}'] > 0
+    assert after[rule_count] == before.get(rule_count, 0) + 1
+    assert after[rule_hits] == before.get(rule_hits, 0) + 1
+    # The request for the metrics is itself in flight
+    assert after["http_requests_in_flight"] == 1
+
+
+def test_get_metrics_exposes_db_pool_checkout_wait(client: FlaskClient) -> None:
+    before: dict[str, float] = _get_metrics(client=client)
+
+    with db.engine.connect():
+        pass
+
+    after: dict[str, float] = _get_metrics(client=client)
+    assert (
+        after["db_pool_checkout_wait_seconds_count"]
+        == before["db_pool_checkout_wait_seconds_count"] + 1
+    )
+
+
+def test_histogram_exposes_cumulative_buckets() -> None:
+    registry = MetricsRegistry()
+    histogram = Histogram(
+        name="latency_seconds",
+        documentation="Latency.",
+        registry=registry,
+        labelnames=("route",),
+        buckets=(0.1, 1),
+    )
+
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.labels('/"quoted"').observe(value)
+
+    assert registry.generate().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        r'latency_seconds_bucket{route="/\"quoted\"",le="0.1"} 2',
+        r'latency_seconds_bucket{route="/\"quoted\"",le="1"} 3',
+        r'latency_seconds_bucket{route="/\"quoted\"",le="+Inf"} 4',
+        r'latency_seconds_sum{route="/\"quoted\""} 2.65',
+        r'latency_seconds_count{route="/\"quoted\""} 4',
+    ]
+
+
+def test_labels_requires_every_label() -> None:
+    counter = Counter(
+        name="hits_total",
+        documentation="Hits.",
+        registry=MetricsRegistry(),
+        labelnames=("code",),
+    )
+
+    with pytest.raises(ValueError, match="labelled by code"):
+        counter.labels()
+
+
+def test_metrics_are_summed_across_processes(tmp_path: "Path") -> None:
+    registry = MetricsRegistry()
+    registry.configure(directory=tmp_path)
+    counter = Counter(name="events_total", documentation="Events.", registry=registry)
+    gauge = Gauge(name="workers", documentation="Workers.", registry=registry)
+
+    counter.inc()
+    gauge.inc()
+
+    process = multiprocessing.get_context("fork").Process(
+        target=_increment_in_child_process, args=(counter, gauge)
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert process.pid is not None
+
+    samples: dict[str, float] = _read_samples(registry.generate())
+    assert samples["events_total"] == 3
+    assert samples["workers"] == 2
+
+    # Only the gauges of live processes are summed
+    mark_process_dead(pid=process.pid, directory=tmp_path)
+
+    samples = _read_samples(registry.generate())
+    assert samples["events_total"] == 3
+    assert samples["workers"] == 1
+
+
+def test_metrics_are_carried_on_by_a_process_with_the_same_id(
+    tmp_path: "Path",
+) -> None:
+    registry = MetricsRegistry()
+    registry.configure(directory=tmp_path)
+    counter = Counter(
+        name="events_total",
+        documentation="Events.",
+        registry=registry,
+        labelnames=("user_id",),
+    )
+
+    # Enough samples for the file of the process to outgrow its initial size
+    for user_id in range(2_000):
+        counter.labels(str(user_id)).inc()
+    assert (tmp_path / f"counter_{os.getpid()}.db").stat().st_size > 64 * 1_024
+
+    registry.configure(directory=tmp_path)
+    counter.labels("0").inc()
+
+    samples: dict[str, float] = _read_samples(registry.generate())
+    assert len(samples) == 2_000
+    assert samples['events_total{user_id="0"}'] == 2
+    assert samples['events_total{user_id="1999"}'] == 1
@@ -1,4 +1,5 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterator
+from contextlib import AbstractContextManager, contextmanager
 
 import pytest
 from flask import Flask
@@ -8,6 +9,7 @@ from werkzeug.test import Client
 from app import create_app
 from app.datastores import (
     SQLAlchemy,
+    StatementRecord,
     db as _db,
 )
 
@@ -59,3 +61,33 @@ def _session(db: SQLAlchemy) -> Generator[None]:
 
     session.rollback()
     connection.close()
+
+
+@pytest.fixture
+def query_budget(
+    db: SQLAlchemy,
+) -> Callable[[int], AbstractContextManager[list[StatementRecord]]]:
+    """
+    Asserts at most `max_statements` statements are executed within a block, listing each
+    statement executed and its call site when the budget is exceeded.
+
+    Usage:
+        with query_budget(max_statements=3):
+            client.post("/event", json=payload)
+    """
+
+    @contextmanager
+    def assert_query_budget(max_statements: int) -> Iterator[list[StatementRecord]]:
+        with db.record_statements() as statements:
+            yield statements
+
+        assert len(statements) <= max_statements, (
+            f"{len(statements)} statements executed, above the budget of "
+            f"{max_statements}:\n"
+            + "\n".join(
+                f"{statement.call_site}: {statement.statement}"
+                for statement in statements
+            )
+        )
+
+    return assert_query_budget
@@ -1,5 +1,4 @@
 from datetime import UTC, datetime
-from decimal import Decimal
 from uuid import uuid4
 
 import factory
@@ -42,10 +41,10 @@ class ActivityEventFactory(SQLAlchemyModelFactory):
 
         is_deposit = factory.Trait(
             transaction_type=ActivityEventTypeEnum.DEPOSIT,
-            amount=Decimal("100.00"),
+            amount=100_00,
         )
 
         is_withdraw = factory.Trait(
             transaction_type=ActivityEventTypeEnum.WITHDRAW,
-            amount=Decimal("100.00"),
+            amount=100_00,
         )